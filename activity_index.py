@@ -0,0 +1,469 @@
+"""Module of a sidecar index of practice sets' offsets by activity.
+
+The index of an uncompressed journal maps each activity key to the byte
+offsets of its practice sets' records, so evaluating one activity seeks
+straight to its k records rather than reading the whole journal.
+
+The index is optional, it's only made the first time an activity is
+looked up. After that it's kept up to date on each lookup, by indexing
+only the records appended to the journal since, the same way as the
+evaluation cache. A journal that was rewritten rather than appended to
+has its index rebuilt.
+
+The index file holds, in order:
+    A header of the journal it was made from, and of its sections.
+    A JSON table of each activity key's start and count in the offsets.
+    The offsets, as native int64s, grouped by activity key.
+    A tail of entries appended since the groups were last rewritten,
+        each an offset, the length of its activity key and the key.
+Appending writes to the tail, then rewrites the header in place, so an
+interrupted append leaves the index as it was. Once the tail is over
+_MAX_TAIL_SIZE, it's folded into the groups by rewriting the index.
+"""
+
+import array
+import hashlib
+import json
+import os
+import pathlib
+import struct
+import typing
+
+import compressed_files
+import evaluation
+import journal_blocks
+import journal_frames
+import results
+import routine
+import sharding
+import timestamps
+
+# Appended to the practices file name for the name of its index.
+INDEX_SUFFIX = ".activity-index"
+
+# Starts every index file, changed whenever its layout changes so older
+# indexes are rebuilt rather than misread.
+_INDEX_MAGIC = b"DPAIDX01"
+
+# The magic, then the fields of an _IndexHeader.
+_HEADER = struct.Struct("=8sQQ32sQQQ")
+
+# The size in bytes of each offset in the groups.
+_OFFSET_SIZE = array.array("q").itemsize
+
+# The offset and activity key length of a tail entry, before the key.
+_TAIL_ENTRY = struct.Struct("=qH")
+
+# The most bytes of tail entries before they're folded into the groups.
+_MAX_TAIL_SIZE = 64 * 1024
+
+# The number of bytes before the indexed offset that are hashed. If a
+# journal is rewritten rather than appended to, they won't match.
+_TAIL_HASH_LENGTH = 64
+
+
+class _StaleIndexError(Exception):
+    """The index doesn't match its journal, or is malformed."""
+
+
+class _IndexHeader(typing.NamedTuple):
+    """The header of an index file."""
+
+    # The inode of the journal, which changes when it's replaced.
+    inode: int
+    # The offset of the journal the records are indexed up to.
+    indexed_offset: int
+    # The sha256 of the journal's bytes just before indexed_offset.
+    tail_hash: bytes
+    table_size: int
+    num_offsets: int
+    tail_size: int
+
+    def get_tail_start(self) -> int:
+        """Returns the offset of the tail in the index file."""
+        return _HEADER.size + self.table_size + self.num_offsets * _OFFSET_SIZE
+
+    def pack(self) -> bytes:
+        """Returns the bytes of this header, as written to the index."""
+        return _HEADER.pack(
+            _INDEX_MAGIC,
+            self.inode,
+            self.indexed_offset,
+            self.tail_hash,
+            self.table_size,
+            self.num_offsets,
+            self.tail_size,
+        )
+
+
+def get_index_file(practices_file: pathlib.Path) -> pathlib.Path:
+    """Returns the file the index of practices_file is kept in."""
+    return practices_file.with_name(f"{practices_file.name}{INDEX_SUFFIX}")
+
+
+def get_activity_records(
+    practices_file: pathlib.Path, activity_key: str
+) -> list[results.PracticeSetRecord]:
+    """Returns the records of activity_key in practices_file.
+
+    The records are in the order they were saved. An uncompressed
+    journal only has the records of activity_key read, through its
+    index. A directory of monthly shards only has the shards with
+    activity_key in their manifest entry read. Other practices files
+    are read whole.
+
+    Raises:
+        InvalidPracticesFileError: The practices_file is malformed.
+    """
+    if practices_file.is_dir():
+        return [
+            record
+            for shard_info in sharding.read_manifest(practices_file).values()
+            if activity_key in shard_info.activity_keys
+            for record in get_activity_records(
+                pathlib.Path(practices_file, shard_info.get_file_name()),
+                activity_key,
+            )
+        ]
+    if not practices_file.is_file():
+        return []
+
+    with open(practices_file, "rb") as raw_file:
+        f = compressed_files.get_reader(raw_file)
+        file_format = results.read_file_format(f)
+        # Offsets into a compressed journal can't be read from without
+        # decompressing everything before them, so it's read whole.
+        if f is raw_file and file_format == results.PracticesFileFormat.JOURNAL:
+            try:
+                return _read_indexed_records(
+                    get_index_file(practices_file), f, activity_key
+                )
+            except OSError:
+                # The index is only an optimization, so the journal is
+                # read whole if the index can't be written.
+                f.seek(0)
+                results.read_file_format(f)
+        return [
+            x for x in results.iter_file_records(f, file_format) if x[0] == activity_key
+        ]
+
+
+def evaluate_activity(
+    practices_file: pathlib.Path, activity: routine.Activity, summary: bool = False
+) -> evaluation.ActivityEvaluation:
+    """Returns the ActivityEvaluation of activity in practices_file.
+
+    The practice sets saved under the activity's description, before
+    activities had ids, are included. If summary is True, only a summary
+    of the scores is kept.
+
+    Raises:
+        InvalidPracticesFileError: The practices_file is malformed.
+    """
+    activity_evaluation = evaluation.ActivityEvaluation(
+        activity.get_key(), [], activity.get_description(), summary
+    )
+    for activity_key in dict.fromkeys([activity.get_key(), activity.get_description()]):
+        for _, score, epoch_micros, utc_offset in get_activity_records(
+            practices_file, activity_key
+        ):
+            activity_evaluation.add_score(score, epoch_micros, utc_offset)
+    return activity_evaluation
+
+
+def _read_indexed_records(
+    index_file: pathlib.Path, f: typing.BinaryIO, activity_key: str
+) -> list[results.PracticeSetRecord]:
+    """Returns the records of activity_key in the journal f, by index.
+
+    The index is brought up to date first. If it's found not to match
+    the journal, e.g. a repair overwrote records in place, it's rebuilt
+    and the records read again.
+
+    Raises:
+        InvalidPracticesFileError: The journal is malformed.
+        OSError: The index can't be written.
+    """
+    try:
+        return _read_records(f, _get_offsets(index_file, f, activity_key), activity_key)
+    except _StaleIndexError:
+        pass
+    try:
+        return _read_records(
+            f, _get_offsets(index_file, f, activity_key, rebuild=True), activity_key
+        )
+    except _StaleIndexError as e:
+        raise results.InvalidPracticesFileError(
+            f"The journal changed while reading the records of {activity_key}"
+        ) from e
+
+
+def _get_offsets(
+    index_file: pathlib.Path,
+    f: typing.BinaryIO,
+    activity_key: str,
+    rebuild: bool = False,
+) -> list[int]:
+    """Returns the offsets of activity_key's records in the journal f.
+
+    The index is brought up to date first, or rebuilt if asked to.
+
+    Raises:
+        InvalidPracticesFileError: The journal is malformed.
+        OSError: The index can't be written.
+        _StaleIndexError: The index is malformed.
+    """
+    stat = os.fstat(f.fileno())
+    header = None if rebuild else _read_header(index_file)
+    if header is None or not _was_appended_to(f, stat, header):
+        key_offsets: dict[str, "array.array[int]"] = {}
+        _add_key_offsets(
+            key_offsets, _iter_key_offsets(f, len(journal_frames.JOURNAL_HEADER))
+        )
+        header = _write_index(index_file, f, stat.st_ino, key_offsets)
+    elif header.indexed_offset < stat.st_size:
+        header = _append_to_index(index_file, f, header)
+
+    try:
+        with open(index_file, "rb") as index:
+            index.seek(_HEADER.size)
+            table = json.loads(index.read(header.table_size))
+            start, count = table.get(activity_key, (0, 0))
+            index.seek(_HEADER.size + header.table_size + start * _OFFSET_SIZE)
+            offsets = array.array("q")
+            offsets.frombytes(index.read(count * _OFFSET_SIZE))
+            index.seek(header.get_tail_start())
+            tail = index.read(header.tail_size)
+        return [
+            *offsets,
+            *(offset for key, offset in _iter_tail(tail) if key == activity_key),
+        ]
+    except (TypeError, ValueError, struct.error) as e:
+        raise _StaleIndexError(f"Malformed index {index_file}") from e
+
+
+def _read_records(
+    f: typing.BinaryIO, offsets: list[int], activity_key: str
+) -> list[results.PracticeSetRecord]:
+    """Returns the records of activity_key at offsets in the journal f.
+
+    A record in a block is read without checking the block's checksum,
+    which was checked when it was indexed.
+
+    Raises:
+        InvalidPracticesFileError: A record's date_time is malformed.
+        _StaleIndexError: An offset isn't of a record of activity_key.
+    """
+    fields: list[tuple[str, int, str]] = []
+    for offset in offsets:
+        f.seek(offset)
+        try:
+            record_fields = results.read_journal_frame(f, f.readline())
+        except results.InvalidPracticesFileError as e:
+            raise _StaleIndexError(f"No record at offset {offset}") from e
+        if [x[0] for x in record_fields] != [activity_key]:
+            raise _StaleIndexError(f"No record of {activity_key} at offset {offset}")
+        fields.extend(record_fields)
+
+    try:
+        parsed_date_times = timestamps.parse_epoch_micros_batch([x[2] for x in fields])
+    except ValueError as e:
+        raise results.InvalidPracticesFileError("Failed to load practice_set") from e
+    return [
+        (key, score, epoch_micros, utc_offset)
+        for (key, score, _), (epoch_micros, utc_offset) in zip(
+            fields, parsed_date_times
+        )
+    ]
+
+
+def _iter_key_offsets(
+    f: typing.BinaryIO, offset: int
+) -> typing.Iterator[tuple[str, int]]:
+    """Yields the activity key and offset of each record in journal f.
+
+    The records from offset on are yielded, leaving f at its end. Each
+    block's checksum is checked.
+
+    Raises:
+        InvalidPracticesFileError: The journal is malformed.
+    """
+    f.seek(offset)
+    while frame := f.readline():
+        if not frame.startswith(journal_blocks.BLOCK_MARKER):
+            # A record from before blocks, or a footer or padding.
+            for activity_key, _, _ in results.read_journal_frame(f, frame):
+                yield activity_key, offset
+            offset = f.tell()
+            continue
+
+        try:
+            _, records = journal_blocks.read_block(f, frame)
+        except journal_blocks.CorruptBlockError as e:
+            raise results.InvalidPracticesFileError(str(e)) from e
+        payload_offset = offset + len(frame)
+        record_offset = payload_offset
+        while record_frame := records.readline():
+            for activity_key, _, _ in results.read_journal_frame(records, record_frame):
+                yield activity_key, record_offset
+            record_offset = payload_offset + records.tell()
+        offset = f.tell()
+
+
+def _add_key_offsets(
+    key_offsets: dict[str, "array.array[int]"],
+    entries: typing.Iterable[tuple[str, int]],
+) -> None:
+    """Adds each entry's offset to the offsets of its activity key."""
+    for activity_key, offset in entries:
+        key_offsets.setdefault(activity_key, array.array("q")).append(offset)
+
+
+def _read_header(index_file: pathlib.Path) -> typing.Optional[_IndexHeader]:
+    """Returns the header of index_file, None if missing or outdated."""
+    try:
+        with open(index_file, "rb") as index:
+            data = index.read(_HEADER.size)
+    except OSError:
+        return None
+    if len(data) != _HEADER.size:
+        return None
+    magic, *fields = _HEADER.unpack(data)
+    if magic != _INDEX_MAGIC:
+        return None
+    return _IndexHeader(*fields)
+
+
+def _write_index(
+    index_file: pathlib.Path,
+    f: typing.BinaryIO,
+    inode: int,
+    key_offsets: dict[str, "array.array[int]"],
+) -> _IndexHeader:
+    """Writes the index of key_offsets, replacing any old index.
+
+    The records of f are indexed up to its current offset.
+    """
+    indexed_offset = f.tell()
+    table = {}
+    num_offsets = 0
+    for activity_key, offsets in key_offsets.items():
+        table[activity_key] = [num_offsets, len(offsets)]
+        num_offsets += len(offsets)
+    table_bytes = json.dumps(table, separators=(",", ":")).encode()
+    header = _IndexHeader(
+        inode,
+        indexed_offset,
+        _hash_tail(f, indexed_offset),
+        len(table_bytes),
+        num_offsets,
+        0,
+    )
+
+    temp_file = index_file.with_name(f"{index_file.name}.tmp")
+    with open(temp_file, "wb") as index:
+        index.write(header.pack())
+        index.write(table_bytes)
+        for offsets in key_offsets.values():
+            offsets.tofile(index)
+        index.flush()
+        os.fsync(index.fileno())
+    os.replace(temp_file, index_file)
+    return header
+
+
+def _append_to_index(
+    index_file: pathlib.Path, f: typing.BinaryIO, header: _IndexHeader
+) -> _IndexHeader:
+    """Indexes the records appended to f, returning the new header.
+
+    Raises:
+        InvalidPracticesFileError: The journal is malformed.
+        _StaleIndexError: The index is malformed.
+    """
+    entries = list(_iter_key_offsets(f, header.indexed_offset))
+    indexed_offset = f.tell()
+    tail = b"".join(
+        _TAIL_ENTRY.pack(offset, len(key_bytes)) + key_bytes
+        for key_bytes, offset in ((x.encode(), y) for x, y in entries)
+    )
+    if header.tail_size + len(tail) > _MAX_TAIL_SIZE:
+        key_offsets = _read_key_offsets(index_file, header)
+        _add_key_offsets(key_offsets, entries)
+        return _write_index(index_file, f, header.inode, key_offsets)
+
+    header = header._replace(
+        indexed_offset=indexed_offset,
+        tail_hash=_hash_tail(f, indexed_offset),
+        tail_size=header.tail_size + len(tail),
+    )
+    with open(index_file, "r+b") as index:
+        index.seek(header.get_tail_start() + header.tail_size - len(tail))
+        index.write(tail)
+        index.flush()
+        os.fsync(index.fileno())
+        # Only once the tail is written, so the header never covers a
+        # partly written tail.
+        index.seek(0)
+        index.write(header.pack())
+        index.flush()
+        os.fsync(index.fileno())
+    return header
+
+
+def _read_key_offsets(
+    index_file: pathlib.Path, header: _IndexHeader
+) -> dict[str, "array.array[int]"]:
+    """Returns the offsets of every activity key in index_file.
+
+    Raises:
+        _StaleIndexError: The index is malformed.
+    """
+    try:
+        with open(index_file, "rb") as index:
+            index.seek(_HEADER.size)
+            table = json.loads(index.read(header.table_size))
+            offsets = array.array("q")
+            offsets.frombytes(index.read(header.num_offsets * _OFFSET_SIZE))
+            tail = index.read(header.tail_size)
+        key_offsets = {
+            activity_key: offsets[start : start + count]
+            for activity_key, (start, count) in table.items()
+        }
+        _add_key_offsets(key_offsets, _iter_tail(tail))
+    except (TypeError, ValueError, struct.error) as e:
+        raise _StaleIndexError(f"Malformed index {index_file}") from e
+    return key_offsets
+
+
+def _iter_tail(tail: bytes) -> typing.Iterator[tuple[str, int]]:
+    """Yields the activity key and offset of each tail entry.
+
+    Raises:
+        ValueError: A key isn't valid UTF-8.
+        struct.error: The tail is truncated.
+    """
+    position = 0
+    while position < len(tail):
+        offset, key_length = _TAIL_ENTRY.unpack_from(tail, position)
+        position += _TAIL_ENTRY.size
+        yield tail[position : position + key_length].decode("utf-8"), offset
+        position += key_length
+
+
+def _was_appended_to(
+    f: typing.BinaryIO, stat: os.stat_result, header: _IndexHeader
+) -> bool:
+    """Returns if the journal f was only appended to since indexed."""
+    return (
+        header.inode == stat.st_ino
+        and header.indexed_offset <= stat.st_size
+        and header.tail_hash == _hash_tail(f, header.indexed_offset)
+    )
+
+
+def _hash_tail(f: typing.BinaryIO, offset: int) -> bytes:
+    """Returns the hash of the bytes just before offset in f."""
+    start = max(0, offset - _TAIL_HASH_LENGTH)
+    f.seek(start)
+    return hashlib.sha256(f.read(offset - start)).digest()
@@ -0,0 +1,176 @@
+import datetime
+import pathlib
+
+import pytest
+
+import activity_index
+import journal_blocks
+import journal_frames
+import results
+import routine
+import sharding
+import timestamps
+
+TIME = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def make_practice_sets(
+    activity_keys: str, start_day: int = 0
+) -> list[results.PracticeSet]:
+    return [
+        results.PracticeSet(
+            activity_key, index % 5, TIME + datetime.timedelta(days=start_day + index)
+        )
+        for index, activity_key in enumerate(activity_keys)
+    ]
+
+
+def get_scores(practices_file: pathlib.Path, activity_key: str) -> list[int]:
+    return [
+        x[1] for x in activity_index.get_activity_records(practices_file, activity_key)
+    ]
+
+
+class TestJournalIndex:
+    def test_get_activity_records(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices.journal")
+        results.write_journal(practices_file, make_practice_sets("abab"))
+
+        records = activity_index.get_activity_records(practices_file, "b")
+
+        assert records == [
+            ("b", 1, *timestamps.to_epoch_micros(TIME.replace(day=2))),
+            ("b", 3, *timestamps.to_epoch_micros(TIME.replace(day=4))),
+        ]
+        assert activity_index.get_index_file(practices_file).exists()
+        assert get_scores(practices_file, "c") == []
+
+    def test_appended(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices.journal")
+        results.append_to_journal(practices_file, make_practice_sets("ab"))
+        assert get_scores(practices_file, "a") == [0]
+
+        results.append_to_journal(practices_file, make_practice_sets("ba", 2))
+        index_file = activity_index.get_index_file(practices_file)
+        inode = index_file.stat().st_ino
+
+        assert get_scores(practices_file, "a") == [0, 1]
+        assert get_scores(practices_file, "b") == [1, 0]
+        # The new records were appended to the index, not rebuilt.
+        assert index_file.stat().st_ino == inode
+
+    def test_tail_folded(
+        self, tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(activity_index, "_MAX_TAIL_SIZE", 30)
+        practices_file = pathlib.Path(tmp_path, "practices.journal")
+        results.append_to_journal(practices_file, make_practice_sets("a"))
+        assert get_scores(practices_file, "a") == [0]
+
+        for day in range(1, 5):
+            results.append_to_journal(practices_file, make_practice_sets("ab", day))
+            get_scores(practices_file, "a")
+
+        assert get_scores(practices_file, "a") == [0, 0, 0, 0, 0]
+        assert get_scores(practices_file, "b") == [1, 1, 1, 1]
+
+    def test_rewritten(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices.journal")
+        results.write_journal(practices_file, make_practice_sets("ab"))
+        assert get_scores(practices_file, "a") == [0]
+
+        results.write_journal(practices_file, make_practice_sets("ba"))
+
+        assert get_scores(practices_file, "a") == [1]
+
+    @pytest.mark.parametrize(
+        "index_contents", [b"", b"not an index", b"DPAIDX01" + b"\xff" * 100]
+    )
+    def test_malformed_index(
+        self, tmp_path: pathlib.Path, index_contents: bytes
+    ) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices.journal")
+        results.write_journal(practices_file, make_practice_sets("ab"))
+        activity_index.get_index_file(practices_file).write_bytes(index_contents)
+
+        assert get_scores(practices_file, "b") == [1]
+
+    def test_overwritten_in_place(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices.journal")
+        results.append_to_journal(practices_file, make_practice_sets("ab"))
+        results.append_to_journal(practices_file, make_practice_sets("ab", 2))
+        assert get_scores(practices_file, "b") == [1, 1]
+
+        # Pad over the first block, as a repair does, which keeps the
+        # journal's size and end.
+        contents = practices_file.read_bytes()
+        start = len(journal_frames.JOURNAL_HEADER)
+        stop = contents.index(journal_blocks.BLOCK_MARKER, start + 1)
+        practices_file.write_bytes(
+            contents[:start]
+            + journal_blocks.get_padding(stop - start)
+            + contents[stop:]
+        )
+
+        # Rebuilt, once its offsets no longer match.
+        assert get_scores(practices_file, "b") == [1]
+        assert get_scores(practices_file, "a") == [0]
+
+
+@pytest.mark.parametrize(
+    ("file_name", "file_format"),
+    [
+        ("practices.txt", results.PracticesFileFormat.TEXT),
+        ("practices.bin", results.PracticesFileFormat.BINARY),
+        ("practices.journal.gz", results.PracticesFileFormat.JOURNAL),
+    ],
+)
+def test_unindexed_formats(
+    tmp_path: pathlib.Path, file_name: str, file_format: results.PracticesFileFormat
+) -> None:
+    practices_file = pathlib.Path(tmp_path, file_name)
+    practices = results.Practices(practices_file, file_format)
+    for practice_set in make_practice_sets("abab"):
+        practices.add_practice_set(
+            routine.Activity(practice_set.activity_key, practice_set.activity_key),
+            practice_set.score,
+            practice_set.date_time,
+        )
+    practices.save()
+
+    assert get_scores(practices_file, "b") == [1, 3]
+    assert not activity_index.get_index_file(practices_file).exists()
+
+
+def test_sharded(tmp_path: pathlib.Path) -> None:
+    practices = sharding.ShardedPractices(tmp_path)
+    for practice_set in make_practice_sets("ab" * 20):
+        practices.add_practice_set(
+            routine.Activity(practice_set.activity_key, practice_set.activity_key),
+            practice_set.score,
+            practice_set.date_time,
+        )
+    practices.save()
+
+    assert len(get_scores(tmp_path, "a")) == 20
+    assert get_scores(pathlib.Path(tmp_path, "missing"), "a") == []
+
+
+def test_evaluate_activity(tmp_path: pathlib.Path) -> None:
+    practices_file = pathlib.Path(tmp_path, "practices.journal")
+    activity = routine.Activity("Scales", "000000000001")
+    # Older practice sets were saved under the description.
+    results.write_journal(
+        practices_file,
+        [
+            results.PracticeSet("Scales", 1, TIME),
+            results.PracticeSet(activity.get_key(), 4, TIME.replace(day=3)),
+            results.PracticeSet("Other", 2, TIME.replace(day=2)),
+        ],
+    )
+
+    activity_evaluation = activity_index.evaluate_activity(practices_file, activity)
+
+    assert activity_evaluation.get_activity_key() == activity.get_key()
+    assert activity_evaluation.get_description() == "Scales"
+    assert activity_evaluation.scores == [1, 4]
@@ -0,0 +1,78 @@
+"""Module of weighted random sampling in O(1), by the alias method."""
+
+import array
+import math
+import random
+import typing
+
+_T_co = typing.TypeVar("_T_co", covariant=True)
+
+
+class Column(typing.Protocol[_T_co]):
+    """A column of numbers, e.g. an array or one mapped from a file."""
+
+    def __len__(self) -> int: ...
+
+    def __getitem__(self, index: int) -> _T_co: ...
+
+
+class AliasTable:
+    """A table picking indexes at random by their weights, in O(1).
+
+    The table is built by Vose's alias method. Each index has a column,
+    with the probability of picking the index itself when its column is
+    picked, and the alias picked otherwise. Picking a column uniformly,
+    then one of its two indexes, picks each index in proportion to its
+    weight.
+    """
+
+    def __init__(self, probabilities: Column[float], aliases: Column[int]):
+        """Creates an AliasTable of the columns from build."""
+        self.probabilities = probabilities
+        self.aliases = aliases
+
+    @classmethod
+    def build(cls, weights: typing.Sequence[float]) -> "AliasTable":
+        """Returns the AliasTable of weights, in O(n).
+
+        Raises:
+            ValueError: There are no weights, or one isn't a positive
+                finite number.
+        """
+        if not weights:
+            raise ValueError("There are no weights to pick from")
+        if not all(0 < x < math.inf for x in weights):
+            raise ValueError(f"The weights must be positive, got {weights}")
+
+        num_weights = len(weights)
+        total_weight = math.fsum(weights)
+        # Each weight scaled so their mean is 1, the size of a column.
+        scaled_weights = [x * num_weights / total_weight for x in weights]
+        probabilities = array.array("d", [1.0]) * num_weights
+        aliases = array.array("q", range(num_weights))
+        small = [i for i, x in enumerate(scaled_weights) if x < 1]
+        large = [i for i, x in enumerate(scaled_weights) if x >= 1]
+        while small and large:
+            small_index = small.pop()
+            large_index = large.pop()
+            # The column of the small weight is topped up by the large.
+            probabilities[small_index] = scaled_weights[small_index]
+            aliases[small_index] = large_index
+            scaled_weights[large_index] -= 1 - scaled_weights[small_index]
+            if scaled_weights[large_index] < 1:
+                small.append(large_index)
+            else:
+                large.append(large_index)
+        # Whatever is left is only off 1 by rounding, so keeps its own
+        # column, which was set to a probability of 1.
+        return cls(probabilities, aliases)
+
+    def __len__(self) -> int:
+        return len(self.probabilities)
+
+    def sample(self) -> int:
+        """Returns an index picked at random by its weight."""
+        index = random.randrange(len(self.probabilities))
+        if random.random() < self.probabilities[index]:
+            return index
+        return self.aliases[index]
@@ -0,0 +1,39 @@
+import collections
+import random
+
+import pytest
+
+import alias_sampler
+
+
+@pytest.mark.parametrize(
+    "weights", [[1.0], [1.0, 1.0, 1.0], [1.0, 2.0, 7.0], [0.1, 100.0, 0.5, 3.0]]
+)
+def test_build(weights: list[float]) -> None:
+    alias_table = alias_sampler.AliasTable.build(weights)
+    assert len(alias_table) == len(weights)
+
+    # The chance of each index, from the columns picked uniformly.
+    chances = [0.0] * len(weights)
+    for index in range(len(alias_table)):
+        probability = alias_table.probabilities[index]
+        chances[index] += probability / len(weights)
+        chances[alias_table.aliases[index]] += (1 - probability) / len(weights)
+    assert chances == pytest.approx([x / sum(weights) for x in weights])
+
+
+def test_sample() -> None:
+    random.seed(0)
+    alias_table = alias_sampler.AliasTable.build([1.0, 3.0])
+
+    counts = collections.Counter(alias_table.sample() for _ in range(10_000))
+
+    assert counts[1] / counts.total() == pytest.approx(0.75, abs=0.02)
+
+
+@pytest.mark.parametrize(
+    "weights", [[], [1.0, 0.0], [1.0, -1.0], [float("inf")], [float("nan")]]
+)
+def test_build_invalid_weights(weights: list[float]) -> None:
+    with pytest.raises(ValueError):
+        alias_sampler.AliasTable.build(weights)
@@ -0,0 +1 @@
+"""Package of benchmarks for the Deliberate Practice CLI's hot paths."""
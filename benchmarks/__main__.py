@@ -0,0 +1,112 @@
+"""Runs the benchmarks, checking them against the stored baseline.
+
+Run from the repository root with "python -m benchmarks". The
+measurements are printed as JSON, and the exit status is 1 if any
+regressed from the baseline. The baseline only stores wall times
+relative to a reference operation, and peak memory, so it holds on
+any machine.
+"""
+
+import argparse
+import json
+import pathlib
+import sys
+import tempfile
+import typing
+
+from benchmarks import scenarios
+
+BASELINE_FILE = pathlib.Path(pathlib.Path(__file__).parent, "baseline.json")
+
+# The sizes that can be benchmarked, by the name they're given as.
+SIZES = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000, "10M": 10_000_000}
+
+# How much worse than the baseline a measurement can be, as a fraction,
+# before it's a regression. Timings vary a lot between runs.
+_DEFAULT_TOLERANCE = 0.5
+
+
+def _parse_args(args: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        choices=SIZES,
+        default=["10k", "100k"],
+        help="The numbers of practice sets to benchmark.",
+    )
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        choices=[x.name for x in scenarios.SCENARIOS],
+        help="The scenarios to run, all of them by default.",
+    )
+    parser.add_argument(
+        "--output", type=pathlib.Path, help="Also write the measurements here."
+    )
+    parser.add_argument("--baseline", type=pathlib.Path, default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=_DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store the measurements as the new baseline.",
+    )
+    return parser.parse_args(args)
+
+
+def _read_baseline(baseline_file: pathlib.Path) -> list[dict[str, typing.Any]]:
+    """Returns the measurements in baseline_file, [] if missing."""
+    try:
+        with open(baseline_file, encoding="utf-8") as f:
+            return typing.cast(list[dict[str, typing.Any]], json.load(f))
+    except FileNotFoundError:
+        return []
+
+
+def _write_measurements(
+    output_file: pathlib.Path, measurements: list[dict[str, typing.Any]]
+) -> None:
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(measurements, f, indent=2)
+        f.write("\n")
+
+
+def main(args: list[str]) -> int:
+    """Runs the benchmarks given by args, returning the exit status."""
+    parsed_args = _parse_args(args)
+    with tempfile.TemporaryDirectory() as data_dir:
+        measurements = scenarios.run_scenarios(
+            pathlib.Path(data_dir),
+            [SIZES[x] for x in parsed_args.sizes],
+            parsed_args.scenarios,
+        )
+
+    json.dump(measurements, sys.stdout, indent=2)
+    print()
+    if parsed_args.output is not None:
+        _write_measurements(parsed_args.output, measurements)
+
+    if parsed_args.update_baseline:
+        _write_measurements(
+            parsed_args.baseline,
+            [
+                {
+                    "scenario": x["scenario"],
+                    "size": x["size"],
+                    **{y: x[y] for y in scenarios.BASELINE_METRICS},
+                }
+                for x in measurements
+            ],
+        )
+        return 0
+
+    regressions = scenarios.find_regressions(
+        measurements, _read_baseline(parsed_args.baseline), parsed_args.tolerance
+    )
+    for regression in regressions:
+        print(f"Regression: {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
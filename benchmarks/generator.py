@@ -0,0 +1,104 @@
+"""Module generating realistic synthetic practice data.
+
+The data is deterministic for a given seed, so benchmark runs on
+different machines, or before and after a change, use the same data.
+"""
+
+import datetime
+import itertools
+import pathlib
+import random
+
+import results
+import routine
+import timestamps
+
+# The practice sets start here and are spread over _SPAN_DAYS, however
+# many there are, so every size covers the same months.
+_START_TIME = datetime.datetime(2020, 1, 1, 18, tzinfo=datetime.timezone.utc)
+_SPAN_DAYS = 5 * 365
+
+# Practice is done in sessions, a few minutes apart within a session.
+_MIN_SESSION_SIZE = 5
+_MAX_SESSION_SIZE = 30
+_MIN_SESSION_GAP_SECONDS = 60
+_MAX_SESSION_GAP_SECONDS = 6 * 60
+
+# Every practice set is in one timezone, UTC-07:00.
+_UTC_OFFSET = -7 * 60 * 60
+
+# Activities are picked with a Zipf like skew, a few are practiced far
+# more often than the rest.
+_POPULARITY_EXPONENT = 0.8
+
+# An activity's expected score rises by one every this many practices,
+# up to the highest score.
+_PRACTICES_PER_SCORE = 25
+
+_MAX_SCORE = len(results.POSSIBLE_SCORES) - 1
+
+
+def generate_activities(num_activities: int) -> list[routine.Activity]:
+    """Returns num_activities Activities, the same on every call."""
+    return [
+        routine.Activity(f"Benchmark activity {x:07d}") for x in range(num_activities)
+    ]
+
+
+def write_activities_file(activities_file: pathlib.Path, num_activities: int) -> None:
+    """Writes an activities file of generate_activities."""
+    with open(activities_file, "w", encoding="utf-8") as f:
+        for activity in generate_activities(num_activities):
+            f.write(f"{activity.to_line()}\n")
+
+
+def _get_average_session_gap_micros(num_practice_sets: int) -> float:
+    """Returns the session gap that fills the span, on average."""
+    average_session_size = (_MIN_SESSION_SIZE + _MAX_SESSION_SIZE) / 2
+    num_sessions = max(1.0, num_practice_sets / average_session_size)
+    return _SPAN_DAYS * 24 * 60 * 60 * 1_000_000 / num_sessions
+
+
+def generate_columns(
+    num_practice_sets: int, num_activities: int, seed: int = 0
+) -> results.PracticeSetColumns:
+    """Returns num_practice_sets of num_activities, in time order.
+
+    The practice sets come in sessions over five years. The activities
+    practiced follow a skewed popularity, and each activity's scores
+    improve, with some noise, the more it's practiced.
+    """
+    rng = random.Random(seed)
+    activity_keys = [x.get_key() for x in generate_activities(num_activities)]
+    picked_indexes = rng.choices(
+        range(num_activities),
+        cum_weights=list(
+            itertools.accumulate(
+                1 / (x + 1) ** _POPULARITY_EXPONENT for x in range(num_activities)
+            )
+        ),
+        k=num_practice_sets,
+    )
+
+    average_session_gap_micros = _get_average_session_gap_micros(num_practice_sets)
+
+    columns = results.PracticeSetColumns()
+    num_practices = [0] * num_activities
+    epoch_micros = timestamps.to_epoch_micros(_START_TIME)[0]
+    session_remaining = 0
+    for activity_index in picked_indexes:
+        if session_remaining:
+            epoch_micros += (
+                rng.randint(_MIN_SESSION_GAP_SECONDS, _MAX_SESSION_GAP_SECONDS)
+                * 1_000_000
+            )
+        else:
+            epoch_micros += int(rng.expovariate(1 / average_session_gap_micros))
+            session_remaining = rng.randint(_MIN_SESSION_SIZE, _MAX_SESSION_SIZE)
+        session_remaining -= 1
+
+        skill = num_practices[activity_index] / _PRACTICES_PER_SCORE
+        num_practices[activity_index] += 1
+        score = min(_MAX_SCORE, max(0, round(rng.gauss(skill, 1))))
+        columns.append(activity_keys[activity_index], score, epoch_micros, _UTC_OFFSET)
+    return columns
@@ -0,0 +1,46 @@
+import pathlib
+
+import results
+import routine
+from benchmarks import generator
+
+
+def test_generate_columns_is_deterministic() -> None:
+    columns = generator.generate_columns(500, 10, seed=3)
+    same_columns = generator.generate_columns(500, 10, seed=3)
+    other_columns = generator.generate_columns(500, 10, seed=4)
+
+    assert len(columns) == 500
+    assert list(columns.iter_practice_sets()) == list(same_columns.iter_practice_sets())
+    assert list(columns.scores) != list(other_columns.scores)
+
+
+def test_generate_columns_values() -> None:
+    columns = generator.generate_columns(2_000, 20)
+
+    assert set(columns.activity_keys) <= {
+        x.get_key() for x in generator.generate_activities(20)
+    }
+    assert set(columns.scores) <= set(range(len(results.POSSIBLE_SCORES)))
+    assert list(columns.epoch_micros) == sorted(columns.epoch_micros)
+    # Spread over years, not crammed into a few days.
+    span_days = (columns.epoch_micros[-1] - columns.epoch_micros[0]) / 86_400e6
+    assert span_days > 365
+
+
+def test_generate_columns_is_skewed() -> None:
+    columns = generator.generate_columns(5_000, 50)
+
+    counts = [0] * len(columns.activity_keys)
+    for key_index in columns.key_indexes:
+        counts[key_index] += 1
+    assert max(counts) > 5 * min(counts)
+
+
+def test_write_activities_file(tmp_path: pathlib.Path) -> None:
+    activities_file = pathlib.Path(tmp_path, "activities.txt")
+    generator.write_activities_file(activities_file, 25)
+
+    activities = routine.Activities(activities_file)
+    assert activities.get_num_activities() == 25
+    assert not activities.has_unsaved_ids()
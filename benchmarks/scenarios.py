@@ -0,0 +1,232 @@
+"""Module of the benchmark scenarios and how they're measured."""
+
+import gc
+import pathlib
+import time
+import tracemalloc
+import typing
+
+import evaluation
+import results
+import routine
+from benchmarks import generator
+
+# The number of activities the practice sets are spread over.
+NUM_ACTIVITIES = 200
+
+# The number of times each operation is timed, the quickest is used.
+_REPEAT = 3
+
+# Wall times are only compared to the baseline above this, as shorter
+# ones vary too much between runs to be meaningful.
+_MIN_COMPARED_WALL_SECONDS = 0.05
+
+# The number of strings sorted by the reference operation, which every
+# wall time is measured relative to.
+_REFERENCE_SIZE = 200_000
+
+# The metrics stored in a baseline, as only these can be compared
+# between machines.
+BASELINE_METRICS = ("relative_wall_time", "peak_memory_bytes")
+
+
+class Dataset:  # pylint: disable=too-few-public-methods
+    """The generated files a benchmark size's scenarios run against."""
+
+    def __init__(self, data_dir: pathlib.Path, size: int, seed: int = 0):
+        """Generates the files for size practice sets in data_dir.
+
+        The activities file has size activities, to measure loading the
+        activities at the same scale as the practices.
+        """
+        self.size = size
+        self.data_dir = data_dir
+
+        self.activities_file = pathlib.Path(data_dir, "activities.txt")
+        generator.write_activities_file(self.activities_file, size)
+
+        self.columns = generator.generate_columns(size, NUM_ACTIVITIES, seed)
+        self.practices_files: dict[results.PracticesFileFormat, pathlib.Path] = {}
+        for file_format in results.PracticesFileFormat:
+            practices_file = pathlib.Path(data_dir, f"practices.{file_format}")
+            results.write_practices_file(practices_file, file_format, self.columns)
+            self.practices_files[file_format] = practices_file
+
+    def load_practices(
+        self, file_format: results.PracticesFileFormat
+    ) -> results.Practices:
+        """Returns the Practices of the file in file_format."""
+        return results.Practices(self.practices_files[file_format])
+
+
+class Scenario(typing.NamedTuple):
+    """A benchmark of a single operation.
+
+    prepare does any untimed setup for a Dataset, then returns the
+    operation to time.
+    """
+
+    name: str
+    prepare: typing.Callable[[Dataset], typing.Callable[[], object]]
+
+
+def _prepare_activities_load(dataset: Dataset) -> typing.Callable[[], object]:
+    return lambda: routine.Activities(dataset.activities_file)
+
+
+def _prepare_practices_load(
+    file_format: results.PracticesFileFormat,
+) -> typing.Callable[[Dataset], typing.Callable[[], object]]:
+    return lambda dataset: lambda: dataset.load_practices(file_format)
+
+
+def _prepare_practices_save(
+    file_format: results.PracticesFileFormat,
+) -> typing.Callable[[Dataset], typing.Callable[[], object]]:
+    def prepare(dataset: Dataset) -> typing.Callable[[], object]:
+        output_file = pathlib.Path(dataset.data_dir, f"saved.{file_format}")
+        return lambda: results.write_practices_file(
+            output_file, file_format, dataset.columns
+        )
+
+    return prepare
+
+
+def _prepare_evaluation_build(dataset: Dataset) -> typing.Callable[[], object]:
+    practices = dataset.load_practices(results.PracticesFileFormat.BINARY)
+    return lambda: evaluation.Evaluation(practices)
+
+
+def _prepare_evaluation_build_summary(
+    dataset: Dataset,
+) -> typing.Callable[[], object]:
+    practices = dataset.load_practices(results.PracticesFileFormat.BINARY)
+    return lambda: evaluation.Evaluation(practices, summary=True)
+
+
+def _prepare_evaluation_stream(dataset: Dataset) -> typing.Callable[[], object]:
+    practices_file = dataset.practices_files[results.PracticesFileFormat.JOURNAL]
+    return lambda: evaluation.Evaluation(results.iter_practice_sets(practices_file))
+
+
+SCENARIOS = (
+    [Scenario("activities_load", _prepare_activities_load)]
+    + [
+        Scenario(f"practices_load_{x}", _prepare_practices_load(x))
+        for x in results.PracticesFileFormat
+    ]
+    + [
+        Scenario(f"practices_save_{x}", _prepare_practices_save(x))
+        for x in results.PracticesFileFormat
+    ]
+    + [
+        Scenario("evaluation_build", _prepare_evaluation_build),
+        Scenario("evaluation_build_summary", _prepare_evaluation_build_summary),
+        Scenario("evaluation_stream", _prepare_evaluation_stream),
+    ]
+)
+
+
+def measure(
+    operation: typing.Callable[[], object], size: int, repeat: int = _REPEAT
+) -> dict[str, float]:
+    """Returns the wall time, peak memory and throughput of operation.
+
+    Tracing memory slows the operation down, so it's timed untraced,
+    taking the quickest of repeat runs, then run once more traced for
+    the peak memory.
+    """
+    wall_seconds = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        operation()
+        wall_seconds = min(wall_seconds, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        operation()
+        _, peak_memory_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "wall_seconds": wall_seconds,
+        "peak_memory_bytes": peak_memory_bytes,
+        "records_per_second": size / wall_seconds if wall_seconds else 0.0,
+    }
+
+
+def _run_reference() -> object:
+    """Sorts strings, a fixed amount of work to time others against."""
+    return sorted(str(x * 7919 % _REFERENCE_SIZE) for x in range(_REFERENCE_SIZE))
+
+
+def run_scenarios(
+    data_dir: pathlib.Path,
+    sizes: list[int],
+    scenario_names: typing.Optional[list[str]] = None,
+) -> list[dict[str, typing.Any]]:
+    """Runs the scenarios for each size, returning their measurements.
+
+    All the scenarios are run unless scenario_names are given. The
+    generated files are written to data_dir. Each wall time is also
+    given relative to that of a reference operation timed in the same
+    run, so it can be compared with a baseline from another machine.
+    """
+    reference_seconds = measure(_run_reference, _REFERENCE_SIZE)["wall_seconds"]
+    measurements = []
+    for size in sizes:
+        size_dir = pathlib.Path(data_dir, str(size))
+        size_dir.mkdir(parents=True, exist_ok=True)
+        dataset = Dataset(size_dir, size)
+        for scenario in SCENARIOS:
+            if scenario_names is not None and scenario.name not in scenario_names:
+                continue
+            measurement: dict[str, typing.Any] = {
+                "scenario": scenario.name,
+                "size": size,
+            }
+            measurement.update(measure(scenario.prepare(dataset), size))
+            measurement["relative_wall_time"] = (
+                measurement["wall_seconds"] / reference_seconds
+            )
+            measurements.append(measurement)
+    return measurements
+
+
+def find_regressions(
+    measurements: list[dict[str, typing.Any]],
+    baseline: list[dict[str, typing.Any]],
+    tolerance: float,
+) -> list[str]:
+    """Returns a description of each measurement worse than baseline.
+
+    A measurement regressed if its relative wall time or peak memory is
+    more than tolerance, as a fraction, over the baseline's. Metrics
+    without a baseline, and wall times too short to time reliably, are
+    skipped.
+    """
+    baseline_by_key = {(x["scenario"], x["size"]): x for x in baseline}
+    regressions = []
+    for measurement in measurements:
+        baseline_measurement = baseline_by_key.get(
+            (measurement["scenario"], measurement["size"])
+        )
+        if baseline_measurement is None:
+            continue
+        for metric in BASELINE_METRICS:
+            if metric not in baseline_measurement or (
+                metric == "relative_wall_time"
+                and measurement["wall_seconds"] <= _MIN_COMPARED_WALL_SECONDS
+            ):
+                continue
+            limit = baseline_measurement[metric] * (1 + tolerance)
+            if measurement[metric] > limit:
+                regressions.append(
+                    f"{measurement['scenario']} at {measurement['size']}: "
+                    f"{metric} {measurement[metric]:.6g} is over the baseline "
+                    f"{baseline_measurement[metric]:.6g}"
+                )
+    return regressions
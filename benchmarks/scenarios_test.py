@@ -0,0 +1,94 @@
+import pathlib
+
+import pytest
+
+from benchmarks import scenarios
+
+
+def test_run_scenarios(tmp_path: pathlib.Path) -> None:
+    measurements = scenarios.run_scenarios(tmp_path, [50, 100])
+
+    assert [(x["scenario"], x["size"]) for x in measurements] == [
+        (x.name, size) for size in [50, 100] for x in scenarios.SCENARIOS
+    ]
+    for measurement in measurements:
+        assert measurement["wall_seconds"] > 0
+        assert measurement["peak_memory_bytes"] > 0
+        assert measurement["records_per_second"] > 0
+        assert measurement["relative_wall_time"] > 0
+
+
+def test_run_scenarios_by_name(tmp_path: pathlib.Path) -> None:
+    measurements = scenarios.run_scenarios(
+        tmp_path, [10], ["practices_load_binary", "evaluation_stream"]
+    )
+
+    assert [x["scenario"] for x in measurements] == [
+        "practices_load_binary",
+        "evaluation_stream",
+    ]
+
+
+def make_measurement(
+    scenario: str, wall_seconds: float, peak_memory_bytes: int
+) -> dict[str, object]:
+    # Measured on a machine whose reference operation takes 0.5s.
+    return {
+        "scenario": scenario,
+        "size": 10,
+        "wall_seconds": wall_seconds,
+        "peak_memory_bytes": peak_memory_bytes,
+        "records_per_second": 10 / wall_seconds,
+        "relative_wall_time": wall_seconds / 0.5,
+    }
+
+
+@pytest.mark.parametrize(
+    ("wall_seconds", "peak_memory_bytes", "expected_metrics"),
+    [
+        (1.0, 1000, []),
+        (1.2, 1200, []),
+        (1.3, 1000, ["relative_wall_time"]),
+        (0.5, 1300, ["peak_memory_bytes"]),
+        (2.0, 2000, ["relative_wall_time", "peak_memory_bytes"]),
+    ],
+)
+def test_find_regressions(
+    wall_seconds: float, peak_memory_bytes: int, expected_metrics: list[str]
+) -> None:
+    baseline = [make_measurement("a", 1.0, 1000), make_measurement("b", 0.01, 1000)]
+    regressions = scenarios.find_regressions(
+        [
+            make_measurement("a", wall_seconds, peak_memory_bytes),
+            # Far slower, but too quick to compare.
+            make_measurement("b", 0.04, 1000),
+        ],
+        baseline,
+        0.25,
+    )
+
+    assert len(regressions) == len(expected_metrics)
+    for regression, metric in zip(regressions, expected_metrics):
+        assert regression.startswith(f"a at 10: {metric}")
+
+
+def test_find_regressions_relative() -> None:
+    # Twice the wall time on a machine half as fast isn't a regression.
+    baseline = [
+        {"scenario": "a", "size": 10, "relative_wall_time": 2.0, "peak_memory_bytes": 9}
+    ]
+    measurement = make_measurement("a", 1.0, 9)
+    assert not scenarios.find_regressions([measurement], baseline, 0.25)
+
+    measurement["relative_wall_time"] = 3.0
+    assert len(scenarios.find_regressions([measurement], baseline, 0.25)) == 1
+
+
+def test_find_regressions_without_baseline() -> None:
+    assert not scenarios.find_regressions([make_measurement("a", 9, 9)], [], 0.25)
+    # Nor with a baseline of absolute wall times only.
+    assert not scenarios.find_regressions(
+        [make_measurement("a", 9, 9)],
+        [{"scenario": "a", "size": 10, "wall_seconds": 0.1}],
+        0.25,
+    )
@@ -0,0 +1,208 @@
+"""Module ingesting practice sets recorded elsewhere in bulk.
+
+The practice sets are read from CSV or NDJSON lines, each with the
+activity, as its key or description, the score, as its index in
+results.POSSIBLE_SCORES or its text, and the date_time in iso format.
+CSV lines start with a header naming those columns, NDJSON lines each
+hold a JSON object with those keys.
+
+All the lines are validated before any practice set is added, so a bad
+line leaves the practices untouched, and they're then added and saved
+together rather than one at a time.
+"""
+
+import csv
+import enum
+import itertools
+import json
+import typing
+
+import results
+import routine
+import timestamps
+
+# The fields of each practice set, as CSV columns or NDJSON keys.
+FIELDS = ("activity", "score", "date_time")
+
+# The most invalid lines listed by an InvalidIngestError.
+_MAX_REPORTED_ERRORS = 10
+
+# The number of date_times parsed together.
+_PARSE_BATCH_SIZE = 4096
+
+
+class InvalidIngestError(Exception):
+    """Lines of the practice sets to ingest are invalid."""
+
+
+class IngestFormat(enum.StrEnum):
+    """The formats practice sets can be ingested from."""
+
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+def detect_format(first_line: str) -> IngestFormat:
+    """Returns the format of lines starting with first_line."""
+    if first_line.lstrip().startswith("{"):
+        return IngestFormat.NDJSON
+    return IngestFormat.CSV
+
+
+def read_practice_sets(
+    lines: typing.Iterable[str],
+    activities: routine.Activities,
+    ingest_format: typing.Optional[IngestFormat] = None,
+) -> results.PracticeSetColumns:
+    """Returns the practice sets in lines, validated against activities.
+
+    The format is detected from the first line, unless given.
+
+    Raises:
+        InvalidIngestError: Any line is invalid. Up to
+            _MAX_REPORTED_ERRORS of them are listed.
+    """
+    lines = iter(lines)
+    first_line = next(lines, "")
+    lines = itertools.chain([first_line], lines)
+    if ingest_format is None:
+        ingest_format = detect_format(first_line)
+    rows = (
+        _iter_csv_rows(lines)
+        if ingest_format == IngestFormat.CSV
+        else _iter_ndjson_rows(lines)
+    )
+
+    errors: list[str] = []
+    columns = results.PracticeSetColumns()
+    # The valid rows waiting for their date_times to be parsed.
+    batch: list[tuple[int, str, int, str]] = []
+    for line_number, row in rows:
+        try:
+            batch.append((line_number, *_validate_row(row, activities)))
+        except ValueError as e:
+            errors.append(f"Line {line_number}: {e}")
+        if len(batch) == _PARSE_BATCH_SIZE:
+            _append_batch(columns, batch, errors)
+            batch = []
+    _append_batch(columns, batch, errors)
+
+    if errors:
+        listed_errors = "\n".join(errors[:_MAX_REPORTED_ERRORS])
+        more = len(errors) - _MAX_REPORTED_ERRORS
+        raise InvalidIngestError(
+            f"{len(errors)} invalid lines, nothing was ingested:\n{listed_errors}"
+            + (f"\n... and {more} more" if more > 0 else "")
+        )
+    return columns
+
+
+def ingest(practices: results.Practices, columns: results.PracticeSetColumns) -> None:
+    """Adds the practice sets in columns to practices, with one save."""
+    practices.add_columns(columns)
+    practices.save()
+
+
+def _iter_csv_rows(
+    lines: typing.Iterable[str],
+) -> typing.Iterator[tuple[int, dict[str, typing.Any]]]:
+    """Yields the line number and fields of each CSV row.
+
+    Raises:
+        InvalidIngestError: The header is missing a field.
+    """
+    reader = csv.DictReader(lines)
+    missing_fields = [x for x in FIELDS if x not in (reader.fieldnames or [])]
+    if missing_fields:
+        raise InvalidIngestError(
+            f"The CSV header is missing {', '.join(missing_fields)}, "
+            f"got {reader.fieldnames}"
+        )
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _iter_ndjson_rows(
+    lines: typing.Iterable[str],
+) -> typing.Iterator[tuple[int, dict[str, typing.Any]]]:
+    """Yields the line number and fields of each NDJSON object.
+
+    A line that isn't a JSON object is yielded without any fields.
+    """
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else {}
+
+
+def _validate_row(
+    row: dict[str, typing.Any], activities: routine.Activities
+) -> tuple[str, int, str]:
+    """Returns the activity key, score and date_time string of row.
+
+    Raises:
+        ValueError: The row is missing a field, or has an invalid one.
+    """
+    missing_fields = [x for x in FIELDS if row.get(x) in (None, "")]
+    if missing_fields:
+        raise ValueError(f"Missing {', '.join(missing_fields)}")
+
+    activity = activities.get_activity(str(row["activity"]))
+    if activity is None:
+        raise ValueError(f'Unknown activity "{row["activity"]}"')
+    return activity.get_key(), _parse_score(row["score"]), str(row["date_time"])
+
+
+def _parse_score(score: typing.Any) -> int:
+    """Returns the index in results.POSSIBLE_SCORES that score names.
+
+    Raises:
+        ValueError: The score isn't an index or text of a score.
+    """
+    if isinstance(score, str) and score in results.POSSIBLE_SCORES:
+        return results.POSSIBLE_SCORES.index(score)
+    if isinstance(score, int) and not isinstance(score, bool):
+        index = score
+    elif isinstance(score, str) and score.strip().isdigit():
+        index = int(score)
+    else:
+        index = -1
+    if not 0 <= index < len(results.POSSIBLE_SCORES):
+        raise ValueError(
+            f"Invalid score {score!r}, expected 0-{len(results.POSSIBLE_SCORES) - 1}"
+        )
+    return index
+
+
+def _append_batch(
+    columns: results.PracticeSetColumns,
+    batch: list[tuple[int, str, int, str]],
+    errors: list[str],
+) -> None:
+    """Appends the practice sets in batch, once their times are parsed.
+
+    Nothing is appended once there are errors, as nothing is ingested.
+    """
+    try:
+        parsed_date_times = timestamps.parse_epoch_micros_batch([x[3] for x in batch])
+    except ValueError:
+        # Parse them one at a time, to find the bad ones.
+        parsed_date_times = []
+        for line_number, _, _, date_time_str in batch:
+            try:
+                parsed_date_times.append(timestamps.parse_epoch_micros(date_time_str))
+            except ValueError:
+                errors.append(
+                    f"Line {line_number}: date_time isn't in iso format, "
+                    f'got "{date_time_str}"'
+                )
+    if errors:
+        return
+    for (_, activity_key, score, _), (epoch_micros, utc_offset) in zip(
+        batch, parsed_date_times
+    ):
+        columns.append(activity_key, score, epoch_micros, utc_offset)
@@ -0,0 +1,126 @@
+import datetime
+import json
+import pathlib
+import typing
+
+import pytest
+
+import bulk_ingest
+import results
+import routine
+
+
+@pytest.fixture(name="activities")
+def fixture_activities(tmp_path: pathlib.Path) -> routine.Activities:
+    activities_file = pathlib.Path(tmp_path, "activities.txt")
+    activities_file.write_text("first\nsecond\n", encoding="utf-8")
+    return routine.Activities(activities_file)
+
+
+def _get_practice_sets(
+    columns: results.PracticeSetColumns,
+) -> list[results.PracticeSet]:
+    return list(columns.iter_practice_sets())
+
+
+@pytest.mark.parametrize("ingest_format", [None, *bulk_ingest.IngestFormat])
+def test_read_practice_sets(
+    activities: routine.Activities,
+    ingest_format: typing.Optional[bulk_ingest.IngestFormat],
+) -> None:
+    first = activities.activities[0]
+    rows: list[dict[str, typing.Any]] = [
+        {"activity": "first", "score": 0, "date_time": "2024-01-01T10:00:00+00:00"},
+        {
+            "activity": first.get_key(),
+            "score": results.POSSIBLE_SCORES[4],
+            "date_time": "2024-01-02T10:00:00-05:00",
+        },
+        {"activity": "second", "score": "2", "date_time": "2024-01-03T10:00:00"},
+    ]
+    if ingest_format == bulk_ingest.IngestFormat.NDJSON:
+        lines = [json.dumps(x) for x in rows]
+    else:
+        lines = ["activity,score,date_time"] + [
+            f'{x["activity"]},"{x["score"]}",{x["date_time"]}' for x in rows
+        ]
+
+    columns = bulk_ingest.read_practice_sets(lines, activities, ingest_format)
+    assert _get_practice_sets(columns) == [
+        results.PracticeSet(
+            first.get_key(),
+            0,
+            datetime.datetime(2024, 1, 1, 10, tzinfo=datetime.timezone.utc),
+        ),
+        results.PracticeSet(
+            first.get_key(),
+            4,
+            datetime.datetime.fromisoformat("2024-01-02T10:00:00-05:00"),
+        ),
+        results.PracticeSet(
+            activities.activities[1].get_key(),
+            2,
+            datetime.datetime(2024, 1, 3, 10),
+        ),
+    ]
+
+
+def test_detect_format() -> None:
+    assert bulk_ingest.detect_format(' {"a": 1}') == bulk_ingest.IngestFormat.NDJSON
+    assert bulk_ingest.detect_format("activity,score") == bulk_ingest.IngestFormat.CSV
+    assert bulk_ingest.detect_format("") == bulk_ingest.IngestFormat.CSV
+
+
+def test_invalid_lines(activities: routine.Activities) -> None:
+    lines = [
+        '{"activity": "first", "score": 1, "date_time": "2024-01-01T10:00:00"}',
+        '{"activity": "third", "score": 1, "date_time": "2024-01-01T10:00:00"}',
+        '{"activity": "first", "score": 5, "date_time": "2024-01-01T10:00:00"}',
+        '{"activity": "first", "score": true, "date_time": "2024-01-01T10:00:00"}',
+        '{"activity": "first", "score": 1, "date_time": "yesterday"}',
+        '{"activity": "first"}',
+        "not json",
+        "",
+    ]
+    with pytest.raises(bulk_ingest.InvalidIngestError) as exc_info:
+        bulk_ingest.read_practice_sets(lines, activities)
+    assert str(exc_info.value).splitlines() == [
+        "6 invalid lines, nothing was ingested:",
+        'Line 2: Unknown activity "third"',
+        "Line 3: Invalid score 5, expected 0-4",
+        "Line 4: Invalid score True, expected 0-4",
+        "Line 6: Missing score, date_time",
+        "Line 7: Missing activity, score, date_time",
+        'Line 5: date_time isn\'t in iso format, got "yesterday"',
+    ]
+
+
+def test_too_many_invalid_lines(activities: routine.Activities) -> None:
+    lines = ["activity,score,date_time"] + ["third,1,2024-01-01T10:00:00"] * 15
+    with pytest.raises(bulk_ingest.InvalidIngestError, match="and 5 more"):
+        bulk_ingest.read_practice_sets(lines, activities)
+
+
+def test_missing_csv_column(activities: routine.Activities) -> None:
+    with pytest.raises(
+        bulk_ingest.InvalidIngestError, match="The CSV header is missing date_time"
+    ):
+        bulk_ingest.read_practice_sets(["activity,score", "first,1"], activities)
+
+
+def test_ingest(tmp_path: pathlib.Path, activities: routine.Activities) -> None:
+    practices_file = pathlib.Path(tmp_path, "practices.journal")
+    practices = results.Practices(practices_file, results.PracticesFileFormat.JOURNAL)
+    added_practice_sets: list[results.PracticeSet] = []
+    practices.add_listener(added_practice_sets.append)
+    lines = ["activity,score,date_time"] + [
+        f"first,{x % 5},2024-01-01T10:00:{x:02d}+00:00" for x in range(50)
+    ]
+    columns = bulk_ingest.read_practice_sets(lines, activities)
+
+    bulk_ingest.ingest(practices, columns)
+
+    assert added_practice_sets == _get_practice_sets(columns)
+    assert results.Practices(practices_file).get_practice_sets() == (
+        _get_practice_sets(columns)
+    )
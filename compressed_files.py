@@ -0,0 +1,230 @@
+"""Module reading and writing gzip or zlib compressed files as streams.
+
+A compressed file is a series of members, each compressed on its own,
+which read as the concatenation of their contents. Appending to a file
+adds a member, rather than recompressing the members before it.
+"""
+
+import contextlib
+import enum
+import io
+import os
+import pathlib
+import typing
+import zlib
+
+
+class CompressedFileError(Exception):
+    """A compressed file is corrupt or truncated."""
+
+
+class Compression(enum.StrEnum):
+    """The compressions a file can be stored with."""
+
+    NONE = "none"
+    # Members are gzip members, as written by gzip.
+    GZIP = "gzip"
+    # Members are zlib streams, as written by zlib.compress.
+    ZLIB = "zlib"
+
+
+# The compression of a new file with each extension.
+_EXTENSION_COMPRESSIONS = {
+    ".gz": Compression.GZIP,
+    ".gzip": Compression.GZIP,
+    ".zz": Compression.ZLIB,
+    ".zlib": Compression.ZLIB,
+}
+
+# The wbits zlib reads and writes each compression's members with.
+_COMPRESSION_WBITS = {
+    Compression.GZIP: 16 + zlib.MAX_WBITS,
+    Compression.ZLIB: zlib.MAX_WBITS,
+}
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+# The number of compressed bytes read at a time.
+_CHUNK_SIZE = 64 * 1024
+
+
+def detect_compression(header: bytes) -> Compression:
+    """Returns the compression of a file starting with header.
+
+    At least the first 2 bytes of the file are needed.
+    """
+    if header.startswith(_GZIP_MAGIC):
+        return Compression.GZIP
+    # A zlib header is the deflate method, a window of up to 32KiB, no
+    # preset dictionary and a checksum. A digit of a text file's count
+    # is never taken as one, as it has the preset dictionary bit.
+    if (
+        len(header) >= 2
+        and header[0] & 0x0F == 8
+        and header[0] >> 4 <= 7
+        and not header[1] & 0x20
+        and (header[0] << 8 | header[1]) % 31 == 0
+    ):
+        return Compression.ZLIB
+    return Compression.NONE
+
+
+def get_compression(path: pathlib.Path) -> Compression:
+    """Returns the compression of the file at path.
+
+    An existing file's compression is detected from its header, the
+    compression of an empty or missing file is chosen by its extension.
+    """
+    try:
+        with open(path, "rb") as f:
+            header = f.read(2)
+    except FileNotFoundError:
+        header = b""
+    if header:
+        return detect_compression(header)
+    return _EXTENSION_COMPRESSIONS.get(path.suffix.lower(), Compression.NONE)
+
+
+def get_reader(f: typing.BinaryIO) -> typing.BinaryIO:
+    """Returns a stream of the decompressed contents of f.
+
+    The compression is detected from the header at f's position, f
+    itself is returned if it isn't compressed. Otherwise the stream
+    decompresses f a chunk at a time as it's read, so the whole of
+    neither the compressed nor the decompressed contents is held in
+    memory. The stream can seek, but seeking backwards decompresses f
+    again from the start.
+
+    Reading the stream raises CompressedFileError if f is corrupt.
+    """
+    start = f.tell()
+    compression = detect_compression(f.read(2))
+    f.seek(start)
+    if compression == Compression.NONE:
+        return f
+    return typing.cast(
+        typing.BinaryIO, io.BufferedReader(_DecompressingReader(f, compression))
+    )
+
+
+@contextlib.contextmanager
+def open_writer(
+    path: pathlib.Path, compression: Compression, append: bool = False
+) -> typing.Iterator[typing.BinaryIO]:
+    """Opens path to write, compressed with compression.
+
+    Everything written is compressed as a new member, which is appended
+    to the file if append is True, otherwise the file is replaced. The
+    file is synced to disk on exit.
+    """
+    with open(path, "ab" if append else "wb") as f:
+        if compression == Compression.NONE:
+            yield f
+        else:
+            with io.BufferedWriter(_CompressingWriter(f, compression)) as writer:
+                yield typing.cast(typing.BinaryIO, writer)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class _DecompressingReader(io.RawIOBase):
+    """Reads the decompressed contents of the members of a file.
+
+    The members are decompressed as they're read, from a chunk of the
+    compressed file at a time.
+    """
+
+    def __init__(self, f: typing.BinaryIO, compression: Compression):
+        """Creates a _DecompressingReader of f, from its position."""
+        super().__init__()
+        self._file = f
+        self._wbits = _COMPRESSION_WBITS[compression]
+        self._start = f.tell()
+        self._decompressor = zlib.decompressobj(self._wbits)
+        # Compressed bytes read from the file, but not yet decompressed.
+        self._input = b""
+        # If the current member has been started, but not finished.
+        self._in_member = False
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def readinto(self, buffer: typing.Any) -> int:
+        with memoryview(buffer) as view, view.cast("B") as byte_view:
+            data = self._read(len(byte_view))
+            byte_view[: len(data)] = data
+        return len(data)
+
+    def _read(self, size: int) -> bytes:
+        """Returns up to size decompressed bytes, none at the end."""
+        while True:
+            if not self._input:
+                self._input = self._file.read(_CHUNK_SIZE)
+                if not self._input:
+                    if self._in_member:
+                        raise CompressedFileError("The last member is truncated")
+                    return b""
+
+            if self._decompressor.eof:
+                # The next member starts right after the last one.
+                self._decompressor = zlib.decompressobj(self._wbits)
+            try:
+                data = self._decompressor.decompress(self._input, size)
+            except zlib.error as e:
+                raise CompressedFileError("A member is corrupt") from e
+            self._in_member = not self._decompressor.eof
+            if self._decompressor.eof:
+                self._input = self._decompressor.unused_data
+            else:
+                self._input = self._decompressor.unconsumed_tail
+
+            if data:
+                self._position += len(data)
+                return data
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("Can't seek from the end")
+
+        if offset < self._position:
+            self._file.seek(self._start)
+            self._decompressor = zlib.decompressobj(self._wbits)
+            self._input = b""
+            self._in_member = False
+            self._position = 0
+        while self._position < offset:
+            if not self._read(min(_CHUNK_SIZE, offset - self._position)):
+                break
+        return self._position
+
+
+class _CompressingWriter(io.RawIOBase):
+    """Writes a member to a file, finished when closed."""
+
+    def __init__(self, f: typing.BinaryIO, compression: Compression):
+        """Creates a _CompressingWriter to f, at its position."""
+        super().__init__()
+        self._file = f
+        self._compressor = zlib.compressobj(wbits=_COMPRESSION_WBITS[compression])
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, buffer: typing.Any) -> int:
+        with memoryview(buffer) as view:
+            self._file.write(self._compressor.compress(view))
+            return view.nbytes
+
+    def close(self) -> None:
+        if not self.closed:
+            self._file.write(self._compressor.flush())
+        super().close()
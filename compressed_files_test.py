@@ -0,0 +1,99 @@
+import gzip
+import io
+import pathlib
+import zlib
+
+import pytest
+
+import compressed_files
+
+
+@pytest.mark.parametrize(
+    ("header", "expected_compression"),
+    [
+        (gzip.compress(b"data"), compressed_files.Compression.GZIP),
+        (zlib.compress(b"data"), compressed_files.Compression.ZLIB),
+        (zlib.compress(b"data", 1), compressed_files.Compression.ZLIB),
+        (b"80\n", compressed_files.Compression.NONE),
+        (b"8\n", compressed_files.Compression.NONE),
+        (b"deliberate-practice-journal v1\n", compressed_files.Compression.NONE),
+        (b"", compressed_files.Compression.NONE),
+    ],
+)
+def test_detect_compression(
+    header: bytes, expected_compression: compressed_files.Compression
+) -> None:
+    assert compressed_files.detect_compression(header) == expected_compression
+
+
+def test_get_compression(tmp_path: pathlib.Path) -> None:
+    assert (
+        compressed_files.get_compression(pathlib.Path(tmp_path, "practices.gz"))
+        == compressed_files.Compression.GZIP
+    )
+    assert (
+        compressed_files.get_compression(pathlib.Path(tmp_path, "practices.zz"))
+        == compressed_files.Compression.ZLIB
+    )
+
+    # An existing file's header wins over its extension.
+    existing_file = pathlib.Path(tmp_path, "existing.gz")
+    existing_file.write_bytes(b"3\n")
+    assert (
+        compressed_files.get_compression(existing_file)
+        == compressed_files.Compression.NONE
+    )
+
+
+@pytest.mark.parametrize(
+    "compression",
+    [compressed_files.Compression.GZIP, compressed_files.Compression.ZLIB],
+)
+def test_appended_members_read_together(
+    tmp_path: pathlib.Path, compression: compressed_files.Compression
+) -> None:
+    path = pathlib.Path(tmp_path, "file")
+    with compressed_files.open_writer(path, compression) as f:
+        f.write(b"first\n" * 10000)
+    with compressed_files.open_writer(path, compression, append=True) as f:
+        f.write(b"second\n")
+
+    with open(path, "rb") as raw_file:
+        f = compressed_files.get_reader(raw_file)
+        assert f is not raw_file
+        assert f.read() == b"first\n" * 10000 + b"second\n"
+
+        f.seek(6 * 10000)
+        assert f.readline() == b"second\n"
+        f.seek(0)
+        assert f.readline() == b"first\n"
+
+    if compression == compressed_files.Compression.GZIP:
+        assert gzip.decompress(path.read_bytes()) == b"first\n" * 10000 + b"second\n"
+
+
+def test_uncompressed(tmp_path: pathlib.Path) -> None:
+    path = pathlib.Path(tmp_path, "file")
+    with compressed_files.open_writer(path, compressed_files.Compression.NONE) as f:
+        f.write(b"data")
+    assert path.read_bytes() == b"data"
+
+    with open(path, "rb") as raw_file:
+        assert compressed_files.get_reader(raw_file) is raw_file
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        # Truncated.
+        gzip.compress(b"data" * 100)[:-10],
+        # Corrupt.
+        gzip.compress(b"data")[:10] + b"\xff" * 20,
+        # Not a member after the first.
+        gzip.compress(b"data") + b"\x00\x01",
+    ],
+)
+def test_corrupt(data: bytes) -> None:
+    f = compressed_files.get_reader(io.BytesIO(data))
+    with pytest.raises(compressed_files.CompressedFileError):
+        f.read()
@@ -1,13 +1,31 @@
 """Main entry point for the Deliberate Practice CLI."""
 
+import argparse
+import contextlib
 import datetime
 import enum
+import functools
+import os
 import pathlib
+import sys
+import time
+import typing
 
+import activity_index
+import bulk_ingest
+import evaluation
+import evaluation_cache
+import journal_repair
+import phase_profiler
+import practices_merge
+import report
 import results
 import routine
+import scheduler
 import settings
+import sharding
 import user_input
+import write_behind
 
 
 class InvalidModeError(Exception):
@@ -19,6 +37,17 @@ class RunMode(enum.StrEnum):
 
     PRACTICE = "Practice"
     EVALUATION = "Evaluation"
+    REPAIR = "Repair"
+
+
+# The windows Evaluation mode can be limited to, by the number of days
+# back from now they start, None for all time.
+EVALUATION_WINDOW_DAYS: dict[str, typing.Optional[int]] = {
+    "All time": None,
+    "Last 7 days": 7,
+    "Last 30 days": 30,
+    "Last 365 days": 365,
+}
 
 
 def select_run_mode(fetch_input: user_input.FetchInput) -> RunMode:
@@ -34,14 +63,39 @@ def select_run_mode(fetch_input: user_input.FetchInput) -> RunMode:
     return RunMode(picked_mode)
 
 
+def select_evaluation_window(
+    fetch_input: user_input.FetchInput,
+) -> typing.Optional[results.DateWindow]:
+    """Prompts the user for the window of time to evaluate.
+
+    Returns None to evaluate all the practice sets.
+    """
+    choices = list(EVALUATION_WINDOW_DAYS)
+    picked_index = user_input.prompt_for_choice(
+        fetch_input, "Which practice sets do you wish to evaluate?", choices
+    )
+    days = EVALUATION_WINDOW_DAYS[choices[picked_index]]
+    if days is None:
+        return None
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return results.DateWindow(since=now - datetime.timedelta(days=days))
+
+
 def run_practice_mode(
     fetch_input: user_input.FetchInput,
     activities: routine.Activities,
     practices: results.Practices,
+    picking_strategy: scheduler.PickingStrategy = scheduler.PickingStrategy.SCHEDULED,
+    practice_tags: typing.Optional[list[str]] = None,
 ) -> int:
     """Runs Practice mode with the given activites.
 
-    Results are saved to the given practices instance.
+    Results are saved to the given practices instance, by a background
+    thread that has finished by the time this returns. The activities
+    are picked by picking_strategy, by default the ones that are weak
+    or haven't been practiced in a while come first. Either way, the
+    activities are picked more often the higher their weights, from
+    only those with any of the practice_tags if given.
 
     Returns the number of practice sets completed.
     """
@@ -55,57 +109,370 @@ def run_practice_mode(
         f"{activity_word} you can practice."
     )
 
+    if practice_tags and not set(practice_tags).intersection(activities.get_tags()):
+        print(f"No activities tagged {', '.join(practice_tags)}, nothing to practice.")
+        return 0
+    if picking_strategy == scheduler.PickingStrategy.SCHEDULED:
+        pick_activity = scheduler.Scheduler(
+            activities, practices, practice_tags
+        ).get_next_activity
+    else:
+        pick_activity = functools.partial(activities.get_random_activity, practice_tags)
+
     activities_done = 0
-    while user_input.prompt_yes_or_no(
-        fetch_input, "Do you wish to practice an activity?"
-    ):
-        chosen_activity = activities.get_random_activity()
-        print(f"\nThe chosen activity is:\n\t{chosen_activity.get_description()}\n")
-
-        user_prompt = "How did you do on this activity?"
-        user_score = user_input.prompt_for_choice(
-            fetch_input, user_prompt, results.POSSIBLE_SCORES
-        )
-        print("Keep up the good work\n")
+    # Saving in the background keeps the prompts from waiting on disk.
+    with write_behind.WriteBehindSaver(practices) as saver:
+        while user_input.prompt_yes_or_no(
+            fetch_input, "Do you wish to practice an activity?"
+        ):
+            chosen_activity = pick_activity()
+            print(f"\nThe chosen activity is:\n\t{chosen_activity.get_description()}\n")
+
+            user_prompt = "How did you do on this activity?"
+            user_score = user_input.prompt_for_choice(
+                fetch_input, user_prompt, results.POSSIBLE_SCORES
+            )
+            print("Keep up the good work\n")
 
-        activities_done += 1
+            activities_done += 1
 
-        current_time = datetime.datetime.now(datetime.timezone.utc)
-        practices.add_practice_set(chosen_activity, user_score, current_time)
-        practices.save()
+            current_time = datetime.datetime.now(datetime.timezone.utc)
+            practices.add_practice_set(chosen_activity, user_score, current_time)
+            saver.save()
 
     return activities_done
 
 
-def main(
+def load_optional_activities(
+    activities_file: pathlib.Path,
+) -> typing.Optional[routine.Activities]:
+    """Returns the Activities in activities_file, None if it's invalid.
+
+    This is for modes that can still run without any activities.
+    """
+    try:
+        return routine.Activities(activities_file)
+    except routine.InvalidActivitiesFileError:
+        return None
+
+
+def write_report(
+    fetch_input: user_input.FetchInput,
+    practice_evaluation: evaluation.Evaluation,
+    report_writer: report.ReportWriter,
+) -> None:
+    """Writes the report of practice_evaluation a page at a time.
+
+    The user is asked before each page after the first.
+    """
+    num_pages = report_writer.get_num_pages(practice_evaluation)
+    report_writer.write(practice_evaluation)
+    for page in range(1, num_pages):
+        if not user_input.prompt_yes_or_no(
+            fetch_input, f"Show page {page + 1} of {num_pages}?"
+        ):
+            break
+        report_writer.write(practice_evaluation, page)
+
+
+def load_practices(practices_file: pathlib.Path) -> results.Practices:
+    """Returns the Practices in practices_file, to add practice sets to.
+
+    New practices files are journals, so saving new practice sets only
+    appends them rather than rewriting the file. Existing text files are
+    converted to a journal by the first save, keeping a backup of the
+    text file. A directory of monthly shards appends to each month's
+    journal.
+    """
+    if practices_file.is_dir():
+        return sharding.ShardedPractices(practices_file)
+    practices = results.Practices(practices_file, results.PracticesFileFormat.JOURNAL)
+    if practices.file_format == results.PracticesFileFormat.TEXT:
+        practices.convert_to_journal()
+    return practices
+
+
+def run_ingest(
+    lines: typing.Iterable[str],
+    activities_file: pathlib.Path,
+    practices_file: pathlib.Path,
+    ingest_format: typing.Optional[bulk_ingest.IngestFormat] = None,
+) -> int:
+    """Adds the practice sets in lines to practices_file, in one save.
+
+    Unlike Practice mode, nothing is prompted for and the only output
+    is a summary once they're saved.
+
+    Returns the number of practice sets ingested.
+
+    Raises:
+        InvalidIngestError: Any of the lines is invalid, in which case
+            nothing is ingested.
+    """
+    with phase_profiler.phase("load activities"):
+        activities = routine.Activities(activities_file)
+        if activities.has_unsaved_ids():
+            activities.save()
+    with phase_profiler.phase("validate"):
+        columns = bulk_ingest.read_practice_sets(lines, activities, ingest_format)
+    with phase_profiler.phase("load practices"):
+        practices = load_practices(practices_file)
+    with phase_profiler.phase("save practices"):
+        bulk_ingest.ingest(practices, columns)
+    print(f"Ingested {len(columns)} practice sets into {practices_file}.")
+    return len(columns)
+
+
+def run_merge(
+    practices_files: list[pathlib.Path], output_file: pathlib.Path
+) -> practices_merge.MergeStats:
+    """Merges practices_files, and any output_file, into output_file.
+
+    Raises:
+        InvalidModeError: The output_file is a directory of shards.
+    """
+    if output_file.is_dir():
+        raise InvalidModeError(f"Can't merge into the shards in {output_file}")
+    with phase_profiler.phase("merge"):
+        merge_stats = practices_merge.merge_practices_files(
+            [output_file, *practices_files], output_file
+        )
+    print(
+        f"Merged {merge_stats.num_read} practice sets into {output_file}, "
+        f"{merge_stats.num_written} after dropping {merge_stats.num_duplicates} "
+        "duplicates."
+    )
+    return merge_stats
+
+
+def print_activity_evaluation(
+    activity_name: str, activities_file: pathlib.Path, practices_file: pathlib.Path
+) -> evaluation.ActivityEvaluation:
+    """Prints the evaluation of the activity named by activity_name.
+
+    The activity_name is its key or description. Only its practice sets
+    are read, through the index next to the practices_file.
+
+    Raises:
+        InvalidModeError: No activity is named activity_name.
+    """
+    with phase_profiler.phase("load activities"):
+        activity = routine.Activities(activities_file).get_activity(activity_name)
+    if activity is None:
+        raise InvalidModeError(f'Unknown activity "{activity_name}"')
+    with phase_profiler.phase("evaluate"):
+        activity_evaluation = activity_index.evaluate_activity(
+            practices_file, activity, summary=True
+        )
+    print(activity_evaluation, end="")
+    return activity_evaluation
+
+
+def repair_practices_file(practices_file: pathlib.Path) -> None:
+    """Repairs practices_file, printing the damaged regions removed."""
+    corrupt_regions = journal_repair.repair_practices(practices_file)
+    if not corrupt_regions:
+        print(f"No damaged blocks found in {practices_file}.")
+        return
+    for region in corrupt_regions:
+        print(f"Removed bytes {region.start}-{region.stop}: {region.reason}")
+    print(
+        f"Repaired {len(corrupt_regions)} damaged regions, each was copied to "
+        f"the {journal_repair.QUARANTINE_SUFFIX} file next to its journal."
+    )
+
+
+def main(  # pylint: disable=too-many-arguments
     fetch_input: user_input.FetchInput,
     activities_file: pathlib.Path,
     practices_file: pathlib.Path,
+    picking_strategy: scheduler.PickingStrategy = scheduler.PickingStrategy.SCHEDULED,
+    report_writer: typing.Optional[report.ReportWriter] = None,
+    *,
+    practice_tags: typing.Optional[list[str]] = None,
 ) -> None:
     """Starts the Deliberate Practice CLI.
 
+    In Practice mode, the activities are picked by picking_strategy,
+    from only those with any of the practice_tags if given.
+    In Evaluation mode, the report is written by report_writer, by
+    default as text to stdout. Repair mode removes damaged blocks from
+    a journal.
+
     Raises:
         InvalidModeError: An unsupported mode was selected.
     """
     selected_run_mode = select_run_mode(fetch_input)
     if selected_run_mode == RunMode.PRACTICE:
         print("\nStaring Practice Mode")
-        activities = routine.Activities(activities_file)
-        practices = results.Practices(practices_file)
+        with phase_profiler.phase("load activities"):
+            activities = routine.Activities(activities_file)
+            # Keep the ids in the activity file, so an activity's
+            # practice sets still match it after its description is
+            # edited.
+            if activities.has_unsaved_ids():
+                activities.save()
+        with phase_profiler.phase("load practices"):
+            practices = load_practices(practices_file)
 
-        run_practice_mode(fetch_input, activities, practices)
+        with phase_profiler.phase("practice"):
+            run_practice_mode(
+                fetch_input, activities, practices, picking_strategy, practice_tags
+            )
     elif selected_run_mode == RunMode.EVALUATION:
         print("\nStarting Evaluation Mode")
-        practices = results.Practices(practices_file)
-        evaluation = results.Evaluation(practices)
-        print(evaluation)
+        with phase_profiler.phase("load activities"):
+            optional_activities = load_optional_activities(activities_file)
+        practice_evaluation = build_evaluation(
+            practices_file,
+            optional_activities,
+            select_evaluation_window(fetch_input),
+        )
+        with phase_profiler.phase("write report"):
+            write_report(
+                fetch_input,
+                practice_evaluation,
+                report.ReportWriter() if report_writer is None else report_writer,
+            )
+    elif selected_run_mode == RunMode.REPAIR:
+        print("\nStarting Repair Mode")
+        with phase_profiler.phase("repair"):
+            repair_practices_file(practices_file)
     else:
         raise InvalidModeError(f"Unexpected mode given, {selected_run_mode}")
 
 
-if __name__ == "__main__":
-    main(
-        input,
-        settings.ACTIVITIES_FILE,
-        settings.PRACTICES_FILE,
+def build_evaluation(
+    practices_file: pathlib.Path,
+    activities: typing.Optional[routine.Activities],
+    window: typing.Optional[results.DateWindow],
+) -> evaluation.Evaluation:
+    """Returns the summary Evaluation of practices_file in window."""
+    if practices_file.is_dir():
+        # The shards in the window are loaded into columns by a pool of
+        # processes, then evaluated in bulk.
+        with phase_profiler.phase("load practices"):
+            sharded_practices = sharding.ShardedPractices(practices_file, window)
+        with phase_profiler.phase("evaluate"):
+            return evaluation.Evaluation(
+                sharded_practices, activities=activities, summary=True
+            )
+    if window is not None:
+        # Finds the practice sets in the window by binary search of the
+        # practices' index by time.
+        with phase_profiler.phase("load practices"):
+            practices = results.Practices(practices_file)
+        with phase_profiler.phase("evaluate"):
+            return evaluation.Evaluation(
+                practices, activities=activities, window=window, summary=True
+            )
+    # The evaluation is cached next to the practices file, so only
+    # practice sets added since the last evaluation are read.
+    with phase_profiler.phase("evaluate"):
+        return evaluation_cache.load_evaluation(practices_file, activities)
+
+
+def parse_args(args: list[str]) -> argparse.Namespace:
+    """Returns the command line options parsed from args."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="1",
+        default=os.environ.get(phase_profiler.PROFILE_ENV_VAR),
+        metavar="CPROFILE_FILE",
+        help=(
+            "Print the wall time and peak memory of each phase of the run on "
+            "exit, and dump cProfile stats to CPROFILE_FILE if given. Also "
+            f"set by the {phase_profiler.PROFILE_ENV_VAR} environment variable."
+        ),
+    )
+    parser.add_argument(
+        "--ingest",
+        metavar="SOURCE",
+        help=(
+            "Add the practice sets in the CSV or NDJSON file SOURCE, or stdin "
+            "if it's -, then exit without prompting."
+        ),
+    )
+    parser.add_argument(
+        "--ingest-format",
+        type=bulk_ingest.IngestFormat,
+        choices=list(bulk_ingest.IngestFormat),
+        help="The format of --ingest, detected from its first line by default.",
+    )
+    parser.add_argument(
+        "--merge",
+        nargs="+",
+        type=pathlib.Path,
+        metavar="PRACTICES_FILE",
+        help=(
+            "Merge the practice sets in each PRACTICES_FILE, e.g. from other "
+            "machines, into the practices file, then exit without prompting."
+        ),
+    )
+    parser.add_argument(
+        "--activity",
+        metavar="ACTIVITY",
+        help=(
+            "Print the evaluation of the activity with the key or description "
+            "ACTIVITY, reading only its practice sets through an index kept "
+            "next to the practices file, then exit without prompting."
+        ),
     )
+    return parser.parse_args(args)
+
+
+def run_cli(args: argparse.Namespace) -> None:
+    """Runs the CLI with the parsed command line options."""
+    if args.merge is not None:
+        run_merge(args.merge, settings.PRACTICES_FILE)
+    elif args.activity is not None:
+        print_activity_evaluation(
+            args.activity, settings.ACTIVITIES_FILE, settings.PRACTICES_FILE
+        )
+    elif args.ingest is None:
+        main(
+            input,
+            settings.ACTIVITIES_FILE,
+            settings.PRACTICES_FILE,
+            scheduler.PickingStrategy(settings.PICKING_STRATEGY),
+            report.ReportWriter(
+                report_format=report.ReportFormat(settings.REPORT_FORMAT),
+                sort_by=report.SortMetric(settings.REPORT_SORT_BY),
+                descending=settings.REPORT_DESCENDING,
+                top=settings.REPORT_TOP,
+                page_size=settings.REPORT_PAGE_SIZE,
+            ),
+            practice_tags=settings.PRACTICE_TAGS,
+        )
+    elif args.ingest == "-":
+        run_ingest(
+            user_input.iter_input_lines(input),
+            settings.ACTIVITIES_FILE,
+            settings.PRACTICES_FILE,
+            args.ingest_format,
+        )
+    else:
+        with open(args.ingest, encoding="utf-8", newline="") as f:
+            run_ingest(
+                f, settings.ACTIVITIES_FILE, settings.PRACTICES_FILE, args.ingest_format
+            )
+
+
+if __name__ == "__main__":
+    parsed_args = parse_args(sys.argv[1:])
+    profiler = phase_profiler.create_profiler(parsed_args.profile)
+    if profiler is not None:
+        # What the interpreter's startup and the imports took, as CPU
+        # time, since the wall time before the Profiler isn't known.
+        profiler.add_phase("startup (CPU)", time.process_time())
+    try:
+        with profiler or contextlib.nullcontext():
+            run_cli(parsed_args)
+    except bulk_ingest.InvalidIngestError as e:
+        sys.exit(str(e))
+    finally:
+        # Written to stderr, so it stays out of a report on stdout.
+        if profiler is not None:
+            profiler.write_summary(sys.stderr)
@@ -4,8 +4,13 @@ import pathlib
 import pytest
 
 import deliberate_practice
+import journal_frames
+import phase_profiler
+import report
 import results
 import routine
+import scheduler
+import sharding
 import user_input
 from test_utils import mocks
 
@@ -15,6 +20,7 @@ from test_utils import mocks
     [
         (1, deliberate_practice.RunMode.PRACTICE),
         (2, deliberate_practice.RunMode.EVALUATION),
+        (3, deliberate_practice.RunMode.REPAIR),
     ],
 )
 def test_select_run_mode_choice_made(
@@ -31,9 +37,12 @@ def test_select_run_mode_no_choice() -> None:
         deliberate_practice.select_run_mode(input_mock)
 
 
+@pytest.mark.parametrize("picking_strategy", list(scheduler.PickingStrategy))
 @pytest.mark.parametrize("number_of_practice_sets", [0, 1, 10, 100])
 def test_run_practice_mode(
-    tmp_path: pathlib.Path, number_of_practice_sets: int
+    tmp_path: pathlib.Path,
+    number_of_practice_sets: int,
+    picking_strategy: scheduler.PickingStrategy,
 ) -> None:
     activity_file = pathlib.Path(tmp_path, "activities.txt")
     with open(activity_file, "w", encoding="utf-8") as f:
@@ -56,11 +65,46 @@ def test_run_practice_mode(
         ]
     )
     activites_done = deliberate_practice.run_practice_mode(
-        mock_input, activities, practices
+        mock_input, activities, practices, picking_strategy
     )
     assert activites_done == number_of_practice_sets
 
 
+@pytest.mark.parametrize("picking_strategy", list(scheduler.PickingStrategy))
+def test_run_practice_mode_tags(
+    tmp_path: pathlib.Path,
+    capsys: pytest.CaptureFixture[str],
+    picking_strategy: scheduler.PickingStrategy,
+) -> None:
+    activity_file = pathlib.Path(tmp_path, "activities.txt")
+    activity_file.write_text(
+        "[id=a1 tags=piano] Scales\n[id=a2 tags=guitar] Chords\n", encoding="utf-8"
+    )
+    activities = routine.Activities(activity_file)
+    practices = results.Practices(pathlib.Path(tmp_path, "practices.txt"))
+
+    deliberate_practice.run_practice_mode(
+        mocks.MockInput(["Y", "2"] * 5 + ["N"]),
+        activities,
+        practices,
+        picking_strategy,
+        ["piano"],
+    )
+    assert {x.activity_key for x in practices.get_practice_sets()} == {"a1"}
+
+    capsys.readouterr()
+    assert not deliberate_practice.run_practice_mode(
+        mocks.MockInput([]),
+        activities,
+        practices,
+        picking_strategy,
+        ["drums"],
+    )
+    assert capsys.readouterr().out.endswith(
+        "No activities tagged drums, nothing to practice.\n"
+    )
+
+
 def test_main_practice_one_activity(
     tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]
 ) -> None:
@@ -84,7 +128,8 @@ def test_main_practice_one_activity(
         "Welcome to the Deliberate Practice CLI\n"
         "Which mode do you wish to run in?\n"
         "1) Practice\n"
-        "2) Evaluation\n\n"
+        "2) Evaluation\n"
+        "3) Repair\n\n"
         "Staring Practice Mode\n"
         "Note: No Practices file found. Starting from an empty state\n"
         "You currently have 1 activity you can practice.\n"
@@ -104,6 +149,12 @@ def test_main_practice_one_activity(
     captured_output = capsys.readouterr().out
     assert expected_output in captured_output
 
+    # The activity's id is kept in the activity file.
+    activity_key = routine.Activity("practice_activity").get_key()
+    assert activity_file.read_text(encoding="utf-8") == (
+        f"[id={activity_key}] practice_activity\n"
+    )
+
 
 def test_main_practice_multiple_activity(
     tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]
@@ -131,7 +182,8 @@ def test_main_practice_multiple_activity(
         "Welcome to the Deliberate Practice CLI\n"
         "Which mode do you wish to run in?\n"
         "1) Practice\n"
-        "2) Evaluation\n\n"
+        "2) Evaluation\n"
+        "3) Repair\n\n"
         "Staring Practice Mode\n"
         "Note: No Practices file found. Starting from an empty state\n"
         f"You currently have {num_activities} activities you can practice.\n"
@@ -174,12 +226,14 @@ def test_main_evaluation(
     mock_input = mocks.MockInput(
         [
             "2",  # Start Evaluation Mode.
+            "1",  # Evaluate all time.
         ]
     )
     deliberate_practice.main(mock_input, activity_file, practices_file)
 
     expected_output = (
-        "Starting Evaluation Mode\n"
+        "Which practice sets do you wish to evaluate?\n"
+        "1) All time\n2) Last 7 days\n3) Last 30 days\n4) Last 365 days\n"
         f"1 activity has been completed {num_practice_sets} times.\n\n"
         "practice_activity\n"
         f"\tPracticed {num_practice_sets} times.\n"
@@ -189,3 +243,274 @@ def test_main_evaluation(
     )
     captured = capsys.readouterr()
     assert expected_output in captured.out
+
+
+def test_main_sharded_practices(
+    tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    activity_file = pathlib.Path(tmp_path, "activities.txt")
+    with open(activity_file, "w", encoding="utf-8") as f:
+        f.write("practice_activity")
+
+    practices_dir = pathlib.Path(tmp_path, "practices")
+    practices_dir.mkdir()
+
+    mock_input = mocks.MockInput(
+        [
+            "1",  # Start Practice Mode.
+            "Y",  # Practice an activity.
+            "2",  # Score the activty a 2.
+            "N",  # Don't practice another, should exit.
+        ]
+    )
+    deliberate_practice.main(mock_input, activity_file, practices_dir)
+    assert sharding.ShardedPractices(practices_dir).get_num_practice_sets() == 1
+
+    mock_input = mocks.MockInput(
+        [
+            "2",  # Start Evaluation Mode.
+            "1",  # Evaluate all time.
+        ]
+    )
+    deliberate_practice.main(mock_input, activity_file, practices_dir)
+    expected_output = (
+        "Which practice sets do you wish to evaluate?\n"
+        "1) All time\n2) Last 7 days\n3) Last 30 days\n4) Last 365 days\n"
+        "1 activity has been completed 1 times.\n\n"
+        "practice_activity\n"
+        "\tPracticed 1 times.\n"
+    )
+    assert expected_output in capsys.readouterr().out
+
+
+def test_build_evaluation_sharded(tmp_path: pathlib.Path) -> None:
+    practices = sharding.ShardedPractices(tmp_path)
+    activity = routine.Activity("Scales")
+    for month in [1, 2, 3]:
+        time = datetime.datetime(2024, month, 1, tzinfo=datetime.timezone.utc)
+        practices.add_practice_set(activity, month, time)
+    practices.save()
+    window = results.DateWindow(
+        datetime.datetime(2024, 2, 1, tzinfo=datetime.timezone.utc),
+        datetime.datetime(2024, 3, 1, tzinfo=datetime.timezone.utc),
+    )
+
+    practice_evaluation = deliberate_practice.build_evaluation(tmp_path, None, window)
+
+    assert practice_evaluation.get_num_of_practice_sets() == 1
+    assert practice_evaluation.get_activity_evaluation(0).get_latest_score() == 2
+
+
+@pytest.mark.parametrize(
+    ("show_next_page", "expected_keys"), [("Y", ["a", "b", "c"]), ("N", ["a"])]
+)
+def test_main_evaluation_pages(
+    tmp_path: pathlib.Path,
+    capsys: pytest.CaptureFixture[str],
+    show_next_page: str,
+    expected_keys: list[str],
+) -> None:
+    activity_file = pathlib.Path(tmp_path, "activities.txt")
+    with open(activity_file, "w", encoding="utf-8") as f:
+        f.write("a\nb\nc\n")
+
+    practices_file = pathlib.Path(tmp_path, "practices.txt")
+    practices = results.Practices(practices_file)
+    time = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    for activity_key in "abc":
+        practices.add_practice_set(routine.Activity(activity_key), 1, time)
+    practices.save()
+
+    mock_input = mocks.MockInput(
+        [
+            "2",  # Start Evaluation Mode.
+            "1",  # Evaluate all time.
+            show_next_page,  # Show page 2.
+            show_next_page,  # Show page 3, if still showing pages.
+        ]
+    )
+    deliberate_practice.main(
+        mock_input,
+        activity_file,
+        practices_file,
+        report_writer=report.ReportWriter(
+            report_format=report.ReportFormat.CSV, page_size=1
+        ),
+    )
+
+    output = capsys.readouterr().out
+    assert [x.split(",")[1] for x in output.splitlines()[2:] if "," in x] == [
+        "description",
+        *expected_keys,
+    ]
+    assert ("Show page 3 of 3?" in output) == (show_next_page == "Y")
+
+
+@pytest.mark.parametrize(
+    ("window_choice", "expected_num_practice_sets"),
+    [("1", 3), ("2", 1), ("3", 2), ("4", 2)],
+)
+def test_main_evaluation_window(
+    tmp_path: pathlib.Path,
+    capsys: pytest.CaptureFixture[str],
+    window_choice: str,
+    expected_num_practice_sets: int,
+) -> None:
+    practices_file = pathlib.Path(tmp_path, "practices.txt")
+    practices = results.Practices(practices_file)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    for days_ago in [3, 20, 400]:
+        practices.add_practice_set(
+            routine.Activity("a"), 1, now - datetime.timedelta(days=days_ago)
+        )
+    practices.save()
+
+    mock_input = mocks.MockInput(
+        [
+            "2",  # Start Evaluation Mode.
+            window_choice,
+        ]
+    )
+    deliberate_practice.main(
+        mock_input, pathlib.Path(tmp_path, "activities.txt"), practices_file
+    )
+
+    assert (
+        f"1 activity has been completed {expected_num_practice_sets} times."
+        in capsys.readouterr().out
+    )
+
+
+def test_main_repair(
+    tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    practices_file = pathlib.Path(tmp_path, "practices.journal")
+    time = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    for score in [1, 2]:
+        results.append_to_journal(
+            practices_file, [results.PracticeSet("a", score, time)]
+        )
+    data = practices_file.read_bytes()
+    practices_file.write_bytes(data[:-5])
+
+    mock_input = mocks.MockInput(["3"])  # Start Repair Mode.
+    deliberate_practice.main(
+        mock_input, pathlib.Path(tmp_path, "activities.txt"), practices_file
+    )
+    assert "Repaired 1 damaged regions" in capsys.readouterr().out
+    assert results.Practices(practices_file).get_num_practice_sets() == 1
+
+    deliberate_practice.main(
+        mocks.MockInput(["3"]), pathlib.Path(tmp_path, "activities.txt"), practices_file
+    )
+    assert "No damaged blocks found" in capsys.readouterr().out
+
+
+def test_parse_args_profile(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv(phase_profiler.PROFILE_ENV_VAR, raising=False)
+    assert deliberate_practice.parse_args([]).profile is None
+    assert deliberate_practice.parse_args(["--profile"]).profile == "1"
+    assert deliberate_practice.parse_args(["--profile", "run.prof"]).profile == (
+        "run.prof"
+    )
+
+    monkeypatch.setenv(phase_profiler.PROFILE_ENV_VAR, "env.prof")
+    assert deliberate_practice.parse_args([]).profile == "env.prof"
+    assert deliberate_practice.parse_args(["--profile"]).profile == "1"
+
+
+def test_run_ingest(tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]) -> None:
+    activities_file = pathlib.Path(tmp_path, "activities.txt")
+    activities_file.write_text("practice_activity\n", encoding="utf-8")
+    practices_file = pathlib.Path(tmp_path, "practices.journal")
+    lines = user_input.iter_input_lines(
+        mocks.MockInput(
+            [
+                "activity,score,date_time",
+                "practice_activity,3,2024-01-01T00:00:00+00:00",
+                "practice_activity,4,2024-01-02T00:00:00+00:00",
+            ]
+        )
+    )
+
+    assert deliberate_practice.run_ingest(lines, activities_file, practices_file) == 2
+    assert capsys.readouterr().out == (
+        "Note: No Practices file found. Starting from an empty state\n"
+        f"Ingested 2 practice sets into {practices_file}.\n"
+    )
+    practices = results.Practices(practices_file)
+    assert practices.file_format == results.PracticesFileFormat.JOURNAL
+    assert [x.score for x in practices.get_practice_sets()] == [3, 4]
+    # The activity ids were saved, so the practice sets keep matching.
+    assert routine.Activities(activities_file).activities[0].to_line() == (
+        activities_file.read_text(encoding="utf-8").strip()
+    )
+
+
+def test_run_merge(tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]) -> None:
+    time = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    practices_file = pathlib.Path(tmp_path, "practices.txt")
+    practices = results.Practices(practices_file)
+    practices.add_practice_set(routine.Activity("a"), 1, time)
+    practices.save()
+    other_file = pathlib.Path(tmp_path, "other.txt")
+    other_practices = results.Practices(other_file)
+    other_practices.add_practice_set(routine.Activity("a"), 1, time)
+    other_practices.add_practice_set(routine.Activity("b"), 2, time)
+    other_practices.save()
+    capsys.readouterr()
+
+    deliberate_practice.run_merge([other_file], practices_file)
+
+    assert capsys.readouterr().out == (
+        f"Merged 3 practice sets into {practices_file}, 2 after dropping 1 "
+        "duplicates.\n"
+    )
+    assert results.Practices(practices_file).get_num_practice_sets() == 2
+    assert pathlib.Path(tmp_path, f"practices.txt{results.BACKUP_SUFFIX}").is_file()
+
+    with pytest.raises(deliberate_practice.InvalidModeError):
+        deliberate_practice.run_merge([other_file], tmp_path)
+
+
+def test_load_practices_converts_text(tmp_path: pathlib.Path) -> None:
+    practices_file = pathlib.Path(tmp_path, "practices.txt")
+    time = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    practices = results.Practices(practices_file)
+    practices.add_practice_set(routine.Activity("Scales"), 3, time)
+    practices.save()
+
+    practices = deliberate_practice.load_practices(practices_file)
+    practices.add_practice_set(routine.Activity("Scales"), 4, time)
+    practices.save()
+
+    assert practices_file.read_bytes().startswith(journal_frames.JOURNAL_HEADER)
+    assert pathlib.Path(tmp_path, "practices.txt.bak").is_file()
+    assert results.Practices(practices_file).get_num_practice_sets() == 2
+
+
+def test_print_activity_evaluation(
+    tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    activities_file = pathlib.Path(tmp_path, "activities.txt")
+    activities_file.write_text("[id=000000000001] Scales\n", encoding="utf-8")
+    practices_file = pathlib.Path(tmp_path, "practices.journal")
+    practices = deliberate_practice.load_practices(practices_file)
+    time = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    practices.add_practice_set(routine.Activity("Scales", "000000000001"), 3, time)
+    practices.add_practice_set(routine.Activity("Other"), 1, time)
+    practices.save()
+    capsys.readouterr()
+
+    activity_evaluation = deliberate_practice.print_activity_evaluation(
+        "Scales", activities_file, practices_file
+    )
+
+    assert activity_evaluation.get_num_practice_sets() == 1
+    assert capsys.readouterr().out == str(activity_evaluation)
+    assert "Scales\n\tPracticed 1 times.\n" in str(activity_evaluation)
+
+    with pytest.raises(deliberate_practice.InvalidModeError):
+        deliberate_practice.print_activity_evaluation(
+            "Missing", activities_file, practices_file
+        )
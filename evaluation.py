@@ -0,0 +1,989 @@
+"""Module for evaluating the results of practice."""
+
+import array
+import bisect
+import collections
+import datetime
+import heapq
+import itertools
+import math
+import typing
+
+import evaluation_numpy
+import results
+import routine
+import timestamps
+import trends
+
+
+class ActivityEvaluationCreationError(Exception):
+    """ActivityEvaluation encountered a error during creation.
+
+    This usually occurs when there is an activity key mismatch.
+    """
+
+
+class ScoresNotKeptError(Exception):
+    """All the scores were asked for, but only a summary was kept."""
+
+
+# The number of latest scores a ScoreSummary keeps.
+RECENT_SCORES_LENGTH = 20
+
+
+class ScoreSummary:
+    """A summary of scores, which takes the same memory however many.
+
+    It keeps a histogram of the scores, their count and sum, and a ring
+    buffer of the latest RECENT_SCORES_LENGTH scores. The mean, median
+    and percentiles of the scores are all found from these.
+    """
+
+    def __init__(self, recent_scores_length: int = RECENT_SCORES_LENGTH) -> None:
+        """Creates an empty ScoreSummary.
+
+        Up to recent_scores_length of the latest scores are kept, none
+        if 0.
+        """
+        self.recent_scores_length = recent_scores_length
+        # The number of each of the results.POSSIBLE_SCORES.
+        self.histogram = [0] * len(results.POSSIBLE_SCORES)
+        self.num_scores = 0
+        self.score_sum = 0
+        # The (epoch microseconds, score) of the latest scores, in time
+        # order.
+        self.recent_scores: collections.deque[tuple[int, int]] = collections.deque()
+
+    def add(self, score: int, epoch_micros: int) -> typing.Optional[tuple[int, int]]:
+        """Adds a score practiced at the given epoch microseconds.
+
+        This takes O(1) for a score newer than the recent scores. The
+        (epoch microseconds, score) left out of the recent scores is
+        returned, either the oldest of them or the score itself if it's
+        older than all of them, None if none was.
+        """
+        self.histogram[score] += 1
+        self.num_scores += 1
+        self.score_sum += score
+        if not self.recent_scores_length:
+            return None
+        return _add_recent_score(
+            self.recent_scores, self.recent_scores_length, epoch_micros, score
+        )
+
+    def merge(self, other: "ScoreSummary") -> None:
+        """Adds the scores summarized by other."""
+        self.histogram = [x + y for x, y in zip(self.histogram, other.histogram)]
+        self.num_scores += other.num_scores
+        self.score_sum += other.score_sum
+        self.recent_scores = collections.deque(
+            heapq.merge(self.recent_scores, other.recent_scores, key=lambda x: x[0]),
+            self.recent_scores_length,
+        )
+
+    def to_dict(self) -> dict[str, typing.Any]:
+        """Returns this summary as a dict, to store as JSON."""
+        return {
+            "histogram": self.histogram,
+            "num_scores": self.num_scores,
+            "score_sum": self.score_sum,
+            "recent_scores": [list(x) for x in self.recent_scores],
+        }
+
+    @classmethod
+    def from_dict(
+        cls,
+        data: dict[str, typing.Any],
+        recent_scores_length: int = RECENT_SCORES_LENGTH,
+    ) -> "ScoreSummary":
+        """Creates a ScoreSummary from the dict of to_dict.
+
+        Up to recent_scores_length of its latest scores are kept.
+
+        Raises:
+            ValueError: The histogram doesn't match the number of
+                scores.
+        """
+        score_summary = cls(recent_scores_length)
+        histogram = [int(x) for x in data["histogram"]]
+        num_scores = int(data["num_scores"])
+        if len(histogram) != len(score_summary.histogram) or (
+            sum(histogram) != num_scores
+        ):
+            raise ValueError(f"Invalid histogram {histogram} of {num_scores} scores")
+        score_summary.histogram = histogram
+        score_summary.num_scores = num_scores
+        score_summary.score_sum = int(data["score_sum"])
+        score_summary.recent_scores = collections.deque(
+            ((int(x), int(y)) for x, y in data["recent_scores"]), recent_scores_length
+        )
+        return score_summary
+
+    def get_recent_scores(self) -> list[int]:
+        """Returns the latest scores, in time order."""
+        return [x[1] for x in self.recent_scores]
+
+    def get_mean(self) -> typing.Optional[float]:
+        """Returns the mean score, None without scores."""
+        if not self.num_scores:
+            return None
+        return self.score_sum / self.num_scores
+
+    def get_percentile(self, percentile: float) -> typing.Optional[int]:
+        """Returns the score at the percentile, from 0 to 100.
+
+        This is the nearest rank percentile, the lowest score that at
+        least percentile percent of the scores are at or below. None is
+        returned without scores.
+        """
+        if not self.num_scores:
+            return None
+        rank = max(1, math.ceil(percentile / 100 * self.num_scores))
+        num_scores = 0
+        for score, count in enumerate(self.histogram):
+            num_scores += count
+            if num_scores >= rank:
+                return score
+        return len(self.histogram) - 1
+
+    def get_median(self) -> typing.Optional[int]:
+        """Returns the median score, None without scores.
+
+        With an even number of scores, this is the lower of the middle
+        two.
+        """
+        return self.get_percentile(50)
+
+    def is_before_recent_scores(self, epoch_micros: int) -> bool:
+        """Returns if a score at epoch_micros is too old to be kept.
+
+        That's when the latest scores kept are full, and all newer.
+        """
+        return (
+            0 < len(self.recent_scores) == self.recent_scores_length
+            and epoch_micros < self.recent_scores[0][0]
+        )
+
+
+def _add_recent_score(
+    recent_scores: collections.deque[tuple[int, int]],
+    recent_scores_length: int,
+    epoch_micros: int,
+    score: int,
+) -> typing.Optional[tuple[int, int]]:
+    """Adds the score to recent_scores, see ScoreSummary.add.
+
+    At the same epoch microseconds, the score goes after those already
+    in recent_scores.
+    """
+    if not recent_scores or epoch_micros >= recent_scores[-1][0]:
+        recent_scores.append((epoch_micros, score))
+    elif (
+        len(recent_scores) < recent_scores_length or epoch_micros >= recent_scores[0][0]
+    ):
+        recent_scores.insert(
+            bisect.bisect_right(recent_scores, epoch_micros, key=lambda x: x[0]),
+            (epoch_micros, score),
+        )
+    else:
+        return epoch_micros, score
+    if len(recent_scores) > recent_scores_length:
+        return recent_scores.popleft()
+    return None
+
+
+class ActivityEvaluation:  # pylint: disable=too-many-instance-attributes,too-many-public-methods
+    """A collection of all practice sets for a given Activity.
+
+    This is only meant to show the users the results of their practice,
+    not to add new pratice sets.
+
+    By default every score is kept, in time order. A summary evaluation
+    only keeps the ScoreSummary of the scores, so its memory doesn't
+    grow with the number of practice sets.
+
+    When every score is kept, the ScoreTrend of the scores is only
+    brought up to date with them when asked for. A summary keeps it up
+    to date as scores are added, along with a base trend of the scores
+    older than its latest ones. A score added out of time order is put
+    in its place among the latest scores, and the trend redone from the
+    base trend and them. A score older than all the latest scores can
+    only be added to the base trend as its newest, which is only in time
+    order while the base trend has no scores. After that the trend is
+    approximate, see is_trend_exact. Merging into a summary adds other's
+    scores the same way, and other's base trend can only be kept when
+    this summary's has no scores.
+    """
+
+    def __init__(
+        self,
+        activity_key: str,
+        practice_sets: list[results.PracticeSet],
+        description: typing.Optional[str] = None,
+        summary: bool = False,
+        trend: typing.Optional[trends.ScoreTrend] = None,
+    ):
+        """Creates an ActivityEvaluation from the given practice_sets.
+
+        Note, all practice_sets must be for the given activity_key,
+        otherwise this will raise an exception. The description of the
+        activity is shown in place of the key, if given. If summary is
+        True, only a summary of the scores is kept. The scores are added
+        to trend, an empty ScoreTrend with the default settings if None.
+
+        Raises:
+            ActivityEvaluationCreationError: The given activity_key
+                didn't match the practice_sets activities keys.
+        """
+        self.activity_key = activity_key
+        self.description = description
+
+        # Ensure all the practice sets are for this activity key.
+        practice_sets_activity_keys = set(x.activity_key for x in practice_sets)
+        unexpected_keys = practice_sets_activity_keys.difference(
+            set([self.activity_key])
+        )
+        if unexpected_keys:
+            raise ActivityEvaluationCreationError(
+                f"activity_key mismatch. Expected only {self.activity_key}, "
+                f"got {practice_sets_activity_keys}"
+            )
+
+        # When every score is kept, the latest come from them instead.
+        self._score_summary = ScoreSummary(RECENT_SCORES_LENGTH if summary else 0)
+        self._trend = trends.ScoreTrend() if trend is None else trend
+        # The trend of the scores older than the latest scores of a
+        # summary, None when every score is kept.
+        self._base_trend = self._trend.copy_empty() if summary else None
+        self._is_trend_exact = True
+
+        # All the scores and their epoch microseconds, kept in the same
+        # order so new scores can be inserted at the right position.
+        # Both are None for a summary evaluation.
+        self._scores: typing.Optional[list[int]] = None if summary else []
+        self._epoch_micros: typing.Optional[list[int]] = None if summary else []
+
+        # The epoch microseconds and UTC offset of the oldest and latest
+        # practice times, only turned into datetimes when asked for.
+        self._oldest_practice_time = (0, 0)
+        self._latest_practice_time = (0, 0)
+
+        for practice_set in sorted(practice_sets, key=lambda x: x.date_time):
+            self.add_score(
+                practice_set.score, *timestamps.to_epoch_micros(practice_set.date_time)
+            )
+
+    @property
+    def scores(self) -> list[int]:
+        """All the scores, in time order.
+
+        Raises:
+            ScoresNotKeptError: This is a summary evaluation.
+        """
+        if self._scores is None:
+            raise ScoresNotKeptError(
+                f"Only a summary of the scores of {self.activity_key} was kept"
+            )
+        return self._scores
+
+    @property
+    def oldest_practice_time(self) -> typing.Optional[datetime.datetime]:
+        """The oldest practice time, None without practice sets."""
+        if not self._score_summary.num_scores:
+            return None
+        return timestamps.from_epoch_micros(*self._oldest_practice_time)
+
+    @property
+    def latest_practice_time(self) -> typing.Optional[datetime.datetime]:
+        """The latest practice time, None without practice sets."""
+        if not self._score_summary.num_scores:
+            return None
+        return timestamps.from_epoch_micros(*self._latest_practice_time)
+
+    def add_practice_set(self, practice_set: results.PracticeSet) -> None:
+        """Adds the practice_set to this evaluation.
+
+        Raises:
+            ActivityEvaluationCreationError: The practice_set is for a
+                different activity_key.
+        """
+        if practice_set.activity_key != self.activity_key:
+            raise ActivityEvaluationCreationError(
+                f"activity_key mismatch. Expected only {self.activity_key}, "
+                f"got {practice_set.activity_key}"
+            )
+
+        self.add_score(
+            practice_set.score, *timestamps.to_epoch_micros(practice_set.date_time)
+        )
+
+    def add_score(self, score: int, epoch_micros: int, utc_offset: int) -> None:
+        """Adds a score practiced at the given epoch microseconds.
+
+        Scores added in time order are appended in O(log n), older ones
+        are inserted in their place among the scores. A summary takes
+        O(1) for scores added in time order.
+        """
+        is_latest = (
+            not self._score_summary.num_scores
+            or epoch_micros >= self._latest_practice_time[0]
+        )
+        if not self._score_summary.num_scores:
+            self._oldest_practice_time = (epoch_micros, utc_offset)
+            self._latest_practice_time = (epoch_micros, utc_offset)
+        elif epoch_micros < self._oldest_practice_time[0]:
+            self._oldest_practice_time = (epoch_micros, utc_offset)
+        elif epoch_micros >= self._latest_practice_time[0]:
+            self._latest_practice_time = (epoch_micros, utc_offset)
+        self._add_to_summary(self._score_summary, score, epoch_micros)
+
+        if self._scores is not None and self._epoch_micros is not None:
+            index = bisect.bisect_right(self._epoch_micros, epoch_micros)
+            self._epoch_micros.insert(index, epoch_micros)
+            self._scores.insert(index, score)
+
+        if not is_latest:
+            self._redo_trend()
+        elif self._scores is None:
+            self._trend.add(score)
+
+    def _add_to_summary(
+        self, score_summary: ScoreSummary, score: int, epoch_micros: int
+    ) -> None:
+        """Adds the score to score_summary, of this evaluation or not.
+
+        Any score left out of its latest scores is added to the base
+        trend, the oldest of them is newer than the base trend's scores.
+        """
+        is_before = score_summary.is_before_recent_scores(epoch_micros)
+        left_out = score_summary.add(score, epoch_micros)
+        if left_out is None or self._base_trend is None:
+            return
+        if is_before and self._base_trend.get_num_scores():
+            # It may be older than some of the base trend's scores.
+            self._is_trend_exact = False
+        self._base_trend.add(left_out[1])
+
+    def _redo_trend(self) -> None:
+        """Redoes the trend from the scores kept, in time order.
+
+        A summary's trend is redone from its base trend and its latest
+        scores. When every score is kept, the trend is only emptied, and
+        redone by get_trend.
+        """
+        if self._base_trend is None:
+            self._trend = self._trend.copy_empty()
+            return
+        self._trend = self._base_trend.copy()
+        for score in self._score_summary.get_recent_scores():
+            self._trend.add(score)
+
+    def _merge_recent_scores(
+        self, other_dict: dict[str, typing.Any]
+    ) -> collections.deque[tuple[int, int]]:
+        """Returns this summary's latest scores merged with other's.
+
+        The scores left out of them are added to the base trend. Other's
+        base trend is kept instead, if this summary's has no scores and
+        both have the same settings. Otherwise the trend can't be exact
+        if other's base trend has scores, as only their number is known.
+        """
+        base_trend = typing.cast(trends.ScoreTrend, self._base_trend)
+        if "base_trend" in other_dict:
+            other_base_trend = trends.ScoreTrend.from_dict(other_dict["base_trend"])
+        else:
+            other_base_trend = base_trend.copy_empty()
+        if "scores" in other_dict:
+            other_scores = list(zip(other_dict["epoch_micros"], other_dict["scores"]))
+        else:
+            other_scores = [
+                (int(x), int(y)) for x, y in other_dict["summary"]["recent_scores"]
+            ]
+        self._is_trend_exact = self._is_trend_exact and other_dict["is_trend_exact"]
+
+        recent_scores = ScoreSummary(self._score_summary.recent_scores_length)
+        if (
+            not base_trend.get_num_scores()
+            and other_base_trend.get_num_scores()
+            and other_base_trend.window_size == base_trend.window_size
+            and other_base_trend.ewma_weight == base_trend.ewma_weight
+        ):
+            self._base_trend = other_base_trend
+            recent_scores.recent_scores.extend(other_scores)
+            added_scores = list(self._score_summary.recent_scores)
+        else:
+            recent_scores.recent_scores.extend(self._score_summary.recent_scores)
+            added_scores = other_scores
+            if other_base_trend.get_num_scores():
+                # Only other's number of older scores is known.
+                self._is_trend_exact = False
+                base_trend_dict = base_trend.to_dict()
+                base_trend_dict["num_scores"] += other_base_trend.get_num_scores()
+                self._base_trend = trends.ScoreTrend.from_dict(base_trend_dict)
+        for epoch_micros, score in added_scores:
+            self._add_to_summary(recent_scores, score, epoch_micros)
+        return recent_scores.recent_scores
+
+    def merge(self, other: "ActivityEvaluation") -> None:
+        """Adds the scores of other, which can be of any activity.
+
+        The scores are merged in time order in O(n), the same as adding
+        each of other's scores after this evaluation's scores. Any
+        evaluation can be merged into a summary, but only evaluations
+        keeping every score into one keeping every score.
+
+        Raises:
+            ScoresNotKeptError: Other is a summary evaluation and this
+                isn't.
+        """
+        other_dict = other.to_dict()
+        other_summary = ScoreSummary.from_dict(
+            other_dict["summary"], self._score_summary.recent_scores_length
+        )
+        if not other_summary.num_scores:
+            return
+        recent_scores = None
+        if self._base_trend is not None:
+            recent_scores = self._merge_recent_scores(other_dict)
+        if self._scores is not None and self._epoch_micros is not None:
+            if "scores" not in other_dict:
+                raise ScoresNotKeptError(
+                    f"Can't merge the summary of {other.activity_key} into the "
+                    f"scores of {self.activity_key}"
+                )
+            merged = list(
+                heapq.merge(
+                    zip(self._epoch_micros, self._scores),
+                    zip(other_dict["epoch_micros"], other_dict["scores"]),
+                    key=lambda x: x[0],
+                )
+            )
+            self._epoch_micros = [x[0] for x in merged]
+            self._scores = [x[1] for x in merged]
+
+        if (
+            not self._score_summary.num_scores
+            or other_dict["oldest_practice_time"][0] < self._oldest_practice_time[0]
+        ):
+            self._oldest_practice_time = other_dict["oldest_practice_time"]
+        if (
+            not self._score_summary.num_scores
+            or other_dict["latest_practice_time"][0] >= self._latest_practice_time[0]
+        ):
+            self._latest_practice_time = other_dict["latest_practice_time"]
+        self._score_summary.merge(other_summary)
+        if recent_scores is not None:
+            self._score_summary.recent_scores = recent_scores
+        self._redo_trend()
+
+    def to_dict(self) -> dict[str, typing.Any]:
+        """Returns the scores and times of this evaluation as a dict.
+
+        The dict only holds lists and numbers, so it can be stored as
+        JSON and turned back into an evaluation by from_dict. Every
+        score is only included if kept.
+        """
+        data: dict[str, typing.Any] = {
+            "summary": self._score_summary.to_dict(),
+            "trend": self.get_trend().to_dict(),
+            "oldest_practice_time": self._oldest_practice_time,
+            "latest_practice_time": self._latest_practice_time,
+            "is_trend_exact": self._is_trend_exact,
+        }
+        if self._base_trend is not None:
+            data["base_trend"] = self._base_trend.to_dict()
+        if self._scores is not None and self._epoch_micros is not None:
+            data["scores"] = self._scores
+            data["epoch_micros"] = self._epoch_micros
+            # So a summary merging this gets its latest scores.
+            start = max(0, len(self._scores) - RECENT_SCORES_LENGTH)
+            data["summary"]["recent_scores"] = [
+                [x, y] for x, y in zip(self._epoch_micros[start:], self._scores[start:])
+            ]
+        return data
+
+    @classmethod
+    def from_dict(
+        cls, activity_key: str, data: dict[str, typing.Any]
+    ) -> "ActivityEvaluation":
+        """Creates an ActivityEvaluation from the dict of to_dict.
+
+        It's a summary evaluation if the dict doesn't have every score.
+
+        Raises:
+            ValueError: The summary or trend in the dict is invalid.
+        """
+        summary = "scores" not in data
+        activity_evaluation = cls(activity_key, [], summary=summary)
+        activity_evaluation._score_summary = ScoreSummary.from_dict(
+            data["summary"], RECENT_SCORES_LENGTH if summary else 0
+        )
+        activity_evaluation._trend = trends.ScoreTrend.from_dict(data["trend"])
+        if summary:
+            activity_evaluation._base_trend = trends.ScoreTrend.from_dict(
+                data["base_trend"]
+            )
+        activity_evaluation._is_trend_exact = bool(data["is_trend_exact"])
+        if "scores" in data:
+            activity_evaluation._scores = list(data["scores"])
+            activity_evaluation._epoch_micros = list(data["epoch_micros"])
+        oldest_epoch_micros, oldest_utc_offset = data["oldest_practice_time"]
+        activity_evaluation._oldest_practice_time = (
+            oldest_epoch_micros,
+            oldest_utc_offset,
+        )
+        latest_epoch_micros, latest_utc_offset = data["latest_practice_time"]
+        activity_evaluation._latest_practice_time = (
+            latest_epoch_micros,
+            latest_utc_offset,
+        )
+        return activity_evaluation
+
+    def __repr__(self) -> str:
+        return (
+            f"ActivityEvaluation("
+            f"{self.activity_key=}, "
+            f"{self.oldest_practice_time=}, "
+            f"{self.latest_practice_time=}, "
+            f"{self._score_summary.histogram=}, "
+            f"{self._scores=})"
+        )
+
+    def __str__(self) -> str:
+        lines = [
+            f"{self.get_description()}\n",
+            f"\tPracticed {self.get_num_practice_sets()} times.\n",
+        ]
+
+        if self.oldest_practice_time:
+            lines.append(f"\tOldest practice {self.oldest_practice_time.isoformat()}\n")
+        if self.latest_practice_time:
+            lines.append(f"\tNewest practice {self.latest_practice_time.isoformat()}\n")
+
+        scores = self.get_recent_scores()
+        if len(scores) < self.get_num_practice_sets():
+            lines.append(
+                f"\tLatest {len(scores)} of {self.get_num_practice_sets()} "
+                f"scores: {scores}\n"
+            )
+        elif scores:
+            lines.append(f"\tScores: {scores}\n")
+
+        return "".join(lines)
+
+    def is_summary(self) -> bool:
+        """Returns if only a summary of the scores is kept."""
+        return self._scores is None
+
+    def get_activity_key(self) -> str:
+        """Returns the key of the Activity this instance maps to."""
+        return self.activity_key
+
+    def get_description(self) -> str:
+        """Returns the Activity's description, or its key if unknown."""
+        return self.activity_key if self.description is None else self.description
+
+    def get_num_practice_sets(self) -> int:
+        """Returns the number of practice sets."""
+        return self._score_summary.num_scores
+
+    def get_oldest_practice_time(self) -> typing.Optional[datetime.datetime]:
+        """Returns the oldest practice time."""
+        return self.oldest_practice_time
+
+    def get_latest_practice_time(self) -> typing.Optional[datetime.datetime]:
+        """Returns the latest practice time ."""
+        return self.latest_practice_time
+
+    def get_oldest_epoch_micros(self) -> typing.Optional[int]:
+        """Returns the oldest practice time, in epoch microseconds.
+
+        Unlike the datetimes, these can always be compared, whether the
+        practice times are naive or not.
+        """
+        return self._oldest_practice_time[0] if self.get_num_practice_sets() else None
+
+    def get_latest_epoch_micros(self) -> typing.Optional[int]:
+        """Returns the latest practice time, in epoch microseconds."""
+        return self._latest_practice_time[0] if self.get_num_practice_sets() else None
+
+    def get_score_summary(self) -> ScoreSummary:
+        """Returns the ScoreSummary of the scores.
+
+        Every evaluation has one, whether it's a summary or not. When
+        every score is kept, it doesn't keep the latest scores, use
+        get_recent_scores instead.
+        """
+        return self._score_summary
+
+    def get_recent_scores(self, max_scores: typing.Optional[int] = None) -> list[int]:
+        """Returns up to max_scores of the latest scores, in time order.
+
+        All the scores are returned if max_scores is None, but a summary
+        only has the latest RECENT_SCORES_LENGTH of them.
+        """
+        if self._scores is None:
+            scores = self._score_summary.get_recent_scores()
+        else:
+            scores = self._scores
+        start = 0 if max_scores is None else max(0, len(scores) - max_scores)
+        return scores[start:]
+
+    def get_trend(self) -> trends.ScoreTrend:
+        """Returns the ScoreTrend of the scores."""
+        if self._scores is not None:
+            # Only the scores added since last asked for are added.
+            for score in itertools.islice(
+                self._scores, self._trend.get_num_scores(), None
+            ):
+                self._trend.add(score)
+        return self._trend
+
+    def is_trend_exact(self) -> bool:
+        """Returns if the trend is exactly that of the scores.
+
+        It's always exact when every score is kept. A summary's can be
+        approximate, after adding a score older than all its latest
+        scores, see the class docstring.
+        """
+        return self._is_trend_exact
+
+    def get_latest_score(self) -> typing.Optional[int]:
+        """Returns the latest score, None without practice sets."""
+        recent_scores = self.get_recent_scores(1)
+        return recent_scores[0] if recent_scores else None
+
+
+class Evaluation:
+    """An Evaluation based off the Practices given.
+
+    By default the evaluation is based off the Practices when given, any
+    future changes won't be reflected here. A live Evaluation instead
+    follows the Practices, updating as each PracticeSet is added.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        practices: typing.Union[
+            results.Practices, typing.Iterable[results.PracticeSet]
+        ],
+        live: bool = False,
+        activities: typing.Optional[routine.Activities] = None,
+        window: typing.Optional[results.DateWindow] = None,
+        *,
+        summary: bool = False,
+        trend: typing.Optional[trends.ScoreTrend] = None,
+    ):
+        """Creates an Evaluation from the given Practices.
+
+        Instead of a Practices, any iterable of PracticeSets can be
+        given, such as iter_practice_sets. It's consumed in a single
+        pass, only the per activity evaluations are kept.
+
+        If live is True, practice sets later added to practices are also
+        added to this Evaluation.
+
+        If activities are given, each ActivityEvaluation shows its
+        activity's description. Practice sets keyed by an activity's
+        description, from before activities had ids, are evaluated
+        together with the ones keyed by its id.
+
+        If a window is given, only the practice sets within it are
+        evaluated. For a Practices, they're found with its index by
+        time, rather than checking every practice set. A Practices
+        loaded with a window, such as sharded practices that skipped
+        the shards outside it, defaults to its own window.
+
+        If summary is True, each ActivityEvaluation only keeps a summary
+        of its scores, rather than all of them. Each one's trend has the
+        settings of trend, the defaults if None.
+
+        A Practices has each activity's practice sets evaluated in time
+        order, whatever order they were saved in. When NumPy is
+        available, it's evaluated with vectorized NumPy. This gives
+        exactly the same evaluation, much faster for a large Practices.
+        """
+        if window is None and isinstance(practices, results.Practices):
+            window = practices.window
+        self.window = window
+        self.activities = activities
+        self.summary = summary
+        self.trend = trends.ScoreTrend() if trend is None else trend
+        self.activity_evaluations: list[ActivityEvaluation] = []
+        # Also holds the description keys of activities, when given.
+        self._activity_evaluations_by_key: dict[str, ActivityEvaluation] = {}
+        self._num_practice_sets = 0
+
+        if isinstance(practices, results.Practices):
+            if window is None or window is practices.window:
+                self._add_columns(practices.columns)
+            else:
+                self._add_rows(practices.columns, practices.query_rows(window))
+            if live:
+                practices.add_listener(self.add_practice_set)
+        else:
+            for practice_set in practices:
+                self.add_practice_set(practice_set)
+
+    def _add_columns(self, columns: results.PracticeSetColumns) -> None:
+        if evaluation_numpy.is_available():
+            self._add_columns_numpy(columns)
+            return
+
+        # Read the arrays directly, rather than creating a PracticeSet
+        # for each practice set.
+        rows: typing.Sequence[int] = range(len(columns))
+        if self.window is not None:
+            rows = [x for x in rows if self.window.contains(columns.epoch_micros[x])]
+        self._add_rows_in_time_order(columns, rows)
+
+    def _add_rows(
+        self, columns: results.PracticeSetColumns, rows: "array.array[int]"
+    ) -> None:
+        if evaluation_numpy.is_available():
+            self._add_columns_numpy(columns, rows)
+            return
+
+        # The rows are already limited to the window.
+        self._add_rows_in_time_order(columns, rows)
+
+    def _add_rows_in_time_order(
+        self, columns: results.PracticeSetColumns, rows: typing.Sequence[int]
+    ) -> None:
+        """Adds the practice sets of the given rows of columns.
+
+        The evaluations are added in the order their activities first
+        appear in the rows, then each one's scores in time order, those
+        at the same time in row order. This is the order the vectorized
+        NumPy evaluation works in, so both give the same evaluations
+        whatever order the practice sets were saved in.
+        """
+        key_activity_evaluations: list[typing.Optional[ActivityEvaluation]] = [
+            None
+        ] * len(columns.activity_keys)
+        for row in rows:
+            key_index = columns.key_indexes[row]
+            if key_activity_evaluations[key_index] is None:
+                key_activity_evaluations[key_index] = (
+                    self._get_or_add_activity_evaluation(
+                        columns.activity_keys[key_index]
+                    )
+                )
+
+        # Sorting is stable, and only takes O(n) for rows already in
+        # time order, as they are when appended as they're practiced.
+        for row in sorted(rows, key=columns.epoch_micros.__getitem__):
+            typing.cast(
+                ActivityEvaluation, key_activity_evaluations[columns.key_indexes[row]]
+            ).add_score(
+                columns.scores[row], columns.epoch_micros[row], columns.utc_offsets[row]
+            )
+        self._num_practice_sets += len(rows)
+
+    def _add_columns_numpy(
+        self,
+        columns: results.PracticeSetColumns,
+        rows: typing.Optional["array.array[int]"] = None,
+    ) -> None:
+        """Adds the practice sets of columns with vectorized NumPy.
+
+        Only the given rows are added, or those in the window if None.
+        The evaluations are the same as _add_rows_in_time_order gives.
+        """
+        canonical_keys = [self._get_canonical_key(x) for x in columns.activity_keys]
+        # Keys of the same activity are evaluated together as a group.
+        group_indexes: dict[str, int] = {}
+        key_groups = [
+            group_indexes.setdefault(x, len(group_indexes)) for x, _ in canonical_keys
+        ]
+
+        first_key_indexes, group_data = evaluation_numpy.get_group_data(
+            columns,
+            self.window if rows is None else rows,
+            key_groups,
+            self.trend,
+            RECENT_SCORES_LENGTH if self.summary else None,
+        )
+
+        # Add the evaluations and keys in the order their practice sets
+        # first appear, as adding them one by one does.
+        for key_index in first_key_indexes:
+            canonical_key, description = canonical_keys[key_index]
+            activity_evaluation = self._activity_evaluations_by_key.get(canonical_key)
+            if activity_evaluation is None:
+                activity_evaluation = ActivityEvaluation.from_dict(
+                    canonical_key, group_data[key_groups[key_index]]
+                )
+                activity_evaluation.description = description
+                self._insert_activity_evaluation(activity_evaluation)
+                self._num_practice_sets += activity_evaluation.get_num_practice_sets()
+            self._activity_evaluations_by_key[columns.activity_keys[key_index]] = (
+                activity_evaluation
+            )
+
+    def _get_canonical_key(self, activity_key: str) -> tuple[str, typing.Optional[str]]:
+        """Returns the key and description activity_key is shown as."""
+        activity = (
+            self.activities.get_activity(activity_key) if self.activities else None
+        )
+        if activity is None:
+            return activity_key, None
+        return activity.get_key(), activity.get_description()
+
+    def _insert_activity_evaluation(
+        self, activity_evaluation: ActivityEvaluation
+    ) -> None:
+        """Adds the evaluation of an activity not yet evaluated."""
+        self._activity_evaluations_by_key[activity_evaluation.get_activity_key()] = (
+            activity_evaluation
+        )
+        # Ensure evaluations are sorted by description order.
+        bisect.insort(
+            self.activity_evaluations,
+            activity_evaluation,
+            key=lambda x: x.get_description(),
+        )
+
+    def _get_or_add_activity_evaluation(self, activity_key: str) -> ActivityEvaluation:
+        activity_evaluation = self._activity_evaluations_by_key.get(activity_key)
+        if activity_evaluation is not None:
+            return activity_evaluation
+
+        canonical_key, description = self._get_canonical_key(activity_key)
+        activity_evaluation = self._activity_evaluations_by_key.get(canonical_key)
+        if activity_evaluation is None:
+            activity_evaluation = ActivityEvaluation(
+                canonical_key, [], description, self.summary, self.trend.copy_empty()
+            )
+            self._insert_activity_evaluation(activity_evaluation)
+        self._activity_evaluations_by_key[activity_key] = activity_evaluation
+        return activity_evaluation
+
+    def add_records(self, records: typing.Iterable[results.PracticeSetRecord]) -> None:
+        """Adds the practice sets of records to their evaluations.
+
+        Any practice sets outside the window are skipped. The records
+        are read into columns first, taking memory in proportion to
+        their number, so each activity's are added in time order. Added
+        to an Evaluation without practice sets, that's the same as
+        evaluating a Practices of them.
+        """
+        columns = results.PracticeSetColumns()
+        for record in records:
+            if self.window is None or self.window.contains(record[2]):
+                columns.append(*record)
+        if self.activity_evaluations:
+            self._add_rows_in_time_order(columns, range(len(columns)))
+        else:
+            self._add_columns(columns)
+
+    def add_activity_evaluation(self, activity_evaluation: ActivityEvaluation) -> None:
+        """Merges activity_evaluation into the one of its activity.
+
+        This is as if its practice sets were added one by one, but only
+        takes O(n) for all of them. Unlike adding them one by one, the
+        practice sets aren't checked against the window.
+
+        Raises:
+            ScoresNotKeptError: activity_evaluation is a summary, but
+                this Evaluation isn't.
+        """
+        self._get_or_add_activity_evaluation(
+            activity_evaluation.get_activity_key()
+        ).merge(activity_evaluation)
+        self._num_practice_sets += activity_evaluation.get_num_practice_sets()
+
+    def add_practice_set(self, practice_set: results.PracticeSet) -> None:
+        """Adds the practice_set to its activity's evaluation.
+
+        This takes O(log n) for a practice set newer than the others of
+        its activity. A practice_set outside the window is skipped.
+        """
+        epoch_micros, utc_offset = timestamps.to_epoch_micros(practice_set.date_time)
+        if self.window is not None and not self.window.contains(epoch_micros):
+            return
+        self._get_or_add_activity_evaluation(practice_set.activity_key).add_score(
+            practice_set.score, epoch_micros, utc_offset
+        )
+        self._num_practice_sets += 1
+
+    def __str__(self) -> str:
+        # Use report.ReportWriter to write a large Evaluation, this
+        # holds the whole report in memory.
+        activity_word = (
+            "activity" if len(self.activity_evaluations) == 1 else "activities"
+        )
+
+        header = (
+            f"{self.get_num_activities()} {activity_word} has been "
+            f"completed {self.get_num_of_practice_sets()} times.\n"
+        )
+        return header + "".join(f"\n{x}" for x in self.activity_evaluations)
+
+    def get_activity_evaluation(self, index: int) -> ActivityEvaluation:
+        """Returns the ActivityEvaluation at the given index.
+
+        The ActivityEvaluations are in description order, which is key
+        order for activities without a known description.
+        """
+        return self.activity_evaluations[index]
+
+    def get_activity_evaluation_by_key(
+        self, activity_key: str
+    ) -> typing.Optional[ActivityEvaluation]:
+        """Returns the ActivityEvaluation of the given activity_key.
+
+        Returns None if the activity has never been practiced.
+        """
+        activity_evaluation = self._activity_evaluations_by_key.get(activity_key)
+        if activity_evaluation is None and self.activities:
+            activity = self.activities.get_activity(activity_key)
+            if activity is not None:
+                activity_evaluation = self._activity_evaluations_by_key.get(
+                    activity.get_key()
+                )
+        return activity_evaluation
+
+    def get_canonical_keys(self) -> dict[str, str]:
+        """Returns the key each activity key is evaluated under.
+
+        That's the activity's own key, if activities were given.
+        """
+        return {
+            x: y.get_activity_key()
+            for x, y in self._activity_evaluations_by_key.items()
+        }
+
+    def get_num_activities(self) -> int:
+        """Returns the number of activities."""
+        return len(self.activity_evaluations)
+
+    def get_most_improved(self, k: int) -> list[ActivityEvaluation]:
+        """Returns up to k activities with the highest positive slopes.
+
+        The activities are picked with a heap of k of them, in
+        O(n log k), rather than sorting them all. The most improved
+        comes first.
+        """
+        return heapq.nlargest(
+            k, (x for x in self.activity_evaluations if _get_slope(x) > 0), _get_slope
+        )
+
+    def get_most_regressed(self, k: int) -> list[ActivityEvaluation]:
+        """Returns up to k activities with the lowest negative slopes.
+
+        The most regressed comes first.
+        """
+        return heapq.nsmallest(
+            k, (x for x in self.activity_evaluations if _get_slope(x) < 0), _get_slope
+        )
+
+    def get_num_of_practice_sets(self) -> int:
+        """Returns the number of practice sets in all activites."""
+        return self._num_practice_sets
+
+
+def _get_slope(activity_evaluation: ActivityEvaluation) -> float:
+    """Returns the slope of activity_evaluation's trend, 0 if none."""
+    slope = activity_evaluation.get_trend().get_slope()
+    return 0.0 if slope is None else slope
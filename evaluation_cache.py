@@ -0,0 +1,219 @@
+"""Module caching the Evaluation of a practices file between runs."""
+
+import hashlib
+import json
+import os
+import pathlib
+import typing
+
+import compressed_files
+import evaluation
+import results
+import routine
+
+# Appended to the practices file name for the name of its cache.
+CACHE_SUFFIX = ".evaluation-cache"
+
+# Changed whenever the layout of the cache changes, so older caches are
+# rebuilt rather than misread.
+_CACHE_VERSION = 3
+
+# The keys every cache has, on top of its version.
+_CACHE_KEYS = frozenset(
+    [
+        "file_state",
+        "file_format",
+        "offset",
+        "tail_hash",
+        "activity_evaluations",
+        "canonical_keys",
+    ]
+)
+
+# The number of bytes before the cached offset that are hashed. If a
+# journal is rewritten rather than appended to, they won't match.
+_TAIL_LENGTH = 64
+
+
+def get_cache_file(practices_file: pathlib.Path) -> pathlib.Path:
+    """Returns the file the cache of practices_file is kept in."""
+    return practices_file.with_name(f"{practices_file.name}{CACHE_SUFFIX}")
+
+
+def load_evaluation(
+    practices_file: pathlib.Path, activities: typing.Optional[routine.Activities] = None
+) -> evaluation.Evaluation:
+    """Returns the summary Evaluation of practices_file, using a cache.
+
+    The cache holds the summary evaluation of each activity, which
+    doesn't grow with the number of practice sets, along with the size,
+    modification time and inode of the practices_file it was made from.
+    If those are unchanged, the practices_file isn't read at all.
+    If practice sets were appended to an uncompressed journal, only the
+    new ones are read, from the offset the cache was made up to.
+    Otherwise the whole practices_file is read, into memory in
+    proportion to its number of practice sets, so each activity's are
+    evaluated in time order.
+
+    The activities are used the same way as by Evaluation. The cache
+    is only used if its activity keys are still evaluated under the
+    same activities. The appended practice sets are added to the cached
+    summaries as Evaluation.add_records does, and if that leaves any of
+    their trends approximate, the whole practices_file is read instead.
+
+    Raises:
+        InvalidPracticesFileError: The practices_file is malformed.
+    """
+    if not practices_file.is_file():
+        return evaluation.Evaluation(
+            results.iter_practice_sets(practices_file),
+            activities=activities,
+            summary=True,
+        )
+
+    cache_file = get_cache_file(practices_file)
+    cache = _read_cache(cache_file)
+    with open(practices_file, "rb") as raw_file:
+        # Taken before reading, so anything written while reading is
+        # read again next time rather than missed.
+        stat = os.fstat(raw_file.fileno())
+        file_state = [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+        f = compressed_files.get_reader(raw_file)
+        # Offsets into a compressed journal can't be read from without
+        # decompressing everything before them, so it's read whole.
+        is_compressed = f is not raw_file
+        file_format = results.read_file_format(f)
+
+        key_evaluation = None
+        if cache is not None and cache["file_state"] == file_state:
+            key_evaluation = _get_cached_evaluation(cache, activities)
+            if key_evaluation is not None:
+                return key_evaluation
+        elif (
+            cache is not None
+            and not is_compressed
+            and _was_appended_to(f, file_format, stat, cache)
+        ):
+            key_evaluation = _get_cached_evaluation(cache, activities)
+            if key_evaluation is not None:
+                f.seek(cache["offset"])
+                key_evaluation.add_records(
+                    results.iter_file_records(
+                        f, file_format, key_evaluation.get_num_of_practice_sets()
+                    )
+                )
+                if not all(
+                    x.is_trend_exact() for x in key_evaluation.activity_evaluations
+                ):
+                    key_evaluation = None
+
+        if key_evaluation is None:
+            key_evaluation = evaluation.Evaluation(
+                [], activities=activities, summary=True
+            )
+            f.seek(0)
+            results.read_file_format(f)
+            key_evaluation.add_records(results.iter_file_records(f, file_format))
+
+        cache = {
+            "version": _CACHE_VERSION,
+            "file_state": file_state,
+            "file_format": file_format,
+            "offset": 0,
+            "tail_hash": "",
+            "activity_evaluations": {
+                x.get_activity_key(): x.to_dict()
+                for x in key_evaluation.activity_evaluations
+            },
+            "canonical_keys": key_evaluation.get_canonical_keys(),
+        }
+        # Only a journal can be read from an offset. Other formats are
+        # read through a wrapper which closes f when done.
+        if file_format == results.PracticesFileFormat.JOURNAL and not is_compressed:
+            cache["offset"] = f.tell()
+            cache["tail_hash"] = _hash_tail(f, f.tell())
+
+    _write_cache(cache_file, cache)
+    return key_evaluation
+
+
+def _read_cache(cache_file: pathlib.Path) -> typing.Optional[dict[str, typing.Any]]:
+    """Returns the cache in cache_file, None if missing or outdated."""
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (
+        not isinstance(cache, dict)
+        or cache.get("version") != _CACHE_VERSION
+        or not _CACHE_KEYS.issubset(cache)
+    ):
+        return None
+    return cache
+
+
+def _write_cache(cache_file: pathlib.Path, cache: dict[str, typing.Any]) -> None:
+    """Writes the cache to cache_file, unless it's not writable.
+
+    The cache is only an optimization, so failing to write it isn't an
+    error.
+    """
+    temp_file = cache_file.with_name(f"{cache_file.name}.tmp")
+    try:
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(cache, f, separators=(",", ":"))
+        os.replace(temp_file, cache_file)
+    except OSError:
+        pass
+
+
+def _was_appended_to(
+    f: typing.BinaryIO,
+    file_format: results.PracticesFileFormat,
+    stat: os.stat_result,
+    cache: dict[str, typing.Any],
+) -> bool:
+    """Returns if the journal f was only appended to since cached."""
+    return (
+        file_format == results.PracticesFileFormat.JOURNAL
+        and cache["file_format"] == results.PracticesFileFormat.JOURNAL
+        and cache["file_state"][2] == stat.st_ino
+        and cache["offset"] <= stat.st_size
+        and cache["tail_hash"] == _hash_tail(f, cache["offset"])
+    )
+
+
+def _get_cached_evaluation(
+    cache: dict[str, typing.Any], activities: typing.Optional[routine.Activities]
+) -> typing.Optional[evaluation.Evaluation]:
+    """Returns the Evaluation in the cache, None if invalid.
+
+    It's also None if any activity key would now be evaluated under a
+    different key than cached, as the activities have changed.
+    """
+    key_evaluation = evaluation.Evaluation([], activities=activities, summary=True)
+    try:
+        for activity_key, data in cache["activity_evaluations"].items():
+            key_evaluation.add_activity_evaluation(
+                evaluation.ActivityEvaluation.from_dict(activity_key, data)
+            )
+        for activity_key, canonical_key in cache["canonical_keys"].items():
+            activity_evaluation = key_evaluation.get_activity_evaluation_by_key(
+                activity_key
+            )
+            if (
+                activity_evaluation is None
+                or activity_evaluation.get_activity_key() != canonical_key
+            ):
+                return None
+    except (KeyError, TypeError, ValueError):
+        return None
+    return key_evaluation
+
+
+def _hash_tail(f: typing.BinaryIO, offset: int) -> str:
+    """Returns the hash of the bytes just before offset in f."""
+    start = max(0, offset - _TAIL_LENGTH)
+    f.seek(start)
+    return hashlib.sha256(f.read(offset - start)).hexdigest()
@@ -0,0 +1,233 @@
+import datetime
+import pathlib
+import typing
+
+import pytest
+
+import evaluation
+import evaluation_cache
+import results
+import routine
+
+START_TIME = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+@pytest.fixture(name="records_read")
+def fixture_records_read(monkeypatch: pytest.MonkeyPatch) -> list[int]:
+    """Counts the records read from the practices file by each load."""
+    records_read: list[int] = []
+    add_records = evaluation.Evaluation.add_records
+
+    def counting_add_records(
+        self: evaluation.Evaluation,
+        records: typing.Iterable[results.PracticeSetRecord],
+    ) -> None:
+        records = list(records)
+        records_read.append(len(records))
+        add_records(self, records)
+
+    monkeypatch.setattr(evaluation.Evaluation, "add_records", counting_add_records)
+    return records_read
+
+
+def add_practice_sets(practices: results.Practices, num_practice_sets: int) -> None:
+    start = practices.get_num_practice_sets()
+    for x in range(start, start + num_practice_sets):
+        practices.add_practice_set(
+            routine.Activity(f"activity_{x % 3}"),
+            x % 5,
+            START_TIME + datetime.timedelta(hours=x),
+        )
+    practices.save()
+
+
+def assert_same_evaluation(
+    practice_evaluation: evaluation.Evaluation, practices_file: pathlib.Path
+) -> None:
+    expected_evaluation = evaluation.Evaluation(
+        results.iter_practice_sets(practices_file), summary=True
+    )
+    assert str(practice_evaluation) == str(expected_evaluation)
+
+
+def test_no_practices_file(
+    tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    practices_file = pathlib.Path(tmp_path, "practices")
+    practice_evaluation = evaluation_cache.load_evaluation(practices_file)
+    assert practice_evaluation.get_num_of_practice_sets() == 0
+    assert "No Practices file found" in capsys.readouterr().out
+    assert not evaluation_cache.get_cache_file(practices_file).exists()
+
+
+def test_journal_appends_read_incrementally(
+    tmp_path: pathlib.Path, records_read: list[int]
+) -> None:
+    practices_file = pathlib.Path(tmp_path, "practices")
+    practices = results.Practices(practices_file, results.PracticesFileFormat.JOURNAL)
+    add_practice_sets(practices, 10)
+
+    practice_evaluation = evaluation_cache.load_evaluation(practices_file)
+    assert_same_evaluation(practice_evaluation, practices_file)
+    assert evaluation_cache.get_cache_file(practices_file).is_file()
+    assert records_read == [10]
+
+    # Unchanged, so nothing is read.
+    practice_evaluation = evaluation_cache.load_evaluation(practices_file)
+    assert_same_evaluation(practice_evaluation, practices_file)
+    assert records_read == [10]
+
+    add_practice_sets(practices, 4)
+    practice_evaluation = evaluation_cache.load_evaluation(practices_file)
+    assert practice_evaluation.get_num_of_practice_sets() == 14
+    assert_same_evaluation(practice_evaluation, practices_file)
+    assert records_read == [10, 4]
+
+
+def test_rewritten_journal_read_fully(
+    tmp_path: pathlib.Path, records_read: list[int]
+) -> None:
+    practices_file = pathlib.Path(tmp_path, "practices")
+    practices = results.Practices(practices_file, results.PracticesFileFormat.JOURNAL)
+    add_practice_sets(practices, 10)
+    evaluation_cache.load_evaluation(practices_file)
+
+    practices.compact()
+    add_practice_sets(practices, 1)
+    practice_evaluation = evaluation_cache.load_evaluation(practices_file)
+    assert_same_evaluation(practice_evaluation, practices_file)
+    assert records_read == [10, 11]
+
+
+@pytest.mark.parametrize(
+    "file_format",
+    [results.PracticesFileFormat.TEXT, results.PracticesFileFormat.BINARY],
+)
+def test_other_formats_read_fully(
+    tmp_path: pathlib.Path,
+    records_read: list[int],
+    file_format: results.PracticesFileFormat,
+) -> None:
+    practices_file = pathlib.Path(tmp_path, "practices")
+    practices = results.Practices(practices_file, file_format)
+    add_practice_sets(practices, 10)
+    evaluation_cache.load_evaluation(practices_file)
+    evaluation_cache.load_evaluation(practices_file)
+    assert records_read == [10]
+
+    add_practice_sets(practices, 2)
+    practice_evaluation = evaluation_cache.load_evaluation(practices_file)
+    assert_same_evaluation(practice_evaluation, practices_file)
+    assert records_read == [10, 12]
+
+
+@pytest.mark.parametrize("cache_contents", ["", "{", "[]", '{"version": 1}'])
+def test_invalid_cache_ignored(
+    tmp_path: pathlib.Path, records_read: list[int], cache_contents: str
+) -> None:
+    practices_file = pathlib.Path(tmp_path, "practices")
+    practices = results.Practices(practices_file, results.PracticesFileFormat.JOURNAL)
+    add_practice_sets(practices, 5)
+    evaluation_cache.get_cache_file(practices_file).write_text(
+        cache_contents, encoding="utf-8"
+    )
+
+    practice_evaluation = evaluation_cache.load_evaluation(practices_file)
+    assert_same_evaluation(practice_evaluation, practices_file)
+    assert records_read == [5]
+
+    evaluation_cache.load_evaluation(practices_file)
+    assert records_read == [5]
+
+
+def test_with_activities(tmp_path: pathlib.Path) -> None:
+    activity_file = pathlib.Path(tmp_path, "activities.txt")
+    activity_file.write_text("[id=a1] activity\n", encoding="utf-8")
+    activities = routine.Activities(activity_file)
+
+    practices_file = pathlib.Path(tmp_path, "practices")
+    practices = results.Practices(practices_file, results.PracticesFileFormat.JOURNAL)
+    practices.add_practice_set(routine.Activity("activity", "a1"), 1, START_TIME)
+    # Keyed by description, as saved before activities had ids.
+    practices.add_practice_set(routine.Activity("activity", "activity"), 2, START_TIME)
+    practices.save()
+
+    for _ in range(2):
+        practice_evaluation = evaluation_cache.load_evaluation(
+            practices_file, activities
+        )
+        assert practice_evaluation.get_num_activities() == 1
+        activity_evaluation = practice_evaluation.get_activity_evaluation(0)
+        assert activity_evaluation.get_activity_key() == "a1"
+        assert activity_evaluation.get_description() == "activity"
+        assert activity_evaluation.get_recent_scores() == [1, 2]
+
+
+def test_changed_activities_read_fully(
+    tmp_path: pathlib.Path, records_read: list[int]
+) -> None:
+    practices_file = pathlib.Path(tmp_path, "practices")
+    practices = results.Practices(practices_file, results.PracticesFileFormat.JOURNAL)
+    practices.add_practice_set(routine.Activity("activity", "a1"), 1, START_TIME)
+    practices.add_practice_set(routine.Activity("activity", "activity"), 2, START_TIME)
+    practices.save()
+    practice_evaluation = evaluation_cache.load_evaluation(practices_file)
+    assert practice_evaluation.get_num_activities() == 2
+
+    activity_file = pathlib.Path(tmp_path, "activities.txt")
+    activity_file.write_text("[id=a1] activity\n", encoding="utf-8")
+    practice_evaluation = evaluation_cache.load_evaluation(
+        practices_file, routine.Activities(activity_file)
+    )
+    assert practice_evaluation.get_num_activities() == 1
+    assert records_read == [2, 2]
+
+
+def test_out_of_order_appends_read_fully(
+    tmp_path: pathlib.Path, records_read: list[int]
+) -> None:
+    practices_file = pathlib.Path(tmp_path, "practices")
+    practices = results.Practices(practices_file, results.PracticesFileFormat.JOURNAL)
+    for x in range(40):
+        practices.add_practice_set(
+            routine.Activity("activity"), x % 5, START_TIME + datetime.timedelta(x)
+        )
+    practices.save()
+    evaluation_cache.load_evaluation(practices_file)
+
+    # Older than all the latest scores kept in the cached summary.
+    for x in range(2):
+        practices.add_practice_set(
+            routine.Activity("activity"), 4, START_TIME - datetime.timedelta(x)
+        )
+    practices.save()
+    practice_evaluation = evaluation_cache.load_evaluation(practices_file)
+    assert records_read == [40, 2, 42]
+
+    activity_evaluation = practice_evaluation.get_activity_evaluation(0)
+    assert activity_evaluation.is_trend_exact()
+    expected_evaluation = evaluation.Evaluation(
+        results.Practices(practices_file), summary=True
+    )
+    assert (
+        activity_evaluation.get_trend().to_dict()
+        == expected_evaluation.get_activity_evaluation(0).get_trend().to_dict()
+    )
+
+
+def test_compressed_journal_read_fully(
+    tmp_path: pathlib.Path, records_read: list[int]
+) -> None:
+    practices_file = pathlib.Path(tmp_path, "practices.gz")
+    practices = results.Practices(practices_file, results.PracticesFileFormat.JOURNAL)
+    add_practice_sets(practices, 10)
+
+    practice_evaluation = evaluation_cache.load_evaluation(practices_file)
+    assert_same_evaluation(practice_evaluation, practices_file)
+    practice_evaluation = evaluation_cache.load_evaluation(practices_file)
+    assert records_read == [10]
+
+    add_practice_sets(practices, 4)
+    practice_evaluation = evaluation_cache.load_evaluation(practices_file)
+    assert_same_evaluation(practice_evaluation, practices_file)
+    assert records_read == [10, 14]
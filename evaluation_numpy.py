@@ -0,0 +1,247 @@
+"""Module evaluating practice set columns with vectorized NumPy.
+
+The practice sets of each group of activity keys are reduced to the
+dict of their ActivityEvaluation.to_dict in a few passes over the
+columns, rather than adding them one by one. NumPy is optional, nothing
+else here can be used unless is_available.
+"""
+
+import array
+import typing
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # type: ignore[assignment]
+
+import results
+import trends
+
+
+def _get_columns(
+    columns: results.PracticeSetColumns,
+    rows: typing.Union["array.array[int]", results.DateWindow, None],
+) -> tuple[typing.Any, ...]:
+    """Returns the arrays of columns as NumPy arrays, of the given rows.
+
+    These are the key indexes, scores, epoch microseconds and UTC
+    offsets. The rows are either row indexes, those in a DateWindow, or
+    all of them if None. The arrays are copies, so the columns can
+    still be appended to.
+    """
+    # The scores give the length, as they're appended last.
+    num_rows = len(columns)
+    arrays = [
+        numpy.frombuffer(x[:num_rows], dtype=x.typecode)
+        for x in (
+            columns.key_indexes,
+            columns.scores,
+            columns.epoch_micros,
+            columns.utc_offsets,
+        )
+    ]
+    if isinstance(rows, results.DateWindow):
+        epoch_micros = arrays[2]
+        in_window = numpy.ones(num_rows, dtype=bool)
+        if rows.since_epoch_micros is not None:
+            in_window &= epoch_micros >= rows.since_epoch_micros
+        if rows.until_epoch_micros is not None:
+            in_window &= epoch_micros < rows.until_epoch_micros
+        arrays = [x[in_window] for x in arrays]
+    elif rows is not None:
+        row_indexes = numpy.frombuffer(rows, dtype=rows.typecode)
+        arrays = [x[row_indexes] for x in arrays]
+    return tuple(arrays)
+
+
+def get_group_data(
+    columns: results.PracticeSetColumns,
+    rows: typing.Union["array.array[int]", results.DateWindow, None],
+    key_groups: list[int],
+    trend: trends.ScoreTrend,
+    recent_scores_length: typing.Optional[int] = None,
+) -> tuple[list[int], dict[int, dict[str, typing.Any]]]:
+    """Returns the ActivityEvaluation.to_dict of each group's scores.
+
+    Each key index of columns is evaluated in the group of key_groups at
+    that index, only over the rows given. The rows are either row
+    indexes, those in a DateWindow, or all of them if None. The key
+    indexes with rows are also returned, in the order they first
+    appear.
+
+    The dicts keep every score if recent_scores_length is None.
+    Otherwise they're of summary evaluations, keeping that many of the
+    latest scores. Their trends have the settings of trend.
+
+    The rows are sorted by group and time with a stable lexsort, so the
+    scores of each group are in the order adding them one by one gives.
+    """
+    key_indexes, scores, epoch_micros, utc_offsets = _get_columns(columns, rows)
+    first_key_indexes = _get_first_key_indexes(key_indexes)
+    if not first_key_indexes:
+        return first_key_indexes, {}
+
+    groups = numpy.array(key_groups, dtype=numpy.int32)[key_indexes]
+    del key_indexes
+    order = numpy.lexsort((epoch_micros, groups))
+    sorted_groups = _SortedGroups.create(
+        groups[order], scores[order], epoch_micros[order]
+    )
+    group_data = _reduce_sorted_groups(sorted_groups, utc_offsets, order)
+    if recent_scores_length is None:
+        _add_scores(group_data, sorted_groups, trend)
+    else:
+        _add_summary_tails(group_data, sorted_groups, trend, recent_scores_length)
+    return first_key_indexes, group_data
+
+
+def is_available() -> bool:
+    """Returns if NumPy is installed, so this module can be used."""
+    return numpy is not None
+
+
+def _get_first_key_indexes(key_indexes: typing.Any) -> list[int]:
+    """Returns the key indexes, in the order they first appear."""
+    present_key_indexes, first_rows = numpy.unique(key_indexes, return_index=True)
+    first_key_indexes: list[int] = present_key_indexes[
+        numpy.argsort(first_rows)
+    ].tolist()
+    return first_key_indexes
+
+
+class _SortedGroups(typing.NamedTuple):
+    """The scores and times of practice sets, sorted by group and time.
+
+    Each group's practice sets are the slice from its start to its stop.
+    """
+
+    groups: typing.Any
+    scores: typing.Any
+    epoch_micros: typing.Any
+    starts: typing.Any
+    stops: typing.Any
+
+    @classmethod
+    def create(
+        cls, groups: typing.Any, scores: typing.Any, epoch_micros: typing.Any
+    ) -> "_SortedGroups":
+        """Returns the _SortedGroups of the sorted arrays."""
+        starts = numpy.flatnonzero(numpy.diff(groups, prepend=-1))
+        stops = numpy.append(starts[1:], len(groups))
+        return cls(groups, scores, epoch_micros, starts, stops)
+
+    def iter_slices(self) -> typing.Iterator[tuple[int, int, int]]:
+        """Yields the group, start and stop of each group's slice."""
+        yield from zip(
+            self.groups[self.starts].tolist(),
+            self.starts.tolist(),
+            self.stops.tolist(),
+        )
+
+
+def _reduce_sorted_groups(
+    sorted_groups: _SortedGroups, utc_offsets: typing.Any, order: typing.Any
+) -> dict[int, dict[str, typing.Any]]:
+    """Returns the summaries and practice times of each group.
+
+    The utc_offsets are in the given order, the order that sorted the
+    groups. The counts, histograms and sums are reduced over each
+    group's slice of the arrays. The summaries have no recent scores.
+    """
+    groups, scores, epoch_micros, starts, stops = sorted_groups
+    histograms = numpy.bincount(
+        groups.astype(numpy.int64) * len(results.POSSIBLE_SCORES) + scores,
+        minlength=(int(groups[-1]) + 1) * len(results.POSSIBLE_SCORES),
+    ).reshape(-1, len(results.POSSIBLE_SCORES))
+    score_sums = numpy.add.reduceat(scores.astype(numpy.int64), starts)
+    return {
+        group: {
+            "summary": {
+                "histogram": histograms[group].tolist(),
+                "num_scores": stop - start,
+                "score_sum": score_sum,
+                "recent_scores": [],
+            },
+            "oldest_practice_time": (int(epoch_micros[start]), oldest_utc_offset),
+            "latest_practice_time": (int(epoch_micros[stop - 1]), latest_utc_offset),
+            # Each group's scores are sorted by time.
+            "is_trend_exact": True,
+        }
+        for (
+            group,
+            start,
+            stop,
+        ), score_sum, oldest_utc_offset, latest_utc_offset in zip(
+            sorted_groups.iter_slices(),
+            score_sums.tolist(),
+            # The UTC offsets of the oldest and latest of each group.
+            utc_offsets[order[starts]].tolist(),
+            utc_offsets[order[stops - 1]].tolist(),
+        )
+    }
+
+
+def _add_scores(
+    group_data: dict[int, dict[str, typing.Any]],
+    sorted_groups: _SortedGroups,
+    trend: trends.ScoreTrend,
+) -> None:
+    """Adds every score and time of each group to group_data.
+
+    The trends are left empty, as they're only worked out from the
+    scores when asked for.
+    """
+    empty_trend = trend.copy_empty().to_dict()
+    for group, start, stop in sorted_groups.iter_slices():
+        group_data[group]["trend"] = empty_trend
+        group_data[group]["scores"] = sorted_groups.scores[start:stop].tolist()
+        group_data[group]["epoch_micros"] = sorted_groups.epoch_micros[
+            start:stop
+        ].tolist()
+
+
+def _add_summary_tails(
+    group_data: dict[int, dict[str, typing.Any]],
+    sorted_groups: _SortedGroups,
+    trend: trends.ScoreTrend,
+    recent_scores_length: int,
+) -> None:
+    """Adds the recent scores and trends of each group to group_data.
+
+    Only the latest scores of each group are read one by one, other
+    than for the EWMA. It's folded over every score in time order, as
+    adding them to a ScoreTrend does, so it's exactly the same. The
+    base trend, of the scores before the recent scores, is the EWMA
+    folded up to them, which the trend's EWMA goes on from.
+    """
+    scores = sorted_groups.scores
+    epoch_micros = sorted_groups.epoch_micros
+    empty_trend = trend.copy_empty().to_dict()
+    for group, start, stop in sorted_groups.iter_slices():
+        recent_start = max(start, stop - recent_scores_length)
+        group_data[group]["summary"]["recent_scores"] = [
+            list(x)
+            for x in zip(
+                epoch_micros[recent_start:stop].tolist(),
+                scores[recent_start:stop].tolist(),
+            )
+        ]
+        base_ewma = trends.get_ewma(
+            scores[start:recent_start].tolist(), trend.ewma_weight
+        )
+        group_data[group]["base_trend"] = {
+            **empty_trend,
+            "num_scores": recent_start - start,
+            "ewma": base_ewma,
+            "window": scores[
+                max(start, recent_start - trend.window_size) : recent_start
+            ].tolist(),
+        }
+        group_data[group]["trend"] = {
+            **empty_trend,
+            "num_scores": stop - start,
+            "ewma": trends.get_ewma(
+                scores[recent_start:stop].tolist(), trend.ewma_weight, base_ewma
+            ),
+            "window": scores[max(start, stop - trend.window_size) : stop].tolist(),
+        }
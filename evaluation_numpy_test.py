@@ -0,0 +1,65 @@
+import array
+
+import pytest
+
+import evaluation_numpy
+import results
+import trends
+
+pytest.importorskip("numpy")
+
+
+def make_columns(
+    practice_sets: list[tuple[str, int, int]]
+) -> results.PracticeSetColumns:
+    columns = results.PracticeSetColumns()
+    for activity_key, score, epoch_micros in practice_sets:
+        columns.append(activity_key, score, epoch_micros, 0)
+    return columns
+
+
+@pytest.mark.parametrize("ewma_weight", [0.3, 1])
+def test_summary_trend(ewma_weight: float) -> None:
+    scores = [4, 0, 2, 3, 1, 4, 4]
+    # The practice sets of b are out of time order.
+    columns = make_columns(
+        [("a", x, index) for index, x in enumerate(scores)]
+        + [("b", 1, 20), ("b", 3, 10)]
+    )
+    trend = trends.ScoreTrend(window_size=3, ewma_weight=ewma_weight)
+
+    first_key_indexes, group_data = evaluation_numpy.get_group_data(
+        columns, None, [0, 1], trend, recent_scores_length=2
+    )
+
+    expected_trend = trend.copy_empty()
+    for score in scores:
+        expected_trend.add(score)
+    assert first_key_indexes == [0, 1]
+    assert group_data[0]["summary"]["recent_scores"] == [[5, 4], [6, 4]]
+    assert group_data[0]["trend"] == expected_trend.to_dict()
+    assert group_data[1]["trend"]["window"] == [3, 1]
+    assert group_data[1]["trend"]["ewma"] == 3 + ewma_weight * (1 - 3)
+    assert "scores" not in group_data[0]
+
+
+def test_every_score() -> None:
+    columns = make_columns([("a", 1, 2), ("b", 2, 0), ("a", 3, 1)])
+
+    first_key_indexes, group_data = evaluation_numpy.get_group_data(
+        columns, array.array("I", [0, 2]), [0, 0], trends.ScoreTrend()
+    )
+
+    assert first_key_indexes == [0]
+    assert group_data[0]["scores"] == [3, 1]
+    assert group_data[0]["epoch_micros"] == [1, 2]
+    assert group_data[0]["summary"]["histogram"] == [0, 1, 0, 1, 0]
+    assert group_data[0]["trend"] == trends.ScoreTrend().to_dict()
+
+
+def test_no_rows() -> None:
+    columns = make_columns([("a", 1, 2)])
+
+    assert evaluation_numpy.get_group_data(
+        columns, array.array("I"), [0], trends.ScoreTrend()
+    ) == ([], {})
@@ -0,0 +1,849 @@
+import datetime
+import pathlib
+import random
+import typing
+
+import pytest
+
+import evaluation
+import evaluation_numpy
+import results
+import routine
+import timestamps
+import trends
+
+
+class TestActivityEvaluation:
+    @pytest.mark.parametrize(
+        ("number_of_practice_sets", "reverse_order"),
+        [(0, False), (1, False), (10, False), (10, True), (100, False), (100, True)],
+    )
+    def test_activity_evaluation(
+        self, number_of_practice_sets: int, reverse_order: bool
+    ) -> None:
+        activity_key = "practice_activity"
+
+        sorted_scores = [x % 5 for x in range(number_of_practice_sets)]
+        initial_time = datetime.datetime.now(datetime.timezone.utc)
+        sorted_datetimes = [
+            initial_time + (x * datetime.timedelta(minutes=5))
+            for x in range(number_of_practice_sets)
+        ]
+        practice_sets = [
+            results.PracticeSet(activity_key, sorted_scores[x], sorted_datetimes[x])
+            for x in range(number_of_practice_sets)
+        ]
+
+        if reverse_order:
+            practice_sets = list(reversed(practice_sets))
+
+        activity_evaluation = evaluation.ActivityEvaluation(activity_key, practice_sets)
+        assert activity_evaluation.get_activity_key() == activity_key
+        assert activity_evaluation.get_num_practice_sets() == number_of_practice_sets
+
+        if number_of_practice_sets == 0:
+            assert activity_evaluation.get_oldest_practice_time() is None
+            assert activity_evaluation.get_latest_practice_time() is None
+            expected_output = (
+                f"{activity_key}\n" f"\tPracticed {number_of_practice_sets} times.\n"
+            )
+        else:
+            assert activity_evaluation.get_oldest_practice_time() == sorted_datetimes[0]
+            assert (
+                activity_evaluation.get_latest_practice_time() == sorted_datetimes[-1]
+            )
+            expected_output = (
+                f"{activity_key}\n"
+                f"\tPracticed {number_of_practice_sets} times.\n"
+                f"\tOldest practice {sorted_datetimes[0].isoformat()}\n"
+                f"\tNewest practice {sorted_datetimes[-1].isoformat()}\n"
+                f"\tScores: {sorted_scores}\n"
+            )
+        assert str(activity_evaluation) == expected_output
+
+    def test_activity_evaluation_mismatch_activity_keys(self) -> None:
+        activity_key = "practice_activity"
+        practice_sets = [
+            results.PracticeSet(
+                "different_key", 1, datetime.datetime.now(datetime.timezone.utc)
+            )
+        ]
+
+        with pytest.raises(
+            evaluation.ActivityEvaluationCreationError, match="activity_key mismatch"
+        ):
+            evaluation.ActivityEvaluation(activity_key, practice_sets)
+
+    def test_add_practice_sets_out_of_order(self) -> None:
+        activity_key = "practice_activity"
+        initial_time = datetime.datetime.now(datetime.timezone.utc)
+        activity_evaluation = evaluation.ActivityEvaluation(activity_key, [])
+
+        for minutes, score in [(10, 2), (0, 0), (20, 4), (5, 1), (10, 3)]:
+            activity_evaluation.add_practice_set(
+                results.PracticeSet(
+                    activity_key,
+                    score,
+                    initial_time + datetime.timedelta(minutes=minutes),
+                )
+            )
+
+        # Practice sets at the same time keep the order they were added.
+        assert activity_evaluation.scores == [0, 1, 2, 3, 4]
+        assert activity_evaluation.get_oldest_practice_time() == initial_time
+        assert activity_evaluation.get_latest_practice_time() == (
+            initial_time + datetime.timedelta(minutes=20)
+        )
+
+    def test_add_practice_set_mismatch_activity_key(self) -> None:
+        activity_evaluation = evaluation.ActivityEvaluation("practice_activity", [])
+
+        with pytest.raises(
+            evaluation.ActivityEvaluationCreationError, match="activity_key mismatch"
+        ):
+            activity_evaluation.add_practice_set(
+                results.PracticeSet(
+                    "different_key", 1, datetime.datetime.now(datetime.timezone.utc)
+                )
+            )
+
+
+class TestEvaluation:
+    @pytest.mark.parametrize("number_of_practice_sets", [0, 1, 10, 100])
+    def test_evaluation_one_activity(
+        self, tmp_path: pathlib.Path, number_of_practice_sets: int
+    ) -> None:
+        activity = routine.Activity("practice_activity")
+
+        practices_file = pathlib.Path(tmp_path, "practices.txt")
+        practices = results.Practices(practices_file)
+        time = datetime.datetime.now(datetime.timezone.utc)
+        for _ in range(number_of_practice_sets):
+            practices.add_practice_set(activity, 1, time)
+
+        practice_evaluation = evaluation.Evaluation(practices)
+        assert practice_evaluation.get_num_of_practice_sets() == number_of_practice_sets
+
+        if number_of_practice_sets == 0:
+            assert practice_evaluation.get_num_activities() == 0
+
+            expected_output = "0 activities has been completed 0 times.\n"
+        else:
+            assert practice_evaluation.get_num_activities() == 1
+
+            activity_evaluation = practice_evaluation.get_activity_evaluation(0)
+            assert activity_evaluation.get_activity_key() == activity.get_key()
+            assert (
+                activity_evaluation.get_num_practice_sets() == number_of_practice_sets
+            )
+            assert activity_evaluation.get_oldest_practice_time() == time
+            assert activity_evaluation.get_latest_practice_time() == time
+
+            expected_output = (
+                f"1 activity has been completed {number_of_practice_sets} times.\n\n"
+                f"{str(activity_evaluation)}"
+            )
+        assert str(practice_evaluation) == expected_output
+
+    def test_evaluation_multiple_activities(self, tmp_path: pathlib.Path) -> None:
+        # Without activities to describe them, the evaluations are in
+        # key order.
+        activities = sorted(
+            [
+                routine.Activity("practice_activity_1"),
+                routine.Activity("practice_activity_2"),
+                routine.Activity("practice_activity_3"),
+            ],
+            key=lambda x: x.get_key(),
+        )
+        num_activities = len(activities)
+        num_practice_set_per_activity = 7
+        total_num_practice_sets = num_activities * num_practice_set_per_activity
+
+        practices_file = pathlib.Path(tmp_path, "practices.txt")
+        practices = results.Practices(practices_file)
+        time = datetime.datetime.now(datetime.timezone.utc)
+        for x in range(total_num_practice_sets):
+            practices.add_practice_set(activities[x % num_activities], 1, time)
+
+        practice_evaluation = evaluation.Evaluation(practices)
+        assert practice_evaluation.get_num_activities() == num_activities
+        assert practice_evaluation.get_num_of_practice_sets() == total_num_practice_sets
+
+        for x, activity in enumerate(activities):
+            activity_evaluation = practice_evaluation.get_activity_evaluation(x)
+            assert activity_evaluation.get_activity_key() == activity.get_key()
+            assert (
+                activity_evaluation.get_num_practice_sets()
+                == num_practice_set_per_activity
+            )
+            assert activity_evaluation.get_oldest_practice_time() == time
+            assert activity_evaluation.get_latest_practice_time() == time
+
+        expected_output = (
+            f"{num_activities} activities has been completed "
+            f"{total_num_practice_sets} times.\n\n"
+            f"{str(practice_evaluation.get_activity_evaluation(0))}\n"
+            f"{str(practice_evaluation.get_activity_evaluation(1))}\n"
+            f"{str(practice_evaluation.get_activity_evaluation(2))}"
+        )
+        assert str(practice_evaluation) == expected_output
+
+    def test_evaluation_from_practice_sets_stream(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices.txt")
+        practices = results.Practices(practices_file)
+        initial_time = datetime.datetime.now(datetime.timezone.utc)
+        for x in range(30):
+            practices.add_practice_set(
+                routine.Activity(f"practice_activity_{x % 4}"),
+                x % 5,
+                initial_time - datetime.timedelta(hours=x),
+            )
+        practices.save()
+
+        streamed_evaluation = evaluation.Evaluation(
+            results.iter_practice_sets(practices_file)
+        )
+        assert str(streamed_evaluation) == str(evaluation.Evaluation(practices))
+
+    def test_live_evaluation_follows_practices(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices.txt")
+        practices = results.Practices(practices_file)
+        activity_1 = routine.Activity("practice_activity_1")
+        activity_2 = routine.Activity("practice_activity_2")
+        time = datetime.datetime.now(datetime.timezone.utc)
+        practices.add_practice_set(activity_2, 1, time)
+
+        live_evaluation = evaluation.Evaluation(practices, live=True)
+        snapshot_evaluation = evaluation.Evaluation(practices)
+        assert (
+            live_evaluation.get_activity_evaluation_by_key(activity_1.get_key()) is None
+        )
+
+        later_time = time + datetime.timedelta(minutes=5)
+        practices.add_practice_set(activity_1, 3, later_time)
+        practices.add_practice_set(activity_2, 4, later_time)
+
+        assert snapshot_evaluation.get_num_of_practice_sets() == 1
+        assert live_evaluation.get_num_of_practice_sets() == 3
+        assert live_evaluation.get_num_activities() == 2
+
+        activity_1_evaluation = live_evaluation.get_activity_evaluation_by_key(
+            activity_1.get_key()
+        )
+        assert activity_1_evaluation is not None
+        assert activity_1_evaluation.scores == [3]
+
+        activity_2_evaluation = live_evaluation.get_activity_evaluation_by_key(
+            activity_2.get_key()
+        )
+        assert activity_2_evaluation is not None
+        assert activity_2_evaluation.scores == [1, 4]
+        assert activity_2_evaluation.get_oldest_practice_time() == time
+        assert activity_2_evaluation.get_latest_practice_time() == later_time
+
+        assert str(live_evaluation) == str(evaluation.Evaluation(practices))
+
+    def test_evaluation_with_activities(self, tmp_path: pathlib.Path) -> None:
+        activity_file = pathlib.Path(tmp_path, "activities.txt")
+        with open(activity_file, "w", encoding="utf-8") as f:
+            f.write("b_activity\n")
+            f.write("[id=a1] c_activity\n")
+            f.write("a_activity\n")
+        activities = routine.Activities(activity_file)
+
+        time = datetime.datetime.now(datetime.timezone.utc)
+        practice_sets = [
+            results.PracticeSet("a1", 1, time),
+            # Keyed by description, as saved before activities had ids.
+            results.PracticeSet("c_activity", 2, time),
+            results.PracticeSet(routine.Activity("a_activity").get_key(), 3, time),
+            results.PracticeSet("unknown_key", 4, time),
+        ]
+
+        practice_evaluation = evaluation.Evaluation(
+            practice_sets, activities=activities
+        )
+        assert practice_evaluation.get_num_activities() == 3
+        assert practice_evaluation.get_num_of_practice_sets() == 4
+
+        assert [
+            practice_evaluation.get_activity_evaluation(x).get_description()
+            for x in range(3)
+        ] == ["a_activity", "c_activity", "unknown_key"]
+
+        activity_evaluation = practice_evaluation.get_activity_evaluation(1)
+        assert activity_evaluation.get_activity_key() == "a1"
+        assert activity_evaluation.scores == [1, 2]
+        assert str(activity_evaluation).startswith("c_activity\n")
+        assert practice_evaluation.get_activity_evaluation_by_key("c_activity") is (
+            activity_evaluation
+        )
+
+
+class TestMergeActivityEvaluations:
+    def make_activity_evaluation(
+        self, activity_key: str, hours: list[int]
+    ) -> evaluation.ActivityEvaluation:
+        start_time = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+        return evaluation.ActivityEvaluation(
+            activity_key,
+            [
+                results.PracticeSet(
+                    activity_key, x % 5, start_time + datetime.timedelta(hours=x)
+                )
+                for x in hours
+            ],
+        )
+
+    @pytest.mark.parametrize(
+        ("hours", "other_hours"),
+        [([], []), ([1, 2], []), ([], [1, 2]), ([1, 3, 5], [0, 3, 4, 6]), ([2], [1])],
+    )
+    def test_merge(self, hours: list[int], other_hours: list[int]) -> None:
+        activity_evaluation = self.make_activity_evaluation("key", hours)
+        activity_evaluation.merge(self.make_activity_evaluation("other", other_hours))
+
+        expected_evaluation = self.make_activity_evaluation("key", hours + other_hours)
+        assert repr(activity_evaluation) == repr(expected_evaluation)
+
+    def test_dict_round_trip(self) -> None:
+        activity_evaluation = self.make_activity_evaluation("key", [3, 1, 2])
+        round_trip = evaluation.ActivityEvaluation.from_dict(
+            "key", activity_evaluation.to_dict()
+        )
+        assert repr(round_trip) == repr(activity_evaluation)
+
+        # Scores added later still go in time order.
+        round_trip.add_score(4, 0, 0)
+        assert round_trip.scores == [4, 1, 2, 3]
+
+    def test_add_activity_evaluation(self) -> None:
+        practice_evaluation = evaluation.Evaluation([])
+        practice_evaluation.add_activity_evaluation(
+            self.make_activity_evaluation("b", [1, 2])
+        )
+        practice_evaluation.add_activity_evaluation(
+            self.make_activity_evaluation("a", [3])
+        )
+        practice_evaluation.add_activity_evaluation(
+            self.make_activity_evaluation("b", [0])
+        )
+
+        assert practice_evaluation.get_num_of_practice_sets() == 4
+        assert [
+            x.get_activity_key() for x in practice_evaluation.activity_evaluations
+        ] == ["a", "b"]
+        activity_evaluation = practice_evaluation.get_activity_evaluation_by_key("b")
+        assert activity_evaluation is not None
+        assert activity_evaluation.scores == [0, 1, 2]
+
+    def test_add_records(self) -> None:
+        practice_evaluation = evaluation.Evaluation([])
+        practice_evaluation.add_records(
+            [("a", 1, 20, 0), ("b", 2, 0, 0), ("a", 3, 10, 0)]
+        )
+
+        assert practice_evaluation.get_num_of_practice_sets() == 3
+        activity_evaluation = practice_evaluation.get_activity_evaluation_by_key("a")
+        assert activity_evaluation is not None
+        assert activity_evaluation.scores == [3, 1]
+
+
+class TestEvaluationWindow:
+    start_time = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    window = results.DateWindow(
+        start_time + datetime.timedelta(days=2), start_time + datetime.timedelta(days=4)
+    )
+
+    def make_practices(self, tmp_path: pathlib.Path) -> results.Practices:
+        practices = results.Practices(pathlib.Path(tmp_path, "practices.txt"))
+        for x in range(6):
+            practices.add_practice_set(
+                routine.Activity(f"activity_{x}"),
+                x % 5,
+                self.start_time + datetime.timedelta(days=x),
+            )
+        return practices
+
+    def test_window_practices(self, tmp_path: pathlib.Path) -> None:
+        practices = self.make_practices(tmp_path)
+        practice_evaluation = evaluation.Evaluation(
+            practices, live=True, window=self.window
+        )
+        assert practice_evaluation.get_num_of_practice_sets() == 2
+        assert practice_evaluation.get_num_activities() == 2
+        assert practice_evaluation.get_activity_evaluation_by_key(
+            routine.Activity("activity_2").get_key()
+        )
+
+        practices.add_practice_set(routine.Activity("activity_0"), 1, self.start_time)
+        practices.add_practice_set(
+            routine.Activity("activity_0"),
+            1,
+            self.start_time + datetime.timedelta(days=3),
+        )
+        assert practice_evaluation.get_num_of_practice_sets() == 3
+
+    def test_window_iterable(self, tmp_path: pathlib.Path) -> None:
+        practices = self.make_practices(tmp_path)
+        practice_evaluation = evaluation.Evaluation(
+            practices.get_practice_sets(), window=self.window
+        )
+        assert practice_evaluation.get_num_of_practice_sets() == 2
+
+    def test_window_records(self) -> None:
+        practice_evaluation = evaluation.Evaluation([], window=self.window)
+        practice_evaluation.add_records(
+            [
+                ("a", 1, timestamps.to_epoch_micros(self.start_time)[0], 0),
+                (
+                    "a",
+                    2,
+                    timestamps.to_epoch_micros(
+                        self.start_time + datetime.timedelta(days=2)
+                    )[0],
+                    0,
+                ),
+            ]
+        )
+        assert practice_evaluation.get_num_of_practice_sets() == 1
+
+
+class TestScoreSummary:
+    @pytest.mark.parametrize(
+        ("scores", "expected_median", "expected_percentiles"),
+        [
+            ([], None, [None, None, None]),
+            ([3], 3, [3, 3, 3]),
+            ([4, 0], 0, [0, 0, 4]),
+            ([0, 1, 1, 2, 4, 4, 4], 2, [0, 1, 4]),
+        ],
+    )
+    def test_statistics(
+        self,
+        scores: list[int],
+        expected_median: typing.Optional[int],
+        expected_percentiles: list[typing.Optional[int]],
+    ) -> None:
+        score_summary = evaluation.ScoreSummary()
+        for epoch_micros, score in enumerate(scores):
+            score_summary.add(score, epoch_micros)
+
+        assert score_summary.num_scores == len(scores)
+        assert sum(score_summary.histogram) == len(scores)
+        assert score_summary.get_mean() == (
+            sum(scores) / len(scores) if scores else None
+        )
+        assert score_summary.get_median() == expected_median
+        assert [
+            score_summary.get_percentile(x) for x in [0, 25, 100]
+        ] == expected_percentiles
+
+    def test_recent_scores(self) -> None:
+        score_summary = evaluation.ScoreSummary()
+        length = evaluation.RECENT_SCORES_LENGTH
+        for epoch_micros in range(length + 5):
+            score_summary.add(epoch_micros % 5, epoch_micros)
+        assert score_summary.get_recent_scores() == [
+            x % 5 for x in range(5, length + 5)
+        ]
+
+        # Older scores are only kept if among the latest.
+        score_summary.add(4, 0)
+        score_summary.add(0, 7)
+        assert score_summary.get_recent_scores() == [
+            1,
+            2,
+            0,
+            *[x % 5 for x in range(8, length + 5)],
+        ]
+        assert score_summary.num_scores == length + 7
+
+    def test_merge_and_dict_round_trip(self) -> None:
+        score_summary = evaluation.ScoreSummary()
+        other_summary = evaluation.ScoreSummary()
+        for epoch_micros in range(30):
+            if epoch_micros % 3:
+                score_summary.add(1, epoch_micros)
+            else:
+                other_summary.add(4, epoch_micros)
+
+        score_summary.merge(evaluation.ScoreSummary.from_dict(other_summary.to_dict()))
+        assert score_summary.histogram == [0, 20, 0, 0, 10]
+        assert score_summary.get_mean() == 2
+        assert score_summary.get_recent_scores() == [
+            4 if x % 3 == 0 else 1 for x in range(10, 30)
+        ]
+
+    def test_invalid_dict(self) -> None:
+        data = evaluation.ScoreSummary().to_dict()
+        data["num_scores"] = 1
+        with pytest.raises(ValueError):
+            evaluation.ScoreSummary.from_dict(data)
+
+
+class TestSummaryEvaluation:
+    start_time = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+    def make_practice_sets(
+        self, activity_key: str, num_practice_sets: int
+    ) -> list[results.PracticeSet]:
+        return [
+            results.PracticeSet(
+                activity_key, x % 5, self.start_time + datetime.timedelta(hours=x)
+            )
+            for x in range(num_practice_sets)
+        ]
+
+    def test_summary(self) -> None:
+        practice_sets = self.make_practice_sets("a", 25)
+        activity_evaluation = evaluation.ActivityEvaluation(
+            "a", practice_sets, summary=True
+        )
+        full_evaluation = evaluation.ActivityEvaluation("a", practice_sets)
+
+        assert activity_evaluation.is_summary()
+        assert not full_evaluation.is_summary()
+        with pytest.raises(evaluation.ScoresNotKeptError):
+            _ = activity_evaluation.scores
+        assert activity_evaluation.get_num_practice_sets() == 25
+        assert activity_evaluation.get_recent_scores() == full_evaluation.scores[5:]
+        assert activity_evaluation.get_recent_scores(2) == [3, 4]
+        assert activity_evaluation.get_latest_score() == 4
+        assert activity_evaluation.get_latest_practice_time() == (
+            self.start_time + datetime.timedelta(hours=24)
+        )
+        assert "\tLatest 20 of 25 scores: [0, 1, " in str(activity_evaluation)
+
+    def test_merge(self) -> None:
+        activity_evaluation = evaluation.ActivityEvaluation("a", [], summary=True)
+        activity_evaluation.merge(
+            evaluation.ActivityEvaluation("a", self.make_practice_sets("a", 3))
+        )
+        activity_evaluation.merge(
+            evaluation.ActivityEvaluation(
+                "a", self.make_practice_sets("a", 2), summary=True
+            )
+        )
+        assert activity_evaluation.get_score_summary().histogram == [2, 2, 1, 0, 0]
+        assert activity_evaluation.get_recent_scores() == [0, 0, 1, 1, 2]
+
+        full_evaluation = evaluation.ActivityEvaluation("a", [])
+        with pytest.raises(evaluation.ScoresNotKeptError):
+            full_evaluation.merge(activity_evaluation)
+
+    def test_dict_round_trip(self) -> None:
+        activity_evaluation = evaluation.ActivityEvaluation(
+            "a", self.make_practice_sets("a", 30), summary=True
+        )
+        round_trip = evaluation.ActivityEvaluation.from_dict(
+            "a", activity_evaluation.to_dict()
+        )
+        assert round_trip.is_summary()
+        assert str(round_trip) == str(activity_evaluation)
+
+    def test_summary_evaluation(self) -> None:
+        practice_evaluation = evaluation.Evaluation(
+            self.make_practice_sets("a", 30) + self.make_practice_sets("b", 3),
+            summary=True,
+        )
+        assert all(x.is_summary() for x in practice_evaluation.activity_evaluations)
+        assert practice_evaluation.get_num_of_practice_sets() == 33
+
+
+class TestTrends:
+    start_time = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+    def make_practice_sets(
+        self, activity_key: str, scores: list[int], first_hour: int = 0
+    ) -> list[results.PracticeSet]:
+        return [
+            results.PracticeSet(
+                activity_key,
+                score,
+                self.start_time + datetime.timedelta(hours=first_hour + x),
+            )
+            for x, score in enumerate(scores)
+        ]
+
+    @pytest.mark.parametrize("summary", [False, True])
+    def test_out_of_order(self, summary: bool) -> None:
+        practice_sets = self.make_practice_sets("a", [0, 1, 2, 3, 4])
+        activity_evaluation = evaluation.ActivityEvaluation(
+            "a", [], summary=summary, trend=trends.ScoreTrend(window_size=3)
+        )
+        for practice_set in practice_sets[2:] + practice_sets[:2]:
+            activity_evaluation.add_practice_set(practice_set)
+
+        trend = activity_evaluation.get_trend()
+        assert trend.get_slope() == 1
+        assert trend.get_moving_average() == 3
+
+    @pytest.mark.parametrize("summary", [False, True])
+    @pytest.mark.parametrize("first_hour", [0, 10])
+    def test_merge(self, summary: bool, first_hour: int) -> None:
+        activity_evaluation = evaluation.ActivityEvaluation(
+            "a", self.make_practice_sets("a", [4, 3], 5), summary=summary
+        )
+        activity_evaluation.merge(
+            evaluation.ActivityEvaluation(
+                "a", self.make_practice_sets("a", [1, 0, 2], first_hour)
+            )
+        )
+
+        expected_evaluation = evaluation.ActivityEvaluation(
+            "a",
+            self.make_practice_sets("a", [4, 3], 5)
+            + self.make_practice_sets("a", [1, 0, 2], first_hour),
+        )
+        assert (
+            activity_evaluation.get_trend().to_dict()
+            == expected_evaluation.get_trend().to_dict()
+        )
+
+    def test_out_of_order_among_recent_scores(self) -> None:
+        practice_sets = self.make_practice_sets("a", [x * 7 % 5 for x in range(60)])
+        activity_evaluation = evaluation.ActivityEvaluation("a", [], summary=True)
+        for practice_set in practice_sets[:40] + practice_sets[:39:-1]:
+            activity_evaluation.add_practice_set(practice_set)
+
+        expected_evaluation = evaluation.ActivityEvaluation("a", practice_sets)
+        assert activity_evaluation.is_trend_exact()
+        assert (
+            activity_evaluation.get_trend().to_dict()
+            == expected_evaluation.get_trend().to_dict()
+        )
+
+    def test_older_than_recent_scores(self) -> None:
+        practice_sets = self.make_practice_sets("a", [x * 7 % 5 for x in range(60)])
+        activity_evaluation = evaluation.ActivityEvaluation("a", [], summary=True)
+        for practice_set in practice_sets[30:] + practice_sets[:30]:
+            activity_evaluation.add_practice_set(practice_set)
+
+        # The older scores could only be added after the base trend's.
+        assert not activity_evaluation.is_trend_exact()
+        assert activity_evaluation.get_trend().get_num_scores() == 60
+        assert activity_evaluation.get_recent_scores() == [
+            x.score for x in practice_sets[40:]
+        ]
+
+        # An older score is in time order while the base trend is empty.
+        activity_evaluation = evaluation.ActivityEvaluation("a", [], summary=True)
+        for practice_set in practice_sets[40:] + practice_sets[39:40]:
+            activity_evaluation.add_practice_set(practice_set)
+        assert activity_evaluation.is_trend_exact()
+
+    @pytest.mark.parametrize("into_latest", [False, True])
+    def test_merge_summaries(self, into_latest: bool) -> None:
+        practice_sets = self.make_practice_sets("a", [x * 7 % 5 for x in range(50)])
+        evaluations = [
+            evaluation.ActivityEvaluation("a", practice_sets[:40], summary=True),
+            evaluation.ActivityEvaluation("a", practice_sets[40:], summary=True),
+        ]
+        if into_latest:
+            evaluations.reverse()
+        evaluations[0].merge(evaluations[1])
+
+        # The scores before the latest ones are kept in the trend.
+        expected_evaluation = evaluation.ActivityEvaluation("a", practice_sets)
+        assert evaluations[0].is_trend_exact()
+        assert (
+            evaluations[0].get_trend().to_dict()
+            == expected_evaluation.get_trend().to_dict()
+        )
+
+    def test_merge_overlapping_summaries(self) -> None:
+        practice_sets = self.make_practice_sets("a", [x * 7 % 5 for x in range(80)])
+        activity_evaluation = evaluation.ActivityEvaluation(
+            "a", practice_sets[::2], summary=True
+        )
+        other_evaluation = evaluation.ActivityEvaluation(
+            "a", practice_sets[1::2], summary=True
+        )
+        activity_evaluation.merge(other_evaluation)
+
+        assert not activity_evaluation.is_trend_exact()
+        assert activity_evaluation.get_trend().get_num_scores() == 80
+        assert activity_evaluation.get_recent_scores() == [
+            x.score for x in practice_sets[60:]
+        ]
+
+        merged_evaluation = evaluation.ActivityEvaluation("a", [], summary=True)
+        merged_evaluation.merge(activity_evaluation)
+        assert not merged_evaluation.is_trend_exact()
+
+    def test_merge_into_empty(self) -> None:
+        activity_evaluation = evaluation.ActivityEvaluation("a", [], summary=True)
+        other_evaluation = evaluation.ActivityEvaluation(
+            "a", self.make_practice_sets("a", [1, 2] * 20), summary=True
+        )
+        activity_evaluation.merge(other_evaluation)
+
+        # The whole trend is kept, not redone from the latest scores.
+        assert (
+            activity_evaluation.get_trend().to_dict()
+            == other_evaluation.get_trend().to_dict()
+        )
+
+    def test_most_improved_and_regressed(self) -> None:
+        practice_evaluation = evaluation.Evaluation(
+            self.make_practice_sets("a", [0, 4])
+            + self.make_practice_sets("b", [2, 3])
+            + self.make_practice_sets("c", [4, 0])
+            + self.make_practice_sets("d", [2, 2])
+            + self.make_practice_sets("e", [3])
+            + self.make_practice_sets("f", [1, 2, 3])
+        )
+
+        assert [
+            x.get_activity_key() for x in practice_evaluation.get_most_improved(2)
+        ] == ["a", "b"]
+        assert [
+            x.get_activity_key() for x in practice_evaluation.get_most_improved(5)
+        ] == ["a", "b", "f"]
+        assert [
+            x.get_activity_key() for x in practice_evaluation.get_most_regressed(5)
+        ] == ["c"]
+
+    def test_trend_settings(self) -> None:
+        practice_evaluation = evaluation.Evaluation(
+            self.make_practice_sets("a", [0, 4, 4]),
+            trend=trends.ScoreTrend(window_size=2, ewma_weight=1),
+        )
+        trend = practice_evaluation.get_activity_evaluation(0).get_trend()
+        assert trend.get_slope() == 0
+        assert trend.get_ewma() == 4
+
+
+class TestNumpyEvaluation:
+    start_time = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    window = results.DateWindow(
+        start_time + datetime.timedelta(days=2), start_time + datetime.timedelta(days=5)
+    )
+
+    def make_practices(
+        self, tmp_path: pathlib.Path, window: typing.Optional[results.DateWindow] = None
+    ) -> results.Practices:
+        practices = results.Practices(
+            pathlib.Path(tmp_path, "practices.txt"), window=window
+        )
+        activity_keys = [
+            "a1",
+            # Keyed by description, as saved before activities had ids.
+            "c_activity",
+            routine.Activity("a_activity").get_key(),
+            "unknown_key",
+            "other_key",
+        ]
+        generator = random.Random(0)
+        for _ in range(500):
+            # Few distinct times, so many are out of order or the same.
+            epoch_micros, _ = timestamps.to_epoch_micros(
+                self.start_time
+                + datetime.timedelta(hours=generator.randrange(7 * 24 // 4) * 4)
+            )
+            practices.columns.append(
+                generator.choice(activity_keys),
+                generator.randrange(len(results.POSSIBLE_SCORES)),
+                epoch_micros,
+                generator.choice([0, 3600]),
+            )
+        return practices
+
+    def make_activities(self, tmp_path: pathlib.Path) -> routine.Activities:
+        activity_file = pathlib.Path(tmp_path, "activities.txt")
+        with open(activity_file, "w", encoding="utf-8") as f:
+            f.write("b_activity\n")
+            f.write("[id=a1] c_activity\n")
+            f.write("a_activity\n")
+        return routine.Activities(activity_file)
+
+    def get_results(
+        self, practice_evaluation: evaluation.Evaluation
+    ) -> list[tuple[str, str, dict[str, typing.Any]]]:
+        return [
+            (x.get_activity_key(), x.get_description(), x.to_dict())
+            for x in practice_evaluation.activity_evaluations
+        ]
+
+    @pytest.mark.parametrize(
+        ("practices_window", "window"),
+        [(None, None), (None, window), (window, None)],
+        ids=["all", "window", "practices_window"],
+    )
+    def test_same_as_without_numpy(
+        self,
+        tmp_path: pathlib.Path,
+        monkeypatch: pytest.MonkeyPatch,
+        practices_window: typing.Optional[results.DateWindow],
+        window: typing.Optional[results.DateWindow],
+    ) -> None:
+        pytest.importorskip("numpy")
+        practices = self.make_practices(tmp_path, practices_window)
+        activities = self.make_activities(tmp_path)
+
+        numpy_evaluation = evaluation.Evaluation(
+            practices, activities=activities, window=window
+        )
+        monkeypatch.setattr(evaluation_numpy, "numpy", None)
+        expected_evaluation = evaluation.Evaluation(
+            practices, activities=activities, window=window
+        )
+
+        assert self.get_results(numpy_evaluation) == self.get_results(
+            expected_evaluation
+        )
+        assert numpy_evaluation.get_num_of_practice_sets() == (
+            expected_evaluation.get_num_of_practice_sets()
+        )
+        for activity_key in ["a1", "c_activity", "unknown_key", "other_key"]:
+            activity_evaluation = numpy_evaluation.get_activity_evaluation_by_key(
+                activity_key
+            )
+            expected_activity_evaluation = (
+                expected_evaluation.get_activity_evaluation_by_key(activity_key)
+            )
+            assert (activity_evaluation is None) == (
+                expected_activity_evaluation is None
+            )
+
+    @pytest.mark.parametrize("window", [None, window], ids=["all", "window"])
+    def test_summary_same_as_without_numpy(
+        self,
+        tmp_path: pathlib.Path,
+        monkeypatch: pytest.MonkeyPatch,
+        window: typing.Optional[results.DateWindow],
+    ) -> None:
+        pytest.importorskip("numpy")
+        # The practice sets are out of time order, many at the same
+        # time.
+        practices = self.make_practices(tmp_path)
+        activities = self.make_activities(tmp_path)
+        trend = trends.ScoreTrend(window_size=3, ewma_weight=0.2)
+
+        numpy_evaluation = evaluation.Evaluation(
+            practices, activities=activities, window=window, summary=True, trend=trend
+        )
+        monkeypatch.setattr(evaluation_numpy, "numpy", None)
+        expected_evaluation = evaluation.Evaluation(
+            practices, activities=activities, window=window, summary=True, trend=trend
+        )
+
+        assert self.get_results(numpy_evaluation) == self.get_results(
+            expected_evaluation
+        )
+        assert all(x.is_summary() for x in numpy_evaluation.activity_evaluations)
+
+    def test_empty_and_live(self, tmp_path: pathlib.Path) -> None:
+        pytest.importorskip("numpy")
+        practices = results.Practices(pathlib.Path(tmp_path, "practices.txt"))
+        practice_evaluation = evaluation.Evaluation(practices, live=True)
+        assert practice_evaluation.get_num_activities() == 0
+
+        practices.add_practice_set(routine.Activity("a"), 2, self.start_time)
+        practices.add_practice_set(
+            routine.Activity("a"), 3, self.start_time - datetime.timedelta(days=1)
+        )
+        assert practice_evaluation.get_num_of_practice_sets() == 2
+        assert practice_evaluation.get_activity_evaluation(0).scores == [3, 2]
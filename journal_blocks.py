@@ -0,0 +1,101 @@
+"""Module of the checksummed blocks journal records are written in.
+
+Each block starts with a frame line of the BLOCK_MARKER, the number of
+records in the block, their size in bytes and their CRC-32, followed
+by the records. The marker is never valid UTF-8, so it never appears
+in a record, and a load can resume from the next block after damage.
+"""
+
+import io
+import itertools
+import typing
+import zlib
+
+# Starts the frame line of every block.
+BLOCK_MARKER = b"\xff\xfeblock"
+
+# The most records in a block, so damage to one loses few of them.
+_MAX_BLOCK_RECORDS = 128
+
+# The number of bytes read at a time when looking for the next block.
+_SCAN_CHUNK_SIZE = 64 * 1024
+
+
+class CorruptBlockError(Exception):
+    """A block is malformed, truncated or fails its checksum."""
+
+
+class CorruptRegion(typing.NamedTuple):
+    """A damaged region of a journal, skipped when loading it.
+
+    The offsets are of the journal's decompressed contents, from start
+    up to, not including, stop.
+    """
+
+    start: int
+    stop: int
+    reason: str
+
+
+def encode_blocks(records: typing.Iterable[bytes]) -> typing.Iterator[bytes]:
+    """Yields the encoded records, framed in checksummed blocks."""
+    records = iter(records)
+    while block_records := list(itertools.islice(records, _MAX_BLOCK_RECORDS)):
+        payload = b"".join(block_records)
+        checksum = zlib.crc32(payload)
+        frame = f" {len(block_records)} {len(payload)} {checksum:08x}\n"
+        yield BLOCK_MARKER + frame.encode() + payload
+
+
+def read_block(f: typing.BinaryIO, frame: bytes) -> tuple[int, io.BytesIO]:
+    """Returns the number of records and the records of a block.
+
+    The frame is the block's frame line, already read from f.
+
+    Raises:
+        CorruptBlockError: The block is malformed, truncated or fails
+            its checksum.
+    """
+    try:
+        num_records_str, size_str, checksum_str = frame[len(BLOCK_MARKER) :].split()
+        num_records, size = int(num_records_str), int(size_str)
+        checksum = int(checksum_str, 16)
+    except ValueError as e:
+        raise CorruptBlockError(f"Malformed journal block frame, got {frame!r}") from e
+
+    payload = f.read(size)
+    if len(payload) != size:
+        raise CorruptBlockError(
+            f"Journal block was truncated, expected {size} bytes, got {len(payload)}"
+        )
+    if zlib.crc32(payload) != checksum:
+        raise CorruptBlockError("Journal block failed its checksum")
+    return num_records, io.BytesIO(payload)
+
+
+def seek_next_block(f: typing.BinaryIO, offset: int) -> int:
+    """Seeks f to the next block from offset, returning its offset.
+
+    f is left at its end, and the end returned, if there's none.
+    """
+    f.seek(offset)
+    # The end of the last chunk, in case a marker spans two chunks.
+    overlap = b""
+    while chunk := f.read(_SCAN_CHUNK_SIZE):
+        data = overlap + chunk
+        index = data.find(BLOCK_MARKER)
+        if index != -1:
+            offset += index - len(overlap)
+            f.seek(offset)
+            return offset
+        overlap = data[1 - len(BLOCK_MARKER) :]
+        offset += len(chunk)
+    return offset
+
+
+def get_padding(size: int) -> bytes:
+    """Returns size bytes a journal load skips, to overwrite damage.
+
+    The padding is blank lines, which are skipped between frames.
+    """
+    return b"\n" * size
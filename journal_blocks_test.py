@@ -0,0 +1,56 @@
+import io
+
+import pytest
+
+import journal_blocks
+
+
+def _read_blocks(data: bytes) -> list[bytes]:
+    f = io.BytesIO(data)
+    blocks = []
+    while frame := f.readline():
+        _, records = journal_blocks.read_block(f, frame)
+        blocks.append(records.read())
+    return blocks
+
+
+def test_encode_blocks() -> None:
+    records = [f"record {x}\n".encode() for x in range(300)]
+    data = b"".join(journal_blocks.encode_blocks(records))
+    assert _read_blocks(data) == [
+        b"".join(records[:128]),
+        b"".join(records[128:256]),
+        b"".join(records[256:]),
+    ]
+    assert not list(journal_blocks.encode_blocks([]))
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        # Truncated.
+        b"".join(journal_blocks.encode_blocks([b"record\n"]))[:-1],
+        # Failed checksum.
+        b"".join(journal_blocks.encode_blocks([b"record\n"])).replace(b"rec", b"REC"),
+        # Malformed frame.
+        journal_blocks.BLOCK_MARKER + b" 1 7\nrecord\n",
+    ],
+)
+def test_read_corrupt_block(data: bytes) -> None:
+    with pytest.raises(journal_blocks.CorruptBlockError):
+        _read_blocks(data)
+
+
+@pytest.mark.parametrize("chunk_size", [4, 64 * 1024])
+def test_seek_next_block(chunk_size: int, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(journal_blocks, "_SCAN_CHUNK_SIZE", chunk_size)
+    block = b"".join(journal_blocks.encode_blocks([b"record\n"]))
+    data = b"damaged" * 3 + block + block
+    f = io.BytesIO(data)
+
+    offset = journal_blocks.seek_next_block(f, 0)
+    assert offset == 21
+    assert f.tell() == offset
+    assert journal_blocks.seek_next_block(f, offset + 1) == 21 + len(block)
+    assert journal_blocks.seek_next_block(f, 22 + len(block)) == len(data)
+    assert f.tell() == len(data)
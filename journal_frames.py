@@ -0,0 +1,143 @@
+"""Module of the frames records are written in, in practices journals.
+
+A journal starts with the JOURNAL_HEADER line, followed by frames. Each
+record is a frame line holding its size in bytes, followed by the
+record, and the records are written in the checksummed blocks of
+journal_blocks. A compacted journal ends with a footer line holding the
+number of records before it, so a load can confirm nothing was lost.
+Blank lines between frames are padding, left by a repair.
+
+The records are only bytes here, results encodes practice sets in them.
+"""
+
+import pathlib
+import typing
+
+import compressed_files
+import journal_blocks
+
+JOURNAL_HEADER = b"deliberate-practice-journal v1\n"
+
+# Starts the frame line of every record.
+_RECORD_MARKER = b"@"
+
+# Starts the footer line of a compacted journal.
+FOOTER_MARKER = b"$"
+
+
+class MalformedFrameError(Exception):
+    """A frame is malformed or truncated, or a footer doesn't match."""
+
+
+def write_journal(f: typing.BinaryIO, records: typing.Iterable[bytes]) -> int:
+    """Writes a compacted journal of records to f, returning how many.
+
+    The records are iterated only once, so they can be streamed.
+    """
+    num_records = 0
+
+    def iter_framed_records() -> typing.Iterator[bytes]:
+        nonlocal num_records
+        for record in records:
+            num_records += 1
+            yield _frame_record(record)
+
+    f.write(JOURNAL_HEADER)
+    for block in journal_blocks.encode_blocks(iter_framed_records()):
+        f.write(block)
+    f.write(FOOTER_MARKER + f" {num_records}\n".encode())
+    return num_records
+
+
+def append_to_journal(
+    journal_file: pathlib.Path, records: typing.Iterable[bytes]
+) -> None:
+    """Appends the records to journal_file, creating it if needed.
+
+    The records are appended in checksummed blocks. A compressed
+    journal_file has them appended as a new member, so the records
+    before them aren't compressed again. The records are synced to disk
+    before this returns.
+    """
+    is_new = not journal_file.is_file() or not journal_file.stat().st_size
+    with compressed_files.open_writer(
+        journal_file, compressed_files.get_compression(journal_file), append=True
+    ) as f:
+        if is_new:
+            f.write(JOURNAL_HEADER)
+        for block in journal_blocks.encode_blocks(_frame_record(x) for x in records):
+            f.write(block)
+
+
+def read_frame(
+    f: typing.BinaryIO, frame: bytes, num_records: typing.Optional[int] = None
+) -> list[bytes]:
+    """Returns the records in the frame read from f.
+
+    The frame is a line just read from f, which is left after the
+    frame's records. A footer has none, and is checked against
+    num_records, unless it's None.
+
+    Raises:
+        MalformedFrameError: The frame is malformed, or its block fails
+            its checksum.
+    """
+    if frame.startswith(journal_blocks.BLOCK_MARKER):
+        return _read_block(f, frame)
+    if frame == b"\n":
+        return []
+
+    marker, _, value = frame.rstrip(b"\n").partition(b" ")
+    try:
+        frame_value = int(value)
+    except ValueError as e:
+        raise MalformedFrameError(f"Malformed journal frame, got {frame!r}") from e
+
+    if marker == FOOTER_MARKER:
+        if num_records is not None and frame_value != num_records:
+            raise MalformedFrameError(
+                f"Journal footer expected {frame_value} practice sets, "
+                f"found {num_records}"
+            )
+        return []
+    if marker != _RECORD_MARKER:
+        raise MalformedFrameError(f"Malformed journal frame, got {frame!r}")
+
+    record = f.read(frame_value)
+    if len(record) != frame_value:
+        raise MalformedFrameError(
+            "Journal record was truncated, expected "
+            f"{frame_value} bytes, got {len(record)}"
+        )
+    return [record]
+
+
+def _read_block(f: typing.BinaryIO, frame: bytes) -> list[bytes]:
+    """Returns the records in the block of frame.
+
+    Raises:
+        MalformedFrameError: The block is malformed, or fails its
+            checksum.
+    """
+    try:
+        num_records, block = journal_blocks.read_block(f, frame)
+    except journal_blocks.CorruptBlockError as e:
+        raise MalformedFrameError(str(e)) from e
+
+    records = []
+    while record_frame := block.readline():
+        if not record_frame.startswith(_RECORD_MARKER):
+            raise MalformedFrameError(
+                f"Unexpected frame in journal block, got {record_frame!r}"
+            )
+        records.extend(read_frame(block, record_frame))
+    if len(records) != num_records:
+        raise MalformedFrameError(
+            f"Journal block expected {num_records} practice sets, found {len(records)}"
+        )
+    return records
+
+
+def _frame_record(record: bytes) -> bytes:
+    """Returns the record after its frame line."""
+    return _RECORD_MARKER + f" {len(record)}\n".encode() + record
@@ -0,0 +1,69 @@
+import io
+
+import pytest
+
+import journal_blocks
+import journal_frames
+
+
+def read_records(data: bytes, check_footers: bool = True) -> list[bytes]:
+    f = io.BytesIO(data)
+    assert f.readline() == journal_frames.JOURNAL_HEADER
+    records: list[bytes] = []
+    while frame := f.readline():
+        records += journal_frames.read_frame(
+            f, frame, len(records) if check_footers else None
+        )
+    return records
+
+
+def test_write_and_read() -> None:
+    f = io.BytesIO()
+    records = [b"first\n", b"", b"third\nrecord\n"]
+
+    assert journal_frames.write_journal(f, iter(records)) == 3
+
+    assert f.getvalue().endswith(journal_frames.FOOTER_MARKER + b" 3\n")
+    assert read_records(f.getvalue()) == records
+
+
+def test_padding() -> None:
+    f = io.BytesIO()
+    journal_frames.write_journal(f, [b"record\n"])
+    data = f.getvalue()
+    header_size = len(journal_frames.JOURNAL_HEADER)
+    padded = data[:header_size] + journal_blocks.get_padding(3) + data[header_size:]
+
+    assert read_records(padded) == [b"record\n"]
+
+
+def test_footer_mismatch() -> None:
+    data = journal_frames.JOURNAL_HEADER + journal_frames.FOOTER_MARKER + b" 1\n"
+
+    assert not read_records(data, check_footers=False)
+    with pytest.raises(
+        journal_frames.MalformedFrameError, match="Journal footer expected 1"
+    ):
+        read_records(data)
+
+
+@pytest.mark.parametrize(
+    ("frame", "expected_error"),
+    [
+        (b"@ x\n", "Malformed journal frame"),
+        (b"# 1\n", "Malformed journal frame"),
+        (b"@ 10\nshort", "Journal record was truncated"),
+    ],
+)
+def test_malformed_frame(frame: bytes, expected_error: str) -> None:
+    with pytest.raises(journal_frames.MalformedFrameError, match=expected_error):
+        read_records(journal_frames.JOURNAL_HEADER + frame)
+
+
+def test_footer_in_block() -> None:
+    [block] = journal_blocks.encode_blocks([journal_frames.FOOTER_MARKER + b" 0\n"])
+
+    with pytest.raises(
+        journal_frames.MalformedFrameError, match="Unexpected frame in journal block"
+    ):
+        read_records(journal_frames.JOURNAL_HEADER + block)
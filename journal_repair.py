@@ -0,0 +1,113 @@
+"""Module repairing practices journals with damaged blocks of records.
+
+The damaged regions a load skips are copied to a quarantine file next
+to the journal, so nothing is lost for good, and then removed from the
+journal. Only the damaged regions are rewritten, the rest of the
+journal is left as it is.
+"""
+
+import mmap
+import os
+import pathlib
+
+import compressed_files
+import journal_blocks
+import journal_frames
+import results
+import sharding
+
+# Appended to the practices file name for the file its damaged regions
+# are copied to.
+QUARANTINE_SUFFIX = ".quarantine"
+
+
+def get_quarantine_file(practices_file: pathlib.Path) -> pathlib.Path:
+    """Returns the file the damaged regions of practices_file go to."""
+    return practices_file.with_name(f"{practices_file.name}{QUARANTINE_SUFFIX}")
+
+
+def repair_practices(
+    practices_file: pathlib.Path,
+) -> list[journal_blocks.CorruptRegion]:
+    """Repairs practices_file, returning the damaged regions removed.
+
+    A directory of monthly shards has each of its shards repaired, with
+    the regions of all of them returned.
+
+    An uncompressed journal has each damaged region overwritten with
+    padding a load skips, or truncated if it's at the end. A compressed
+    journal is rewritten without them instead, as its members can't be
+    rewritten in place. So is a journal with a footer after a damaged
+    region, as the footer counts the practice sets removed. Each region
+    is first appended to the quarantine file, after a line giving its
+    offsets and why it was removed.
+
+    Raises:
+        InvalidPracticesFileError: The practices_file is malformed
+            other than by damaged blocks, e.g. it isn't a journal.
+    """
+    if practices_file.is_dir():
+        return [
+            region
+            for shard_info in sharding.read_manifest(practices_file).values()
+            for region in repair_practices(
+                pathlib.Path(practices_file, shard_info.get_file_name())
+            )
+        ]
+
+    practices = results.Practices(practices_file, skip_corrupt=True)
+    if not practices.corrupt_regions:
+        return []
+
+    _quarantine(practices_file, practices.corrupt_regions)
+    if compressed_files.get_compression(practices_file) != (
+        compressed_files.Compression.NONE
+    ) or _may_have_footer_after(practices_file, practices.corrupt_regions[0].start):
+        practices.compact()
+        return practices.corrupt_regions
+
+    with open(practices_file, "r+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        for region in practices.corrupt_regions:
+            if region.stop == size:
+                f.truncate(region.start)
+            else:
+                f.seek(region.start)
+                f.write(journal_blocks.get_padding(region.stop - region.start))
+        f.flush()
+        os.fsync(f.fileno())
+    return practices.corrupt_regions
+
+
+def _may_have_footer_after(practices_file: pathlib.Path, offset: int) -> bool:
+    """Returns if the journal practices_file has a footer after offset.
+
+    A line of a record can also start like a footer, in which case this
+    returns True needlessly, but a footer is never missed.
+    """
+    with open(practices_file, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return (
+                buffer.find(b"\n" + journal_frames.FOOTER_MARKER, max(0, offset - 1))
+                != -1
+            )
+
+
+def _quarantine(
+    practices_file: pathlib.Path, regions: list[journal_blocks.CorruptRegion]
+) -> None:
+    """Appends each region of practices_file to its quarantine file."""
+    with open(practices_file, "rb") as raw_file, open(
+        get_quarantine_file(practices_file), "ab"
+    ) as quarantine_file:
+        f = compressed_files.get_reader(raw_file)
+        for region in regions:
+            f.seek(region.start)
+            quarantine_file.write(
+                f"# {practices_file.name} {region.start}-{region.stop}: "
+                f"{region.reason}\n".encode()
+            )
+            quarantine_file.write(f.read(region.stop - region.start))
+            quarantine_file.write(b"\n")
+        quarantine_file.flush()
+        os.fsync(quarantine_file.fileno())
@@ -0,0 +1,126 @@
+import datetime
+import gzip
+import pathlib
+
+import pytest
+
+import compressed_files
+import journal_blocks
+import journal_frames
+import journal_repair
+import results
+import sharding
+
+_TIME = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def _write_journal(journal_file: pathlib.Path, scores: list[int]) -> None:
+    """Writes a journal with a block for each score."""
+    for score in scores:
+        results.append_to_journal(
+            journal_file, [results.PracticeSet("activity", score, _TIME)]
+        )
+
+
+def _corrupt_block(journal_file: pathlib.Path, block: int) -> bytes:
+    """Corrupts the given block of journal_file, returning its bytes."""
+    data = journal_file.read_bytes()
+    offset = -1
+    for _ in range(block + 1):
+        offset = data.index(journal_blocks.BLOCK_MARKER, offset + 1)
+    stop = data.find(journal_blocks.BLOCK_MARKER, offset + 1)
+    damaged = bytes([data[offset + 40] ^ 1])
+    journal_file.write_bytes(data[: offset + 40] + damaged + data[offset + 41 :])
+    return journal_file.read_bytes()[offset : stop if stop != -1 else None]
+
+
+@pytest.mark.parametrize(("block", "expected_scores"), [(1, [0, 2, 3]), (3, [0, 1, 2])])
+def test_repair(tmp_path: pathlib.Path, block: int, expected_scores: list[int]) -> None:
+    journal_file = pathlib.Path(tmp_path, "practices.journal")
+    _write_journal(journal_file, [0, 1, 2, 3])
+    size = journal_file.stat().st_size
+    damaged_block = _corrupt_block(journal_file, block)
+
+    [region] = journal_repair.repair_practices(journal_file)
+    assert region.stop - region.start == len(damaged_block)
+
+    practices = results.Practices(journal_file)
+    assert [x.score for x in practices.get_practice_sets()] == expected_scores
+    # Only the damaged block is changed, a block at the end is removed.
+    if block == 3:
+        assert journal_file.stat().st_size == size - len(damaged_block)
+    else:
+        assert journal_file.stat().st_size == size
+    assert (
+        damaged_block in journal_repair.get_quarantine_file(journal_file).read_bytes()
+    )
+
+    # Practice sets can still be appended after a repair.
+    _write_journal(journal_file, [4])
+    assert results.Practices(journal_file).get_num_practice_sets() == 4
+    assert not journal_repair.repair_practices(journal_file)
+
+
+def test_repair_with_footer(tmp_path: pathlib.Path) -> None:
+    journal_file = pathlib.Path(tmp_path, "practices.journal")
+    # Written in two blocks, followed by a footer counting all of them.
+    results.write_journal(
+        journal_file,
+        [results.PracticeSet("activity", x % 5, _TIME) for x in range(200)],
+    )
+    _write_journal(journal_file, [3])
+    _corrupt_block(journal_file, 0)
+
+    [region] = journal_repair.repair_practices(journal_file)
+    assert region.start == len(journal_frames.JOURNAL_HEADER)
+
+    # The footer counted the removed practice sets, so it's rewritten.
+    practices = results.Practices(journal_file)
+    assert practices.get_num_practice_sets() == 73
+    assert journal_file.read_bytes().endswith(b"\n$ 73\n")
+
+
+def test_repair_undamaged(tmp_path: pathlib.Path) -> None:
+    journal_file = pathlib.Path(tmp_path, "practices.journal")
+    _write_journal(journal_file, [0, 1])
+    data = journal_file.read_bytes()
+
+    assert not journal_repair.repair_practices(journal_file)
+    assert journal_file.read_bytes() == data
+    assert not journal_repair.get_quarantine_file(journal_file).exists()
+
+
+def test_repair_compressed(tmp_path: pathlib.Path) -> None:
+    uncompressed_file = pathlib.Path(tmp_path, "practices.journal")
+    _write_journal(uncompressed_file, [0, 1, 2])
+    damaged_block = _corrupt_block(uncompressed_file, 1)
+    journal_file = pathlib.Path(tmp_path, "practices.journal.gz")
+    journal_file.write_bytes(gzip.compress(uncompressed_file.read_bytes()))
+
+    assert len(journal_repair.repair_practices(journal_file)) == 1
+
+    assert compressed_files.get_compression(journal_file) == (
+        compressed_files.Compression.GZIP
+    )
+    practices = results.Practices(journal_file)
+    assert [x.score for x in practices.get_practice_sets()] == [0, 2]
+    assert (
+        damaged_block in journal_repair.get_quarantine_file(journal_file).read_bytes()
+    )
+
+
+def test_repair_sharded(tmp_path: pathlib.Path) -> None:
+    practices_dir = pathlib.Path(tmp_path, "practices")
+    practices = sharding.ShardedPractices(practices_dir)
+    for month in [1, 2]:
+        for score in [1, 2]:
+            practices.columns.append_practice_set(
+                results.PracticeSet("activity", score, _TIME.replace(month=month))
+            )
+        practices.save()
+    shard_file = pathlib.Path(practices_dir, "2024-02.journal")
+    _corrupt_block(shard_file, 0)
+
+    [region] = journal_repair.repair_practices(practices_dir)
+    assert region.start == len(journal_frames.JOURNAL_HEADER)
+    assert sharding.ShardedPractices(practices_dir).get_num_practice_sets() == 2
@@ -0,0 +1,205 @@
+"""Module profiling the phases of a run of the CLI.
+
+Each phase records how many times it ran, its wall time and, through
+tracemalloc, the peak memory it allocated. The whole run can also be
+profiled by cProfile, with its stats dumped to a file to read with
+pstats or snakeviz.
+
+Phases are marked with the phase context manager, which does nothing
+unless a Profiler is active, so marking them is free in a normal run.
+"""
+
+import contextlib
+import cProfile
+import pathlib
+import threading
+import time
+import tracemalloc
+import typing
+
+# Set to profile a run without the --profile option. A value of "1"
+# profiles the phases, any other path also dumps cProfile stats to it.
+PROFILE_ENV_VAR = "DELIBERATE_PRACTICE_PROFILE"
+
+# The values of PROFILE_ENV_VAR, or --profile, that turn profiling off.
+_DISABLED_VALUES = frozenset(["", "0"])
+
+# The value of PROFILE_ENV_VAR, or --profile, that only profiles the
+# phases, without dumping cProfile stats.
+_PHASES_ONLY_VALUE = "1"
+
+
+# The active Profiler the phases are recorded by, if profiling.
+_ACTIVE_PROFILERS: list["Profiler"] = []
+
+
+class ProfilingError(Exception):
+    """A Profiler was started while another was active."""
+
+
+class PhaseStats:  # pylint: disable=too-few-public-methods
+    """The totals over every time a phase ran."""
+
+    def __init__(self, name: str):
+        """Creates a PhaseStats for the phase of the given name."""
+        self.name = name
+        self.calls = 0
+        self.wall_seconds = 0.0
+        # The most memory allocated at once by any run of the phase,
+        # above what was allocated when it started. None if untraced.
+        self.peak_memory_bytes: typing.Optional[int] = None
+
+    def add(self, wall_seconds: float, peak_memory_bytes: typing.Optional[int]) -> None:
+        """Adds a run of the phase."""
+        self.calls += 1
+        self.wall_seconds += wall_seconds
+        if peak_memory_bytes is not None:
+            self.peak_memory_bytes = max(self.peak_memory_bytes or 0, peak_memory_bytes)
+
+
+class Profiler:  # pylint: disable=too-many-instance-attributes
+    """Profiles the phases of a run, used as a context manager.
+
+    While active, the phases marked by phase are recorded in phases, by
+    name in the order they first ran. Phases can be nested, and can run
+    on other threads, but cProfile only profiles the thread the
+    Profiler was entered on.
+    """
+
+    def __init__(
+        self,
+        cprofile_file: typing.Optional[pathlib.Path] = None,
+        trace_memory: bool = True,
+    ):
+        """Creates a Profiler, dumping cProfile stats to cprofile_file.
+
+        Without a cprofile_file, cProfile isn't run. Tracing the memory
+        with tracemalloc slows allocations down, so it can be turned off
+        to time the phases more closely.
+        """
+        self.cprofile_file = cprofile_file
+        self.trace_memory = trace_memory
+        self.phases: dict[str, PhaseStats] = {}
+        self.wall_seconds = 0.0
+
+        self._lock = threading.Lock()
+        # For each phase running, the traced memory when it started and
+        # the peak since, up to the last reset of tracemalloc's peak.
+        self._running_phases: dict[object, tuple[int, int]] = {}
+        self._cprofile: typing.Optional[cProfile.Profile] = None
+        self._started_tracing = False
+        self._start = 0.0
+
+    def __enter__(self) -> "Profiler":
+        if _ACTIVE_PROFILERS:
+            raise ProfilingError("Another Profiler is already active")
+        _ACTIVE_PROFILERS.append(self)
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if self.cprofile_file is not None:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.wall_seconds += time.perf_counter() - self._start
+        if self._cprofile is not None and self.cprofile_file is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.cprofile_file)
+            self._cprofile = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        _ACTIVE_PROFILERS.clear()
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> typing.Iterator[None]:
+        """Records the time and memory of the with block as name."""
+        key = object()
+        with self._lock:
+            self._update_peaks()
+            current = tracemalloc.get_traced_memory()[0]
+            self._running_phases[key] = (current, current)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall_seconds = time.perf_counter() - start
+            with self._lock:
+                self._update_peaks()
+                start_memory, peak = self._running_phases.pop(key)
+                self.phases.setdefault(name, PhaseStats(name)).add(
+                    wall_seconds,
+                    peak - start_memory if tracemalloc.is_tracing() else None,
+                )
+
+    def add_phase(self, name: str, wall_seconds: float) -> None:
+        """Records a run of a phase timed before this was active.
+
+        Its time is added to the total, as it wasn't counted in it.
+        """
+        with self._lock:
+            self.phases.setdefault(name, PhaseStats(name)).add(wall_seconds, None)
+            self.wall_seconds += wall_seconds
+
+    def _update_peaks(self) -> None:
+        """Folds tracemalloc's peak into each running phase's peak.
+
+        The peak is then reset, so the next phase to start has its own.
+        """
+        if not tracemalloc.is_tracing():
+            return
+        peak = tracemalloc.get_traced_memory()[1]
+        for key, (start_memory, phase_peak) in self._running_phases.items():
+            self._running_phases[key] = (start_memory, max(phase_peak, peak))
+        tracemalloc.reset_peak()
+
+    def write_summary(self, stream: typing.TextIO) -> None:
+        """Writes a table of the phases, and the total, to stream.
+
+        Each phase's share is of the total wall time, so nested phases
+        are counted in both.
+        """
+        name_width = max([len("total"), *(len(x) for x in self.phases)])
+        stream.write(
+            f"{'phase':<{name_width}} {'calls':>6} {'wall s':>9} {'share':>6} "
+            f"{'peak KiB':>10}\n"
+        )
+        for stats in self.phases.values():
+            share = stats.wall_seconds / self.wall_seconds if self.wall_seconds else 0
+            peak = (
+                "-"
+                if stats.peak_memory_bytes is None
+                else f"{stats.peak_memory_bytes / 1024:.0f}"
+            )
+            stream.write(
+                f"{stats.name:<{name_width}} {stats.calls:>6} "
+                f"{stats.wall_seconds:>9.3f} {share:>6.1%} {peak:>10}\n"
+            )
+        stream.write(f"{'total':<{name_width}} {'':>6} {self.wall_seconds:>9.3f}\n")
+        if self.cprofile_file is not None:
+            stream.write(f"cProfile stats written to {self.cprofile_file}\n")
+
+
+def phase(name: str) -> typing.ContextManager[None]:
+    """Records the with block as the phase name, if profiling."""
+    if not _ACTIVE_PROFILERS:
+        return contextlib.nullcontext()
+    return _ACTIVE_PROFILERS[0].phase(name)
+
+
+def create_profiler(setting: typing.Optional[str]) -> typing.Optional[Profiler]:
+    """Returns the Profiler for the value of --profile, if any.
+
+    No setting, "" or "0" turns profiling off, "1" only profiles the
+    phases, and any other value is the file cProfile stats are dumped
+    to.
+    """
+    if setting is None or setting in _DISABLED_VALUES:
+        return None
+    if setting == _PHASES_ONLY_VALUE:
+        return Profiler()
+    return Profiler(pathlib.Path(setting))
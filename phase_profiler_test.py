@@ -0,0 +1,85 @@
+import io
+import pathlib
+import pstats
+import typing
+
+import pytest
+
+import phase_profiler
+
+
+def test_phases(tmp_path: pathlib.Path) -> None:
+    cprofile_file = pathlib.Path(tmp_path, "run.prof")
+    with phase_profiler.Profiler(cprofile_file) as profiler:
+        for _ in range(2):
+            with phase_profiler.phase("outer"):
+                with phase_profiler.phase("inner"):
+                    data = bytearray(1024 * 1024)
+                del data
+
+    assert list(profiler.phases) == ["inner", "outer"]
+    inner, outer = profiler.phases["inner"], profiler.phases["outer"]
+    assert (inner.calls, outer.calls) == (2, 2)
+    assert outer.wall_seconds >= inner.wall_seconds
+    assert profiler.wall_seconds >= outer.wall_seconds
+    # The outer phase's peak includes the one of the phase nested in it.
+    assert inner.peak_memory_bytes is not None
+    assert inner.peak_memory_bytes >= 1024 * 1024
+    assert outer.peak_memory_bytes is not None
+    assert outer.peak_memory_bytes >= inner.peak_memory_bytes
+
+    assert pstats.Stats(str(cprofile_file)).get_stats_profile().func_profiles
+
+    summary = io.StringIO()
+    profiler.write_summary(summary)
+    lines = summary.getvalue().splitlines()
+    assert lines[0].split() == ["phase", "calls", "wall", "s", "share", "peak", "KiB"]
+    assert lines[1].split()[:2] == ["inner", "2"]
+    assert lines[3].startswith("total")
+    assert lines[4] == f"cProfile stats written to {cprofile_file}"
+
+
+def test_untraced_phase() -> None:
+    with phase_profiler.Profiler(trace_memory=False) as profiler:
+        profiler.add_phase("startup", 0.5)
+        with phase_profiler.phase("phase"):
+            pass
+
+    assert profiler.phases["startup"].wall_seconds == 0.5
+    assert profiler.wall_seconds >= 0.5
+    assert profiler.phases["startup"].peak_memory_bytes is None
+    assert profiler.phases["phase"].peak_memory_bytes is None
+    summary = io.StringIO()
+    profiler.write_summary(summary)
+    assert summary.getvalue().splitlines()[2].split()[-1] == "-"
+
+
+def test_phase_without_profiler() -> None:
+    with phase_profiler.phase("phase"):
+        pass
+    with phase_profiler.Profiler() as profiler:
+        with pytest.raises(phase_profiler.ProfilingError):
+            with phase_profiler.Profiler():
+                pass
+    assert not profiler.phases
+
+
+@pytest.mark.parametrize(
+    ("setting", "expected_enabled", "expected_cprofile_file"),
+    [
+        (None, False, None),
+        ("", False, None),
+        ("0", False, None),
+        ("1", True, None),
+        ("run.prof", True, pathlib.Path("run.prof")),
+    ],
+)
+def test_create_profiler(
+    setting: typing.Optional[str],
+    expected_enabled: bool,
+    expected_cprofile_file: typing.Optional[pathlib.Path],
+) -> None:
+    profiler = phase_profiler.create_profiler(setting)
+    assert (profiler is not None) == expected_enabled
+    if profiler is not None:
+        assert profiler.cprofile_file == expected_cprofile_file
@@ -0,0 +1,161 @@
+"""Module merging the practices files of several machines into one.
+
+The inputs are streamed in time order and merged with a k-way merge, so
+the whole of them is never held in memory. An input that isn't already
+in time order, e.g. after an ingest of older practice sets, is first
+sorted in bounded chunks spilled to temporary journals, which are then
+merged like any other input.
+
+The same practice set is often in several inputs, as the files were
+copied between machines. Exact duplicates always share a time, so only
+the practice sets at the latest time merged are kept to find them.
+"""
+
+import contextlib
+import heapq
+import itertools
+import pathlib
+import shutil
+import tempfile
+import typing
+
+import compressed_files
+import results
+import timestamps
+
+# The most practice sets sorted in memory at once, for each chunk of an
+# input that isn't in time order.
+_SORT_CHUNK_SIZE = 100_000
+
+
+class MergeStats(typing.NamedTuple):
+    """The practice sets read and written by merge_practices_files."""
+
+    num_read: int
+    num_duplicates: int
+    num_written: int
+
+
+def merge_practices_files(
+    practices_files: list[pathlib.Path], output_file: pathlib.Path
+) -> MergeStats:
+    """Merges practices_files into a journal in output_file.
+
+    The practices_files can be in any format, and output_file can be one
+    of them, as it's only replaced once the merge is done. The practice
+    sets are written in time order, with exact duplicates dropped.
+
+    An existing output_file in another format is copied next to it
+    first, with results.BACKUP_SUFFIX appended to its name, the same as
+    Practices.convert_to_journal does.
+
+    Raises:
+        InvalidPracticesFileError: A practices file is malformed.
+    """
+    _back_up_non_journal(output_file)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        inputs: list[typing.Iterable[results.PracticeSetRecord]] = []
+        for index, practices_file in enumerate(practices_files):
+            inputs.extend(
+                _get_sorted_inputs(practices_file, pathlib.Path(temp_dir, str(index)))
+            )
+
+        counts = {"read": 0, "duplicates": 0}
+        merged = heapq.merge(*inputs, key=lambda x: x[2])
+        num_written = results.write_journal(
+            output_file, map(_to_practice_set, _drop_duplicates(merged, counts))
+        )
+    return MergeStats(counts["read"], counts["duplicates"], num_written)
+
+
+def _back_up_non_journal(practices_file: pathlib.Path) -> None:
+    """Copies practices_file to its backup, if not a journal."""
+    if not practices_file.is_file():
+        return
+    with open(practices_file, "rb") as raw_file:
+        file_format = results.read_file_format(compressed_files.get_reader(raw_file))
+    if file_format != results.PracticesFileFormat.JOURNAL:
+        shutil.copy2(
+            practices_file,
+            practices_file.with_name(f"{practices_file.name}{results.BACKUP_SUFFIX}"),
+        )
+
+
+def _drop_duplicates(
+    records: typing.Iterable[results.PracticeSetRecord], counts: dict[str, int]
+) -> typing.Iterator[results.PracticeSetRecord]:
+    """Yields the records in time order, without exact duplicates.
+
+    The window of records seen rolls forward with the time, as only
+    records at the same time can be duplicates. The counts of records
+    read and duplicates dropped are added to counts.
+    """
+    window_epoch_micros: typing.Optional[int] = None
+    window: set[tuple[str, int, int, bool]] = set()
+    for activity_key, score, epoch_micros, utc_offset in records:
+        counts["read"] += 1
+        if epoch_micros != window_epoch_micros:
+            window_epoch_micros = epoch_micros
+            window.clear()
+        # PracticeSets are equal at the same instant in any UTC offset,
+        # but a naive date_time never equals an aware one.
+        identity = (
+            activity_key,
+            score,
+            epoch_micros,
+            utc_offset == timestamps.NAIVE_UTC_OFFSET,
+        )
+        if identity in window:
+            counts["duplicates"] += 1
+            continue
+        window.add(identity)
+        yield activity_key, score, epoch_micros, utc_offset
+
+
+def _iter_records(
+    practices_file: pathlib.Path,
+) -> typing.Generator[results.PracticeSetRecord, None, None]:
+    """Yields the records in practices_file, in the file's order."""
+    with open(practices_file, "rb") as raw_file:
+        f = compressed_files.get_reader(raw_file)
+        yield from results.iter_file_records(f, results.read_file_format(f))
+
+
+def _to_practice_set(record: results.PracticeSetRecord) -> results.PracticeSet:
+    """Returns a new PracticeSet of record."""
+    activity_key, score, epoch_micros, utc_offset = record
+    return results.PracticeSet(
+        activity_key, score, timestamps.from_epoch_micros(epoch_micros, utc_offset)
+    )
+
+
+def _is_time_ordered(practices_file: pathlib.Path) -> bool:
+    """Returns if the records of practices_file are in time order."""
+    with contextlib.closing(_iter_records(practices_file)) as records:
+        epoch_micros = (x[2] for x in records)
+        return all(x <= y for x, y in itertools.pairwise(epoch_micros))
+
+
+def _get_sorted_inputs(
+    practices_file: pathlib.Path, chunk_dir: pathlib.Path
+) -> list[typing.Iterable[results.PracticeSetRecord]]:
+    """Returns iterables of the records of practices_file in time order.
+
+    An input already in time order is streamed as is. Otherwise it's
+    sorted a chunk at a time into journals in chunk_dir, which are
+    returned instead.
+    """
+    if not practices_file.exists():
+        return []
+    if _is_time_ordered(practices_file):
+        return [_iter_records(practices_file)]
+
+    chunk_dir.mkdir()
+    chunk_files: list[pathlib.Path] = []
+    records = _iter_records(practices_file)
+    while chunk := list(itertools.islice(records, _SORT_CHUNK_SIZE)):
+        chunk.sort(key=lambda x: x[2])
+        chunk_file = pathlib.Path(chunk_dir, f"{len(chunk_files)}.journal")
+        results.write_journal(chunk_file, map(_to_practice_set, chunk))
+        chunk_files.append(chunk_file)
+    return [_iter_records(x) for x in chunk_files]
@@ -0,0 +1,90 @@
+import datetime
+import pathlib
+
+import pytest
+
+import practices_merge
+import results
+
+_TIME = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def _practice_set(key: str, minutes: int, score: int = 1) -> results.PracticeSet:
+    return results.PracticeSet(key, score, _TIME + datetime.timedelta(minutes=minutes))
+
+
+def _write(
+    practices_file: pathlib.Path,
+    practice_sets: list[results.PracticeSet],
+    file_format: results.PracticesFileFormat = results.PracticesFileFormat.TEXT,
+) -> None:
+    columns = results.PracticeSetColumns()
+    for practice_set in practice_sets:
+        columns.append_practice_set(practice_set)
+    results.write_practices_file(practices_file, file_format, columns)
+
+
+def test_merge(tmp_path: pathlib.Path) -> None:
+    first_file = pathlib.Path(tmp_path, "first.txt")
+    _write(first_file, [_practice_set("a", 0), _practice_set("b", 2)])
+    second_file = pathlib.Path(tmp_path, "second.bin")
+    _write(
+        second_file,
+        [
+            _practice_set("a", 0),
+            # The same time and activity, but a different score.
+            _practice_set("a", 0, score=2),
+            _practice_set("c", 1),
+            # The same instant in another UTC offset.
+            results.PracticeSet(
+                "b",
+                1,
+                (_TIME + datetime.timedelta(minutes=2)).astimezone(
+                    datetime.timezone(datetime.timedelta(hours=5))
+                ),
+            ),
+        ],
+        results.PracticesFileFormat.BINARY,
+    )
+    output_file = pathlib.Path(tmp_path, "merged.journal")
+
+    merge_stats = practices_merge.merge_practices_files(
+        [first_file, second_file, pathlib.Path(tmp_path, "missing")], output_file
+    )
+
+    assert merge_stats == practices_merge.MergeStats(6, 2, 4)
+    practices = results.Practices(output_file)
+    assert practices.file_format == results.PracticesFileFormat.JOURNAL
+    assert practices.get_practice_sets() == [
+        _practice_set("a", 0),
+        _practice_set("a", 0, score=2),
+        _practice_set("c", 1),
+        _practice_set("b", 2),
+    ]
+
+
+@pytest.mark.parametrize("sort_chunk_size", [2, 100])
+def test_merge_unsorted_input(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch, sort_chunk_size: int
+) -> None:
+    monkeypatch.setattr(practices_merge, "_SORT_CHUNK_SIZE", sort_chunk_size)
+    practices_file = pathlib.Path(tmp_path, "practices.txt")
+    minutes = [5, 3, 9, 0, 3, 7, 1]
+    _write(practices_file, [_practice_set("a", x) for x in minutes])
+    other_file = pathlib.Path(tmp_path, "practices.journal")
+    _write(other_file, [_practice_set("a", x) for x in [2, 5]])
+
+    # The output can be one of the inputs.
+    merge_stats = practices_merge.merge_practices_files(
+        [practices_file, other_file], practices_file
+    )
+
+    assert merge_stats == practices_merge.MergeStats(9, 2, 7)
+    assert results.Practices(practices_file).get_practice_sets() == [
+        _practice_set("a", x) for x in [0, 1, 2, 3, 5, 7, 9]
+    ]
+    # The text file replaced by a journal is backed up.
+    backup_file = pathlib.Path(tmp_path, f"practices.txt{results.BACKUP_SUFFIX}")
+    assert results.Practices(backup_file).get_practice_sets() == [
+        _practice_set("a", x) for x in minutes
+    ]
@@ -0,0 +1,295 @@
+"""Module writing the report of an Evaluation to a text stream.
+
+The report is written one activity at a time, so it starts appearing
+right away and never has to be held in memory as a whole.
+"""
+
+import csv
+import enum
+import heapq
+import itertools
+import json
+import sys
+import typing
+
+import evaluation
+
+
+class ReportFormat(enum.StrEnum):
+    """The formats a report can be written in.
+
+    TEXT is meant to be read, NDJSON and CSV to be read by other tools.
+    NDJSON has a JSON object per line, one for each activity.
+    """
+
+    TEXT = "text"
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class SortMetric(enum.StrEnum):
+    """The metrics the activities of a report can be sorted by."""
+
+    DESCRIPTION = "description"
+    NUM_PRACTICE_SETS = "num_practice_sets"
+    OLDEST_PRACTICE = "oldest_practice"
+    LATEST_PRACTICE = "latest_practice"
+    LATEST_SCORE = "latest_score"
+    MEAN_SCORE = "mean_score"
+    MEDIAN_SCORE = "median_score"
+    SLOPE = "slope"
+
+
+# The number of most improved and most regressed activities the TEXT
+# format lists.
+_NUM_RANKED_ACTIVITIES = 3
+
+# The fields written for each activity in the NDJSON and CSV formats.
+_FIELDS = [
+    "activity_key",
+    "description",
+    "num_practice_sets",
+    "oldest_practice_time",
+    "latest_practice_time",
+    "latest_score",
+    "mean_score",
+    "median_score",
+    "histogram",
+    "moving_average",
+    "ewma",
+    "slope",
+    "is_trend_exact",
+    "scores",
+]
+
+
+# The value of each metric other than the description for a practiced
+# activity.
+_PRACTICED_METRICS: dict[
+    SortMetric, typing.Callable[[evaluation.ActivityEvaluation], typing.Any]
+] = {
+    SortMetric.OLDEST_PRACTICE: lambda x: x.get_oldest_epoch_micros(),
+    SortMetric.LATEST_PRACTICE: lambda x: x.get_latest_epoch_micros(),
+    SortMetric.LATEST_SCORE: lambda x: x.get_latest_score(),
+    SortMetric.MEAN_SCORE: lambda x: x.get_score_summary().get_mean(),
+    SortMetric.MEDIAN_SCORE: lambda x: x.get_score_summary().get_median(),
+    SortMetric.SLOPE: lambda x: x.get_trend().get_slope(),
+}
+
+
+def get_metric(
+    activity_evaluation: evaluation.ActivityEvaluation, metric: SortMetric
+) -> typing.Any:
+    """Returns the value of metric for activity_evaluation.
+
+    The values of an activity without practice sets sort first, as do
+    those of one with too few for the metric, such as a slope of a
+    single practice set.
+    """
+    if metric == SortMetric.DESCRIPTION:
+        return activity_evaluation.get_description()
+    if metric == SortMetric.NUM_PRACTICE_SETS:
+        return activity_evaluation.get_num_practice_sets()
+    if not activity_evaluation.get_num_practice_sets():
+        return float("-inf")
+    value = _PRACTICED_METRICS[metric](activity_evaluation)
+    return float("-inf") if value is None else value
+
+
+class ReportWriter:
+    """Writes the report of an Evaluation to a text stream.
+
+    The activities can be sorted by any SortMetric, limited to the top
+    ones, and split into pages. Finding the top activities, or those up
+    to the page written, uses a heap of that many activities rather than
+    sorting them all.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        stream: typing.Optional[typing.TextIO] = None,
+        *,
+        report_format: ReportFormat = ReportFormat.TEXT,
+        sort_by: SortMetric = SortMetric.DESCRIPTION,
+        descending: bool = False,
+        top: typing.Optional[int] = None,
+        page_size: typing.Optional[int] = None,
+        max_scores: typing.Optional[int] = evaluation.RECENT_SCORES_LENGTH,
+    ):
+        """Creates a ReportWriter writing to stream.
+
+        If no stream is given, the report is written to sys.stdout as
+        it is when written. Only the top activities are written, if
+        given, and each page has up to page_size of them. Up to
+        max_scores of each activity's latest scores are written, all of
+        those kept if None.
+        """
+        self.stream = stream
+        self.report_format = report_format
+        self.sort_by = sort_by
+        self.descending = descending
+        self.top = top
+        self.page_size = page_size
+        self.max_scores = max_scores
+
+    def get_num_activities(self, key_evaluation: evaluation.Evaluation) -> int:
+        """Returns the number of activities in the report."""
+        num_activities = key_evaluation.get_num_activities()
+        return num_activities if self.top is None else min(self.top, num_activities)
+
+    def get_num_pages(self, key_evaluation: evaluation.Evaluation) -> int:
+        """Returns the number of pages of the report, at least one."""
+        num_activities = self.get_num_activities(key_evaluation)
+        if self.page_size is None or not num_activities:
+            return 1
+        return -(-num_activities // self.page_size)
+
+    def write(self, key_evaluation: evaluation.Evaluation, page: int = 0) -> None:
+        """Writes the given page of the report of key_evaluation.
+
+        The pages count from 0. The first page starts with the totals
+        in the TEXT format, and the column names in the CSV format.
+        """
+        num_activities = self.get_num_activities(key_evaluation)
+        start = 0 if self.page_size is None else page * self.page_size
+        stop = (
+            num_activities
+            if self.page_size is None
+            else min(start + self.page_size, num_activities)
+        )
+        activity_evaluations = itertools.islice(
+            self._iter_sorted(key_evaluation, stop), start, stop
+        )
+
+        stream = sys.stdout if self.stream is None else self.stream
+        if self.report_format == ReportFormat.TEXT:
+            self._write_text(stream, key_evaluation, activity_evaluations, page)
+            if stop - start < key_evaluation.get_num_activities():
+                stream.write(
+                    f"\nShowing activities {start + 1}-{stop} of "
+                    f"{key_evaluation.get_num_activities()}.\n"
+                )
+        elif self.report_format == ReportFormat.NDJSON:
+            for activity_evaluation in activity_evaluations:
+                json.dump(self._get_row(activity_evaluation), stream)
+                stream.write("\n")
+        else:
+            writer = csv.DictWriter(stream, _FIELDS, lineterminator="\n")
+            if page == 0:
+                writer.writeheader()
+            for activity_evaluation in activity_evaluations:
+                row = self._get_row(activity_evaluation)
+                row["histogram"] = " ".join(str(x) for x in row["histogram"])
+                row["scores"] = " ".join(str(x) for x in row["scores"])
+                writer.writerow(row)
+        stream.flush()
+
+    def _iter_sorted(
+        self, key_evaluation: evaluation.Evaluation, stop: int
+    ) -> typing.Iterator[evaluation.ActivityEvaluation]:
+        """Yields the activity evaluations in order, up to stop."""
+        activity_evaluations = key_evaluation.activity_evaluations
+        if self.sort_by == SortMetric.DESCRIPTION and not self.descending:
+            # Already in this order.
+            return itertools.islice(activity_evaluations, stop)
+
+        def key(activity_evaluation: evaluation.ActivityEvaluation) -> typing.Any:
+            return get_metric(activity_evaluation, self.sort_by)
+
+        if self.descending:
+            return iter(heapq.nlargest(stop, activity_evaluations, key=key))
+        return iter(heapq.nsmallest(stop, activity_evaluations, key=key))
+
+    def _write_text(
+        self,
+        stream: typing.TextIO,
+        key_evaluation: evaluation.Evaluation,
+        activity_evaluations: typing.Iterable[evaluation.ActivityEvaluation],
+        page: int,
+    ) -> None:
+        if page == 0:
+            activity_word = (
+                "activity" if key_evaluation.get_num_activities() == 1 else "activities"
+            )
+            stream.write(
+                f"{key_evaluation.get_num_activities()} {activity_word} has been "
+                f"completed {key_evaluation.get_num_of_practice_sets()} times.\n"
+            )
+            self._write_ranking(
+                stream,
+                "Most improved",
+                key_evaluation.get_most_improved(_NUM_RANKED_ACTIVITIES),
+            )
+            self._write_ranking(
+                stream,
+                "Most regressed",
+                key_evaluation.get_most_regressed(_NUM_RANKED_ACTIVITIES),
+            )
+
+        for activity_evaluation in activity_evaluations:
+            stream.write(
+                f"\n{activity_evaluation.get_description()}\n"
+                f"\tPracticed {activity_evaluation.get_num_practice_sets()} times.\n"
+            )
+            oldest_practice_time = activity_evaluation.get_oldest_practice_time()
+            if oldest_practice_time:
+                stream.write(f"\tOldest practice {oldest_practice_time.isoformat()}\n")
+            latest_practice_time = activity_evaluation.get_latest_practice_time()
+            if latest_practice_time:
+                stream.write(f"\tNewest practice {latest_practice_time.isoformat()}\n")
+
+            scores = activity_evaluation.get_recent_scores(self.max_scores)
+            if len(scores) < activity_evaluation.get_num_practice_sets():
+                stream.write(
+                    f"\tLatest {len(scores)} of "
+                    f"{activity_evaluation.get_num_practice_sets()} scores: {scores}\n"
+                )
+            elif scores:
+                stream.write(f"\tScores: {scores}\n")
+
+    def _write_ranking(
+        self,
+        stream: typing.TextIO,
+        title: str,
+        activity_evaluations: list[evaluation.ActivityEvaluation],
+    ) -> None:
+        """Writes a line of activity_evaluations and their slopes.
+
+        Slopes of approximate trends, see
+        ActivityEvaluation.is_trend_exact, are marked as such.
+        """
+        if activity_evaluations:
+            ranking = ", ".join(
+                f"{x.get_description()} ({x.get_trend().get_slope():+.2f}"
+                f"{'' if x.is_trend_exact() else ' approximate'})"
+                for x in activity_evaluations
+            )
+            stream.write(f"{title}: {ranking}\n")
+
+    def _get_row(
+        self, activity_evaluation: evaluation.ActivityEvaluation
+    ) -> dict[str, typing.Any]:
+        oldest_practice_time = activity_evaluation.get_oldest_practice_time()
+        latest_practice_time = activity_evaluation.get_latest_practice_time()
+        score_summary = activity_evaluation.get_score_summary()
+        trend = activity_evaluation.get_trend()
+        return {
+            "activity_key": activity_evaluation.get_activity_key(),
+            "description": activity_evaluation.get_description(),
+            "num_practice_sets": activity_evaluation.get_num_practice_sets(),
+            "oldest_practice_time": (
+                oldest_practice_time.isoformat() if oldest_practice_time else None
+            ),
+            "latest_practice_time": (
+                latest_practice_time.isoformat() if latest_practice_time else None
+            ),
+            "latest_score": activity_evaluation.get_latest_score(),
+            "mean_score": score_summary.get_mean(),
+            "median_score": score_summary.get_median(),
+            "histogram": score_summary.histogram,
+            "moving_average": trend.get_moving_average(),
+            "ewma": trend.get_ewma(),
+            "slope": trend.get_slope(),
+            "is_trend_exact": activity_evaluation.is_trend_exact(),
+            "scores": activity_evaluation.get_recent_scores(self.max_scores),
+        }
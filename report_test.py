@@ -0,0 +1,225 @@
+import csv
+import datetime
+import io
+import json
+import typing
+
+import pytest
+
+import evaluation
+import report
+import results
+
+START_TIME = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def make_evaluation() -> evaluation.Evaluation:
+    """Returns an Evaluation of activities a to e.
+
+    The later the activity, the fewer and more recent its practice sets
+    and the lower its scores.
+    """
+    practice_sets = []
+    for index, activity_key in enumerate("abcde"):
+        for x in range(5 - index):
+            practice_sets.append(
+                results.PracticeSet(
+                    activity_key,
+                    4 - index,
+                    START_TIME + datetime.timedelta(days=index * 10 + x),
+                )
+            )
+    return evaluation.Evaluation(practice_sets)
+
+
+def write_report(
+    key_evaluation: evaluation.Evaluation, page: int = 0, **kwargs: typing.Any
+) -> str:
+    stream = io.StringIO()
+    report.ReportWriter(stream, **kwargs).write(key_evaluation, page)
+    return stream.getvalue()
+
+
+def get_ndjson_keys(key_evaluation: evaluation.Evaluation, **kwargs: typing.Any) -> str:
+    ndjson_report = write_report(
+        key_evaluation, report_format=report.ReportFormat.NDJSON, **kwargs
+    )
+    return "".join(json.loads(x)["activity_key"] for x in ndjson_report.splitlines())
+
+
+def test_text_matches_str() -> None:
+    key_evaluation = make_evaluation()
+    assert write_report(key_evaluation) == str(key_evaluation)
+
+
+def test_text_latest_scores() -> None:
+    key_evaluation = evaluation.Evaluation(
+        [
+            results.PracticeSet("a", x % 5, START_TIME + datetime.timedelta(hours=x))
+            for x in range(8)
+        ]
+    )
+
+    assert "\tLatest 3 of 8 scores: [0, 1, 2]\n" in write_report(
+        key_evaluation, max_scores=3
+    )
+    assert "\tScores: [0, 1, 2, 3, 4, 0, 1, 2]\n" in write_report(
+        key_evaluation, max_scores=None
+    )
+
+
+def test_ndjson() -> None:
+    rows = [
+        json.loads(x)
+        for x in write_report(
+            make_evaluation(), report_format=report.ReportFormat.NDJSON
+        ).splitlines()
+    ]
+
+    assert len(rows) == 5
+    assert rows[4] == {
+        "activity_key": "e",
+        "description": "e",
+        "num_practice_sets": 1,
+        "oldest_practice_time": "2024-02-10T00:00:00+00:00",
+        "latest_practice_time": "2024-02-10T00:00:00+00:00",
+        "latest_score": 0,
+        "mean_score": 0.0,
+        "median_score": 0,
+        "histogram": [1, 0, 0, 0, 0],
+        "moving_average": 0.0,
+        "ewma": 0,
+        "slope": None,
+        "is_trend_exact": True,
+        "scores": [0],
+    }
+
+
+def test_csv() -> None:
+    rows = list(
+        csv.DictReader(
+            io.StringIO(
+                write_report(make_evaluation(), report_format=report.ReportFormat.CSV)
+            )
+        )
+    )
+
+    assert [x["activity_key"] for x in rows] == list("abcde")
+    assert rows[1]["scores"] == "3 3 3 3"
+    assert rows[1]["mean_score"] == "3.0"
+
+
+@pytest.mark.parametrize(
+    ("sort_by", "descending", "expected_keys"),
+    [
+        (report.SortMetric.DESCRIPTION, False, "abcde"),
+        (report.SortMetric.DESCRIPTION, True, "edcba"),
+        (report.SortMetric.NUM_PRACTICE_SETS, False, "edcba"),
+        (report.SortMetric.LATEST_PRACTICE, True, "edcba"),
+        (report.SortMetric.OLDEST_PRACTICE, False, "abcde"),
+        (report.SortMetric.MEAN_SCORE, True, "abcde"),
+        (report.SortMetric.LATEST_SCORE, False, "edcba"),
+    ],
+)
+def test_sort_by(
+    sort_by: report.SortMetric, descending: bool, expected_keys: str
+) -> None:
+    assert (
+        get_ndjson_keys(make_evaluation(), sort_by=sort_by, descending=descending)
+        == expected_keys
+    )
+
+
+def test_sort_by_slope() -> None:
+    key_evaluation = evaluation.Evaluation(
+        [
+            results.PracticeSet(
+                activity_key, score, START_TIME + datetime.timedelta(days=x)
+            )
+            for activity_key, scores in [("a", [1, 2, 3]), ("b", [4, 0]), ("c", [2])]
+            for x, score in enumerate(scores)
+        ]
+    )
+
+    # The slope of c's single practice set is None, so it sorts first.
+    assert get_ndjson_keys(key_evaluation, sort_by=report.SortMetric.SLOPE) == "cba"
+    assert (
+        get_ndjson_keys(key_evaluation, sort_by=report.SortMetric.SLOPE, top=1) == "c"
+    )
+
+
+def test_top() -> None:
+    key_evaluation = make_evaluation()
+    assert (
+        get_ndjson_keys(key_evaluation, sort_by=report.SortMetric.MEAN_SCORE, top=2)
+        == "ed"
+    )
+    assert report.ReportWriter(top=2).get_num_pages(key_evaluation) == 1
+
+
+@pytest.mark.parametrize(
+    ("top", "page", "expected_keys"),
+    [(None, 0, "ab"), (None, 1, "cd"), (None, 2, "e"), (3, 1, "c"), (None, 3, "")],
+)
+def test_paging(top: typing.Optional[int], page: int, expected_keys: str) -> None:
+    assert (
+        get_ndjson_keys(make_evaluation(), top=top, page_size=2, page=page)
+        == expected_keys
+    )
+
+
+def test_text_paging() -> None:
+    key_evaluation = make_evaluation()
+    writer = report.ReportWriter(page_size=2)
+    assert writer.get_num_pages(key_evaluation) == 3
+
+    first_page = write_report(key_evaluation, page_size=2)
+    assert first_page.startswith("5 activities has been completed 15 times.\n")
+    assert first_page.endswith("\nShowing activities 1-2 of 5.\n")
+
+    last_page = write_report(key_evaluation, 2, page_size=2)
+    assert last_page.startswith("\ne\n")
+    assert last_page.endswith("\nShowing activities 5-5 of 5.\n")
+
+
+def test_empty_evaluation() -> None:
+    key_evaluation = evaluation.Evaluation([])
+    assert report.ReportWriter(page_size=2).get_num_pages(key_evaluation) == 1
+    assert write_report(key_evaluation, page_size=2) == str(key_evaluation)
+
+
+def test_text_ranking() -> None:
+    key_evaluation = evaluation.Evaluation(
+        [
+            results.PracticeSet(
+                activity_key, score, START_TIME + datetime.timedelta(hours=x)
+            )
+            for activity_key, scores in [("a", [1, 2, 3]), ("b", [4, 0]), ("c", [2])]
+            for x, score in enumerate(scores)
+        ]
+    )
+
+    assert write_report(key_evaluation).startswith(
+        "3 activities has been completed 6 times.\n"
+        "Most improved: a (+1.00)\n"
+        "Most regressed: b (-4.00)\n"
+    )
+
+
+def test_approximate_trend() -> None:
+    # The last practice sets are older than the latest 20 kept by the
+    # summary, so its trend is approximate.
+    key_evaluation = evaluation.Evaluation(
+        (
+            results.PracticeSet("a", x % 5, START_TIME + datetime.timedelta(hours=x))
+            for x in [*range(10, 40), 1, 0]
+        ),
+        summary=True,
+    )
+
+    assert "\nMost improved: a (+0.24 approximate)\n" in write_report(key_evaluation)
+    row = json.loads(
+        write_report(key_evaluation, report_format=report.ReportFormat.NDJSON)
+    )
+    assert row["is_trend_exact"] is False
+    assert row["num_practice_sets"] == 32
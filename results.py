@@ -1,10 +1,25 @@
-"""Module of everything related to tracking practice results."""
+"""Module of everything related to tracking practice results.
 
+Evaluation and ActivityEvaluation moved from here to evaluation.py.
+"""
+
+import array
 import datetime
+import enum
+import io
+import mmap
+import os
 import pathlib
+import shutil
+import struct
 import typing
 
+import compressed_files
+import journal_blocks
+import journal_frames
 import routine
+import timestamp_index
+import timestamps
 
 POSSIBLE_SCORES = [
     "I wasn’t successful",
@@ -19,76 +34,774 @@ class InvalidPracticesFileError(Exception):
     """There was an issue with the practices file."""
 
 
-class Practices:
+class PartialPracticesError(Exception):
+    """The Practices only holds part of its practices file.
+
+    This happens when a Practices is loaded with a DateWindow, as
+    rewriting its file would lose the practice sets outside the window.
+    """
+
+
+class DateWindow:
+    """A window of time that practice sets can be limited to.
+
+    The window starts at since and ends just before until, either can be
+    None to leave that side open.
+    """
+
+    def __init__(
+        self,
+        since: typing.Optional[datetime.datetime] = None,
+        until: typing.Optional[datetime.datetime] = None,
+    ):
+        """Creates a DateWindow from since up to, not including, until.
+
+        Either can be None to leave that side of the window open.
+        """
+        self.since = since
+        self.until = until
+        # Kept as epoch microseconds, to check practice sets quickly.
+        self.since_epoch_micros = (
+            None if since is None else timestamps.to_epoch_micros(since)[0]
+        )
+        self.until_epoch_micros = (
+            None if until is None else timestamps.to_epoch_micros(until)[0]
+        )
+
+    def __repr__(self) -> str:
+        return f"DateWindow({self.since=}, {self.until=})"
+
+    def contains(self, epoch_micros: int) -> bool:
+        """Returns if the epoch microseconds are within this window."""
+        return (
+            self.since_epoch_micros is None or epoch_micros >= self.since_epoch_micros
+        ) and (
+            self.until_epoch_micros is None or epoch_micros < self.until_epoch_micros
+        )
+
+    def overlaps(self, first_epoch_micros: int, last_epoch_micros: int) -> bool:
+        """Returns if any time from first to last is in this window."""
+        return (
+            self.since_epoch_micros is None
+            or last_epoch_micros >= self.since_epoch_micros
+        ) and (
+            self.until_epoch_micros is None
+            or first_epoch_micros < self.until_epoch_micros
+        )
+
+
+class PracticesFileFormat(enum.StrEnum):
+    """The on disk formats a practices file can be stored in."""
+
+    # The count of practice sets, followed by every practice set. Any
+    # change requires rewriting the whole file.
+    TEXT = "text"
+    # A header line followed by framed practice sets, in checksummed
+    # blocks. New practice sets are appended, the file is only
+    # rewritten when compacted.
+    JOURNAL = "journal"
+    # A header, a table of the activity keys and fixed width records
+    # referencing them. Any change requires rewriting the whole file.
+    BINARY = "binary"
+
+
+BINARY_HEADER = b"DPBIN\x00\x01\n"
+
+# After the BINARY_HEADER, the number of activity keys and the number of
+# practice sets in the file.
+_BINARY_COUNTS = struct.Struct("<II")
+
+# Each activity key in the table is its utf-8 length and then its bytes.
+_BINARY_KEY_LENGTH = struct.Struct("<I")
+
+# A practice set record is its activity key's index in the table, the
+# microseconds since the epoch, the UTC offset in seconds and the score.
+_BINARY_RECORD = struct.Struct("<IqiB")
+
+# Appended to the practices file name for the file written by compact,
+# which is then renamed over the practices file.
+_TEMP_FILE_SUFFIX = ".tmp"
+
+# Appended to the practices file name for the copy of it kept when it's
+# converted to a journal.
+BACKUP_SUFFIX = ".bak"
+
+# The number of date_times parsed together when loading practice sets.
+_PARSE_BATCH_SIZE = 4096
+
+
+class Practices:  # pylint: disable=too-many-instance-attributes
     """Practices is the holder of all completed practices."""
 
-    def __init__(self, practices_file: pathlib.Path):
+    def __init__(
+        self,
+        practices_file: pathlib.Path,
+        file_format: PracticesFileFormat = PracticesFileFormat.TEXT,
+        window: typing.Optional[DateWindow] = None,
+        skip_corrupt: bool = False,
+    ):
         """Creates a Practices instance from the given practices_file.
 
         If the practices_file doens't exist, create an empty Practices
-        instance.
+        instance which will be saved in the given file_format. If it
+        does exist, the format is detected from the file itself.
+
+        If a window is given, only the practice sets within it are
+        loaded. New practice sets can still be appended to a journal,
+        but the file can't be rewritten.
+
+        If skip_corrupt is True, damaged regions of a journal are
+        skipped and listed in corrupt_regions, rather than raising
+        InvalidPracticesFileError. Loading resumes at the next block of
+        records after each one. Rewriting the file drops them.
         """
         self.practices_file = practices_file
+        self.file_format = file_format
+        self.window = window
+        # The damaged regions skipped by the load, None if not skipped.
+        self.corrupt_regions: typing.Optional[list[journal_blocks.CorruptRegion]] = (
+            [] if skip_corrupt else None
+        )
+
+        self.columns = PracticeSetColumns()
+
+        # The number of practice sets already written to the
+        # practices_file, used to only append new ones to a journal.
+        self._num_saved_practice_sets = 0
+
+        # Set by convert_to_journal until the next save rewrites the
+        # practices_file.
+        self._is_converting = False
+
+        # Called with every PracticeSet added to this instance.
+        self._listeners: list[typing.Callable[[PracticeSet], None]] = []
 
-        self.practice_sets = []
+        # Built by the first query_rows, then kept up to date by each.
+        self._timestamp_index: typing.Optional[timestamp_index.TimestampIndex] = None
 
         # If the practices file doesn't exist yet, that is ok.
         # We'll create it later when saving results.
-        if not practices_file.is_file():
+        if not practices_file.exists():
             print("Note: No Practices file found. Starting from an empty state")
             return
 
-        with open(self.practices_file, encoding="utf-8") as f:
-            num_practice_sets_str = f.readline()
-            try:
-                num_practice_sets = int(num_practice_sets_str)
-            except ValueError as e:
-                raise InvalidPracticesFileError(
-                    "Expected an integer for number of practice sets, instead got "
-                    f'"{num_practice_sets_str}"'
-                ) from e
-
-            for _ in range(num_practice_sets):
-                try:
-                    practice_set = PracticeSet.load_from_file_object(f)
-                except PracticeSetLoadingError as e:
-                    raise InvalidPracticesFileError(
-                        "Failed to load practice_set"
-                    ) from e
-                self.practice_sets.append(practice_set)
-
-            # Verify that there is no other content in the file.
-            remaining_data = f.read(None).strip("\n")
-            if remaining_data:
-                raise InvalidPracticesFileError(
-                    "Unexpected data remaining after load completed. Found:\n"
-                    f"{remaining_data}"
-                )
+        self._load()
+        self._num_saved_practice_sets = len(self.columns)
+
+    def _load(self) -> None:
+        """Loads the practice sets in the window from practices_file."""
+        with open(self.practices_file, "rb") as raw_file:
+            f = compressed_files.get_reader(raw_file)
+            self.file_format = read_file_format(f)
+            for record in iter_file_records(
+                f, self.file_format, corrupt_regions=self.corrupt_regions
+            ):
+                if self.window is None or self.window.contains(record[2]):
+                    self.columns.append(*record)
 
     def save(self) -> None:
         """Saves this Practices instance to it's practices_file.
 
         This Practices instance can them be reproduced by opening
-        that file.
+        that file. For a journal, only the practice sets added since the
+        last save are appended, use compact to rewrite the whole file.
+
+        Practice sets can be added by another thread during a save, the
+        ones added after it started are left for the next save.
+
+        Raises:
+            PartialPracticesError: This was loaded with a window and
+                isn't a journal.
+        """
+        if self._is_converting:
+            shutil.copy2(
+                self.practices_file,
+                self.practices_file.with_name(
+                    f"{self.practices_file.name}{BACKUP_SUFFIX}"
+                ),
+            )
+            self.compact()
+            self._is_converting = False
+            return
+        if self.file_format != PracticesFileFormat.JOURNAL or (
+            not self._num_saved_practice_sets and not self.practices_file.is_file()
+        ):
+            self.compact()
+            return
+
+        num_practice_sets = len(self.columns)
+        append_to_journal(
+            self.practices_file,
+            self.columns.iter_practice_sets(
+                self._num_saved_practice_sets, num_practice_sets
+            ),
+        )
+
+        self._num_saved_practice_sets = num_practice_sets
+
+    def convert_to_journal(self) -> None:
+        """Makes the next save rewrite practices_file as a journal.
+
+        Saves after that only append the practice sets added since the
+        last one. The practices_file in its old format is copied next to
+        it first, with BACKUP_SUFFIX appended to its name. Nothing
+        changes if it's already a journal or doesn't exist yet.
+
+        Raises:
+            PartialPracticesError: This was loaded with a window.
+        """
+        self._check_not_partial()
+        if self.file_format == PracticesFileFormat.JOURNAL:
+            return
+        self.file_format = PracticesFileFormat.JOURNAL
+        self._is_converting = self.practices_file.is_file()
+
+    def save_as(
+        self, practices_file: pathlib.Path, file_format: PracticesFileFormat
+    ) -> None:
+        """Saves this Practices instance to a new file, in file_format.
+
+        Future saves will also go to the new practices_file.
+
+        Raises:
+            PartialPracticesError: This was loaded with a window.
         """
-        with open(self.practices_file, "w", encoding="utf-8") as f:
-            f.write(f"{len(self.practice_sets)}\n")
-            for practice_set in self.practice_sets:
-                practice_set.save(f)
+        self._check_not_partial()
+        self.practices_file = practices_file
+        self.file_format = file_format
+        self.compact()
+
+    def compact(self) -> None:
+        """Rewrites the whole practices_file from this instance.
+
+        For a journal this drops the intermediate footers and ends the
+        file with a footer counting all the practice sets. Text and
+        binary files are always compact, so this is the same as save.
+
+        The new file is written next to the practices_file and renamed
+        over it, so a crash part way leaves the old file intact.
+
+        Raises:
+            PartialPracticesError: This was loaded with a window.
+        """
+        self._check_not_partial()
+        num_practice_sets = len(self.columns)
+        write_practices_file(
+            self.practices_file, self.file_format, self.columns, num_practice_sets
+        )
+
+        self._num_saved_practice_sets = num_practice_sets
+
+    def _check_not_partial(self) -> None:
+        """Raises PartialPracticesError if loaded with a window."""
+        if self.window is not None:
+            raise PartialPracticesError(
+                f"Can't rewrite {self.practices_file}, only the practice sets "
+                f"in {self.window} were loaded"
+            )
 
     def get_num_practice_sets(self) -> int:
         """Returns the number of PracticeSets."""
-        return len(self.practice_sets)
+        return len(self.columns)
 
     def add_practice_set(
         self, act: routine.Activity, score: int, date_time: datetime.datetime
     ) -> None:
-        """Add a PracticeSet to this instance."""
-        self.practice_sets.append(PracticeSet(act.get_key(), score, date_time))
+        """Add a PracticeSet to this instance.
+
+        The new PracticeSet is also passed to every listener.
+        """
+        practice_set = PracticeSet(act.get_key(), score, date_time)
+        self.columns.append_practice_set(practice_set)
+        for listener in self._listeners:
+            listener(practice_set)
+
+    def add_columns(self, columns: "PracticeSetColumns") -> None:
+        """Adds all the practice sets in columns to this instance.
+
+        This is much quicker than adding them one at a time, unless
+        there are listeners, which are still passed each PracticeSet.
+        """
+        start = len(self.columns)
+        self.columns.extend(columns)
+        if self._listeners:
+            for practice_set in self.columns.iter_practice_sets(start):
+                for listener in self._listeners:
+                    listener(practice_set)
+
+    def add_listener(self, listener: typing.Callable[["PracticeSet"], None]) -> None:
+        """Calls listener with each PracticeSet added from now on."""
+        self._listeners.append(listener)
 
     def get_practice_sets(self) -> list["PracticeSet"]:
-        """Returns the PracticeSets contained."""
-        return self.practice_sets
+        """Returns the PracticeSets contained.
+
+        The PracticeSets are created from the columns on each call, so
+        bulk readers should prefer reading the columns directly.
+        """
+        return list(self.columns.iter_practice_sets())
+
+    def query_rows(
+        self, window: DateWindow, activity_key: typing.Optional[str] = None
+    ) -> "array.array[int]":
+        """Returns the column indexes of the practice sets in window.
+
+        Only the practice sets of activity_key are included, if given.
+        The indexes are in time order. They're found by binary search of
+        an index sorted by time, which takes O(n log n) to build on the
+        first query, and is only updated with the new practice sets on
+        later ones.
+        """
+        if self._timestamp_index is None:
+            self._timestamp_index = timestamp_index.TimestampIndex(
+                self.columns.epoch_micros, self.columns.key_indexes
+            )
+        self._timestamp_index.update(len(self.columns))
+
+        key_index = None
+        if activity_key is not None:
+            key_index = self.columns.get_key_index(activity_key)
+            if key_index is None:
+                return array.array("I")
+        return self._timestamp_index.get_rows(
+            window.since_epoch_micros, window.until_epoch_micros, key_index
+        )
+
+    def get_practice_sets_in(
+        self, window: DateWindow, activity_key: typing.Optional[str] = None
+    ) -> list["PracticeSet"]:
+        """Returns the PracticeSets in window, in time order.
+
+        Only the practice sets of activity_key are included, if given.
+        """
+        return [
+            self.columns.get_practice_set(x)
+            for x in self.query_rows(window, activity_key)
+        ]
+
+
+def convert_practices_file(
+    source_file: pathlib.Path,
+    destination_file: pathlib.Path,
+    file_format: PracticesFileFormat,
+) -> None:
+    """Writes the practices in source_file to destination_file.
+
+    The source_file can be in any format, the destination_file will be
+    in the given file_format.
+    """
+    Practices(source_file).save_as(destination_file, file_format)
+
+
+def write_practices_file(
+    practices_file: pathlib.Path,
+    file_format: PracticesFileFormat,
+    columns: "PracticeSetColumns",
+    num_practice_sets: typing.Optional[int] = None,
+) -> None:
+    """Writes the practice sets in columns to practices_file.
+
+    Only the first num_practice_sets are written, if given. The file is
+    written next to the practices_file and renamed over it, so a crash
+    part way leaves any old file intact.
+
+    The file keeps the compression of any existing practices_file,
+    otherwise it's compressed as chosen by its extension.
+    """
+    if num_practice_sets is None:
+        num_practice_sets = len(columns)
+    temp_file = practices_file.with_name(f"{practices_file.name}{_TEMP_FILE_SUFFIX}")
+    with compressed_files.open_writer(
+        temp_file, compressed_files.get_compression(practices_file)
+    ) as f:
+        if file_format == PracticesFileFormat.TEXT:
+            text_file = io.TextIOWrapper(f, encoding="utf-8")
+            text_file.write(f"{num_practice_sets}\n")
+            for practice_set in columns.iter_practice_sets(0, num_practice_sets):
+                practice_set.save(text_file)
+            text_file.flush()
+            text_file.detach()
+        elif file_format == PracticesFileFormat.BINARY:
+            _encode_binary_columns(f, columns, num_practice_sets)
+        else:
+            journal_frames.write_journal(
+                f,
+                map(
+                    _encode_journal_record,
+                    columns.iter_practice_sets(0, num_practice_sets),
+                ),
+            )
+    os.replace(temp_file, practices_file)
+
+
+def write_journal(
+    journal_file: pathlib.Path, practice_sets: typing.Iterable["PracticeSet"]
+) -> int:
+    """Writes practice_sets to journal_file, returning how many.
+
+    Unlike write_practices_file, practice_sets is iterated only once,
+    so it can be streamed rather than held in memory. Like it, the file
+    is written next to journal_file and renamed over it, and keeps the
+    compression of any existing journal_file.
+    """
+    temp_file = journal_file.with_name(f"{journal_file.name}{_TEMP_FILE_SUFFIX}")
+    with compressed_files.open_writer(
+        temp_file, compressed_files.get_compression(journal_file)
+    ) as f:
+        num_practice_sets = journal_frames.write_journal(
+            f, map(_encode_journal_record, practice_sets)
+        )
+    os.replace(temp_file, journal_file)
+    return num_practice_sets
+
+
+def append_to_journal(
+    journal_file: pathlib.Path, practice_sets: typing.Iterable["PracticeSet"]
+) -> None:
+    """Appends the practice_sets to journal_file, creating it if needed.
+
+    Like journal_frames.append_to_journal, they're synced to disk
+    before this returns.
+    """
+    journal_frames.append_to_journal(
+        journal_file, map(_encode_journal_record, practice_sets)
+    )
+
+
+def iter_practice_sets(
+    practices_file: pathlib.Path,
+) -> typing.Generator["PracticeSet", None, None]:
+    """Yields the PracticeSets in practices_file, one at a time.
+
+    Unlike Practices, the practice sets are read lazily so only the one
+    being yielded needs to be held in memory. If the practices_file
+    doesn't exist, nothing is yielded.
+
+    Raises:
+        InvalidPracticesFileError: The practices_file is malformed. Any
+            practice sets before the malformed one are still yielded.
+    """
+    if not practices_file.is_file():
+        print("Note: No Practices file found. Starting from an empty state")
+        return
+
+    with open(practices_file, "rb") as raw_file:
+        f = compressed_files.get_reader(raw_file)
+        yield from _iter_file_practice_sets(f, read_file_format(f))
+
+
+def read_file_format(f: typing.BinaryIO) -> PracticesFileFormat:
+    """Returns the format of the practices file f, from its header.
+
+    f is left positioned at the start of the file's practice sets.
+
+    Raises:
+        InvalidPracticesFileError: f is a corrupt compressed file.
+    """
+    try:
+        header = f.read(max(len(journal_frames.JOURNAL_HEADER), len(BINARY_HEADER)))
+    except compressed_files.CompressedFileError as e:
+        raise InvalidPracticesFileError("Failed to decompress the header") from e
+    if header.startswith(journal_frames.JOURNAL_HEADER):
+        f.seek(len(journal_frames.JOURNAL_HEADER))
+        return PracticesFileFormat.JOURNAL
+    if header.startswith(BINARY_HEADER):
+        f.seek(len(BINARY_HEADER))
+        return PracticesFileFormat.BINARY
+    f.seek(0)
+    return PracticesFileFormat.TEXT
+
+
+def _iter_file_practice_sets(
+    f: typing.BinaryIO, file_format: PracticesFileFormat
+) -> typing.Iterator["PracticeSet"]:
+    """Yields the PracticeSets in f, stored in the given file_format."""
+    if file_format == PracticesFileFormat.BINARY:
+        for activity_key, score, epoch_micros, utc_offset in iter_file_records(
+            f, file_format
+        ):
+            yield PracticeSet(
+                activity_key,
+                score,
+                timestamps.from_epoch_micros(epoch_micros, utc_offset),
+            )
+        return
+
+    try:
+        for activity_key, score, date_time_str in _iter_file_fields(f, file_format):
+            try:
+                date_time = _parse_date_time(date_time_str)
+            except PracticeSetLoadingError as e:
+                raise InvalidPracticesFileError("Failed to load practice_set") from e
+            yield PracticeSet(activity_key, score, date_time)
+    except compressed_files.CompressedFileError as e:
+        raise InvalidPracticesFileError("Failed to decompress practice sets") from e
+
+
+def iter_file_records(
+    f: typing.BinaryIO,
+    file_format: PracticesFileFormat,
+    num_practice_sets: int = 0,
+    corrupt_regions: typing.Optional[list[journal_blocks.CorruptRegion]] = None,
+) -> typing.Iterator["PracticeSetRecord"]:
+    """Yields the practice sets in f as PracticeSetRecords.
+
+    No PracticeSet or datetime is created for each one. Binary files
+    store the records directly, other formats have their date_times
+    parsed in batches.
+
+    f must be positioned by read_file_format. A journal can instead be
+    positioned at the start of any of its records, along with the
+    num_practice_sets before it so its footers are still checked.
+
+    If corrupt_regions is given, the damaged regions of a journal are
+    appended to it and skipped, rather than raising.
+
+    Raises:
+        InvalidPracticesFileError: f is malformed, or a corrupt
+            compressed file.
+    """
+    try:
+        if file_format == PracticesFileFormat.BINARY:
+            yield from _iter_binary_file_records(f)
+            return
+
+        batch: list[tuple[str, int, str]] = []
+        for fields in _iter_file_fields(
+            f, file_format, num_practice_sets, corrupt_regions
+        ):
+            batch.append(fields)
+            if len(batch) == _PARSE_BATCH_SIZE:
+                yield from _parse_fields_batch(batch)
+                batch = []
+        yield from _parse_fields_batch(batch)
+    except compressed_files.CompressedFileError as e:
+        raise InvalidPracticesFileError("Failed to decompress practice sets") from e
+
+
+def _iter_binary_file_records(
+    f: typing.BinaryIO,
+) -> typing.Iterator["PracticeSetRecord"]:
+    """Yields the records of the binary practices file f."""
+    try:
+        fileno = f.fileno()
+    except io.UnsupportedOperation:
+        # A decompressed stream has no file to map, so it's read whole.
+        f.seek(0)
+        with memoryview(f.read()) as view:
+            yield from _iter_binary_records(view)
+        return
+
+    # Map the file rather than reading it, so the records are decoded
+    # in one pass straight out of the page cache.
+    with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as buffer:
+        with memoryview(buffer) as view:
+            yield from _iter_binary_records(view)
+
+
+def _parse_fields_batch(
+    batch: list[tuple[str, int, str]],
+) -> list["PracticeSetRecord"]:
+    try:
+        parsed_date_times = timestamps.parse_epoch_micros_batch([x[2] for x in batch])
+    except ValueError as e:
+        raise InvalidPracticesFileError("Failed to load practice_set") from e
+    return [
+        (activity_key, score, epoch_micros, utc_offset)
+        for (activity_key, score, _), (epoch_micros, utc_offset) in zip(
+            batch, parsed_date_times
+        )
+    ]
+
+
+def _iter_file_fields(
+    f: typing.BinaryIO,
+    file_format: PracticesFileFormat,
+    num_practice_sets: int = 0,
+    corrupt_regions: typing.Optional[list[journal_blocks.CorruptRegion]] = None,
+) -> typing.Iterator[tuple[str, int, str]]:
+    """Yields the fields of each practice set in a text or journal f.
+
+    The date_time is left as a string, so the caller can choose how to
+    parse it.
+    """
+    if file_format == PracticesFileFormat.JOURNAL:
+        yield from _iter_journal_fields(f, num_practice_sets, corrupt_regions)
+    else:
+        yield from _iter_text_fields(io.TextIOWrapper(f, encoding="utf-8"))
+
+
+def _iter_text_fields(f: typing.TextIO) -> typing.Iterator[tuple[str, int, str]]:
+    num_practice_sets_str = f.readline()
+    try:
+        num_practice_sets = int(num_practice_sets_str)
+    except ValueError as e:
+        raise InvalidPracticesFileError(
+            "Expected an integer for number of practice sets, instead got "
+            f'"{num_practice_sets_str}"'
+        ) from e
+
+    for _ in range(num_practice_sets):
+        try:
+            yield _read_practice_set_fields(f)
+        except PracticeSetLoadingError as e:
+            raise InvalidPracticesFileError("Failed to load practice_set") from e
+
+    # Verify that there is no other content in the file.
+    remaining_data = f.read().strip("\n")
+    if remaining_data:
+        raise InvalidPracticesFileError(
+            "Unexpected data remaining after load completed. Found:\n"
+            f"{remaining_data}"
+        )
+
+
+def _iter_journal_fields(
+    f: typing.BinaryIO,
+    num_practice_sets: int = 0,
+    corrupt_regions: typing.Optional[list[journal_blocks.CorruptRegion]] = None,
+) -> typing.Iterator[tuple[str, int, str]]:
+    """Yields the fields of each practice set in the journal f.
+
+    If corrupt_regions is given, each frame that fails to load starts a
+    damaged region, which is appended to it. The region runs up to the
+    next block, where loading resumes. Footers are no longer checked
+    once a region is skipped, as they count its records.
+    """
+    while True:
+        start = f.tell()
+        try:
+            frame = f.readline()
+            if not frame:
+                return
+            fields = read_journal_frame(
+                f, frame, None if corrupt_regions else num_practice_sets
+            )
+        except InvalidPracticesFileError as e:
+            if corrupt_regions is None:
+                raise
+            stop = journal_blocks.seek_next_block(f, start + 1)
+            corrupt_regions.append(journal_blocks.CorruptRegion(start, stop, str(e)))
+            continue
+        num_practice_sets += len(fields)
+        yield from fields
+
+
+def read_journal_frame(
+    f: typing.BinaryIO,
+    frame: bytes,
+    num_practice_sets: typing.Optional[int] = None,
+) -> list[tuple[str, int, str]]:
+    """Returns the fields of the practice sets in the frame read from f.
+
+    Each practice set's fields are its activity key, score and date_time
+    string. The frame is read as by journal_frames.read_frame, with its
+    footer checked against num_practice_sets, unless it's None.
+
+    Raises:
+        InvalidPracticesFileError: The frame is malformed.
+    """
+    try:
+        records = journal_frames.read_frame(f, frame, num_practice_sets)
+    except journal_frames.MalformedFrameError as e:
+        raise InvalidPracticesFileError(str(e)) from e
+    return [_decode_journal_record(x) for x in records]
+
+
+def _decode_journal_record(record: bytes) -> tuple[str, int, str]:
+    """Returns the fields of the practice set in a journal record.
+
+    Raises:
+        InvalidPracticesFileError: The record is malformed.
+    """
+    try:
+        record_file = io.StringIO(record.decode("utf-8"))
+        fields = _read_practice_set_fields(record_file)
+    except (UnicodeDecodeError, PracticeSetLoadingError) as e:
+        raise InvalidPracticesFileError("Failed to load practice_set") from e
+    if record_file.read():
+        raise InvalidPracticesFileError(
+            f"Unexpected data in journal record. Found:\n{record!r}"
+        )
+    return fields
+
+
+def _encode_binary_columns(
+    f: typing.BinaryIO, columns: "PracticeSetColumns", num_practice_sets: int
+) -> None:
+    """Writes the first num_practice_sets in columns to f, as binary."""
+    # The keys of the first num_practice_sets are always in the
+    # activity_keys, even if more are being added.
+    activity_keys = columns.activity_keys[:]
+    records = bytearray()
+    for key_index, epoch_micros, utc_offset, score in zip(
+        columns.key_indexes[:num_practice_sets],
+        columns.epoch_micros[:num_practice_sets],
+        columns.utc_offsets[:num_practice_sets],
+        columns.scores[:num_practice_sets],
+    ):
+        records += _BINARY_RECORD.pack(key_index, epoch_micros, utc_offset, score)
+
+    f.write(BINARY_HEADER)
+    f.write(_BINARY_COUNTS.pack(len(activity_keys), num_practice_sets))
+    for activity_key in activity_keys:
+        encoded_key = activity_key.encode("utf-8")
+        f.write(_BINARY_KEY_LENGTH.pack(len(encoded_key)) + encoded_key)
+    f.write(records)
+
+
+def _iter_binary_records(buffer: memoryview) -> typing.Iterator["PracticeSetRecord"]:
+    """Yields the records written by _encode_binary_columns.
+
+    Raises:
+        InvalidPracticesFileError: The buffer isn't a valid binary
+            practices file.
+    """
+    offset = len(BINARY_HEADER)
+    try:
+        num_keys, num_practice_sets = _BINARY_COUNTS.unpack_from(buffer, offset)
+        offset += _BINARY_COUNTS.size
+
+        activity_keys = []
+        for _ in range(num_keys):
+            (key_length,) = _BINARY_KEY_LENGTH.unpack_from(buffer, offset)
+            offset += _BINARY_KEY_LENGTH.size
+            activity_keys.append(
+                str(buffer[offset : offset + key_length], encoding="utf-8")
+            )
+            offset += key_length
+    except (struct.error, UnicodeDecodeError) as e:
+        raise InvalidPracticesFileError(
+            "Failed to load the binary activity key table"
+        ) from e
+
+    records_size = len(buffer) - offset
+    if records_size != num_practice_sets * _BINARY_RECORD.size:
+        raise InvalidPracticesFileError(
+            f"Expected {num_practice_sets} binary practice sets, instead got "
+            f"{records_size} bytes of records"
+        )
+
+    with buffer[offset:] as records:
+        for key_index, epoch_micros, utc_offset, score in _BINARY_RECORD.iter_unpack(
+            records
+        ):
+            if key_index >= num_keys:
+                raise InvalidPracticesFileError(
+                    f"Binary practice set has unknown activity key {key_index}"
+                )
+            if score >= len(POSSIBLE_SCORES):
+                raise InvalidPracticesFileError(
+                    f"Binary practice set has invalid score {score}"
+                )
+            yield activity_keys[key_index], score, epoch_micros, utc_offset
+
+
+def _encode_journal_record(practice_set: "PracticeSet") -> bytes:
+    """Returns the journal record for the given practice_set."""
+    record = io.StringIO()
+    practice_set.save(record)
+    return record.getvalue().encode("utf-8")
 
 
 class PracticeSetLoadingError(Exception):
@@ -98,6 +811,52 @@ class PracticeSetLoadingError(Exception):
     """
 
 
+def _read_practice_set_fields(f: typing.TextIO) -> tuple[str, int, str]:
+    """Reads a PracticeSet's fields, leaving the date_time unparsed.
+
+    Raises:
+        PracticeSetLoadingError: The IO buffer has a malformed
+            PracticeSet.
+    """
+    activity_key = f.readline().rstrip("\n")
+    if not activity_key:
+        raise PracticeSetLoadingError("No value for activity_key")
+
+    score_str = f.readline().rstrip("\n")
+    if not score_str:
+        raise PracticeSetLoadingError("No value for score")
+    try:
+        score = int(score_str)
+    except ValueError as e:
+        raise PracticeSetLoadingError(
+            f'score wasn\'t an integer, got "{score_str}"'
+        ) from e
+    if not 0 <= score < len(POSSIBLE_SCORES):
+        raise PracticeSetLoadingError(
+            f"score must be 0-{len(POSSIBLE_SCORES) - 1}, got {score}"
+        )
+
+    date_time_str = f.readline().rstrip("\n")
+    if not date_time_str:
+        raise PracticeSetLoadingError("No value for date_time")
+
+    return activity_key, score, date_time_str
+
+
+def _parse_date_time(date_time_str: str) -> datetime.datetime:
+    """Parses the iso format date_time_str.
+
+    Raises:
+        PracticeSetLoadingError: date_time_str isn't in iso format.
+    """
+    try:
+        return datetime.datetime.fromisoformat(date_time_str)
+    except ValueError as e:
+        raise PracticeSetLoadingError(
+            f'datetime wasn\'t in iso format, got "{date_time_str}"'
+        ) from e
+
+
 class PracticeSet:
     """PracticeSet is an an Activity that was practiced and scored.
 
@@ -105,6 +864,8 @@ class PracticeSet:
     activity.
     """
 
+    __slots__ = ("activity_key", "score", "date_time")
+
     def __init__(self, activity_key: str, score: int, date_time: datetime.datetime):
         """Creates a PracticeSet with the given values."""
         self.activity_key = activity_key
@@ -119,29 +880,8 @@ class PracticeSet:
             PracticeSetLoadingError: The IO buffer has a malformed
                 PracticeSet.
         """
-        activity_key = f.readline().rstrip("\n")
-        if not activity_key:
-            raise PracticeSetLoadingError("No value for activity_key")
-
-        score_str = f.readline().rstrip("\n")
-        if not score_str:
-            raise PracticeSetLoadingError("No value for score")
-        try:
-            score = int(score_str)
-        except ValueError as e:
-            raise PracticeSetLoadingError(
-                f'score wasn\'t an integer, got "{score_str}"'
-            ) from e
-
-        date_time_str = f.readline().rstrip("\n")
-        if not date_time_str:
-            raise PracticeSetLoadingError("No value for date_time")
-        try:
-            date_time = datetime.datetime.fromisoformat(date_time_str)
-        except ValueError as e:
-            raise PracticeSetLoadingError(
-                f'datetime wasn\'t in iso format, got "{date_time_str}"'
-            ) from e
+        activity_key, score, date_time_str = _read_practice_set_fields(f)
+        date_time = _parse_date_time(date_time_str)
 
         return PracticeSet(activity_key, score, date_time)
 
@@ -166,148 +906,95 @@ class PracticeSet:
         f.write(f"{self.activity_key}\n{self.score}\n{self.date_time.isoformat()}\n")
 
 
-class ActivityEvaluationCreationError(Exception):
-    """ActivityEvaluation encountered a error during creation.
-
-    This usually occurs when there is an activity key mismatch.
-    """
+# A PracticeSet as plain values: its activity_key, score, the
+# microseconds since the epoch and the UTC offset of its date_time.
+PracticeSetRecord = tuple[str, int, int, int]
 
 
-class ActivityEvaluation:
-    """A collection of all practice sets for a given Activity.
+class PracticeSetColumns:
+    """A column oriented store of PracticeSets.
 
-    This is only meant to show the users the results of their practice,
-    not to add new pratice sets.
+    Each activity key is stored once, the practice sets refer to it by
+    index. The other values are kept in typed arrays, so a practice set
+    takes a few bytes instead of a full object. Bulk readers can use
+    the arrays directly, PracticeSets are created on demand.
     """
 
-    def __init__(self, activity_key: str, practice_sets: list[PracticeSet]):
-        """Creates an ActivityEvaluation from the given practice_sets.
-
-        Note, all practice_sets must be for the given activity_key,
-        otherwise this will raise an exception.
-
-        Raises:
-            ActivityEvaluationCreationError: The given activity_key
-                didn't match the practice_sets activities keys.
-        """
-        self.activity_key = activity_key
-
-        # Ensure all the practice sets are for this activity key.
-        practice_sets_activity_keys = set(x.activity_key for x in practice_sets)
-        unexpected_keys = practice_sets_activity_keys.difference(
-            set([self.activity_key])
-        )
-        if unexpected_keys:
-            raise ActivityEvaluationCreationError(
-                f"activity_key mismatch. Expected only {self.activity_key}, "
-                f"got {practice_sets_activity_keys}"
-            )
-
-        ordered_practice_sets = sorted(practice_sets, key=lambda x: x.date_time)
-        self.scores = [x.score for x in ordered_practice_sets]
-
-        self.oldest_practice_time: typing.Optional[datetime.datetime] = None
-        self.latest_practice_time: typing.Optional[datetime.datetime] = None
-        if ordered_practice_sets:
-            self.oldest_practice_time = ordered_practice_sets[0].date_time
-            self.latest_practice_time = ordered_practice_sets[-1].date_time
-
-    def __repr__(self) -> str:
-        return (
-            f"ActivityEvaluation("
-            f"{self.activity_key=}, "
-            f"{self.oldest_practice_time=}, "
-            f"{self.latest_practice_time=}, "
-            f"{self.scores=})"
-        )
-
-    def __str__(self) -> str:
-        output = (
-            f"{self.activity_key}\n"
-            f"\tPracticed {self.get_num_practice_sets()} times.\n"
-        )
-
-        if self.oldest_practice_time:
-            output += f"\tOldest practice {self.oldest_practice_time.isoformat()}\n"
-        if self.latest_practice_time:
-            output += f"\tNewest practice {self.latest_practice_time.isoformat()}\n"
-
-        if self.scores:
-            output += f"\tScores: {self.scores}\n"
-
-        return output
+    def __init__(self) -> None:
+        """Creates an empty PracticeSetColumns."""
+        self.activity_keys: list[str] = []
+        self._activity_key_indexes: dict[str, int] = {}
 
-    def get_activity_key(self) -> str:
-        """Returns the key of the Activity this instance maps to."""
-        return self.activity_key
+        self.key_indexes = array.array("I")
+        self.scores = array.array("B")
+        self.epoch_micros = array.array("q")
+        # The UTC offset in seconds, or timestamps.NAIVE_UTC_OFFSET.
+        self.utc_offsets = array.array("i")
 
-    def get_num_practice_sets(self) -> int:
-        """Returns the number of practice sets."""
+    def __len__(self) -> int:
         return len(self.scores)
 
-    def get_oldest_practice_time(self) -> typing.Optional[datetime.datetime]:
-        """Returns the oldest practice time."""
-        return self.oldest_practice_time
-
-    def get_latest_practice_time(self) -> typing.Optional[datetime.datetime]:
-        """Returns the latest practice time ."""
-        return self.latest_practice_time
-
-
-class Evaluation:
-    """An Evaluation based off the Practices given.
-
-    The evaluation is based off the Practices when given, any future
-    changes won't be reflected here. If changes are desired, a new
-    Evaluation needs to be created.
-    """
-
-    def __init__(self, practices: Practices):
-        """Creates an Evaluation from the given Practices."""
-        activity_to_practice_sets: dict[str, list[PracticeSet]] = {}
-
-        for practice_set in practices.get_practice_sets():
-            activity_to_practice_sets.setdefault(practice_set.activity_key, []).append(
-                practice_set
-            )
-
-        self.activity_evaluations = []
-        for activity_key, practice_sets in activity_to_practice_sets.items():
-            self.activity_evaluations.append(
-                ActivityEvaluation(activity_key, practice_sets)
-            )
-
-        # Ensure evaluations are sorted by key order.
-        self.activity_evaluations = sorted(
-            self.activity_evaluations, key=lambda x: x.activity_key
-        )
-
-    def __str__(self) -> str:
-        activity_word = (
-            "activity" if len(self.activity_evaluations) == 1 else "activities"
+    def append(
+        self, activity_key: str, score: int, epoch_micros: int, utc_offset: int
+    ) -> None:
+        """Appends the practice set with the given values."""
+        key_index = self._activity_key_indexes.get(activity_key)
+        if key_index is None:
+            key_index = len(self.activity_keys)
+            self._activity_key_indexes[activity_key] = key_index
+            self.activity_keys.append(activity_key)
+
+        # The scores give the length, so they are appended last. Then
+        # another thread never sees a partly appended practice set.
+        self.key_indexes.append(key_index)
+        self.epoch_micros.append(epoch_micros)
+        self.utc_offsets.append(utc_offset)
+        self.scores.append(score)
+
+    def get_key_index(self, activity_key: str) -> typing.Optional[int]:
+        """Returns the index of activity_key, None if it has none."""
+        return self._activity_key_indexes.get(activity_key)
+
+    def append_practice_set(self, practice_set: PracticeSet) -> None:
+        """Appends the given practice_set."""
+        self.append(
+            practice_set.activity_key,
+            practice_set.score,
+            *timestamps.to_epoch_micros(practice_set.date_time),
         )
 
-        output = (
-            f"{self.get_num_activities()} {activity_word} has been "
-            f"completed {self.get_num_of_practice_sets()} times.\n"
+    def extend(self, other: "PracticeSetColumns") -> None:
+        """Appends all the practice sets in other."""
+        other_key_indexes = []
+        for activity_key in other.activity_keys:
+            key_index = self._activity_key_indexes.get(activity_key)
+            if key_index is None:
+                key_index = len(self.activity_keys)
+                self._activity_key_indexes[activity_key] = key_index
+                self.activity_keys.append(activity_key)
+            other_key_indexes.append(key_index)
+
+        self.key_indexes.extend(other_key_indexes[x] for x in other.key_indexes)
+        self.epoch_micros.extend(other.epoch_micros)
+        self.utc_offsets.extend(other.utc_offsets)
+        self.scores.extend(other.scores)
+
+    def get_practice_set(self, index: int) -> PracticeSet:
+        """Returns a new PracticeSet of the practice set at index."""
+        return PracticeSet(
+            self.activity_keys[self.key_indexes[index]],
+            self.scores[index],
+            timestamps.from_epoch_micros(
+                self.epoch_micros[index], self.utc_offsets[index]
+            ),
         )
 
-        for activity_evaluation in self.activity_evaluations:
-            output += "\n" + str(activity_evaluation)
-
-        return output
+    def iter_practice_sets(
+        self, start: int = 0, stop: typing.Optional[int] = None
+    ) -> typing.Iterator[PracticeSet]:
+        """Yields a new PracticeSet for each practice set from start.
 
-    def get_activity_evaluation(self, index: int) -> ActivityEvaluation:
-        """Returns the ActivityEvaluation at the given index.
-
-        The ActivityEvaluations are in key order.
+        The practice sets stop before the stop index, if given.
         """
-        return self.activity_evaluations[index]
-
-    def get_num_activities(self) -> int:
-        """Returns the number of activities."""
-        return len(self.activity_evaluations)
-
-    def get_num_of_practice_sets(self) -> int:
-        """Returns the number of practice sets in all activites."""
-        return sum(x.get_num_practice_sets() for x in self.activity_evaluations)
+        for index in range(start, len(self) if stop is None else stop):
+            yield self.get_practice_set(index)
@@ -4,8 +4,12 @@ import pathlib
 
 import pytest
 
+import compressed_files
+import journal_blocks
+import journal_frames
 import results
 import routine
+import timestamps
 
 
 class TestResults:
@@ -109,7 +113,22 @@ class TestResults:
 
         with open(practices_file, "w", encoding="utf-8") as f:
             f.write("2\n")
-            f.write("activity_key\n5\n2024-05-02T14:28:42.439597+00:00\n")
+            f.write("activity_key\n4\n2024-05-02T14:28:42.439597+00:00\n")
+
+        with pytest.raises(
+            results.InvalidPracticesFileError, match="Failed to load practice_set"
+        ):
+            results.Practices(practices_file)
+
+    @pytest.mark.parametrize("score", [-1, 5, 7])
+    def test_try_load_from_file_with_invalid_score(
+        self, tmp_path: pathlib.Path, score: int
+    ) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices_file.txt")
+
+        with open(practices_file, "w", encoding="utf-8") as f:
+            f.write("1\n")
+            f.write(f"activity_key\n{score}\n2024-05-02T14:28:42.439597+00:00\n")
 
         with pytest.raises(
             results.InvalidPracticesFileError, match="Failed to load practice_set"
@@ -123,7 +142,7 @@ class TestResults:
 
         with open(practices_file, "w", encoding="utf-8") as f:
             f.write("1\n")
-            f.write("activity_key\n5\n2024-05-02T14:28:42.439597+00:00\n")
+            f.write("activity_key\n4\n2024-05-02T14:28:42.439597+00:00\n")
             f.write("Unexpected data")
 
         with pytest.raises(
@@ -133,6 +152,512 @@ class TestResults:
             results.Practices(practices_file)
 
 
+class TestDateTimeParsing:
+    date_time_strs = [
+        "2024-05-02T14:28:42.439597+00:00",
+        "2024-05-02T14:28:42+00:00",
+        "1960-01-01T23:59:59.999999+00:00",
+        "2024-05-02T14:28:42.439597+05:30",
+        "2024-05-02T14:28:42-07:00",
+        "2024-05-02T14:28:42.439597",
+        "2024-05-02 14:28:42+00:00",
+        "2024-05-02T14:28:42.439+00:00",
+    ]
+
+    @pytest.fixture(params=[True, False], ids=["numpy", "no_numpy"])
+    def use_numpy(
+        self, request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        if request.param:
+            pytest.importorskip("numpy")
+        else:
+            monkeypatch.setattr(timestamps, "numpy", None)
+
+    @pytest.mark.usefixtures("use_numpy")
+    def test_load_all_layouts(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices_file.txt")
+        with open(practices_file, "w", encoding="utf-8") as f:
+            f.write(f"{len(self.date_time_strs)}\n")
+            for date_time_str in self.date_time_strs:
+                f.write(f"activity_key\n1\n{date_time_str}\n")
+
+        practice_sets = results.Practices(practices_file).get_practice_sets()
+
+        for practice_set, date_time_str in zip(practice_sets, self.date_time_strs):
+            expected_date_time = datetime.datetime.fromisoformat(date_time_str)
+            assert practice_set.date_time.isoformat() == expected_date_time.isoformat()
+
+    @pytest.mark.usefixtures("use_numpy")
+    @pytest.mark.parametrize(
+        "bad_date_time_str",
+        ["2024-05-02T24:28:42+00:00", "2024-02-30T14:28:42+00:00", "not a date"],
+    )
+    def test_load_bad_date_time(
+        self, tmp_path: pathlib.Path, bad_date_time_str: str
+    ) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices_file.txt")
+        with open(practices_file, "w", encoding="utf-8") as f:
+            f.write("2\n")
+            f.write("activity_key\n1\n2024-05-02T14:28:42+00:00\n")
+            f.write(f"activity_key\n1\n{bad_date_time_str}\n")
+
+        with pytest.raises(
+            results.InvalidPracticesFileError, match="Failed to load practice_set"
+        ):
+            results.Practices(practices_file)
+
+
+class TestJournalPractices:
+    def test_new_journal_save_and_reload(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices_file.txt")
+        practices = results.Practices(
+            practices_file, results.PracticesFileFormat.JOURNAL
+        )
+        practices.save()
+
+        with open(practices_file, "rb") as f:
+            assert f.readline() == journal_frames.JOURNAL_HEADER
+
+        new_practices = results.Practices(practices_file)
+        assert new_practices.file_format == results.PracticesFileFormat.JOURNAL
+        assert new_practices.get_num_practice_sets() == 0
+
+    def test_save_only_appends_new_practice_sets(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices_file.txt")
+        practices = results.Practices(
+            practices_file, results.PracticesFileFormat.JOURNAL
+        )
+        activity = routine.Activity("activity")
+        time = datetime.datetime.now(datetime.timezone.utc)
+
+        practices.add_practice_set(activity, 1, time)
+        practices.save()
+        size_after_first_save = practices_file.stat().st_size
+
+        practices.add_practice_set(activity, 2, time)
+        practices.save()
+        size_after_second_save = practices_file.stat().st_size
+
+        practices.add_practice_set(activity, 3, time)
+        practices.save()
+
+        # Each save appends a single record of the same size.
+        record_size = size_after_second_save - size_after_first_save
+        assert practices_file.stat().st_size == size_after_second_save + record_size
+
+        expected_practice_sets = [
+            results.PracticeSet(activity.get_key(), score, time) for score in [1, 2, 3]
+        ]
+        new_practices = results.Practices(practices_file)
+        assert new_practices.get_practice_sets() == expected_practice_sets
+
+    def test_multiple_load_add_save_loops(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices_file.txt")
+        activity = routine.Activity("activity")
+
+        for count in range(10):
+            practices = results.Practices(
+                practices_file, results.PracticesFileFormat.JOURNAL
+            )
+            assert practices.get_num_practice_sets() == count
+
+            time = datetime.datetime.now(datetime.timezone.utc)
+            practices.add_practice_set(activity, count % 5, time)
+            practices.save()
+
+    def test_convert_to_journal(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices_file.txt")
+        activity = routine.Activity("activity")
+        time = datetime.datetime.now(datetime.timezone.utc)
+        practices = results.Practices(practices_file)
+        practices.add_practice_set(activity, 1, time)
+        practices.save()
+        text = practices_file.read_bytes()
+
+        practices = results.Practices(practices_file)
+        practices.convert_to_journal()
+        practices.add_practice_set(activity, 2, time)
+        practices.save()
+
+        backup_file = pathlib.Path(tmp_path, "practices_file.txt.bak")
+        assert backup_file.read_bytes() == text
+        assert practices_file.read_bytes().startswith(journal_frames.JOURNAL_HEADER)
+        size_after_conversion = practices_file.stat().st_size
+
+        practices.add_practice_set(activity, 3, time)
+        practices.save()
+
+        # Only the new practice set is appended, without a footer.
+        with open(practices_file, "rb") as f:
+            f.seek(size_after_conversion)
+            assert not f.read().startswith(b"$")
+        assert [
+            x.score for x in results.Practices(practices_file).get_practice_sets()
+        ] == [
+            1,
+            2,
+            3,
+        ]
+
+    def test_compact_then_append(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices_file.txt")
+        practices = results.Practices(
+            practices_file, results.PracticesFileFormat.JOURNAL
+        )
+        activity = routine.Activity("activity")
+        time = datetime.datetime.now(datetime.timezone.utc)
+        practices.add_practice_set(activity, 1, time)
+        practices.add_practice_set(activity, 2, time)
+        practices.compact()
+
+        with open(practices_file, "rb") as f:
+            assert f.read().endswith(b"$ 2\n")
+
+        # Records appended after the footer are still loaded.
+        practices.add_practice_set(activity, 3, time)
+        practices.save()
+
+        new_practices = results.Practices(practices_file)
+        assert new_practices.get_num_practice_sets() == 3
+
+    def test_footer_count_mismatch(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices_file.txt")
+        record = b"activity_key\n4\n2024-05-02T14:28:42.439597+00:00\n"
+        with open(practices_file, "wb") as f:
+            f.write(journal_frames.JOURNAL_HEADER)
+            f.write(f"@ {len(record)}\n".encode() + record)
+            f.write(b"$ 2\n")
+
+        with pytest.raises(
+            results.InvalidPracticesFileError, match="Journal footer expected 2"
+        ):
+            results.Practices(practices_file)
+
+    def test_invalid_score(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices_file.txt")
+        record = b"activity_key\n7\n2024-05-02T14:28:42.439597+00:00\n"
+        with open(practices_file, "wb") as f:
+            f.write(journal_frames.JOURNAL_HEADER)
+            f.write(f"@ {len(record)}\n".encode() + record)
+
+        with pytest.raises(
+            results.InvalidPracticesFileError, match="Failed to load practice_set"
+        ):
+            results.Practices(practices_file)
+
+    def test_truncated_record(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices_file.txt")
+        record = b"activity_key\n4\n2024-05-02T14:28:42.439597+00:00\n"
+        with open(practices_file, "wb") as f:
+            f.write(journal_frames.JOURNAL_HEADER)
+            f.write(f"@ {len(record)}\n".encode() + record[:10])
+
+        with pytest.raises(
+            results.InvalidPracticesFileError, match="Journal record was truncated"
+        ):
+            results.Practices(practices_file)
+
+    def test_malformed_frame(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices_file.txt")
+        with open(practices_file, "wb") as f:
+            f.write(journal_frames.JOURNAL_HEADER)
+            f.write(b"Unexpected data\n")
+
+        with pytest.raises(
+            results.InvalidPracticesFileError, match="Malformed journal frame"
+        ):
+            results.Practices(practices_file)
+
+    def test_corrupt_block(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices_file.txt")
+        practices = results.Practices(
+            practices_file, results.PracticesFileFormat.JOURNAL
+        )
+        time = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+        # Each save appends its own block.
+        for score in [1, 2, 3]:
+            practices.add_practice_set(routine.Activity("activity"), score, time)
+            practices.save()
+        data = practices_file.read_bytes()
+        second_block = data.index(
+            journal_blocks.BLOCK_MARKER, len(journal_frames.JOURNAL_HEADER) + 1
+        )
+        practices_file.write_bytes(
+            data[: second_block + 40] + b"X" + data[second_block + 41 :]
+        )
+
+        with pytest.raises(
+            results.InvalidPracticesFileError, match="failed its checksum"
+        ):
+            results.Practices(practices_file)
+
+        skipped_practices = results.Practices(practices_file, skip_corrupt=True)
+        assert [x.score for x in skipped_practices.get_practice_sets()] == [1, 3]
+        assert skipped_practices.corrupt_regions is not None
+        [region] = skipped_practices.corrupt_regions
+        assert region.start == second_block
+        assert data[region.stop :].startswith(journal_blocks.BLOCK_MARKER)
+
+    def test_truncated_block_skipped(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices_file.txt")
+        time = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+        results.append_to_journal(practices_file, [results.PracticeSet("a", 1, time)])
+        size = practices_file.stat().st_size
+        results.append_to_journal(practices_file, [results.PracticeSet("b", 2, time)])
+        with open(practices_file, "r+b") as f:
+            f.truncate(size + 20)
+
+        practices = results.Practices(practices_file, skip_corrupt=True)
+        assert practices.get_practice_sets() == [results.PracticeSet("a", 1, time)]
+        assert practices.corrupt_regions is not None
+        [region] = practices.corrupt_regions
+        assert (region.start, region.stop) == (size, size + 20)
+        assert "Journal block was truncated" in region.reason
+
+
+class TestBinaryPractices:
+    def test_save_and_reload(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices_file.bin")
+        practices = results.Practices(
+            practices_file, results.PracticesFileFormat.BINARY
+        )
+        practices.save()
+        assert results.Practices(practices_file).get_num_practice_sets() == 0
+
+        time = datetime.datetime.now(datetime.timezone.utc)
+        for x in range(10):
+            practices.add_practice_set(
+                routine.Activity(f"activity_{x % 3}"), x % 5, time
+            )
+        practices.save()
+
+        with open(practices_file, "rb") as f:
+            assert f.read(len(results.BINARY_HEADER)) == results.BINARY_HEADER
+
+        new_practices = results.Practices(practices_file)
+        assert new_practices.file_format == results.PracticesFileFormat.BINARY
+        assert new_practices.get_practice_sets() == practices.get_practice_sets()
+
+    @pytest.mark.parametrize(
+        "date_time",
+        [
+            datetime.datetime(2024, 5, 2, 14, 28, 42, 439597, datetime.timezone.utc),
+            datetime.datetime(
+                1969,
+                12,
+                31,
+                23,
+                59,
+                tzinfo=datetime.timezone(datetime.timedelta(hours=-7)),
+            ),
+            datetime.datetime(2024, 5, 2, 14, 28, 42),
+        ],
+    )
+    def test_date_times_round_trip(
+        self, tmp_path: pathlib.Path, date_time: datetime.datetime
+    ) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices_file.bin")
+        practices = results.Practices(
+            practices_file, results.PracticesFileFormat.BINARY
+        )
+        practices.add_practice_set(routine.Activity("activity"), 4, date_time)
+        practices.save()
+
+        reloaded_date_time = (
+            results.Practices(practices_file).get_practice_sets()[0].date_time
+        )
+        assert reloaded_date_time.isoformat() == date_time.isoformat()
+
+    def test_convert_between_formats(self, tmp_path: pathlib.Path) -> None:
+        text_file = pathlib.Path(tmp_path, "practices_file.txt")
+        practices = results.Practices(text_file)
+        time = datetime.datetime.now(datetime.timezone.utc)
+        for x in range(5):
+            practices.add_practice_set(routine.Activity(f"activity_{x}"), x, time)
+        practices.save()
+
+        binary_file = pathlib.Path(tmp_path, "practices_file.bin")
+        results.convert_practices_file(
+            text_file, binary_file, results.PracticesFileFormat.BINARY
+        )
+        round_trip_file = pathlib.Path(tmp_path, "round_trip.txt")
+        results.convert_practices_file(
+            binary_file, round_trip_file, results.PracticesFileFormat.TEXT
+        )
+
+        assert round_trip_file.read_bytes() == text_file.read_bytes()
+
+    def test_truncated_records(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices_file.bin")
+        practices = results.Practices(
+            practices_file, results.PracticesFileFormat.BINARY
+        )
+        time = datetime.datetime.now(datetime.timezone.utc)
+        practices.add_practice_set(routine.Activity("activity"), 1, time)
+        practices.save()
+
+        data = practices_file.read_bytes()
+        practices_file.write_bytes(data[:-1])
+
+        with pytest.raises(
+            results.InvalidPracticesFileError, match="Expected 1 binary practice sets"
+        ):
+            results.Practices(practices_file)
+
+    def test_truncated_key_table(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices_file.bin")
+        practices_file.write_bytes(results.BINARY_HEADER + b"\x01\x00")
+
+        with pytest.raises(
+            results.InvalidPracticesFileError, match="binary activity key table"
+        ):
+            results.Practices(practices_file)
+
+    def test_unknown_activity_key(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices_file.bin")
+        practices = results.Practices(
+            practices_file, results.PracticesFileFormat.BINARY
+        )
+        time = datetime.datetime.now(datetime.timezone.utc)
+        practices.add_practice_set(routine.Activity("activity"), 1, time)
+        practices.save()
+
+        # Point the only record past the end of the activity key table.
+        data = bytearray(practices_file.read_bytes())
+        data[-17] = 5
+        practices_file.write_bytes(bytes(data))
+
+        with pytest.raises(
+            results.InvalidPracticesFileError, match="unknown activity key 5"
+        ):
+            results.Practices(practices_file)
+
+    def test_invalid_score(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices_file.bin")
+        practices = results.Practices(
+            practices_file, results.PracticesFileFormat.BINARY
+        )
+        time = datetime.datetime.now(datetime.timezone.utc)
+        practices.add_practice_set(routine.Activity("activity"), 1, time)
+        practices.save()
+
+        # The score is the last byte of the only record.
+        data = bytearray(practices_file.read_bytes())
+        data[-1] = 7
+        practices_file.write_bytes(bytes(data))
+
+        with pytest.raises(results.InvalidPracticesFileError, match="invalid score 7"):
+            results.Practices(practices_file)
+
+
+class TestCompressedPractices:
+    @pytest.mark.parametrize("file_format", list(results.PracticesFileFormat))
+    @pytest.mark.parametrize("extension", [".gz", ".zz"])
+    def test_save_and_reload(
+        self,
+        tmp_path: pathlib.Path,
+        file_format: results.PracticesFileFormat,
+        extension: str,
+    ) -> None:
+        practices_file = pathlib.Path(tmp_path, f"practices{extension}")
+        practices = results.Practices(practices_file, file_format)
+        time = datetime.datetime.now(datetime.timezone.utc)
+        for x in range(100):
+            practices.add_practice_set(
+                routine.Activity(f"activity_{x % 3}"), x % 5, time
+            )
+        practices.save()
+
+        assert compressed_files.get_compression(practices_file) != (
+            compressed_files.Compression.NONE
+        )
+        new_practices = results.Practices(practices_file)
+        assert new_practices.file_format == file_format
+        assert new_practices.get_practice_sets() == practices.get_practice_sets()
+        assert (
+            list(results.iter_practice_sets(practices_file))
+            == practices.get_practice_sets()
+        )
+
+    def test_journal_appends_members(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices.gz")
+        practices = results.Practices(
+            practices_file, results.PracticesFileFormat.JOURNAL
+        )
+        time = datetime.datetime.now(datetime.timezone.utc)
+        practices.add_practice_set(routine.Activity("activity"), 1, time)
+        practices.save()
+        first_member = practices_file.read_bytes()
+
+        practices.add_practice_set(routine.Activity("activity"), 2, time)
+        practices.save()
+        # The first member is left as is, the new practice set follows.
+        assert practices_file.read_bytes().startswith(first_member)
+        assert results.Practices(practices_file).get_practice_sets() == (
+            practices.get_practice_sets()
+        )
+
+        # Compacting keeps the compression, as one member.
+        practices.compact()
+        assert compressed_files.get_compression(practices_file) == (
+            compressed_files.Compression.GZIP
+        )
+        assert results.Practices(practices_file).get_practice_sets() == (
+            practices.get_practice_sets()
+        )
+
+    def test_corrupt_file(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices.gz")
+        practices = results.Practices(
+            practices_file, results.PracticesFileFormat.JOURNAL
+        )
+        practices.add_practice_set(
+            routine.Activity("activity"), 1, datetime.datetime.now()
+        )
+        practices.save()
+        practices_file.write_bytes(practices_file.read_bytes()[:-12])
+
+        with pytest.raises(results.InvalidPracticesFileError):
+            results.Practices(practices_file)
+
+
+class TestIterPracticeSets:
+    def test_missing_practices_file(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "no_file.txt")
+        assert not list(results.iter_practice_sets(practices_file))
+
+    @pytest.mark.parametrize("file_format", list(results.PracticesFileFormat))
+    def test_yields_saved_practice_sets(
+        self, tmp_path: pathlib.Path, file_format: results.PracticesFileFormat
+    ) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices_file")
+        practices = results.Practices(practices_file, file_format)
+        time = datetime.datetime.now(datetime.timezone.utc)
+        for x in range(10):
+            practices.add_practice_set(
+                routine.Activity(f"activity_{x % 3}"), x % 5, time
+            )
+        practices.save()
+
+        practice_sets = list(results.iter_practice_sets(practices_file))
+        assert practice_sets == practices.get_practice_sets()
+
+    @pytest.mark.parametrize("file_format", list(results.PracticesFileFormat))
+    def test_stop_iterating_early(
+        self, tmp_path: pathlib.Path, file_format: results.PracticesFileFormat
+    ) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices_file")
+        practices = results.Practices(practices_file, file_format)
+        time = datetime.datetime.now(datetime.timezone.utc)
+        for x in range(10):
+            practices.add_practice_set(routine.Activity("activity"), x % 5, time)
+        practices.save()
+
+        practice_sets = results.iter_practice_sets(practices_file)
+        assert next(practice_sets) == practices.get_practice_sets()[0]
+        practice_sets.close()
+
+
 class TestPracticeSet:
     def test_equal_practice_sets(self) -> None:
         time = datetime.datetime.now(datetime.timezone.utc)
@@ -197,7 +722,7 @@ class TestPracticeSet:
             results.PracticeSet.load_from_file_object(f)
 
     def test_load_practice_set_missing_date_time(self) -> None:
-        f = io.StringIO("activity_key\n5\n\n")
+        f = io.StringIO("activity_key\n4\n\n")
         with pytest.raises(
             results.PracticeSetLoadingError, match="No value for date_time"
         ):
@@ -218,8 +743,14 @@ class TestPracticeSet:
         ):
             results.PracticeSet.load_from_file_object(f)
 
+    def test_load_pratice_set_score_out_of_range(self) -> None:
+        f = io.StringIO("activity_key\n5\n2024-05-02T14:28:42.439597+00:00\n")
+
+        with pytest.raises(results.PracticeSetLoadingError, match="score must be 0-4"):
+            results.PracticeSet.load_from_file_object(f)
+
     def test_load_pratice_set_datetime_wrong_format(self) -> None:
-        f = io.StringIO("activity_key\n5\nwrong_date_format\n")
+        f = io.StringIO("activity_key\n4\nwrong_date_format\n")
 
         with pytest.raises(
             results.PracticeSetLoadingError, match="datetime wasn't in iso format"
@@ -227,140 +758,183 @@ class TestPracticeSet:
             results.PracticeSet.load_from_file_object(f)
 
 
-class TestActivityEvaluation:
-    @pytest.mark.parametrize(
-        ("number_of_practice_sets", "reverse_order"),
-        [(0, False), (1, False), (10, False), (10, True), (100, False), (100, True)],
-    )
-    def test_activity_evaluation(
-        self, number_of_practice_sets: int, reverse_order: bool
-    ) -> None:
-        activity_key = "practice_activity"
-
-        sorted_scores = [x % 5 for x in range(number_of_practice_sets)]
-        initial_time = datetime.datetime.now(datetime.timezone.utc)
-        sorted_datetimes = [
-            initial_time + (x * datetime.timedelta(minutes=5))
-            for x in range(number_of_practice_sets)
-        ]
+class TestPracticeSetColumns:
+    def test_append_and_get_practice_sets(self) -> None:
+        columns = results.PracticeSetColumns()
+        time = datetime.datetime.now(datetime.timezone.utc)
         practice_sets = [
-            results.PracticeSet(activity_key, sorted_scores[x], sorted_datetimes[x])
-            for x in range(number_of_practice_sets)
+            results.PracticeSet(f"key{x % 2}", x, time + datetime.timedelta(hours=x))
+            for x in range(4)
         ]
+        for practice_set in practice_sets:
+            columns.append_practice_set(practice_set)
+
+        assert len(columns) == 4
+        assert columns.activity_keys == ["key0", "key1"]
+        assert list(columns.key_indexes) == [0, 1, 0, 1]
+        assert list(columns.scores) == [0, 1, 2, 3]
+        assert columns.get_practice_set(2) == practice_sets[2]
+        assert list(columns.iter_practice_sets()) == practice_sets
+        assert list(columns.iter_practice_sets(3)) == practice_sets[3:]
+
+    def test_practice_sets_are_slotted(self) -> None:
+        practice_set = results.PracticeSet(
+            "key1", 2, datetime.datetime.now(datetime.timezone.utc)
+        )
+        assert not hasattr(practice_set, "__dict__")
 
-        if reverse_order:
-            practice_sets = list(reversed(practice_sets))
-
-        activity_evaluation = results.ActivityEvaluation(activity_key, practice_sets)
-        assert activity_evaluation.get_activity_key() == activity_key
-        assert activity_evaluation.get_num_practice_sets() == number_of_practice_sets
-
-        if number_of_practice_sets == 0:
-            assert activity_evaluation.get_oldest_practice_time() is None
-            assert activity_evaluation.get_latest_practice_time() is None
-            expected_output = (
-                f"{activity_key}\n" f"\tPracticed {number_of_practice_sets} times.\n"
-            )
-        else:
-            assert activity_evaluation.get_oldest_practice_time() == sorted_datetimes[0]
-            assert (
-                activity_evaluation.get_latest_practice_time() == sorted_datetimes[-1]
-            )
-            expected_output = (
-                f"{activity_key}\n"
-                f"\tPracticed {number_of_practice_sets} times.\n"
-                f"\tOldest practice {sorted_datetimes[0].isoformat()}\n"
-                f"\tNewest practice {sorted_datetimes[-1].isoformat()}\n"
-                f"\tScores: {sorted_scores}\n"
-            )
-        assert str(activity_evaluation) == expected_output
-
-    def test_activity_evaluation_mismatch_activity_keys(self) -> None:
-        activity_key = "practice_activity"
-        practice_sets = [
-            results.PracticeSet(
-                "different_key", 1, datetime.datetime.now(datetime.timezone.utc)
-            )
-        ]
+    def test_practices_get_practice_sets_returns_copies(
+        self, tmp_path: pathlib.Path
+    ) -> None:
+        practices = results.Practices(pathlib.Path(tmp_path, "practices.txt"))
+        time = datetime.datetime.now(datetime.timezone.utc)
+        practices.add_practice_set(routine.Activity("activity"), 1, time)
 
-        with pytest.raises(
-            results.ActivityEvaluationCreationError, match="activity_key mismatch"
-        ):
-            results.ActivityEvaluation(activity_key, practice_sets)
+        practices.get_practice_sets()[0].score = 4
+        assert practices.get_practice_sets()[0].score == 1
 
 
-class TestEvaluation:
-    @pytest.mark.parametrize("number_of_practice_sets", [0, 1, 10, 100])
-    def test_evaluation_one_activity(
-        self, tmp_path: pathlib.Path, number_of_practice_sets: int
-    ) -> None:
-        activity = routine.Activity("practice_activity")
+class TestDateWindow:
+    since = datetime.datetime(2024, 2, 1, tzinfo=datetime.timezone.utc)
+    until = datetime.datetime(2024, 3, 1, tzinfo=datetime.timezone.utc)
 
-        practices_file = pathlib.Path(tmp_path, "practices.txt")
-        practices = results.Practices(practices_file)
-        time = datetime.datetime.now(datetime.timezone.utc)
-        for _ in range(number_of_practice_sets):
-            practices.add_practice_set(activity, 1, time)
+    def to_epoch_micros(self, date_time: datetime.datetime) -> int:
+        return timestamps.to_epoch_micros(date_time)[0]
 
-        evaluation = results.Evaluation(practices)
-        assert evaluation.get_num_of_practice_sets() == number_of_practice_sets
+    @pytest.mark.parametrize(
+        ("days", "expected_contains"),
+        [(-1, False), (0, True), (28, True), (29, False)],
+    )
+    def test_contains(self, days: int, expected_contains: bool) -> None:
+        window = results.DateWindow(self.since, self.until)
+        date_time = self.since + datetime.timedelta(days=days)
+        assert window.contains(self.to_epoch_micros(date_time)) == expected_contains
 
-        if number_of_practice_sets == 0:
-            assert evaluation.get_num_activities() == 0
+    def test_open_ended(self) -> None:
+        epoch_micros = self.to_epoch_micros(self.since)
+        assert results.DateWindow().contains(epoch_micros)
+        assert results.DateWindow(since=self.since).contains(epoch_micros)
+        assert not results.DateWindow(until=self.since).contains(epoch_micros)
 
-            expected_output = "0 activities has been completed 0 times.\n"
-        else:
-            assert evaluation.get_num_activities() == 1
+    @pytest.mark.parametrize(
+        ("first_days", "last_days", "expected_overlaps"),
+        [(-10, -1, False), (-10, 0, True), (10, 20, True), (29, 40, False)],
+    )
+    def test_overlaps(
+        self, first_days: int, last_days: int, expected_overlaps: bool
+    ) -> None:
+        window = results.DateWindow(self.since, self.until)
+        first = self.since + datetime.timedelta(days=first_days)
+        last = self.since + datetime.timedelta(days=last_days)
+        assert (
+            window.overlaps(self.to_epoch_micros(first), self.to_epoch_micros(last))
+            == expected_overlaps
+        )
 
-            activity_evaluation = evaluation.get_activity_evaluation(0)
-            assert activity_evaluation.get_activity_key() == activity.get_key()
-            assert (
-                activity_evaluation.get_num_practice_sets() == number_of_practice_sets
-            )
-            assert activity_evaluation.get_oldest_practice_time() == time
-            assert activity_evaluation.get_latest_practice_time() == time
 
-            expected_output = (
-                f"1 activity has been completed {number_of_practice_sets} times.\n\n"
-                f"{str(activity_evaluation)}"
-            )
-        assert str(evaluation) == expected_output
+@pytest.mark.parametrize("file_format", list(results.PracticesFileFormat))
+def test_load_window(
+    tmp_path: pathlib.Path, file_format: results.PracticesFileFormat
+) -> None:
+    practices_file = pathlib.Path(tmp_path, "practices")
+    practices = results.Practices(practices_file, file_format)
+    start_time = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    for x in range(10):
+        practices.add_practice_set(
+            routine.Activity("activity"), x % 5, start_time + datetime.timedelta(x)
+        )
+    practices.save()
 
-    def test_evaluation_multiple_activities(self, tmp_path: pathlib.Path) -> None:
-        activities = [
-            routine.Activity("practice_activity_1"),
-            routine.Activity("practice_activity_2"),
-            routine.Activity("practice_activity_3"),
-        ]
-        num_activities = len(activities)
-        num_practice_set_per_activity = 7
-        total_num_practice_sets = num_activities * num_practice_set_per_activity
+    window = results.DateWindow(
+        start_time + datetime.timedelta(3), start_time + datetime.timedelta(6)
+    )
+    windowed_practices = results.Practices(practices_file, window=window)
+    assert [x.score for x in windowed_practices.get_practice_sets()] == [3, 4, 0]
+
+    with pytest.raises(results.PartialPracticesError):
+        windowed_practices.compact()
+    with pytest.raises(results.PartialPracticesError):
+        windowed_practices.save_as(
+            pathlib.Path(tmp_path, "other"), results.PracticesFileFormat.TEXT
+        )
 
-        practices_file = pathlib.Path(tmp_path, "practices.txt")
-        practices = results.Practices(practices_file)
-        time = datetime.datetime.now(datetime.timezone.utc)
-        for x in range(total_num_practice_sets):
-            practices.add_practice_set(activities[x % num_activities], 1, time)
-
-        evaluation = results.Evaluation(practices)
-        assert evaluation.get_num_activities() == num_activities
-        assert evaluation.get_num_of_practice_sets() == total_num_practice_sets
-
-        for x, activity in enumerate(activities):
-            activity_evaluation = evaluation.get_activity_evaluation(x)
-            assert activity_evaluation.get_activity_key() == activity.get_key()
-            assert (
-                activity_evaluation.get_num_practice_sets()
-                == num_practice_set_per_activity
-            )
-            assert activity_evaluation.get_oldest_practice_time() == time
-            assert activity_evaluation.get_latest_practice_time() == time
-
-        expected_output = (
-            f"{num_activities} activities has been completed "
-            f"{total_num_practice_sets} times.\n\n"
-            f"{str(evaluation.get_activity_evaluation(0))}\n"
-            f"{str(evaluation.get_activity_evaluation(1))}\n"
-            f"{str(evaluation.get_activity_evaluation(2))}"
+    # Only a journal can save new practice sets, by appending them.
+    windowed_practices.add_practice_set(routine.Activity("activity"), 1, start_time)
+    if file_format == results.PracticesFileFormat.JOURNAL:
+        windowed_practices.save()
+        assert results.Practices(practices_file).get_num_practice_sets() == 11
+    else:
+        with pytest.raises(results.PartialPracticesError):
+            windowed_practices.save()
+
+
+def test_query_rows(tmp_path: pathlib.Path) -> None:
+    practices = results.Practices(pathlib.Path(tmp_path, "practices"))
+    start_time = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    for x in [0, 5, 2, 8]:
+        practices.add_practice_set(
+            routine.Activity(f"activity_{x % 2}"),
+            x % 5,
+            start_time + datetime.timedelta(x),
         )
-        assert str(evaluation) == expected_output
+
+    window = results.DateWindow(
+        start_time + datetime.timedelta(1), start_time + datetime.timedelta(6)
+    )
+    assert list(practices.query_rows(window)) == [2, 1]
+    activity_0_key = routine.Activity("activity_0").get_key()
+    assert list(practices.query_rows(window, activity_0_key)) == [2]
+    assert [x.score for x in practices.get_practice_sets_in(window)] == [2, 0]
+    assert not practices.get_practice_sets_in(window, "unknown")
+
+    # Practice sets added after a query are in the next one.
+    practices.add_practice_set(
+        routine.Activity("activity_0"), 4, start_time + datetime.timedelta(3)
+    )
+    assert list(practices.query_rows(window)) == [2, 4, 1]
+    assert [
+        x.score
+        for x in practices.get_practice_sets_in(results.DateWindow(), activity_0_key)
+    ] == [0, 2, 4, 3]
+
+
+def test_columns_extend() -> None:
+    columns = results.PracticeSetColumns()
+    columns.append("a", 1, 10, 0)
+    other_columns = results.PracticeSetColumns()
+    other_columns.append("b", 2, 20, 60)
+    other_columns.append("a", 3, 30, 0)
+
+    columns.extend(other_columns)
+    assert columns.activity_keys == ["a", "b"]
+    assert list(columns.key_indexes) == [0, 1, 0]
+    assert list(columns.scores) == [1, 2, 3]
+    assert list(columns.epoch_micros) == [10, 20, 30]
+    assert list(columns.utc_offsets) == [0, 60, 0]
+
+
+def test_append_to_journal(tmp_path: pathlib.Path) -> None:
+    journal_file = pathlib.Path(tmp_path, "journal")
+    time = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    results.append_to_journal(journal_file, [results.PracticeSet("a", 1, time)])
+    results.append_to_journal(journal_file, [results.PracticeSet("b", 2, time)])
+
+    practices = results.Practices(journal_file)
+    assert practices.file_format == results.PracticesFileFormat.JOURNAL
+    assert practices.get_practice_sets() == [
+        results.PracticeSet("a", 1, time),
+        results.PracticeSet("b", 2, time),
+    ]
+
+
+def test_write_journal(tmp_path: pathlib.Path) -> None:
+    journal_file = pathlib.Path(tmp_path, "journal.gz")
+    time = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    practice_sets = [results.PracticeSet(f"key_{x}", x % 5, time) for x in range(300)]
+
+    assert results.write_journal(journal_file, iter(practice_sets)) == 300
+
+    assert compressed_files.get_compression(journal_file) == (
+        compressed_files.Compression.GZIP
+    )
+    assert results.Practices(journal_file).get_practice_sets() == practice_sets
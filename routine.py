@@ -1,51 +1,400 @@
 """Module of the classes related to a practice routine."""
 
+import array
+import bisect
+import hashlib
+import io
+import json
+import math
+import mmap
+import os
 import pathlib
 import random
+import re
+import struct
+import typing
+
+import alias_sampler
+
+# An activity line can start with metadata in square brackets, made of
+# space separated key=value pairs, such as "[id=3f2a9c1b7e01] Scales".
+# Besides the id, an activity can have a weight, how often it's picked
+# relative to the others, and comma separated tags, such as
+# "[id=3f2a9c1b7e01 weight=2 tags=piano,warmup] Scales". Square brackets
+# with other keys and no id, such as "[tempo=120] Scales", were written
+# by users before there was metadata, so they're in the description.
+_METADATA_LINE_PATTERN = re.compile(r"\[((?:\s*\w+=\S+)+)\s*\]\s*(.*)")
+
+_METADATA_KEYS = frozenset(["id", "weight", "tags"])
+
+_ID_PATTERN = re.compile(r"[\w-]+")
+
+_TAG_PATTERN = re.compile(r"[\w-]+")
+
+# The number of hex digits of the description hash used as an id when
+# the activity file doesn't give one.
+_HASH_ID_LENGTH = 12
+
+# Appended to the activity file name for the file of its line index.
+LINE_INDEX_SUFFIX = ".line-index"
+
+# Starts every line index, changed whenever its layout changes so older
+# indexes are rebuilt rather than misread.
+_LINE_INDEX_MAGIC = b"DPLIDX03"
+
+# The magic, the size, modification time and inode of the activity file
+# indexed, its number of activities, if any is missing an id and the
+# size of the JSON table of its _WeightedLines. The _LineColumns follow,
+# as native int64s and float64s, then the table, then the columns of
+# each _WeightedLines.
+_LINE_INDEX_HEADER = struct.Struct("=8sQQQQ?Q")
+
+# The size of every item of a line index's columns, native int64s and
+# float64s.
+_ITEM_SIZE = 8
 
 
 class InvalidActivitiesFileError(Exception):
     """There was an issue with the activities file."""
 
 
-class Activities:
+class NoTaggedActivitiesError(Exception):
+    """No activity has any of the tags to pick from."""
+
+
+class Activities:  # pylint: disable=too-many-instance-attributes
     """Activities is the root of all practice routine information.
 
     Activities is responsible for managing all the practice activities,
     including deciding what activity should be done next.
+
+    The activity file is mapped rather than read, along with an index of
+    the offset of each activity's line, kept next to it and only rebuilt
+    when the file changes. So the activities are counted, and picked at
+    random, without reading them all, and an Activity is only created
+    for the lines used. Looking up an activity by key, or getting all of
+    them, creates them all once. Finding the line of an activity by key
+    only reads the lines whose key hashes the same.
     """
 
     def __init__(self, activity_file: pathlib.Path):
-        """Creates an Activities instance from the specified file."""
-        self.activities = []
+        """Creates an Activities instance from the specified file.
+
+        Raises:
+            InvalidActivitiesFileError: The activity_file is missing,
+                empty or has invalid activities.
+        """
+        self.activity_file = activity_file
+        self._buffer: typing.Optional[mmap.mmap] = None
+        self._line_index: _LineIndex
+        # The tagged lines, and AliasTable of their total weights, of
+        # each set of tags picked from.
+        self._tagged_lines: dict[
+            frozenset[str], tuple[list[_WeightedLines], alias_sampler.AliasTable]
+        ] = {}
+        # Created from every line when first needed.
+        self._activities: typing.Optional[list[Activity]] = None
+        self._activities_by_key: dict[str, Activity] = {}
+        # Practice sets saved before activities had ids used the
+        # description as the key, so those can still be looked up.
+        self._activities_by_description: dict[str, Activity] = {}
+        self._sorted_activities: list[Activity] = []
+        self._load()
+
+    def _load(self) -> None:
+        """Maps the activity file, and loads or rebuilds its index.
+
+        Raises:
+            InvalidActivitiesFileError: The activity_file is missing,
+                empty or has invalid activities.
+        """
         try:
-            with open(activity_file, encoding="utf-8") as f:
-                for line in f.readlines():
-                    stripped_line = line.strip()
-                    if stripped_line:
-                        self.activities.append(Activity(stripped_line))
+            with open(self.activity_file, "rb") as f:
+                stat = os.fstat(f.fileno())
+                if stat.st_size:
+                    self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
         except FileNotFoundError as e:
             raise InvalidActivitiesFileError(
                 "No Activity file found, please create an activity file. "
             ) from e
 
-        if not self.activities:
+        index_file = get_line_index_file(self.activity_file)
+        file_state = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        line_index = _LineIndex.open(index_file, file_state)
+        if line_index is None:
+            line_index = self._index_lines()
+            line_index.write(index_file, file_state)
+        self._line_index = line_index
+        self._tagged_lines = {}
+
+        if not self._line_index.line_offsets:
             raise InvalidActivitiesFileError(
                 "No activities found in activity file. Please add activities."
             )
 
+    def _index_lines(self) -> "_LineIndex":
+        """Returns the index of the activity lines, checking them all.
+
+        Every activity is created, as they're all checked.
+
+        Raises:
+            InvalidActivitiesFileError: An activity is invalid.
+        """
+        line_offsets = array.array("q")
+        activities = []
+        has_unsaved_ids = False
+        if self._buffer is not None:
+            self._buffer.seek(0)
+            while True:
+                line_offset = self._buffer.tell()
+                line = self._buffer.readline()
+                if not line:
+                    break
+                stripped_line = line.decode("utf-8").strip()
+                if stripped_line:
+                    activity = Activity.from_line(stripped_line)
+                    line_offsets.append(line_offset)
+                    activities.append(activity)
+                    if activity.to_line() != stripped_line:
+                        has_unsaved_ids = True
+        self._set_activities(activities)
+        return _LineIndex.build(activities, line_offsets, has_unsaved_ids)
+
+    def _set_activities(self, activities: list["Activity"]) -> None:
+        """Sets all the activities, and the lookups of them.
+
+        Raises:
+            InvalidActivitiesFileError: Activities have the same id.
+        """
+        self._activities_by_key = {}
+        self._activities_by_description = {}
+        for activity in activities:
+            existing_activity = self._activities_by_key.setdefault(
+                activity.get_key(), activity
+            )
+            if existing_activity.get_description() != activity.get_description():
+                raise InvalidActivitiesFileError(
+                    f'Activities "{existing_activity.get_description()}" and '
+                    f'"{activity.get_description()}" have the same id '
+                    f"{activity.get_key()}"
+                )
+            self._activities_by_description.setdefault(
+                activity.get_description(), activity
+            )
+
+        self._sorted_activities = sorted(activities, key=lambda x: x.get_description())
+        self._activities = activities
+
+    @property
+    def activities(self) -> list["Activity"]:
+        """All the activities, in the order of the activity file."""
+        return self._load_activities()
+
+    def _load_activities(self) -> list["Activity"]:
+        """Returns all the activities, creating them the first time."""
+        if self._activities is None:
+            activities = [
+                self._read_activity(x)
+                for x in range(len(self._line_index.line_offsets))
+            ]
+            self._set_activities(activities)
+            return activities
+        return self._activities
+
+    def _read_activity(self, index: int) -> "Activity":
+        """Returns a new Activity of the line at index in O(1)."""
+        if self._buffer is None:
+            raise InvalidActivitiesFileError(
+                f"The activity file {self.activity_file} was closed"
+            )
+        start = self._line_index.line_offsets[index]
+        stop = self._buffer.find(b"\n", start)
+        line = self._buffer[start : len(self._buffer) if stop == -1 else stop]
+        return Activity.from_line(line.decode("utf-8").strip())
+
+    def _close(self) -> None:
+        """Unmaps the activity file and its index."""
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+        self._line_index.close()
+
+    def save(self) -> None:
+        """Saves the activities to the activity file, with their ids.
+
+        Once saved, an activity keeps its id even if its description is
+        later edited in the activity file. Blank lines are kept where
+        they were. The file is written next to the activity file and
+        renamed over it, so a crash part way leaves the old file intact.
+        """
+        activities = iter(self.activities)
+        lines = []
+        if self._buffer is not None:
+            # Split like _index_lines, so each non blank line is the
+            # next activity. Its line ending is kept too.
+            for line in io.BytesIO(self._buffer[:]):
+                decoded_line = line.decode("utf-8")
+                if decoded_line.strip():
+                    line_ending = decoded_line[len(decoded_line.rstrip("\r\n")) :]
+                    lines.append(next(activities).to_line() + (line_ending or "\n"))
+                else:
+                    lines.append(decoded_line)
+
+        temp_file = self.activity_file.with_name(f"{self.activity_file.name}.tmp")
+        with open(temp_file, "w", encoding="utf-8", newline="") as f:
+            f.writelines(lines)
+        # The file can't be replaced while it's mapped on some systems.
+        self._close()
+        os.replace(temp_file, self.activity_file)
+        self._load()
+
+    def has_unsaved_ids(self) -> bool:
+        """Returns if the activity file is missing any activity ids."""
+        return self._line_index.has_unsaved_ids
+
+    def get_activity(self, key: str) -> typing.Optional["Activity"]:
+        """Returns the Activity with the given key, None if not found.
+
+        The description of an activity is also accepted as its key, as
+        it was the key before activities had ids.
+        """
+        self._load_activities()
+        activity = self._activities_by_key.get(key)
+        if activity is None:
+            activity = self._activities_by_description.get(key)
+        return activity
+
     def get_activity_descriptions(self) -> list[str]:
-        """Returns all the Activity descriptions, in key order."""
-        sorted_activities = sorted(self.activities, key=lambda x: x.get_key())
-        return [x.get_description() for x in sorted_activities]
+        """Returns all the Activity descriptions, in sorted order."""
+        self._load_activities()
+        return [x.get_description() for x in self._sorted_activities]
 
     def get_num_activities(self) -> int:
-        """Returns the number of Activities."""
-        return len(self.activities)
+        """Returns the number of Activities, without reading them."""
+        return len(self._line_index.line_offsets)
+
+    def get_tags(self) -> list[str]:
+        """Returns the tags of the Activities, in sorted order.
+
+        They're found without reading the activities.
+        """
+        return sorted(self._line_index.tag_lines)
+
+    def get_lines(
+        self, tags: typing.Optional[typing.Iterable[str]] = None
+    ) -> typing.Sequence[int]:
+        """Returns the lines of the Activities, without reading them.
+
+        A line is the index of an activity in the activity file, as
+        given to get_activity_at. If tags are given, only the lines of
+        the activities with any of them are returned, in order.
+
+        Raises:
+            NoTaggedActivitiesError: No activity has any of the tags.
+        """
+        tag_set = set(tags or ())
+        if not tag_set:
+            return range(self.get_num_activities())
+        lines: set[int] = set()
+        for tag in tag_set:
+            weighted_lines = self._line_index.tag_lines.get(tag)
+            if weighted_lines is not None:
+                lines.update(
+                    weighted_lines.lines[x] for x in range(len(weighted_lines.lines))
+                )
+        if not lines:
+            raise NoTaggedActivitiesError(
+                f"No activity has any of the tags {sorted(tag_set)}"
+            )
+        return sorted(lines)
+
+    def find_line(self, key: str) -> typing.Optional[int]:
+        """Returns the line of the Activity with the given key.
+
+        Like get_activity, the description is also accepted as the key,
+        and None is returned if not found. Only the lines whose key or
+        description hash the same as key are read.
+        """
+        columns = self._line_index.columns
+        key_hash = _hash_key(key)
+        start = bisect.bisect_left(columns.key_hashes, key_hash)
+        stop = bisect.bisect_right(columns.key_hashes, key_hash, start)
+        lines = sorted(set(columns.key_lines[x] for x in range(start, stop)))
+        activities = [self._get_activity_at(x) for x in lines]
+        for line, activity in zip(lines, activities):
+            if activity.get_key() == key:
+                return line
+        for line, activity in zip(lines, activities):
+            if activity.get_description() == key:
+                return line
+        return None
+
+    def get_activity_at(self, line: int) -> "Activity":
+        """Returns the Activity of the line, reading only that line."""
+        return self._get_activity_at(line)
+
+    def get_weight_at(self, line: int) -> float:
+        """Returns the weight of the line's Activity, from the index."""
+        return float(self._line_index.columns.weights[line])
+
+    def get_description_position_at(self, line: int) -> int:
+        """Returns the position of the line's Activity by description.
+
+        That's its index in get_activity_descriptions, found without
+        reading the activities.
+        """
+        return int(self._line_index.columns.description_positions[line])
+
+    def get_random_activity(
+        self, tags: typing.Optional[typing.Collection[str]] = None
+    ) -> "Activity":
+        """Returns a random Activity, picked by its weight.
+
+        If tags are given, only the activities with any of them are
+        picked. Each pick takes O(1) whatever the number of activities,
+        from the alias tables of their weights kept in the index, and
+        only the line of the activity picked is read.
+
+        Raises:
+            NoTaggedActivitiesError: No activity has any of the tags.
+        """
+        if not tags:
+            return self._get_activity_at(self._line_index.all_lines.sample_line())
+
+        tag_set = frozenset(tags)
+        tagged_lines = self._tagged_lines.get(tag_set)
+        if tagged_lines is None:
+            tag_lines = [
+                self._line_index.tag_lines[x]
+                for x in sorted(tag_set)
+                if x in self._line_index.tag_lines
+            ]
+            if not tag_lines:
+                raise NoTaggedActivitiesError(
+                    f"No activity has any of the tags {sorted(tag_set)}"
+                )
+            tagged_lines = (
+                tag_lines,
+                alias_sampler.AliasTable.build([x.total_weight for x in tag_lines]),
+            )
+            self._tagged_lines[tag_set] = tagged_lines
+
+        tag_lines, tag_table = tagged_lines
+        while True:
+            activity = self._get_activity_at(
+                tag_lines[tag_table.sample()].sample_line()
+            )
+            # An activity with several of the tags can be picked through
+            # each of them, so it's only kept once in that many, leaving
+            # it picked in proportion to its weight alone.
+            if random.random() * len(tag_set.intersection(activity.tags)) < 1:
+                return activity
 
-    def get_random_activity(self) -> "Activity":
-        """Returns a random Activity."""
-        return random.choice(self.activities)
+    def _get_activity_at(self, index: int) -> "Activity":
+        """Returns the Activity of the line at index in O(1)."""
+        if self._activities is not None:
+            return self._activities[index]
+        return self._read_activity(index)
 
 
 class Activity:
@@ -57,13 +406,88 @@ class Activity:
     level of skill.
     """
 
-    def __init__(self, description: str):
+    def __init__(
+        self,
+        description: str,
+        activity_id: typing.Optional[str] = None,
+        weight: float = 1.0,
+        tags: typing.Iterable[str] = (),
+    ):
         """Creates an Activity with the given description.
 
-        At this time, an activity is fully represented by a single
-        string.
+        If no activity_id is given, one is made from a hash of the
+        description. The weight is how often it's picked, relative to
+        the other activities.
         """
         self.description = description
+        if activity_id is None:
+            activity_id = hashlib.sha256(description.encode("utf-8")).hexdigest()[
+                :_HASH_ID_LENGTH
+            ]
+        self.activity_id = activity_id
+        self.weight = float(weight)
+        self.tags = tuple(dict.fromkeys(tags))
+
+    @classmethod
+    def from_line(cls, line: str) -> "Activity":
+        """Creates an Activity from a line of an activity file.
+
+        The line is the description, optionally preceded by metadata
+        such as "[id=3f2a9c1b7e01 weight=2 tags=piano,warmup] ". Square
+        brackets with unknown keys and no id, such as "[tempo=120] ",
+        are part of the description instead.
+
+        Raises:
+            InvalidActivitiesFileError: The metadata is invalid.
+        """
+        match = _METADATA_LINE_PATTERN.fullmatch(line)
+        if match is None:
+            return cls(line)
+
+        metadata_str, description = match.groups()
+        metadata = dict(x.split("=", 1) for x in metadata_str.split())
+        if "id" not in metadata and not _METADATA_KEYS.issuperset(metadata):
+            return cls(line)
+        activity_id = metadata.pop("id", None)
+        weight_str = metadata.pop("weight", "1")
+        tags = metadata.pop("tags", "").split(",")
+        if metadata:
+            raise InvalidActivitiesFileError(
+                f"Unknown activity metadata {sorted(metadata)} in {line}"
+            )
+        if activity_id is not None and not _ID_PATTERN.fullmatch(activity_id):
+            raise InvalidActivitiesFileError(
+                f'Invalid activity id "{activity_id}" in {line}'
+            )
+        try:
+            weight = float(weight_str)
+        except ValueError:
+            weight = math.nan
+        if not 0 < weight < math.inf:
+            raise InvalidActivitiesFileError(
+                f'Invalid activity weight "{weight_str}" in {line}, expected a '
+                "positive number"
+            )
+        if tags == [""]:
+            tags = []
+        invalid_tags = [x for x in tags if not _TAG_PATTERN.fullmatch(x)]
+        if invalid_tags:
+            raise InvalidActivitiesFileError(
+                f"Invalid activity tags {invalid_tags} in {line}"
+            )
+        return cls(description, activity_id, weight, tags)
+
+    def to_line(self) -> str:
+        """Returns the line of an activity file for this Activity."""
+        metadata = [f"id={self.activity_id}"]
+        if self.weight != 1:
+            weight_str = (
+                f"{self.weight:.0f}" if self.weight.is_integer() else repr(self.weight)
+            )
+            metadata.append(f"weight={weight_str}")
+        if self.tags:
+            metadata.append(f"tags={','.join(self.tags)}")
+        return f"[{' '.join(metadata)}] {self.description}"
 
     def get_description(self) -> str:
         """Returns the description of this Activity.
@@ -76,8 +500,300 @@ class Activity:
     def get_key(self) -> str:
         """Returns the key for this Activity.
 
-        Currently the key is just the description, but in the future it
-        should be a unique identifier that maps to this activity and
-        this activity only.
+        The key is a short unique identifier, which maps to this
+        activity and this activity only.
+        """
+        return self.activity_id
+
+
+def get_line_index_file(activity_file: pathlib.Path) -> pathlib.Path:
+    """Returns the file the line index of activity_file is kept in."""
+    return activity_file.with_name(f"{activity_file.name}{LINE_INDEX_SUFFIX}")
+
+
+class _MappedColumn:
+    """A column of numbers mapped from a line index."""
+
+    def __init__(self, buffer: mmap.mmap, offset: int, length: int, typecode: str):
+        """Creates the column of length items of typecode at offset."""
+        self._buffer = buffer
+        self._offset = offset
+        self._length = length
+        self._item = struct.Struct(f"={typecode}")
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: int) -> typing.Any:
+        if not 0 <= index < self._length:
+            raise IndexError(f"Index {index} out of range")
+        return self._item.unpack_from(
+            self._buffer, self._offset + index * self._item.size
+        )[0]
+
+
+class _WeightedLines(typing.NamedTuple):
+    """The lines of some activities, picked from by their weights.
+
+    The lines are the indexes of the activities in the activity file,
+    in the same order as the weights of alias_table.
+    """
+
+    lines: alias_sampler.Column[int]
+    alias_table: alias_sampler.AliasTable
+    total_weight: float
+
+    def sample_line(self) -> int:
+        """Returns a line picked at random by its weight, in O(1)."""
+        return self.lines[self.alias_table.sample()]
+
+
+class _LineColumns(typing.NamedTuple):
+    """The columns of a line index.
+
+    Each line of an activity has an offset in the activity file, a
+    weight and a position in description order. The key hashes are the
+    hashes of each activity's key and of its description, sorted, and
+    the key lines the line each of them is of.
+    """
+
+    offsets: alias_sampler.Column[int]
+    weights: alias_sampler.Column[float]
+    description_positions: alias_sampler.Column[int]
+    key_hashes: alias_sampler.Column[int]
+    key_lines: alias_sampler.Column[int]
+
+
+class _LineIndex:
+    """The index of the lines of an activity file, and their weights.
+
+    It holds the _LineColumns of the activities, and the _WeightedLines
+    of all the activities and of each tag's activities. It's built from
+    the activity file, then written next to it, and mapped from there
+    until the activity file changes.
+    """
+
+    def __init__(
+        self,
+        columns: _LineColumns,
+        has_unsaved_ids: bool,
+        all_lines: _WeightedLines,
+        tag_lines: dict[str, _WeightedLines],
+        buffer: typing.Optional[mmap.mmap] = None,
+    ):
+        """Creates a _LineIndex, of the columns mapped in buffer."""
+        self.columns = columns
+        self.line_offsets = columns.offsets
+        self.has_unsaved_ids = has_unsaved_ids
+        self.all_lines = all_lines
+        self.tag_lines = tag_lines
+        self._buffer = buffer
+
+    @classmethod
+    def build(
+        cls,
+        activities: list["Activity"],
+        line_offsets: "array.array[int]",
+        has_unsaved_ids: bool,
+    ) -> "_LineIndex":
+        """Returns the _LineIndex of activities, at line_offsets."""
+        lines_by_tag: dict[str, "array.array[int]"] = {}
+        for line, activity in enumerate(activities):
+            for tag in activity.tags:
+                lines_by_tag.setdefault(tag, array.array("q")).append(line)
+        weights = [x.weight for x in activities]
+        description_positions = array.array("q", [0] * len(activities))
+        for position, line in enumerate(
+            sorted(range(len(activities)), key=lambda x: activities[x].description)
+        ):
+            description_positions[line] = position
+        key_lines = sorted(
+            (_hash_key(key), line)
+            for line, activity in enumerate(activities)
+            for key in [activity.get_key(), activity.get_description()]
+        )
+        columns = _LineColumns(
+            line_offsets,
+            array.array("d", weights),
+            description_positions,
+            array.array("q", [x for x, _ in key_lines]),
+            array.array("q", [x for _, x in key_lines]),
+        )
+        return cls(
+            columns,
+            has_unsaved_ids,
+            _build_weighted_lines(array.array("q", range(len(activities))), weights),
+            {
+                tag: _build_weighted_lines(lines, [weights[x] for x in lines])
+                for tag, lines in lines_by_tag.items()
+            },
+        )
+
+    @classmethod
+    def open(
+        cls, index_file: pathlib.Path, file_state: tuple[int, int, int]
+    ) -> typing.Optional["_LineIndex"]:
+        """Maps index_file, None if missing, malformed or outdated.
+
+        The file_state is the size, modification time and inode of the
+        activity file, which changes whenever the file does.
+        """
+        try:
+            with open(index_file, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            (
+                magic,
+                size,
+                mtime_ns,
+                inode,
+                num_lines,
+                has_unsaved_ids,
+                table_size,
+            ) = _LINE_INDEX_HEADER.unpack_from(buffer)
+            if magic == _LINE_INDEX_MAGIC and (size, mtime_ns, inode) == file_state:
+                table_offset = _LINE_INDEX_HEADER.size + 7 * num_lines * _ITEM_SIZE
+                table = json.loads(buffer[table_offset : table_offset + table_size])
+                columns_offset = table_offset + table_size
+                return cls(
+                    _map_line_columns(buffer, num_lines),
+                    has_unsaved_ids,
+                    _map_weighted_lines(buffer, columns_offset, table["all"]),
+                    {
+                        tag: _map_weighted_lines(buffer, columns_offset, x)
+                        for tag, x in table["tags"].items()
+                    },
+                    buffer,
+                )
+        except (KeyError, TypeError, ValueError, struct.error):
+            pass
+        buffer.close()
+        return None
+
+    def write(self, index_file: pathlib.Path, file_state: tuple[int, int, int]) -> None:
+        """Writes this built index to index_file, unless not writable.
+
+        The index is only an optimization, so failing to write it isn't
+        an error.
         """
-        return self.get_description()
+        columns = bytearray()
+        table: dict[str, typing.Any] = {"tags": {}}
+        for tag, weighted_lines in [
+            (None, self.all_lines),
+            *self.tag_lines.items(),
+        ]:
+            entry = [
+                len(columns),
+                len(weighted_lines.lines),
+                weighted_lines.total_weight,
+            ]
+            if tag is None:
+                table["all"] = entry
+            else:
+                table["tags"][tag] = entry
+            # A built index's columns are all arrays.
+            for column in [
+                weighted_lines.alias_table.probabilities,
+                weighted_lines.alias_table.aliases,
+                weighted_lines.lines,
+            ]:
+                columns += typing.cast("array.array[typing.Any]", column).tobytes()
+        table_bytes = json.dumps(table, separators=(",", ":")).encode()
+
+        temp_file = index_file.with_name(f"{index_file.name}.tmp")
+        try:
+            with open(temp_file, "wb") as f:
+                f.write(
+                    _LINE_INDEX_HEADER.pack(
+                        _LINE_INDEX_MAGIC,
+                        *file_state,
+                        len(self.line_offsets),
+                        self.has_unsaved_ids,
+                        len(table_bytes),
+                    )
+                )
+                # A built index's columns are all arrays.
+                for line_column in self.columns:
+                    f.write(
+                        typing.cast("array.array[typing.Any]", line_column).tobytes()
+                    )
+                f.write(table_bytes)
+                f.write(columns)
+            os.replace(temp_file, index_file)
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        """Unmaps the index, if it was mapped."""
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+
+
+def _hash_key(key: str) -> int:
+    """Returns the hash of an activity key, the same across runs."""
+    return int.from_bytes(
+        hashlib.blake2b(key.encode("utf-8"), digest_size=_ITEM_SIZE).digest(),
+        "little",
+        signed=True,
+    )
+
+
+def _map_line_columns(buffer: mmap.mmap, num_lines: int) -> _LineColumns:
+    """Returns the _LineColumns of num_lines lines, mapped from buffer.
+
+    Raises:
+        ValueError: The columns are past the end of buffer.
+    """
+    column_size = num_lines * _ITEM_SIZE
+    if _LINE_INDEX_HEADER.size + 7 * column_size > len(buffer):
+        raise ValueError(f"The columns of {num_lines} lines are past the index's end")
+    # There are two key hashes and key lines for each line.
+    offsets = [_LINE_INDEX_HEADER.size + x * column_size for x in [0, 1, 2, 3, 5]]
+    return _LineColumns(
+        _MappedColumn(buffer, offsets[0], num_lines, "q"),
+        _MappedColumn(buffer, offsets[1], num_lines, "d"),
+        _MappedColumn(buffer, offsets[2], num_lines, "q"),
+        _MappedColumn(buffer, offsets[3], 2 * num_lines, "q"),
+        _MappedColumn(buffer, offsets[4], 2 * num_lines, "q"),
+    )
+
+
+def _build_weighted_lines(
+    lines: "array.array[int]", weights: list[float]
+) -> _WeightedLines:
+    """Returns the _WeightedLines of lines, with the given weights.
+
+    No lines have an empty alias table, which is never picked from.
+    """
+    alias_table = (
+        alias_sampler.AliasTable.build(weights)
+        if weights
+        else alias_sampler.AliasTable(array.array("d"), array.array("q"))
+    )
+    return _WeightedLines(lines, alias_table, math.fsum(weights))
+
+
+def _map_weighted_lines(
+    buffer: mmap.mmap, columns_offset: int, entry: list[typing.Any]
+) -> _WeightedLines:
+    """Returns the _WeightedLines of a table entry, mapped from buffer.
+
+    Raises:
+        ValueError: The entry is malformed, or past the end of buffer.
+    """
+    offset, length, total_weight = entry
+    start = columns_offset + offset
+    column_size = length * _ITEM_SIZE
+    if start + 3 * column_size > len(buffer):
+        raise ValueError(f"The weighted lines {entry} are past the index's end")
+    return _WeightedLines(
+        _MappedColumn(buffer, start + 2 * column_size, length, "q"),
+        alias_sampler.AliasTable(
+            _MappedColumn(buffer, start, length, "d"),
+            _MappedColumn(buffer, start + column_size, length, "q"),
+        ),
+        float(total_weight),
+    )
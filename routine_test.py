@@ -1,4 +1,6 @@
+import collections
 import pathlib
+import random
 
 import pytest
 
@@ -96,6 +98,187 @@ class TestActivities:
         for _ in range(20):
             assert activities.get_random_activity()
 
+    def test_get_activity(self, tmp_path: pathlib.Path) -> None:
+        activity_file = pathlib.Path(tmp_path, "activities.txt")
+        with open(activity_file, "w", encoding="utf-8") as f:
+            f.write("activity_1\n")
+            f.write("[id=a2] activity_2\n")
+
+        activities = routine.Activities(activity_file)
+        activity_1 = routine.Activity("activity_1")
+
+        found_activity = activities.get_activity(activity_1.get_key())
+        assert found_activity is not None
+        assert found_activity.get_description() == "activity_1"
+
+        found_activity = activities.get_activity("a2")
+        assert found_activity is not None
+        assert found_activity.get_description() == "activity_2"
+
+        # The description was the key before activities had ids.
+        found_activity = activities.get_activity("activity_2")
+        assert found_activity is not None
+        assert found_activity.get_key() == "a2"
+
+        assert activities.get_activity("unknown") is None
+
+    def test_duplicate_ids(self, tmp_path: pathlib.Path) -> None:
+        activity_file = pathlib.Path(tmp_path, "activities.txt")
+        with open(activity_file, "w", encoding="utf-8") as f:
+            f.write("[id=a1] activity_1\n")
+            f.write("[id=a1] activity_2\n")
+
+        with pytest.raises(routine.InvalidActivitiesFileError, match="same id a1"):
+            routine.Activities(activity_file)
+
+    def test_save_keeps_ids(self, tmp_path: pathlib.Path) -> None:
+        activity_file = pathlib.Path(tmp_path, "activities.txt")
+        with open(activity_file, "w", encoding="utf-8") as f:
+            f.write("activity_1\n")
+            f.write("[id=a2] activity_2\n")
+
+        activities = routine.Activities(activity_file)
+        assert activities.has_unsaved_ids()
+        activities.save()
+        assert not activities.has_unsaved_ids()
+        assert not routine.Activities(activity_file).has_unsaved_ids()
+        original_key = routine.Activity("activity_1").get_key()
+        assert activity_file.read_text(encoding="utf-8") == (
+            f"[id={original_key}] activity_1\n[id=a2] activity_2\n"
+        )
+
+        # Editing a saved activity's description keeps its key.
+        activity_file.write_text(
+            f"[id={original_key}] activity_1 edited\n", encoding="utf-8"
+        )
+        edited_activity = routine.Activities(activity_file).get_activity(original_key)
+        assert edited_activity is not None
+        assert edited_activity.get_description() == "activity_1 edited"
+
+    def test_save_keeps_layout(self, tmp_path: pathlib.Path) -> None:
+        activity_file = pathlib.Path(tmp_path, "activities.txt")
+        activity_file.write_bytes(b"activity_1\n\n  \n[id=a2] activity_2\r\nactivity_3")
+
+        routine.Activities(activity_file).save()
+
+        key_1 = routine.Activity("activity_1").get_key()
+        key_3 = routine.Activity("activity_3").get_key()
+        expected_text = (
+            f"[id={key_1}] activity_1\n\n  \n[id=a2] activity_2\r\n"
+            f"[id={key_3}] activity_3\n"
+        )
+        assert activity_file.read_bytes() == expected_text.encode()
+        assert not pathlib.Path(tmp_path, "activities.txt.tmp").exists()
+
+    def test_line_index(
+        self, tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        activity_file = pathlib.Path(tmp_path, "activities.txt")
+        activity_file.write_text(
+            "".join(f"[id=a{x}] activity_{x}\n\n" for x in range(100)),
+            encoding="utf-8",
+        )
+        routine.Activities(activity_file)
+        assert routine.get_line_index_file(activity_file).exists()
+
+        created_activities: list[str] = []
+        from_line = routine.Activity.from_line
+
+        def count_from_line(line: str) -> routine.Activity:
+            created_activities.append(line)
+            return from_line(line)
+
+        monkeypatch.setattr(routine.Activity, "from_line", count_from_line)
+        activities = routine.Activities(activity_file)
+        assert activities.get_num_activities() == 100
+        assert not activities.has_unsaved_ids()
+        activity = activities.get_random_activity()
+
+        # Only the line picked was read, from the index.
+        assert created_activities == [activity.to_line()]
+        assert activities.get_activity("a42") is not None
+        assert len(created_activities) == 101
+
+    def test_find_line(self, tmp_path: pathlib.Path) -> None:
+        activity_file = pathlib.Path(tmp_path, "activities.txt")
+        activity_file.write_text(
+            "[id=a1 weight=2 tags=piano] Scales\n\nChords\n[id=Chords] Arpeggios\n",
+            encoding="utf-8",
+        )
+        # The lines are found from the index the second time.
+        for activities in [
+            routine.Activities(activity_file),
+            routine.Activities(activity_file),
+        ]:
+            assert activities.find_line("a1") == 0
+            # Keys come before descriptions, as with get_activity.
+            assert activities.find_line("Chords") == 2
+            assert activities.find_line("Scales") == 0
+            assert activities.find_line("Sight reading") is None
+            assert activities.get_activity_at(2).get_description() == "Arpeggios"
+
+            assert list(activities.get_lines()) == [0, 1, 2]
+            assert list(activities.get_lines(["piano", "drums"])) == [0]
+            with pytest.raises(routine.NoTaggedActivitiesError):
+                activities.get_lines(["drums"])
+            assert [activities.get_weight_at(x) for x in range(3)] == [2, 1, 1]
+            assert [activities.get_description_position_at(x) for x in range(3)] == [
+                2,
+                1,
+                0,
+            ]
+
+    def test_line_index_rebuilt(self, tmp_path: pathlib.Path) -> None:
+        activity_file = pathlib.Path(tmp_path, "activities.txt")
+        activity_file.write_text("[id=a1] activity_1\n", encoding="utf-8")
+        assert routine.Activities(activity_file).get_num_activities() == 1
+
+        activity_file.write_text("[id=a1] activity_1\nactivity_2\n", encoding="utf-8")
+        activities = routine.Activities(activity_file)
+        assert activities.get_num_activities() == 2
+        assert activities.has_unsaved_ids()
+
+        routine.get_line_index_file(activity_file).write_bytes(b"malformed")
+        activities = routine.Activities(activity_file)
+        assert activities.get_activity_descriptions() == ["activity_1", "activity_2"]
+
+    def test_weighted_random_activity(self, tmp_path: pathlib.Path) -> None:
+        activity_file = pathlib.Path(tmp_path, "activities.txt")
+        activity_file.write_text(
+            "[id=a1 weight=3 tags=piano] Scales\n"
+            "[id=a2 tags=piano,guitar] Chords\n"
+            "[id=a3 weight=0.5] Sight reading\n",
+            encoding="utf-8",
+        )
+        random.seed(0)
+        # The alias tables are mapped from the index the second time.
+        for activities in [
+            routine.Activities(activity_file),
+            routine.Activities(activity_file),
+        ]:
+            assert activities.get_tags() == ["guitar", "piano"]
+
+            counts = collections.Counter(
+                activities.get_random_activity().get_key() for _ in range(9000)
+            )
+            assert counts["a1"] / 9000 == pytest.approx(3 / 4.5, abs=0.03)
+            assert counts["a3"] / 9000 == pytest.approx(0.5 / 4.5, abs=0.03)
+
+            # a2 is in both tags, but not picked more for it.
+            counts = collections.Counter(
+                activities.get_random_activity(["piano", "guitar"]).get_key()
+                for _ in range(8000)
+            )
+            assert set(counts) == {"a1", "a2"}
+            assert counts["a1"] / 8000 == pytest.approx(3 / 4, abs=0.03)
+            assert {
+                activities.get_random_activity(["guitar", "drums"]).get_key()
+                for _ in range(10)
+            } == {"a2"}
+
+            with pytest.raises(routine.NoTaggedActivitiesError):
+                activities.get_random_activity(["drums"])
+
 
 def test_activity_get_description() -> None:
     act = routine.Activity("content")
@@ -104,4 +287,78 @@ def test_activity_get_description() -> None:
 
 def test_activity_get_key() -> None:
     act = routine.Activity("content")
-    assert act.get_key() == "content"
+    assert act.get_key() == routine.Activity("content").get_key()
+    assert act.get_key() != routine.Activity("other content").get_key()
+    assert len(act.get_key()) == 12
+
+
+def test_activity_given_key() -> None:
+    act = routine.Activity("content", "my_id")
+    assert act.get_key() == "my_id"
+
+
+@pytest.mark.parametrize(
+    ("line", "expected_description", "expected_key"),
+    [
+        ("content", "content", routine.Activity("content").get_key()),
+        ("[id=my-id] content", "content", "my-id"),
+        ("[ id=my_id ]content", "content", "my_id"),
+        ("[WIP] content", "[WIP] content", routine.Activity("[WIP] content").get_key()),
+        # Written before there was metadata, so part of the description.
+        (
+            "[tempo=120] content",
+            "[tempo=120] content",
+            routine.Activity("[tempo=120] content").get_key(),
+        ),
+        (
+            "[weight=2 tempo=120] content",
+            "[weight=2 tempo=120] content",
+            routine.Activity("[weight=2 tempo=120] content").get_key(),
+        ),
+    ],
+)
+def test_activity_from_line(
+    line: str, expected_description: str, expected_key: str
+) -> None:
+    act = routine.Activity.from_line(line)
+    assert act.get_description() == expected_description
+    assert act.get_key() == expected_key
+    assert routine.Activity.from_line(act.to_line()).get_key() == expected_key
+
+
+@pytest.mark.parametrize(
+    ("line", "error"),
+    [
+        ("[id=my_id colour=red] content", "Unknown activity metadata"),
+        ("[id=my/id] content", "Invalid activity id"),
+        ("[id=my_id weight=heavy] content", "Invalid activity weight"),
+        ("[id=my_id weight=0] content", "Invalid activity weight"),
+        ("[id=my_id weight=-1] content", "Invalid activity weight"),
+        ("[id=my_id weight=inf] content", "Invalid activity weight"),
+        ("[id=my_id tags=a,,b] content", "Invalid activity tags"),
+    ],
+)
+def test_activity_from_line_invalid_metadata(line: str, error: str) -> None:
+    with pytest.raises(routine.InvalidActivitiesFileError, match=error):
+        routine.Activity.from_line(line)
+
+
+@pytest.mark.parametrize(
+    ("line", "weight", "tags"),
+    [
+        ("[id=my_id] content", 1.0, ()),
+        ("[id=my_id weight=2 tags=piano] content", 2.0, ("piano",)),
+        (
+            "[id=my_id weight=0.25 tags=piano,warm-up] content",
+            0.25,
+            ("piano", "warm-up"),
+        ),
+    ],
+)
+def test_activity_weight_and_tags(
+    line: str, weight: float, tags: tuple[str, ...]
+) -> None:
+    activity = routine.Activity.from_line(line)
+    assert activity.weight == weight
+    assert activity.tags == tags
+    assert activity.to_line() == line
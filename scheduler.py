@@ -0,0 +1,175 @@
+"""Module for picking which Activity to practice next."""
+
+import enum
+import heapq
+import typing
+
+import results
+import routine
+import timestamps
+
+
+class PickingStrategy(enum.StrEnum):
+    """The ways the next Activity to practice can be picked."""
+
+    RANDOM = "Random"
+    SCHEDULED = "Scheduled"
+
+
+# The time until an activity of weight 1 is due again when it's mastery
+# is 0, the lowest score. Each point of mastery doubles it, so a
+# mastered activity is due every 16 days while one that wasn't
+# successful is due daily. The time is divided by the weight, so an
+# activity of weight 2 is due twice as often.
+_BASE_INTERVAL_MICROS = 24 * 60 * 60 * 1_000_000
+
+# How much the latest score counts towards an activity's mastery, with
+# the rest coming from its earlier scores.
+_LATEST_SCORE_WEIGHT = 0.5
+
+# Activities never practiced are due before all others.
+_NEVER_PRACTICED_DUE = float("-inf")
+
+# The heap is rebuilt once its outdated entries outnumber the current
+# ones by this factor, to keep it from growing without limit.
+_MAX_HEAP_GROWTH = 2
+
+
+class Scheduler:
+    """Schedules Activities by how weak and stale they are.
+
+    Each activity has a mastery, a moving average of its scores, and is
+    due again an interval after its latest practice set. The interval
+    grows with mastery, so weak activities come up often, while the
+    mastered ones come up once they have gone a long time unpracticed.
+    It shrinks with the activity's weight, like random picks favor the
+    heavier activities.
+
+    The activities are kept in a heap ordered by when they are due, so
+    picking the next one and updating it after a practice set each
+    takes O(log n), rather than rescanning the practice history. They're
+    scheduled by their lines in the activity file, with the weights and
+    tags of the activities' line index, so an Activity is only created
+    for the lines of the practiced activities and those picked.
+    """
+
+    def __init__(
+        self,
+        activities: routine.Activities,
+        practices: results.Practices,
+        tags: typing.Optional[typing.Iterable[str]] = None,
+    ):
+        """Creates a Scheduler for the activities.
+
+        Only the activities with any of the tags are scheduled, if
+        given. The history in practices is read once, after that the
+        Scheduler follows the practice sets added to practices.
+
+        Raises:
+            routine.NoTaggedActivitiesError: No activity has any of the
+                tags.
+        """
+        self._activities = activities
+        # Keyed by the line of each activity in the activity file.
+        self._mastery: dict[int, float] = {}
+        self._latest_epoch_micros: dict[int, int] = {}
+        # Also holds the lines of the activities not yet practiced.
+        self._due: dict[int, float] = dict.fromkeys(
+            activities.get_lines(tags), _NEVER_PRACTICED_DUE
+        )
+        # The lines of the activity keys of practice sets, None for keys
+        # of activities not being scheduled.
+        self._key_lines: dict[str, typing.Optional[int]] = {}
+
+        columns = practices.columns
+        key_lines = [self._find_line(x) for x in columns.activity_keys]
+        for key_index, score, epoch_micros in zip(
+            columns.key_indexes, columns.scores, columns.epoch_micros
+        ):
+            line = key_lines[key_index]
+            if line is not None:
+                self._add_score(line, score, epoch_micros)
+        for line in self._mastery:
+            self._due[line] = self._get_due(line)
+
+        # Each heap entry is (due, description position, line), so ties
+        # in when activities are due go to the first described. When an
+        # activity is rescheduled its old entry stays in the heap, and
+        # is dropped once it reaches the top if it no longer matches
+        # _due.
+        self._heap = [self._get_heap_entry(x, y) for x, y in self._due.items()]
+        heapq.heapify(self._heap)
+
+        practices.add_listener(self.add_practice_set)
+
+    def _find_line(self, activity_key: str) -> typing.Optional[int]:
+        """Returns the line of the scheduled Activity for activity_key.
+
+        Returns None if activity_key isn't of a scheduled Activity.
+        """
+        if activity_key not in self._key_lines:
+            line = self._activities.find_line(activity_key)
+            self._key_lines[activity_key] = line if line in self._due else None
+        return self._key_lines[activity_key]
+
+    def _add_score(self, line: int, score: int, epoch_micros: int) -> None:
+        """Updates the mastery and latest practice of the line."""
+        mastery = self._mastery.get(line)
+        self._mastery[line] = (
+            score
+            if mastery is None
+            else mastery + _LATEST_SCORE_WEIGHT * (score - mastery)
+        )
+        self._latest_epoch_micros[line] = max(
+            epoch_micros, self._latest_epoch_micros.get(line, epoch_micros)
+        )
+
+    def _get_due(self, line: int) -> float:
+        """Returns when the line is due, in epoch microseconds."""
+        mastery = self._mastery.get(line)
+        if mastery is None:
+            return _NEVER_PRACTICED_DUE
+        return self._latest_epoch_micros[
+            line
+        ] + _BASE_INTERVAL_MICROS * 2**mastery / self._activities.get_weight_at(line)
+
+    def _get_heap_entry(self, line: int, due: float) -> tuple[float, int, int]:
+        """Returns the heap entry of the line, due when given."""
+        return (due, self._activities.get_description_position_at(line), line)
+
+    def add_practice_set(self, practice_set: results.PracticeSet) -> None:
+        """Reschedules the activity of practice_set.
+
+        This is called for each practice set added to the Practices
+        given to the Scheduler. Practice sets of activities not being
+        scheduled are ignored.
+        """
+        line = self._find_line(practice_set.activity_key)
+        if line is None:
+            return
+
+        epoch_micros, _ = timestamps.to_epoch_micros(practice_set.date_time)
+        self._add_score(line, practice_set.score, epoch_micros)
+        due = self._get_due(line)
+        self._due[line] = due
+        heapq.heappush(self._heap, self._get_heap_entry(line, due))
+
+        if len(self._heap) > _MAX_HEAP_GROWTH * len(self._due):
+            self._heap = [self._get_heap_entry(x, y) for x, y in self._due.items()]
+            heapq.heapify(self._heap)
+
+    def get_next_activity(self) -> routine.Activity:
+        """Returns the Activity that is most overdue for practice."""
+        while True:
+            due, _, line = self._heap[0]
+            if self._due[line] == due:
+                return self._activities.get_activity_at(line)
+            heapq.heappop(self._heap)
+
+    def get_mastery(self, activity: routine.Activity) -> typing.Optional[float]:
+        """Returns the mastery of activity, None if never practiced.
+
+        The mastery is between 0 and the highest score.
+        """
+        line = self._find_line(activity.get_key())
+        return None if line is None else self._mastery.get(line)
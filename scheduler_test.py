@@ -0,0 +1,198 @@
+import datetime
+import pathlib
+
+import pytest
+
+import results
+import routine
+import scheduler
+
+START_TIME = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+@pytest.fixture(name="activities")
+def fixture_activities(tmp_path: pathlib.Path) -> routine.Activities:
+    activity_file = pathlib.Path(tmp_path, "activities.txt")
+    with open(activity_file, "w", encoding="utf-8") as f:
+        f.write("activity_c\nactivity_a\nactivity_b\n")
+    return routine.Activities(activity_file)
+
+
+@pytest.fixture(name="practices")
+def fixture_practices(tmp_path: pathlib.Path) -> results.Practices:
+    return results.Practices(pathlib.Path(tmp_path, "practices.txt"))
+
+
+def get_activity(activities: routine.Activities, description: str) -> routine.Activity:
+    activity = activities.get_activity(description)
+    assert activity is not None
+    return activity
+
+
+def test_never_practiced_first(
+    activities: routine.Activities, practices: results.Practices
+) -> None:
+    practices.add_practice_set(get_activity(activities, "activity_a"), 0, START_TIME)
+
+    activity_scheduler = scheduler.Scheduler(activities, practices)
+    assert activity_scheduler.get_next_activity().get_description() == "activity_b"
+
+
+def test_follows_practices(
+    activities: routine.Activities, practices: results.Practices
+) -> None:
+    activity_scheduler = scheduler.Scheduler(activities, practices)
+
+    picked = []
+    for _ in range(3):
+        activity = activity_scheduler.get_next_activity()
+        picked.append(activity.get_description())
+        practices.add_practice_set(activity, 4, START_TIME)
+
+    assert picked == ["activity_a", "activity_b", "activity_c"]
+
+
+def test_weak_activity_first(
+    activities: routine.Activities, practices: results.Practices
+) -> None:
+    practices.add_practice_set(get_activity(activities, "activity_a"), 4, START_TIME)
+    practices.add_practice_set(get_activity(activities, "activity_b"), 0, START_TIME)
+    practices.add_practice_set(get_activity(activities, "activity_c"), 2, START_TIME)
+
+    activity_scheduler = scheduler.Scheduler(activities, practices)
+    assert activity_scheduler.get_next_activity().get_description() == "activity_b"
+
+    # Once the weak activity improves, the next weakest is due first.
+    practices.add_practice_set(get_activity(activities, "activity_b"), 4, START_TIME)
+    practices.add_practice_set(get_activity(activities, "activity_b"), 4, START_TIME)
+    assert activity_scheduler.get_next_activity().get_description() == "activity_c"
+
+
+def test_stale_activity_first(
+    activities: routine.Activities, practices: results.Practices
+) -> None:
+    stale_time = START_TIME - datetime.timedelta(days=30)
+    practices.add_practice_set(get_activity(activities, "activity_a"), 4, stale_time)
+    practices.add_practice_set(get_activity(activities, "activity_b"), 2, START_TIME)
+    practices.add_practice_set(get_activity(activities, "activity_c"), 2, START_TIME)
+
+    activity_scheduler = scheduler.Scheduler(activities, practices)
+    assert activity_scheduler.get_next_activity().get_description() == "activity_a"
+
+
+def test_mastery(activities: routine.Activities, practices: results.Practices) -> None:
+    activity = get_activity(activities, "activity_a")
+    activity_scheduler = scheduler.Scheduler(activities, practices)
+    assert activity_scheduler.get_mastery(activity) is None
+
+    practices.add_practice_set(activity, 4, START_TIME)
+    assert activity_scheduler.get_mastery(activity) == 4
+
+    practices.add_practice_set(activity, 0, START_TIME)
+    assert activity_scheduler.get_mastery(activity) == 2
+
+
+def test_unknown_activities_ignored(
+    activities: routine.Activities, practices: results.Practices
+) -> None:
+    practices.add_practice_set(routine.Activity("removed_activity"), 0, START_TIME)
+    activity_scheduler = scheduler.Scheduler(activities, practices)
+
+    practices.add_practice_set(routine.Activity("removed_activity"), 0, START_TIME)
+    assert activity_scheduler.get_next_activity().get_description() == "activity_a"
+
+
+def test_many_practice_sets(
+    activities: routine.Activities, practices: results.Practices
+) -> None:
+    activity_scheduler = scheduler.Scheduler(activities, practices)
+
+    # Each activity is picked in turn, as scoring it pushes it back.
+    for i in range(100):
+        activity = activity_scheduler.get_next_activity()
+        assert (
+            activity.get_description()
+            == ["activity_a", "activity_b", "activity_c"][i % 3]
+        )
+        practices.add_practice_set(
+            activity, 2, START_TIME + datetime.timedelta(minutes=i)
+        )
+
+
+def test_heavier_activity_due_sooner(
+    tmp_path: pathlib.Path, practices: results.Practices
+) -> None:
+    activity_file = pathlib.Path(tmp_path, "activities.txt")
+    activity_file.write_text(
+        "activity_a\n[weight=2] activity_b\n[weight=0.5] activity_c\n",
+        encoding="utf-8",
+    )
+    activities = routine.Activities(activity_file)
+    for description in ["activity_a", "activity_b", "activity_c"]:
+        practices.add_practice_set(get_activity(activities, description), 4, START_TIME)
+
+    activity_scheduler = scheduler.Scheduler(activities, practices)
+    assert activity_scheduler.get_next_activity().get_description() == "activity_b"
+
+    # Practiced later, the heavier activity is still due first.
+    practices.add_practice_set(
+        get_activity(activities, "activity_b"),
+        4,
+        START_TIME + datetime.timedelta(days=7),
+    )
+    assert activity_scheduler.get_next_activity().get_description() == "activity_b"
+
+
+def test_only_tagged_activities(
+    tmp_path: pathlib.Path, practices: results.Practices
+) -> None:
+    activity_file = pathlib.Path(tmp_path, "activities.txt")
+    activity_file.write_text(
+        "[tags=piano] activity_b\nactivity_a\n[tags=guitar,piano] activity_c\n",
+        encoding="utf-8",
+    )
+    activities = routine.Activities(activity_file)
+    practices.add_practice_set(get_activity(activities, "activity_a"), 0, START_TIME)
+
+    activity_scheduler = scheduler.Scheduler(activities, practices, ["piano"])
+
+    picked = []
+    for i in range(4):
+        activity = activity_scheduler.get_next_activity()
+        picked.append(activity.get_description())
+        practices.add_practice_set(
+            activity, 4, START_TIME + datetime.timedelta(minutes=i)
+        )
+    assert picked == ["activity_b", "activity_c", "activity_b", "activity_c"]
+
+    with pytest.raises(routine.NoTaggedActivitiesError):
+        scheduler.Scheduler(activities, practices, ["drums"])
+
+
+def test_only_lines_used_read(
+    tmp_path: pathlib.Path,
+    practices: results.Practices,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    activity_file = pathlib.Path(tmp_path, "activities.txt")
+    activity_file.write_text(
+        "".join(f"[id=a{x}] activity_{x:03}\n" for x in range(100)), encoding="utf-8"
+    )
+    practices.add_practice_set(routine.Activity("activity_000", "a0"), 4, START_TIME)
+    routine.Activities(activity_file)
+
+    read_lines: list[str] = []
+    activity_from_line = routine.Activity.from_line
+
+    def read_line(line: str) -> routine.Activity:
+        read_lines.append(line)
+        return activity_from_line(line)
+
+    monkeypatch.setattr(routine.Activity, "from_line", read_line)
+    activity_scheduler = scheduler.Scheduler(
+        routine.Activities(activity_file), practices
+    )
+    assert activity_scheduler.get_next_activity().get_description() == "activity_001"
+
+    # Only the lines of the practiced activity and the one picked.
+    assert read_lines == ["[id=a0] activity_000", "[id=a1] activity_001"]
@@ -1,9 +1,34 @@
 """Module containing various settings constants."""
 
 import pathlib
+import typing
 
 USER_FILES_ROOT = pathlib.Path(__file__, "..", "user_files").resolve()
 
 ACTIVITIES_FILE = pathlib.Path(USER_FILES_ROOT, "my_deliberate_practice_activities.txt")
 
 PRACTICES_FILE = pathlib.Path(USER_FILES_ROOT, "my_deliberate_practice_practices.txt")
+
+# How practice mode picks activities, "Scheduled" or "Random".
+PICKING_STRATEGY = "Scheduled"
+
+# Practice mode only picks the activities with any of these tags, such
+# as ["piano"], None for all of them. This applies to both picking
+# strategies, as do the activities' weights: random picks are in
+# proportion to them, and scheduled activities are due more often.
+PRACTICE_TAGS: typing.Optional[list[str]] = None
+
+# How evaluation mode reports, as "text", "ndjson" or "csv".
+REPORT_FORMAT = "text"
+
+# The metric the report's activities are sorted by, one of
+# "description", "num_practice_sets", "oldest_practice",
+# "latest_practice", "latest_score" or "mean_score".
+REPORT_SORT_BY = "description"
+REPORT_DESCENDING = False
+
+# Only report this many activities, None for all of them.
+REPORT_TOP: typing.Optional[int] = None
+
+# The activities reported per page, None for a single page.
+REPORT_PAGE_SIZE: typing.Optional[int] = None
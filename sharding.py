@@ -0,0 +1,361 @@
+"""Module for storing practices as a directory of monthly shards.
+
+Each month's practice sets are kept in their own journal, with a
+manifest describing every shard. Loading only the months of interest
+skips the other shards entirely, and the shards that are needed are
+loaded in parallel.
+"""
+
+import collections
+import concurrent.futures
+import itertools
+import json
+import os
+import pathlib
+import re
+import time
+import typing
+
+import results
+import timestamps
+
+MANIFEST_FILE_NAME = "manifest.json"
+
+# Changed whenever the layout of the manifest changes.
+_MANIFEST_VERSION = 1
+
+_SHARD_SUFFIX = ".journal"
+
+# The file name of any shard, as written by get_shard_name.
+_SHARD_FILE_PATTERN = re.compile(rf"\d{{4}}-\d{{2}}{re.escape(_SHARD_SUFFIX)}")
+
+
+class ShardInfo:
+    """The manifest entry describing a single shard."""
+
+    def __init__(
+        self,
+        name: str,
+        num_practice_sets: int = 0,
+        first_epoch_micros: typing.Optional[int] = None,
+        last_epoch_micros: typing.Optional[int] = None,
+        activity_keys: typing.Optional[set[str]] = None,
+    ):
+        """Creates a ShardInfo for the shard of the given name.
+
+        The name is the shard's month, as YYYY-MM.
+        """
+        self.name = name
+        self.num_practice_sets = num_practice_sets
+        self.first_epoch_micros = first_epoch_micros
+        self.last_epoch_micros = last_epoch_micros
+        self.activity_keys = set() if activity_keys is None else activity_keys
+
+    def __repr__(self) -> str:
+        return (
+            f"ShardInfo({self.name=}, {self.num_practice_sets=}, "
+            f"{self.first_epoch_micros=}, {self.last_epoch_micros=})"
+        )
+
+    def get_file_name(self) -> str:
+        """Returns the name of the shard's journal file."""
+        return f"{self.name}{_SHARD_SUFFIX}"
+
+    def add(self, activity_key: str, epoch_micros: int) -> None:
+        """Adds a practice set to this ShardInfo."""
+        self.num_practice_sets += 1
+        if self.first_epoch_micros is None or epoch_micros < self.first_epoch_micros:
+            self.first_epoch_micros = epoch_micros
+        if self.last_epoch_micros is None or epoch_micros > self.last_epoch_micros:
+            self.last_epoch_micros = epoch_micros
+        self.activity_keys.add(activity_key)
+
+    def overlaps(self, window: typing.Optional[results.DateWindow]) -> bool:
+        """Returns if any of the shard's practice sets may be in it."""
+        if window is None:
+            return True
+        if self.first_epoch_micros is None or self.last_epoch_micros is None:
+            return False
+        return window.overlaps(self.first_epoch_micros, self.last_epoch_micros)
+
+    def to_dict(self) -> dict[str, typing.Any]:
+        """Returns this ShardInfo as a dict, to be stored as JSON."""
+        return {
+            "num_practice_sets": self.num_practice_sets,
+            "first_epoch_micros": self.first_epoch_micros,
+            "last_epoch_micros": self.last_epoch_micros,
+            "activity_keys": sorted(self.activity_keys),
+        }
+
+    @classmethod
+    def from_dict(cls, name: str, data: dict[str, typing.Any]) -> "ShardInfo":
+        """Creates a ShardInfo from the dict of to_dict."""
+        return cls(
+            name,
+            data["num_practice_sets"],
+            data["first_epoch_micros"],
+            data["last_epoch_micros"],
+            set(data["activity_keys"]),
+        )
+
+
+def get_shard_name(epoch_micros: int) -> str:
+    """Returns the name of the shard for the epoch microseconds."""
+    utc_time = time.gmtime(epoch_micros // 1_000_000)
+    return f"{utc_time.tm_year:04d}-{utc_time.tm_mon:02d}"
+
+
+def read_manifest(practices_dir: pathlib.Path) -> dict[str, ShardInfo]:
+    """Returns the ShardInfos in the manifest of practices_dir, by name.
+
+    A practices_dir without a manifest has no shards yet.
+
+    Raises:
+        InvalidPracticesFileError: The manifest is malformed.
+    """
+    manifest_file = pathlib.Path(practices_dir, MANIFEST_FILE_NAME)
+    try:
+        with open(manifest_file, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        raise results.InvalidPracticesFileError(
+            f"Failed to read the manifest {manifest_file}"
+        ) from e
+
+    try:
+        if manifest["version"] != _MANIFEST_VERSION:
+            raise results.InvalidPracticesFileError(
+                f"Unsupported manifest version {manifest['version']} in "
+                f"{manifest_file}"
+            )
+        return {
+            name: ShardInfo.from_dict(name, data)
+            for name, data in manifest["shards"].items()
+        }
+    except (KeyError, TypeError, ValueError) as e:
+        raise results.InvalidPracticesFileError(
+            f"Malformed manifest {manifest_file}"
+        ) from e
+
+
+def _write_manifest(practices_dir: pathlib.Path, shards: dict[str, ShardInfo]) -> None:
+    """Writes the manifest of practices_dir, replacing any old one."""
+    manifest = {
+        "version": _MANIFEST_VERSION,
+        "shards": {name: shards[name].to_dict() for name in sorted(shards)},
+    }
+    manifest_file = pathlib.Path(practices_dir, MANIFEST_FILE_NAME)
+    temp_file = manifest_file.with_name(f"{MANIFEST_FILE_NAME}.tmp")
+    with open(temp_file, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_file, manifest_file)
+
+
+def _remove_stale_shards(
+    practices_dir: pathlib.Path, shards: dict[str, ShardInfo]
+) -> None:
+    """Deletes the shard files of practices_dir not in shards."""
+    file_names = {x.get_file_name() for x in shards.values()}
+    for shard_file in practices_dir.iterdir():
+        if (
+            _SHARD_FILE_PATTERN.fullmatch(shard_file.name)
+            and shard_file.name not in file_names
+        ):
+            shard_file.unlink(missing_ok=True)
+
+
+def _load_shard(
+    shard_file: pathlib.Path, window: typing.Optional[results.DateWindow]
+) -> results.PracticeSetColumns:
+    """Returns the practice sets in window from shard_file.
+
+    This runs in the worker processes, so it must be importable.
+    """
+    return results.Practices(shard_file, window=window).columns
+
+
+class ShardedPractices(results.Practices):
+    """Practices stored in a directory of monthly shards.
+
+    The practices_file is the directory, holding a journal for each
+    month along with a manifest of each shard's practice set count, time
+    range and activity keys. When loaded with a window, only the shards
+    overlapping it are read, any others are skipped without opening
+    them. New practice sets can be saved even with a window, as they are
+    appended to the journal of their month.
+    """
+
+    def __init__(
+        self,
+        practices_dir: pathlib.Path,
+        window: typing.Optional[results.DateWindow] = None,
+        max_workers: typing.Optional[int] = None,
+    ):
+        """Creates a ShardedPractices from the shards in practices_dir.
+
+        The shards are loaded by a pool of up to max_workers processes,
+        which defaults to the number of CPUs. With a single shard to
+        load, or a max_workers of 1, it's loaded in this process.
+
+        Raises:
+            InvalidPracticesFileError: The manifest or a shard is
+                malformed.
+        """
+        self.max_workers = max_workers
+        self.shards: dict[str, ShardInfo] = {}
+        super().__init__(practices_dir, results.PracticesFileFormat.JOURNAL, window)
+
+    def _load(self) -> None:
+        self.shards = read_manifest(self.practices_file)
+        shard_files = [
+            pathlib.Path(self.practices_file, self.shards[x].get_file_name())
+            for x in sorted(self.shards)
+            if self.shards[x].overlaps(self.window)
+        ]
+
+        if len(shard_files) > 1 and self.max_workers != 1:
+            with concurrent.futures.ProcessPoolExecutor(self.max_workers) as executor:
+                shard_columns = list(
+                    executor.map(
+                        _load_shard, shard_files, itertools.repeat(self.window)
+                    )
+                )
+        else:
+            shard_columns = [_load_shard(x, self.window) for x in shard_files]
+
+        for columns in shard_columns:
+            self.columns.extend(columns)
+
+    def get_loaded_shard_names(self) -> list[str]:
+        """Returns the names of the shards overlapping the window."""
+        return [x for x in sorted(self.shards) if self.shards[x].overlaps(self.window)]
+
+    def save(self) -> None:
+        """Appends the practice sets added since the last save.
+
+        Each practice set is appended to the shard of its month. The
+        manifest is updated first, so it's never missing a practice set
+        even if a crash stops the shards from being written.
+        """
+        num_practice_sets = len(self.columns)
+        new_shard_indexes: dict[str, list[int]] = collections.defaultdict(list)
+        for index in range(self._num_saved_practice_sets, num_practice_sets):
+            epoch_micros = self.columns.epoch_micros[index]
+            shard_name = get_shard_name(epoch_micros)
+            new_shard_indexes[shard_name].append(index)
+            self.shards.setdefault(shard_name, ShardInfo(shard_name)).add(
+                self.columns.activity_keys[self.columns.key_indexes[index]],
+                epoch_micros,
+            )
+
+        self.practices_file.mkdir(parents=True, exist_ok=True)
+        _write_manifest(self.practices_file, self.shards)
+        for shard_name, indexes in new_shard_indexes.items():
+            results.append_to_journal(
+                pathlib.Path(
+                    self.practices_file, self.shards[shard_name].get_file_name()
+                ),
+                (self.columns.get_practice_set(x) for x in indexes),
+            )
+
+        self._num_saved_practice_sets = num_practice_sets
+
+    def save_as(
+        self, practices_file: pathlib.Path, file_format: results.PracticesFileFormat
+    ) -> None:
+        """Saves all the practice sets to a single practices_file.
+
+        Unlike for Practices, future saves still go to the shards.
+
+        Raises:
+            PartialPracticesError: This was loaded with a window.
+        """
+        self._check_not_partial()
+        results.write_practices_file(practices_file, file_format, self.columns)
+
+    def compact(self) -> None:
+        """Rewrites every shard and the manifest from this instance.
+
+        Any other shard files in the directory aren't in the new
+        manifest, so they're deleted once it has replaced the old one.
+        A crash before then leaves them in place, along with the old
+        manifest that may still list them.
+
+        Raises:
+            PartialPracticesError: This was loaded with a window.
+        """
+        self._check_not_partial()
+        num_practice_sets = len(self.columns)
+        shard_columns: dict[str, results.PracticeSetColumns] = collections.defaultdict(
+            results.PracticeSetColumns
+        )
+        self.shards = {}
+        for index in range(num_practice_sets):
+            epoch_micros = self.columns.epoch_micros[index]
+            activity_key = self.columns.activity_keys[self.columns.key_indexes[index]]
+            shard_name = get_shard_name(epoch_micros)
+            shard_columns[shard_name].append(
+                activity_key,
+                self.columns.scores[index],
+                epoch_micros,
+                self.columns.utc_offsets[index],
+            )
+            self.shards.setdefault(shard_name, ShardInfo(shard_name)).add(
+                activity_key, epoch_micros
+            )
+
+        self.practices_file.mkdir(parents=True, exist_ok=True)
+        for shard_name, columns in shard_columns.items():
+            results.write_practices_file(
+                pathlib.Path(
+                    self.practices_file, self.shards[shard_name].get_file_name()
+                ),
+                results.PracticesFileFormat.JOURNAL,
+                columns,
+            )
+        _write_manifest(self.practices_file, self.shards)
+        _remove_stale_shards(self.practices_file, self.shards)
+
+        self._num_saved_practice_sets = num_practice_sets
+
+
+def shard_practices_file(
+    practices_file: pathlib.Path, practices_dir: pathlib.Path
+) -> ShardedPractices:
+    """Splits the practices in practices_file into monthly shards.
+
+    The shards are written to practices_dir, replacing any it already
+    holds.
+    """
+    sharded_practices = ShardedPractices(practices_dir)
+    sharded_practices.columns.extend(results.Practices(practices_file).columns)
+    sharded_practices.compact()
+    return sharded_practices
+
+
+def iter_practice_sets(
+    practices_dir: pathlib.Path, window: typing.Optional[results.DateWindow] = None
+) -> typing.Iterator[results.PracticeSet]:
+    """Yields the PracticeSets in the window, from practices_dir.
+
+    Like results.iter_practice_sets, the practice sets are read lazily,
+    one shard at a time. Shards outside the window aren't read.
+
+    Raises:
+        InvalidPracticesFileError: The manifest or a shard is malformed.
+    """
+    shards = read_manifest(practices_dir)
+    for shard_name in sorted(shards):
+        if not shards[shard_name].overlaps(window):
+            continue
+        for practice_set in results.iter_practice_sets(
+            pathlib.Path(practices_dir, shards[shard_name].get_file_name())
+        ):
+            if window is None or window.contains(
+                timestamps.to_epoch_micros(practice_set.date_time)[0]
+            ):
+                yield practice_set
@@ -0,0 +1,202 @@
+import datetime
+import json
+import pathlib
+
+import pytest
+
+import evaluation
+import results
+import routine
+import sharding
+import timestamps
+
+START_TIME = datetime.datetime(2024, 1, 15, tzinfo=datetime.timezone.utc)
+
+
+def add_practice_sets(practices: results.Practices, num_months: int) -> None:
+    """Adds a practice set every 10 days, for about num_months."""
+    for x in range(num_months * 3):
+        practices.add_practice_set(
+            routine.Activity(f"activity_{x % 2}"),
+            x % 5,
+            START_TIME + datetime.timedelta(days=10 * x),
+        )
+
+
+def get_scores(practices: results.Practices) -> list[int]:
+    return [x.score for x in practices.get_practice_sets()]
+
+
+@pytest.mark.parametrize(
+    ("date_time", "expected_name"),
+    [
+        (datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc), "2024-01"),
+        (
+            datetime.datetime(2023, 12, 31, 23, 59, 59, tzinfo=datetime.timezone.utc),
+            "2023-12",
+        ),
+        (datetime.datetime(1969, 7, 20, tzinfo=datetime.timezone.utc), "1969-07"),
+    ],
+)
+def test_get_shard_name(date_time: datetime.datetime, expected_name: str) -> None:
+    epoch_micros, _ = timestamps.to_epoch_micros(date_time)
+    assert sharding.get_shard_name(epoch_micros) == expected_name
+
+
+class TestShardedPractices:
+    def test_empty(
+        self, tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        practices = sharding.ShardedPractices(pathlib.Path(tmp_path, "practices"))
+        assert practices.get_num_practice_sets() == 0
+        assert "No Practices file found" in capsys.readouterr().out
+
+    @pytest.mark.parametrize("max_workers", [1, 2])
+    def test_save_and_load(self, tmp_path: pathlib.Path, max_workers: int) -> None:
+        practices_dir = pathlib.Path(tmp_path, "practices")
+        practices = sharding.ShardedPractices(practices_dir)
+        add_practice_sets(practices, 3)
+        practices.save()
+
+        assert sorted(x.name for x in practices_dir.iterdir()) == [
+            "2024-01.journal",
+            "2024-02.journal",
+            "2024-03.journal",
+            "2024-04.journal",
+            sharding.MANIFEST_FILE_NAME,
+        ]
+        manifest = sharding.read_manifest(practices_dir)
+        assert manifest["2024-01"].num_practice_sets == 2
+        assert manifest["2024-01"].activity_keys == {
+            routine.Activity("activity_0").get_key(),
+            routine.Activity("activity_1").get_key(),
+        }
+
+        loaded_practices = sharding.ShardedPractices(
+            practices_dir, max_workers=max_workers
+        )
+        assert loaded_practices.get_practice_sets() == practices.get_practice_sets()
+
+    def test_appends(self, tmp_path: pathlib.Path) -> None:
+        practices_dir = pathlib.Path(tmp_path, "practices")
+        practices = sharding.ShardedPractices(practices_dir)
+        add_practice_sets(practices, 1)
+        practices.save()
+        practices.add_practice_set(
+            routine.Activity("activity_0"), 4, START_TIME + datetime.timedelta(days=1)
+        )
+        practices.save()
+
+        manifest = sharding.read_manifest(practices_dir)
+        assert manifest["2024-01"].num_practice_sets == 3
+        assert get_scores(sharding.ShardedPractices(practices_dir)) == [0, 1, 4, 2]
+
+    def test_window_prunes_shards(self, tmp_path: pathlib.Path) -> None:
+        practices_dir = pathlib.Path(tmp_path, "practices")
+        practices = sharding.ShardedPractices(practices_dir)
+        add_practice_sets(practices, 4)
+        practices.save()
+
+        window = results.DateWindow(
+            datetime.datetime(2024, 2, 1, tzinfo=datetime.timezone.utc),
+            datetime.datetime(2024, 3, 1, tzinfo=datetime.timezone.utc),
+        )
+        # Shards outside the window aren't read, even if they're broken.
+        pathlib.Path(practices_dir, "2024-04.journal").write_text("broken")
+
+        windowed_practices = sharding.ShardedPractices(practices_dir, window)
+        assert windowed_practices.get_loaded_shard_names() == ["2024-02"]
+        assert [x.date_time.day for x in windowed_practices.get_practice_sets()] == [
+            4,
+            14,
+            24,
+        ]
+
+        practice_evaluation = evaluation.Evaluation(windowed_practices)
+        assert practice_evaluation.get_num_of_practice_sets() == 3
+
+        assert [
+            x.date_time.day for x in sharding.iter_practice_sets(practices_dir, window)
+        ] == [4, 14, 24]
+
+    def test_window_saves(self, tmp_path: pathlib.Path) -> None:
+        practices_dir = pathlib.Path(tmp_path, "practices")
+        practices = sharding.ShardedPractices(practices_dir)
+        add_practice_sets(practices, 2)
+        practices.save()
+
+        window = results.DateWindow(
+            datetime.datetime(2024, 2, 1, tzinfo=datetime.timezone.utc)
+        )
+        windowed_practices = sharding.ShardedPractices(practices_dir, window)
+        windowed_practices.add_practice_set(
+            routine.Activity("activity_0"), 4, START_TIME
+        )
+        windowed_practices.save()
+        with pytest.raises(results.PartialPracticesError):
+            windowed_practices.compact()
+
+        # The new practice set is appended to its month, outside the
+        # window.
+        all_scores = get_scores(sharding.ShardedPractices(practices_dir))
+        assert all_scores == [0, 1, 4, 2, 3, 4, 0]
+
+    def test_compact(self, tmp_path: pathlib.Path) -> None:
+        practices_dir = pathlib.Path(tmp_path, "practices")
+        practices = sharding.ShardedPractices(practices_dir)
+        add_practice_sets(practices, 2)
+        practices.save()
+        practices.compact()
+
+        loaded_practices = sharding.ShardedPractices(practices_dir)
+        assert loaded_practices.get_practice_sets() == practices.get_practice_sets()
+
+    def test_compact_removes_stale_shards(self, tmp_path: pathlib.Path) -> None:
+        practices_dir = pathlib.Path(tmp_path, "practices")
+        practices = sharding.ShardedPractices(practices_dir)
+        add_practice_sets(practices, 2)
+        practices.save()
+        # Not in the manifest, such as one left by an older compact.
+        stale_file = pathlib.Path(practices_dir, "2023-01.journal")
+        stale_file.write_bytes(b"")
+        other_file = pathlib.Path(practices_dir, "notes.journal")
+        other_file.write_bytes(b"")
+
+        practices.compact()
+
+        assert not stale_file.exists()
+        assert other_file.exists()
+        assert sorted(x.name for x in practices_dir.glob("????-??.journal")) == [
+            x.get_file_name() for x in practices.shards.values()
+        ]
+
+    def test_malformed_manifest(self, tmp_path: pathlib.Path) -> None:
+        practices_dir = pathlib.Path(tmp_path, "practices")
+        practices_dir.mkdir()
+        manifest_file = pathlib.Path(practices_dir, sharding.MANIFEST_FILE_NAME)
+
+        manifest_file.write_text("{", encoding="utf-8")
+        with pytest.raises(results.InvalidPracticesFileError, match="Failed to read"):
+            sharding.ShardedPractices(practices_dir)
+
+        manifest_file.write_text(json.dumps({"version": 1}), encoding="utf-8")
+        with pytest.raises(results.InvalidPracticesFileError, match="Malformed"):
+            sharding.ShardedPractices(practices_dir)
+
+    def test_shard_practices_file(self, tmp_path: pathlib.Path) -> None:
+        practices_file = pathlib.Path(tmp_path, "practices.txt")
+        practices = results.Practices(practices_file)
+        add_practice_sets(practices, 2)
+        practices.save()
+
+        practices_dir = pathlib.Path(tmp_path, "practices")
+        sharding.shard_practices_file(practices_file, practices_dir)
+        loaded_practices = sharding.ShardedPractices(practices_dir)
+        assert loaded_practices.get_practice_sets() == practices.get_practice_sets()
+
+        single_file = pathlib.Path(tmp_path, "single.bin")
+        loaded_practices.save_as(single_file, results.PracticesFileFormat.BINARY)
+        assert (
+            results.Practices(single_file).get_practice_sets()
+            == practices.get_practice_sets()
+        )
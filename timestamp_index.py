@@ -0,0 +1,111 @@
+"""Module of an index for time range queries over practice sets."""
+
+import array
+import bisect
+import typing
+
+
+class _SortedRows:
+    """The indexes of rows, sorted by their epoch microseconds."""
+
+    def __init__(self) -> None:
+        self.epoch_micros = array.array("q")
+        self.rows = array.array("I")
+
+    def add(self, epoch_micros: "array.array[int]", rows: list[int]) -> None:
+        """Adds the rows, which must already be sorted by time.
+
+        Rows newer than all the others, the usual case, are appended.
+        Older ones are inserted in place, which is O(n) each.
+        """
+        if not self.epoch_micros or epoch_micros[rows[0]] >= self.epoch_micros[-1]:
+            self.epoch_micros.extend(epoch_micros[x] for x in rows)
+            self.rows.extend(rows)
+            return
+
+        for row in rows:
+            index = bisect.bisect_right(self.epoch_micros, epoch_micros[row])
+            self.epoch_micros.insert(index, epoch_micros[row])
+            self.rows.insert(index, row)
+
+    def get_rows(
+        self,
+        since_epoch_micros: typing.Optional[int],
+        until_epoch_micros: typing.Optional[int],
+    ) -> "array.array[int]":
+        """Returns the rows from since up to, not including, until."""
+        start = (
+            0
+            if since_epoch_micros is None
+            else bisect.bisect_left(self.epoch_micros, since_epoch_micros)
+        )
+        stop = (
+            len(self.rows)
+            if until_epoch_micros is None
+            else bisect.bisect_left(self.epoch_micros, until_epoch_micros)
+        )
+        return self.rows[start:stop]
+
+
+class TimestampIndex:
+    """An index of practice set rows by time, overall and per activity.
+
+    The rows are the positions in parallel arrays of the practice sets'
+    epoch microseconds and activity key indexes, such as those of a
+    PracticeSetColumns. The rows are kept sorted by time, so the ones in
+    a time range are found by binary search and returned as a slice,
+    rather than checking every practice set.
+
+    Rows appended to the arrays are indexed by the next update.
+    """
+
+    def __init__(
+        self, epoch_micros: "array.array[int]", key_indexes: "array.array[int]"
+    ) -> None:
+        """Creates an empty TimestampIndex of the arrays."""
+        self._epoch_micros = epoch_micros
+        self._key_indexes = key_indexes
+        self._num_indexed_rows = 0
+        self._all_rows = _SortedRows()
+        self._key_rows: dict[int, _SortedRows] = {}
+
+    def update(self, num_rows: int) -> None:
+        """Indexes the rows added since the last update, up to num_rows.
+
+        Rows in time order, the usual case, are added in O(1) each.
+        """
+        if num_rows <= self._num_indexed_rows:
+            return
+
+        new_rows = sorted(
+            range(self._num_indexed_rows, num_rows),
+            key=self._epoch_micros.__getitem__,
+        )
+        self._all_rows.add(self._epoch_micros, new_rows)
+
+        new_key_rows: dict[int, list[int]] = {}
+        for row in new_rows:
+            new_key_rows.setdefault(self._key_indexes[row], []).append(row)
+        for key_index, rows in new_key_rows.items():
+            self._key_rows.setdefault(key_index, _SortedRows()).add(
+                self._epoch_micros, rows
+            )
+
+        self._num_indexed_rows = num_rows
+
+    def get_rows(
+        self,
+        since_epoch_micros: typing.Optional[int] = None,
+        until_epoch_micros: typing.Optional[int] = None,
+        key_index: typing.Optional[int] = None,
+    ) -> "array.array[int]":
+        """Returns the rows from since up to, not including, until.
+
+        Either end can be None to leave it open. The rows are in time
+        order, and only those of key_index if given.
+        """
+        if key_index is None:
+            sorted_rows = self._all_rows
+        else:
+            sorted_rows = self._key_rows.get(key_index, _SortedRows())
+        return sorted_rows.get_rows(since_epoch_micros, until_epoch_micros)
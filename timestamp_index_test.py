@@ -0,0 +1,65 @@
+import array
+import typing
+
+import pytest
+
+import timestamp_index
+
+
+def make_index(
+    epoch_micros: list[int], key_indexes: list[int]
+) -> timestamp_index.TimestampIndex:
+    index = timestamp_index.TimestampIndex(
+        array.array("q", epoch_micros), array.array("I", key_indexes)
+    )
+    index.update(len(epoch_micros))
+    return index
+
+
+@pytest.mark.parametrize(
+    ("since", "until", "key_index", "expected_rows"),
+    [
+        (None, None, None, [0, 1, 2, 3, 4]),
+        (20, None, None, [2, 3, 4]),
+        (None, 30, None, [0, 1, 2]),
+        (15, 40, None, [2, 3]),
+        (20, 20, None, []),
+        (100, None, None, []),
+        (None, None, 0, [0, 2, 4]),
+        (15, None, 1, [3]),
+        (None, None, 2, []),
+    ],
+)
+def test_get_rows(
+    since: typing.Optional[int],
+    until: typing.Optional[int],
+    key_index: typing.Optional[int],
+    expected_rows: list[int],
+) -> None:
+    index = make_index([0, 10, 20, 30, 40], [0, 1, 0, 1, 0])
+    assert list(index.get_rows(since, until, key_index)) == expected_rows
+
+
+def test_out_of_order_rows() -> None:
+    index = make_index([30, 10, 20, 10], [0, 0, 1, 0])
+    assert list(index.get_rows()) == [1, 3, 2, 0]
+    assert list(index.get_rows(key_index=0)) == [1, 3, 0]
+    assert list(index.get_rows(10, 30)) == [1, 3, 2]
+
+
+def test_update() -> None:
+    epoch_micros = array.array("q", [10, 20])
+    key_indexes = array.array("I", [0, 1])
+    index = timestamp_index.TimestampIndex(epoch_micros, key_indexes)
+    index.update(2)
+
+    # Newer rows are appended, older ones inserted in place.
+    epoch_micros.extend([30, 5, 15, 40])
+    key_indexes.extend([0, 1, 0, 1])
+    index.update(5)
+    assert list(index.get_rows()) == [3, 0, 4, 1, 2]
+    assert list(index.get_rows(key_index=1)) == [3, 1]
+
+    index.update(6)
+    assert list(index.get_rows(25)) == [2, 5]
+    assert list(index.get_rows(key_index=1)) == [3, 1, 5]
@@ -0,0 +1,135 @@
+"""Functions converting practice times to and from epoch microseconds.
+
+Practice times are stored as the microseconds since the Unix epoch and
+the UTC offset in seconds, which keeps them compact and quick to compare
+while still round tripping to the exact datetime.
+"""
+
+import datetime
+import functools
+import typing
+
+try:
+    import numpy
+except ImportError:
+    # NumPy is optional, it's only used to speed up parsing.
+    numpy = None  # type: ignore[assignment]
+
+# The UTC offset stored for a naive date_time, which has no offset.
+NAIVE_UTC_OFFSET = -(2**31)
+
+# The lengths of the layouts isoformat writes for an aware datetime,
+# with and without microseconds.
+_FIXED_LAYOUT_LENGTHS = (32, 25)
+
+_UTC_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_NAIVE_EPOCH = datetime.datetime(1970, 1, 1)
+_ONE_MICROSECOND = datetime.timedelta(microseconds=1)
+_ONE_SECOND = datetime.timedelta(seconds=1)
+
+
+def to_epoch_micros(date_time: datetime.datetime) -> tuple[int, int]:
+    """Returns the epoch microseconds and UTC offset of date_time.
+
+    The UTC offset is in seconds, or NAIVE_UTC_OFFSET if date_time is
+    naive.
+    """
+    utc_offset = date_time.utcoffset()
+    if utc_offset is None:
+        return (date_time - _NAIVE_EPOCH) // _ONE_MICROSECOND, NAIVE_UTC_OFFSET
+    return (date_time - _UTC_EPOCH) // _ONE_MICROSECOND, utc_offset // _ONE_SECOND
+
+
+@functools.cache
+def _get_timezone(utc_offset: int) -> datetime.timezone:
+    """Returns the timezone for the UTC offset, in seconds."""
+    return datetime.timezone(utc_offset * _ONE_SECOND)
+
+
+def from_epoch_micros(epoch_micros: int, utc_offset: int) -> datetime.datetime:
+    """Reverses to_epoch_micros."""
+    if utc_offset == NAIVE_UTC_OFFSET:
+        return _NAIVE_EPOCH + epoch_micros * _ONE_MICROSECOND
+    return (_UTC_EPOCH + epoch_micros * _ONE_MICROSECOND).astimezone(
+        _get_timezone(utc_offset)
+    )
+
+
+def _get_fixed_layout_utc_offset(date_time_str: str) -> typing.Optional[int]:
+    """Returns the UTC offset of date_time_str, if in a fixed layout.
+
+    The fixed layouts are the ones isoformat writes for an aware
+    datetime, like "2024-05-02T14:28:42.439597+00:00", with or without
+    the microseconds. The UTC offset is in seconds, None is returned if
+    date_time_str is in any other layout.
+    """
+    if (
+        len(date_time_str) not in _FIXED_LAYOUT_LENGTHS
+        or date_time_str[10] != "T"
+        or date_time_str[-6] not in "+-"
+    ):
+        return None
+    return _parse_utc_offset_suffix(date_time_str[-6:])
+
+
+@functools.cache
+def _parse_utc_offset_suffix(suffix: str) -> typing.Optional[int]:
+    """Returns the seconds of a "+HH:MM" suffix, None if malformed."""
+    hours, minutes = suffix[1:3], suffix[4:]
+    digits = hours + minutes
+    if suffix[3] != ":" or not digits.isascii() or not digits.isdigit():
+        return None
+    utc_offset = int(hours) * 3600 + int(minutes) * 60
+    return -utc_offset if suffix[0] == "-" else utc_offset
+
+
+def parse_epoch_micros(date_time_str: str) -> tuple[int, int]:
+    """Returns the epoch microseconds and UTC offset of date_time_str.
+
+    Raises:
+        ValueError: date_time_str isn't in iso format.
+    """
+    date_time = datetime.datetime.fromisoformat(date_time_str)
+    utc_offset = _get_fixed_layout_utc_offset(date_time_str)
+    if utc_offset is None:
+        return to_epoch_micros(date_time)
+
+    # The timestamp is accurate to far less than a second, so rounding
+    # it without the microseconds gives the exact whole seconds. This
+    # is much quicker than the timedelta math in to_epoch_micros.
+    seconds = round(date_time.timestamp() - date_time.microsecond / 1_000_000)
+    return seconds * 1_000_000 + date_time.microsecond, utc_offset
+
+
+def parse_epoch_micros_batch(date_time_strs: list[str]) -> list[tuple[int, int]]:
+    """Returns the epoch microseconds and UTC offsets of date_time_strs.
+
+    When NumPy is available, the date_time_strs in a fixed layout are
+    all parsed in one vectorized call. Any others, or all of them when
+    NumPy is unavailable, are parsed one at a time.
+
+    Raises:
+        ValueError: A date_time_str isn't in iso format.
+    """
+    if numpy is None:
+        return [parse_epoch_micros(x) for x in date_time_strs]
+
+    utc_offsets = [_get_fixed_layout_utc_offset(x) for x in date_time_strs]
+    fixed_layout_indexes = [i for i, x in enumerate(utc_offsets) if x is not None]
+    try:
+        local_epoch_micros = numpy.array(
+            [date_time_strs[i][:-6] for i in fixed_layout_indexes],
+            dtype="datetime64[us]",
+        ).astype(numpy.int64)
+    except ValueError:
+        # Let the row by row parsing find and report the bad row.
+        return [parse_epoch_micros(x) for x in date_time_strs]
+
+    parsed: list[tuple[int, int]] = [
+        parse_epoch_micros(x) if utc_offset is None else (0, utc_offset)
+        for x, utc_offset in zip(date_time_strs, utc_offsets)
+    ]
+    for i, epoch_micros in zip(fixed_layout_indexes, local_epoch_micros.tolist()):
+        utc_offset = parsed[i][1]
+        parsed[i] = (epoch_micros - utc_offset * 1_000_000, utc_offset)
+    return parsed
@@ -0,0 +1,67 @@
+import datetime
+
+import pytest
+
+import timestamps
+
+
+@pytest.mark.parametrize(
+    "date_time",
+    [
+        datetime.datetime(2024, 5, 2, 14, 28, 42, 439597, datetime.timezone.utc),
+        datetime.datetime(1960, 1, 1, 23, 59, 59, 999999, datetime.timezone.utc),
+        datetime.datetime(
+            2024, 5, 2, 14, 28, tzinfo=datetime.timezone(datetime.timedelta(hours=-7))
+        ),
+        datetime.datetime(2024, 5, 2, 14, 28, 42),
+    ],
+)
+def test_epoch_micros_round_trip(date_time: datetime.datetime) -> None:
+    epoch_micros, utc_offset = timestamps.to_epoch_micros(date_time)
+    round_trip = timestamps.from_epoch_micros(epoch_micros, utc_offset)
+    assert round_trip.isoformat() == date_time.isoformat()
+
+
+def test_naive_utc_offset() -> None:
+    _, utc_offset = timestamps.to_epoch_micros(datetime.datetime(2024, 5, 2))
+    assert utc_offset == timestamps.NAIVE_UTC_OFFSET
+
+
+DATE_TIME_STRS = [
+    "2023-11-05T01:30:00.000001+00:00",
+    "2023-11-05T01:30:00-04:00",
+    "1969-12-31T23:59:59.999999+00:00",
+    "2023-11-05T01:30:00.5+09:45",
+    "2023-11-05T01:30:00",
+    "2023-11-05",
+]
+
+
+@pytest.fixture(name="use_numpy", params=[True, False], ids=["numpy", "no_numpy"])
+def fixture_use_numpy(
+    request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    if request.param:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(timestamps, "numpy", None)
+
+
+@pytest.mark.parametrize("date_time_str", DATE_TIME_STRS)
+def test_parse_epoch_micros(date_time_str: str) -> None:
+    assert timestamps.parse_epoch_micros(date_time_str) == timestamps.to_epoch_micros(
+        datetime.datetime.fromisoformat(date_time_str)
+    )
+
+
+@pytest.mark.usefixtures("use_numpy")
+def test_parse_epoch_micros_batch() -> None:
+    assert timestamps.parse_epoch_micros_batch(DATE_TIME_STRS) == [
+        timestamps.parse_epoch_micros(x) for x in DATE_TIME_STRS
+    ]
+
+
+@pytest.mark.usefixtures("use_numpy")
+def test_parse_epoch_micros_batch_invalid() -> None:
+    with pytest.raises(ValueError):
+        timestamps.parse_epoch_micros_batch(DATE_TIME_STRS + ["2023-13-05T01:30:00"])
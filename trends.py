@@ -0,0 +1,167 @@
+"""Module tracking the trend of an activity's scores over time."""
+
+import typing
+
+# The number of latest scores the moving average and slope are over.
+DEFAULT_WINDOW_SIZE = 10
+
+# How much the latest score counts towards the EWMA, with the rest
+# coming from the scores before it.
+DEFAULT_EWMA_WEIGHT = 0.3
+
+
+def get_ewma(
+    scores: typing.Iterable[int],
+    ewma_weight: float,
+    ewma: typing.Optional[float] = None,
+) -> typing.Optional[float]:
+    """Returns ewma with the scores added in order, None without any.
+
+    The EWMA is updated one score at a time, with the same arithmetic as
+    ScoreTrend.add, so it's exactly the EWMA of a ScoreTrend adding the
+    same scores, not just close to it.
+    """
+    for score in scores:
+        ewma = score if ewma is None else ewma + ewma_weight * (score - ewma)
+    return ewma
+
+
+class ScoreTrend:  # pylint: disable=too-many-instance-attributes
+    """The trend of a series of scores, updated in O(1) per score.
+
+    It tracks the moving average and the least squares slope of the
+    latest window_size scores, and the exponentially weighted moving
+    average (EWMA) of all of them. The slope is the change in score per
+    practice set, so a positive slope is improving.
+
+    The window is kept as running sums, which are updated as a score
+    enters and leaves it, rather than summed again for each score.
+    """
+
+    def __init__(
+        self,
+        window_size: int = DEFAULT_WINDOW_SIZE,
+        ewma_weight: float = DEFAULT_EWMA_WEIGHT,
+    ):
+        """Creates a ScoreTrend without any scores.
+
+        Raises:
+            ValueError: The window_size is below 2, or the ewma_weight
+                isn't between 0 and 1.
+        """
+        if window_size < 2:
+            raise ValueError(f"The window_size {window_size} is below 2")
+        if not 0 < ewma_weight <= 1:
+            raise ValueError(f"The ewma_weight {ewma_weight} isn't in (0, 1]")
+        self.window_size = window_size
+        self.ewma_weight = ewma_weight
+
+        self._num_scores = 0
+        self._ewma: typing.Optional[float] = None
+        # The window as a ring buffer, with the oldest score at
+        # _num_scores % window_size once full.
+        self._window: list[int] = []
+        # The sums over the window of x, x squared, the score and x
+        # times the score, where x is the score's position among all
+        # the scores. They're all ints, so they're exact.
+        self._sum_x = 0
+        self._sum_xx = 0
+        self._sum_y = 0
+        self._sum_xy = 0
+
+    def add(self, score: int) -> None:
+        """Adds the latest score."""
+        # The same arithmetic as get_ewma, inlined as it's per score.
+        if self._ewma is None:
+            self._ewma = score
+        else:
+            self._ewma = self._ewma + self.ewma_weight * (score - self._ewma)
+
+        x = self._num_scores
+        self._num_scores += 1
+        if len(self._window) < self.window_size:
+            self._window.append(score)
+        else:
+            old_x = x - self.window_size
+            old_score = self._window[x % self.window_size]
+            self._window[x % self.window_size] = score
+            self._sum_x -= old_x
+            self._sum_xx -= old_x * old_x
+            self._sum_y -= old_score
+            self._sum_xy -= old_x * old_score
+        self._sum_x += x
+        self._sum_xx += x * x
+        self._sum_y += score
+        self._sum_xy += x * score
+
+    def get_num_scores(self) -> int:
+        """Returns the number of scores added, in the window or not."""
+        return self._num_scores
+
+    def get_moving_average(self) -> typing.Optional[float]:
+        """Returns the mean of the window, None without scores."""
+        if not self._window:
+            return None
+        return self._sum_y / len(self._window)
+
+    def get_ewma(self) -> typing.Optional[float]:
+        """Returns the EWMA of the scores, None without scores."""
+        return self._ewma
+
+    def get_slope(self) -> typing.Optional[float]:
+        """Returns the slope of the window, None under two scores."""
+        n = len(self._window)
+        if n < 2:
+            return None
+        return (n * self._sum_xy - self._sum_x * self._sum_y) / (
+            n * self._sum_xx - self._sum_x * self._sum_x
+        )
+
+    def to_dict(self) -> dict[str, typing.Any]:
+        """Returns this trend as a dict, to store as JSON."""
+        return {
+            "window_size": self.window_size,
+            "ewma_weight": self.ewma_weight,
+            "num_scores": self._num_scores,
+            "ewma": self._ewma,
+            "window": self._get_ordered_window(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, typing.Any]) -> "ScoreTrend":
+        """Creates a ScoreTrend from the dict of to_dict.
+
+        Raises:
+            ValueError: The dict is invalid.
+        """
+        score_trend = cls(int(data["window_size"]), float(data["ewma_weight"]))
+        window = [int(x) for x in data["window"]]
+        num_scores = int(data["num_scores"])
+        if len(window) > score_trend.window_size or len(window) > num_scores:
+            raise ValueError(f"Invalid trend window {window} of {num_scores} scores")
+
+        # Replaying the window gives its sums, then the count and EWMA
+        # are restored to include the scores before it.
+        score_trend._num_scores = num_scores - len(window)
+        for score in window:
+            score_trend.add(score)
+        start = num_scores % score_trend.window_size
+        if len(window) == score_trend.window_size and start:
+            score_trend._window = window[-start:] + window[:-start]
+        score_trend._ewma = None if data["ewma"] is None else float(data["ewma"])
+        return score_trend
+
+    def _get_ordered_window(self) -> list[int]:
+        """Returns the scores of the window, oldest first."""
+        start = self._num_scores % self.window_size
+        if len(self._window) < self.window_size or not start:
+            return list(self._window)
+        return self._window[start:] + self._window[:start]
+
+    def copy(self) -> "ScoreTrend":
+        """Returns a copy of this ScoreTrend, with the same scores."""
+        return ScoreTrend.from_dict(self.to_dict())
+
+    def copy_empty(self) -> "ScoreTrend":
+        """Returns an empty ScoreTrend with the same settings."""
+        return ScoreTrend(self.window_size, self.ewma_weight)
@@ -0,0 +1,80 @@
+import pytest
+
+import trends
+
+
+def add_scores(score_trend: trends.ScoreTrend, scores: list[int]) -> None:
+    for score in scores:
+        score_trend.add(score)
+
+
+@pytest.mark.parametrize(
+    ("scores", "expected_moving_average", "expected_slope"),
+    [
+        ([], None, None),
+        ([3], 3, None),
+        ([1, 3], 2, 2),
+        ([4, 3, 2, 1], 2, -1),
+        ([2, 2, 2, 2, 2], 2, 0),
+        # Only the latest 3 scores are in the window.
+        ([4, 4, 0, 1, 2], 1, 1),
+        ([0, 0, 0, 0, 4, 2, 0], 2, -2),
+    ],
+)
+def test_window(
+    scores: list[int],
+    expected_moving_average: float | None,
+    expected_slope: float | None,
+) -> None:
+    score_trend = trends.ScoreTrend(window_size=3)
+    add_scores(score_trend, scores)
+    assert score_trend.get_moving_average() == expected_moving_average
+    assert score_trend.get_slope() == expected_slope
+
+
+def test_ewma() -> None:
+    score_trend = trends.ScoreTrend(ewma_weight=0.5)
+    assert score_trend.get_ewma() is None
+    add_scores(score_trend, [4, 0, 2, 3])
+    assert score_trend.get_ewma() == 2.5
+
+
+def test_get_ewma() -> None:
+    scores = [4, 0, 2, 3, 1, 1, 4, 0, 3]
+    score_trend = trends.ScoreTrend(ewma_weight=0.3)
+    add_scores(score_trend, scores)
+
+    # Exactly the same, not just close.
+    assert trends.get_ewma(scores, 0.3) == score_trend.get_ewma()
+    assert trends.get_ewma(scores[4:], 0.3, trends.get_ewma(scores[:4], 0.3)) == (
+        score_trend.get_ewma()
+    )
+    assert trends.get_ewma([], 0.3) is None
+
+
+def test_dict_round_trip() -> None:
+    score_trend = trends.ScoreTrend(window_size=4, ewma_weight=0.2)
+    add_scores(score_trend, [0, 1, 4, 2, 3, 3])
+    round_trip = trends.ScoreTrend.from_dict(score_trend.to_dict())
+    assert round_trip.to_dict() == score_trend.to_dict()
+
+    # Both carry on the same from here.
+    add_scores(score_trend, [4, 0])
+    add_scores(round_trip, [4, 0])
+    assert round_trip.get_slope() == score_trend.get_slope()
+    assert round_trip.get_moving_average() == score_trend.get_moving_average()
+    assert round_trip.get_ewma() == score_trend.get_ewma()
+
+
+@pytest.mark.parametrize(("window_size", "ewma_weight"), [(1, 0.5), (3, 0), (3, 1.5)])
+def test_invalid_settings(window_size: int, ewma_weight: float) -> None:
+    with pytest.raises(ValueError):
+        trends.ScoreTrend(window_size, ewma_weight)
+
+
+def test_invalid_dict() -> None:
+    data = trends.ScoreTrend(window_size=2).to_dict()
+    data["window"] = [1, 2, 3]
+    data["num_scores"] = 3
+    with pytest.raises(ValueError):
+        trends.ScoreTrend.from_dict(data)
@@ -87,3 +87,12 @@ def prompt_yes_or_no(fetch_input: FetchInput, user_prompt: str) -> bool:
             print("Unclear input, expecting y/Y/n/N. Please try again.")
             continue
         return result in ("y", "Y")
+
+
+def iter_input_lines(fetch_input: FetchInput) -> typing.Iterator[str]:
+    """Yields each line of input, until there is no more."""
+    while True:
+        try:
+            yield fetch_input()
+        except EOFError:
+            return
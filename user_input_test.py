@@ -88,3 +88,8 @@ class TestPromptUserForYesOrNo:
         mock_input = mocks.MockInput(["5"])
         with pytest.raises(user_input.NoChoiceMadeError):
             user_input.prompt_yes_or_no(mock_input, self.basic_prompt)
+
+
+def test_iter_input_lines() -> None:
+    input_mock = mocks.MockInput(["first", "", "third"])
+    assert list(user_input.iter_input_lines(input_mock)) == ["first", "", "third"]
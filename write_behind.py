@@ -0,0 +1,136 @@
+"""Module for saving Practices in the background."""
+
+import queue
+import signal
+import sys
+import threading
+import types
+import typing
+
+import phase_profiler
+import results
+
+# The most saves that can be waiting for the writer thread. The saves
+# waiting are all done by one write, so this is rarely reached.
+_MAX_PENDING_SAVES = 64
+
+# Put on the queue to stop the writer thread.
+_STOP = object()
+
+
+class WriteBehindError(Exception):
+    """The writer thread failed to save the Practices."""
+
+
+class WriteBehindSaver:
+    """Saves a Practices instance from a background writer thread.
+
+    The caller adds practice sets to the Practices as usual and calls
+    save, which only queues the save. The writer thread batches all the
+    saves waiting into one Practices.save, so a journal gets the new
+    practice sets appended and other formats are rewritten and renamed
+    over the old file. At most the practice sets added since the last
+    write are lost in a crash.
+
+    Use a WriteBehindSaver as a context manager, which flushes the
+    saves waiting on exit, including on a SIGTERM.
+    """
+
+    def __init__(
+        self,
+        practices: results.Practices,
+        max_pending_saves: int = _MAX_PENDING_SAVES,
+    ):
+        """Creates a WriteBehindSaver and starts its writer thread."""
+        self._practices = practices
+        self._queue: queue.Queue[object] = queue.Queue(max_pending_saves)
+        self._error: typing.Optional[Exception] = None
+        self._previous_sigterm_handler: typing.Any = None
+
+        self._thread = threading.Thread(
+            target=self._write, name="practices-writer", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self) -> "WriteBehindSaver":
+        # Turn SIGTERM into SystemExit, so __exit__ runs and flushes.
+        # Signal handlers can only be set from the main thread.
+        if threading.current_thread() is threading.main_thread():
+            self._previous_sigterm_handler = signal.signal(
+                signal.SIGTERM, _exit_on_signal
+            )
+        return self
+
+    def __exit__(
+        self,
+        exc_type: typing.Optional[type[BaseException]],
+        exc_value: typing.Optional[BaseException],
+        traceback: typing.Optional[types.TracebackType],
+    ) -> None:
+        if self._previous_sigterm_handler is not None:
+            signal.signal(signal.SIGTERM, self._previous_sigterm_handler)
+            self._previous_sigterm_handler = None
+        self.close()
+
+    def _write(self) -> None:
+        """Saves the Practices for the saves queued, until stopped."""
+        stopped = False
+        while not stopped:
+            saves = [self._queue.get()]
+            while not self._queue.empty():
+                saves.append(self._queue.get_nowait())
+            stopped = _STOP in saves
+
+            try:
+                if self._error is None:
+                    with phase_profiler.phase("save practices"):
+                        self._practices.save()
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                # Reported to the caller by its next call.
+                self._error = e
+            finally:
+                for _ in saves:
+                    self._queue.task_done()
+
+    def _raise_error(self) -> None:
+        """Raises WriteBehindError if the writer thread failed."""
+        if self._error is not None:
+            raise WriteBehindError(
+                f"Failed to save {self._practices.practices_file}"
+            ) from self._error
+
+    def save(self) -> None:
+        """Queues a save of the Practices.
+
+        This only waits if max_pending_saves saves are already queued.
+
+        Raises:
+            WriteBehindError: An earlier save failed.
+        """
+        self._raise_error()
+        self._queue.put(None)
+
+    def flush(self) -> None:
+        """Waits until all the queued saves are written.
+
+        Raises:
+            WriteBehindError: A save failed.
+        """
+        self._queue.join()
+        self._raise_error()
+
+    def close(self) -> None:
+        """Writes the queued saves, then stops the writer thread.
+
+        Raises:
+            WriteBehindError: A save failed.
+        """
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._raise_error()
+
+
+def _exit_on_signal(signal_number: int, _: typing.Optional[types.FrameType]) -> None:
+    """Exits as if sys.exit was called, so cleanup code runs."""
+    sys.exit(128 + signal_number)
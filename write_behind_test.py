@@ -0,0 +1,103 @@
+import datetime
+import os
+import pathlib
+import signal
+import threading
+
+import pytest
+
+import results
+import routine
+import write_behind
+
+TIME = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+@pytest.mark.parametrize("file_format", list(results.PracticesFileFormat))
+def test_saves_in_background(
+    tmp_path: pathlib.Path, file_format: results.PracticesFileFormat
+) -> None:
+    practices_file = pathlib.Path(tmp_path, "practices")
+    practices = results.Practices(practices_file, file_format)
+    activity = routine.Activity("activity")
+
+    with write_behind.WriteBehindSaver(practices) as saver:
+        for score in range(5):
+            practices.add_practice_set(activity, score, TIME)
+            saver.save()
+
+        saver.flush()
+        assert results.Practices(practices_file).get_num_practice_sets() == 5
+
+        practices.add_practice_set(activity, 1, TIME)
+        saver.save()
+
+    loaded_practice_sets = results.Practices(practices_file).get_practice_sets()
+    assert [x.score for x in loaded_practice_sets] == [0, 1, 2, 3, 4, 1]
+    assert list(tmp_path.iterdir()) == [practices_file]
+
+
+def test_batches_saves(tmp_path: pathlib.Path) -> None:
+    practices_file = pathlib.Path(tmp_path, "practices")
+    practices = results.Practices(practices_file, results.PracticesFileFormat.JOURNAL)
+    activity = routine.Activity("activity")
+
+    num_saves = 0
+    save = practices.save
+    saving = threading.Event()
+    continue_saving = threading.Event()
+
+    def blocking_save() -> None:
+        nonlocal num_saves
+        num_saves += 1
+        saving.set()
+        continue_saving.wait()
+        save()
+
+    practices.save = blocking_save  # type: ignore[method-assign]
+
+    with write_behind.WriteBehindSaver(practices) as saver:
+        practices.add_practice_set(activity, 1, TIME)
+        saver.save()
+        saving.wait()
+
+        # While the first save is being written, these are all queued
+        # and then written together.
+        for _ in range(10):
+            practices.add_practice_set(activity, 2, TIME)
+            saver.save()
+        continue_saving.set()
+
+    assert num_saves == 2
+    assert results.Practices(practices_file).get_num_practice_sets() == 11
+
+
+def test_save_error(tmp_path: pathlib.Path) -> None:
+    # The practices file can't be created in a missing directory.
+    practices_file = pathlib.Path(tmp_path, "missing", "practices")
+    practices = results.Practices(practices_file)
+    practices.add_practice_set(routine.Activity("activity"), 1, TIME)
+
+    saver = write_behind.WriteBehindSaver(practices)
+    saver.save()
+    with pytest.raises(write_behind.WriteBehindError, match="Failed to save"):
+        saver.flush()
+    with pytest.raises(write_behind.WriteBehindError):
+        saver.save()
+    with pytest.raises(write_behind.WriteBehindError):
+        saver.close()
+
+
+def test_flushes_on_sigterm(tmp_path: pathlib.Path) -> None:
+    practices_file = pathlib.Path(tmp_path, "practices")
+    practices = results.Practices(practices_file)
+    previous_handler = signal.getsignal(signal.SIGTERM)
+
+    with pytest.raises(SystemExit):
+        with write_behind.WriteBehindSaver(practices) as saver:
+            practices.add_practice_set(routine.Activity("activity"), 1, TIME)
+            saver.save()
+            os.kill(os.getpid(), signal.SIGTERM)
+
+    assert results.Practices(practices_file).get_num_practice_sets() == 1
+    assert signal.getsignal(signal.SIGTERM) == previous_handler